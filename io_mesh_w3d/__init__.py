@@ -197,6 +197,45 @@ class ImportW3D(bpy.types.Operator, ImportHelper, ReportHelper):
 
     filter_glob: StringProperty(default='*.w3d;*.w3x', options={'HIDDEN'})
 
+    use_mmap: BoolProperty(
+        name='Memory mapped',
+        description='Decode W3D files directly from a memory mapping of the file, recommended for large files',
+        default=False)
+
+    use_numpy: BoolProperty(
+        name='NumPy arrays',
+        description='Decode the vertex data of W3D meshes into NumPy arrays instead of lists of vectors',
+        default=False)
+
+    use_compact: BoolProperty(
+        name='Compact meshes',
+        description='Keep the vertex and face data of W3D meshes in flat typed arrays to reduce the memory usage',
+        default=False)
+
+    use_parallel: BoolProperty(
+        name='Parallel decoding',
+        description='Decode the meshes of W3D files in multiple processes, recommended for containers with many meshes',
+        default=False)
+
+    asset_index: StringProperty(
+        name='Asset index',
+        description='Asset index created with w3dtool.py index, used to find skeletons, meshes and textures '
+                    'outside the directory of the imported file',
+        subtype='FILE_PATH',
+        default='')
+
+    texture_paths: StringProperty(
+        name='Texture search paths',
+        description='Semicolon separated directories which are searched for textures after the directory of the '
+                    'imported file, e.g. the texture directories of the mod and of the game',
+        default='')
+
+    mesh_names: StringProperty(
+        name='Mesh names',
+        description='Comma separated names or identifiers of the meshes and sub objects to import, '
+                    'everything is imported if empty',
+        default='')
+
     def execute(self, context):
         print_version(self.info)
         if self.filepath.lower().endswith('.w3d'):
@@ -0,0 +1,292 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# persistent sqlite index of the assets and dependencies of art trees: containers and
+# animations -> hierarchies, containers -> sub objects, meshes -> textures and w3x includes.
+# the search paths are scanned once and afterwards only files with a changed mtime or size
+# are scanned again. assets of later search paths (mods) win over earlier ones (base game).
+
+import os
+import sqlite3
+import time
+from urllib.request import pathname2url
+
+from io_mesh_w3d.batch_convert import EXTENSIONS, find_files, include_path
+from io_mesh_w3d.reference_validator import (FileReferences, TEXTURE_EXTENSIONS, ValidationReport, check_references,
+                                             name_key, scan_files, texture_key)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    root TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT);
+CREATE TABLE IF NOT EXISTS assets (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    pivots INTEGER,
+    skinned INTEGER,
+    max_bone INTEGER);
+CREATE INDEX IF NOT EXISTS assets_by_key ON assets(kind, key);
+CREATE TABLE IF NOT EXISTS dependencies (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    subject_kind TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    key TEXT NOT NULL,
+    bone_index INTEGER);
+CREATE INDEX IF NOT EXISTS dependencies_by_key ON dependencies(kind, key);
+'''
+
+# asset kinds a dependency can be resolved to
+DEPENDENCY_TARGETS = {
+    'hierarchy': ['hierarchy'],
+    'sub_object': ['mesh', 'collision_box'],
+    'texture': ['image', 'texture'],
+    'texture_file': ['image'],
+    'include': []}
+
+
+def asset_key(kind, name):
+    return texture_key(name) if kind == 'image' else name_key(name)
+
+
+def is_model(path):
+    return os.path.splitext(path)[1].lower() in EXTENSIONS
+
+
+class IndexReport:
+    def __init__(self, files=0, scanned=0, removed=0, seconds=0.0):
+        self.files = files
+        self.scanned = scanned
+        self.removed = removed
+        self.seconds = seconds
+
+    def format(self):
+        return f'indexed {self.files} files in {self.seconds:.2f} s ({self.scanned} scanned, {self.removed} removed)'
+
+
+class AssetIndex:
+    def __init__(self, path=':memory:', read_only=False):
+        # read only indices are only used for lookups, the schema is neither created nor updated
+        self.path = path
+        if read_only:
+            self.connection = sqlite3.connect('file:' + pathname2url(os.path.abspath(path)) + '?mode=ro', uri=True)
+            return
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, search_paths, max_workers=None):
+        start = time.perf_counter()
+        indexed = {path: (id, mtime, size) for (id, path, mtime, size) in
+                   self.connection.execute('SELECT id, path, mtime, size FROM files')}
+
+        found = {}
+        for (priority, root) in enumerate(os.path.abspath(path) for path in search_paths):
+            for path in find_files([root], EXTENSIONS + TEXTURE_EXTENSIONS):
+                found[os.path.abspath(path)] = (root, priority)
+
+        unchanged = []
+        changed = []
+        for (path, (root, priority)) in found.items():
+            stat = os.stat(path)
+            row = indexed.get(path)
+            if row is not None and row[1] == stat.st_mtime and row[2] == stat.st_size:
+                unchanged.append((root, priority, row[0]))
+            else:
+                changed.append((path, root, priority, stat))
+        removed = [path for path in indexed if path not in found]
+
+        # scanned before the transaction, the worker processes must not inherit it
+        models = [path for (path, _, _, _) in changed if is_model(path)]
+        scans = dict(zip(models, scan_files(models, max_workers)))
+
+        with self.connection:
+            self.connection.executemany('UPDATE files SET root = ?, priority = ? WHERE id = ?', unchanged)
+            self.connection.executemany('DELETE FROM files WHERE path = ?',
+                                        [(path,) for path in removed] + [(path,) for (path, _, _, _) in changed])
+            for (path, root, priority, stat) in changed:
+                scan = scans.get(path)
+                cursor = self.connection.execute(
+                    'INSERT INTO files (path, root, priority, mtime, size, error) VALUES (?, ?, ?, ?, ?, ?)',
+                    (path, root, priority, stat.st_mtime, stat.st_size, scan.error if scan is not None else None))
+                if scan is None:
+                    self.connection.execute('INSERT INTO assets (file_id, kind, name, key) VALUES (?, ?, ?, ?)',
+                                            (cursor.lastrowid, 'image', os.path.basename(path),
+                                             asset_key('image', path)))
+                else:
+                    self.store(cursor.lastrowid, scan)
+
+        return IndexReport(len(found), len(changed), len(removed), time.perf_counter() - start)
+
+    def store(self, file_id, scan):
+        assets = []
+        dependencies = []
+
+        def asset(kind, name, pivots=None, skinned=None, max_bone=None):
+            assets.append((file_id, kind, name, asset_key(kind, name), pivots, skinned, max_bone))
+
+        def dependency(subject_kind, subject, kind, name, bone_index=None):
+            dependencies.append((file_id, subject_kind, subject, kind, name, name_key(name), bone_index))
+
+        for (name, pivot_count) in scan.hierarchies:
+            asset('hierarchy', name, pivots=pivot_count)
+        for (name, hierarchy_name, sub_objects) in scan.containers:
+            asset('container', name)
+            dependency('container', name, 'hierarchy', hierarchy_name)
+            for (identifier, bone_index) in sub_objects:
+                dependency('container', name, 'sub_object', identifier, bone_index)
+        for (identifier, is_skin, max_bone, textures) in scan.meshes:
+            asset('mesh', identifier, skinned=int(is_skin), max_bone=max_bone)
+            for texture in textures:
+                dependency('mesh', identifier, 'texture', texture)
+        for name in scan.collision_boxes:
+            asset('collision_box', name)
+        for (name, hierarchy_name) in scan.animations:
+            asset('animation', name)
+            dependency('animation', name, 'hierarchy', hierarchy_name)
+        for (id, file) in scan.textures:
+            asset('texture', id)
+            dependency('texture', id, 'texture_file', file or '')
+        for source in scan.includes:
+            dependency('file', '', 'include', source)
+
+        self.connection.executemany('INSERT INTO assets VALUES (?, ?, ?, ?, ?, ?, ?)', assets)
+        self.connection.executemany('INSERT INTO dependencies VALUES (?, ?, ?, ?, ?, ?, ?)', dependencies)
+
+    def find(self, kind, name, extension=None):
+        # path of the file defining the asset, files of later search paths are preferred
+        query = 'SELECT files.path FROM assets JOIN files ON files.id = assets.file_id ' \
+                'WHERE assets.kind = ? AND assets.key = ?'
+        parameters = [kind, asset_key(kind, name)]
+        if extension is not None:
+            query += ' AND lower(files.path) LIKE ?'
+            parameters.append('%' + extension.lower())
+        row = self.connection.execute(query + ' ORDER BY files.priority DESC, files.path LIMIT 1',
+                                      parameters).fetchone()
+        return row[0] if row is not None else None
+
+    def dependencies(self, path):
+        # (subject, kind, name, resolved path or None) for each dependency of a file
+        result = []
+        for (subject, kind, name) in self.connection.execute(
+                'SELECT subject, kind, dependencies.name FROM dependencies JOIN files ON files.id = file_id '
+                'WHERE files.path = ? ORDER BY dependencies.rowid', (os.path.abspath(path),)):
+            if kind == 'include':
+                included = include_path(path, name)
+                resolved = os.path.abspath(included) if os.path.exists(included) else None
+            else:
+                resolved = next((found for found in (self.find(target, name) for target in DEPENDENCY_TARGETS[kind])
+                                 if found is not None), None)
+            result.append((subject, kind, name, resolved))
+        return result
+
+    def dependents(self, kind, name):
+        # (path, subject) of the files depending on an asset, e.g. all users of a hierarchy
+        return list(self.connection.execute(
+            'SELECT files.path, subject FROM dependencies JOIN files ON files.id = file_id '
+            'WHERE kind = ? AND key = ? ORDER BY files.path, dependencies.rowid', (kind, name_key(name))))
+
+    def paths(self):
+        return [row[0] for row in self.connection.execute('SELECT path FROM files ORDER BY path')]
+
+    def file_references(self):
+        # the indexed references in the form of the scans of the reference validator
+        result = {}
+        for (file_id, path, error) in self.connection.execute('SELECT id, path, error FROM files ORDER BY path'):
+            if is_model(path):
+                result[file_id] = FileReferences(path)
+                result[file_id].error = error
+
+        subjects = {}
+        for (file_id, kind, name, pivots, skinned, max_bone) in self.connection.execute(
+                'SELECT file_id, kind, name, pivots, skinned, max_bone FROM assets ORDER BY rowid'):
+            scan = result.get(file_id)
+            if scan is None:
+                continue
+            if kind == 'hierarchy':
+                scan.hierarchies.append((name, pivots))
+            elif kind == 'container':
+                subjects[(file_id, kind, name)] = [name, '', []]
+                scan.containers.append(subjects[(file_id, kind, name)])
+            elif kind == 'mesh':
+                subjects[(file_id, kind, name)] = [name, bool(skinned), max_bone, []]
+                scan.meshes.append(subjects[(file_id, kind, name)])
+            elif kind == 'collision_box':
+                scan.collision_boxes.append(name)
+            elif kind == 'animation':
+                subjects[(file_id, kind, name)] = [name, '']
+                scan.animations.append(subjects[(file_id, kind, name)])
+            elif kind == 'texture':
+                subjects[(file_id, kind, name)] = [name, '']
+                scan.textures.append(subjects[(file_id, kind, name)])
+
+        for (file_id, subject_kind, subject, kind, name, bone_index) in self.connection.execute(
+                'SELECT file_id, subject_kind, subject, kind, name, bone_index FROM dependencies ORDER BY rowid'):
+            if kind == 'include':
+                result[file_id].includes.append(name)
+                continue
+            entry = subjects.get((file_id, subject_kind, subject))
+            if entry is None:
+                continue
+            if kind == 'sub_object':
+                entry[2].append((name, bone_index))
+            elif kind == 'texture':
+                entry[3].append(name)
+            else:
+                entry[1] = name
+
+        scans = list(result.values())
+        for scan in scans:
+            scan.containers = [tuple(entry) for entry in scan.containers]
+            scan.meshes = [tuple(entry) for entry in scan.meshes]
+            scan.animations = [tuple(entry) for entry in scan.animations]
+            scan.textures = [tuple(entry) for entry in scan.textures]
+        return scans
+
+
+def open_asset_index(context):
+    # the asset index configured in the import settings, opened once for all lookups of an import
+    path = getattr(context, 'asset_index', '')
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        return AssetIndex(path, read_only=True)
+    except sqlite3.Error as e:
+        context.warning(f'failed to open asset index {path}: {e}')
+        return None
+
+
+def find_indexed_asset(context, kind, name, extension=None):
+    # lookup in the asset index opened for the import, None without an index
+    index = getattr(context, 'asset_database', None)
+    if index is None:
+        return None
+    try:
+        return index.find(kind, name, extension)
+    except sqlite3.Error:
+        return None
+
+
+def validate_indexed(index_path, paths, max_workers=None):
+    # like validate, but the files are scanned into the index and only changed files are scanned again
+    start = time.perf_counter()
+    index = AssetIndex(index_path)
+    index.update(paths, max_workers)
+    scans = index.file_references()
+    files = index.paths()
+    index.close()
+
+    texture_files = [path for path in files if not is_model(path)]
+    problems = check_references(scans, texture_files, {path.lower() for path in files})
+    return ValidationReport(len(scans), problems, time.perf_counter() - start)
@@ -0,0 +1,367 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# headless loading of w3d and w3x files and batch conversion between both formats
+
+import os
+import time
+
+from io_mesh_w3d.common.structs.animation import Animation, W3D_CHUNK_ANIMATION
+from io_mesh_w3d.common.structs.collision_box import CollisionBox, W3D_CHUNK_BOX
+from io_mesh_w3d.common.structs.data_context import DataContext
+from io_mesh_w3d.common.structs.hierarchy import Hierarchy, W3D_CHUNK_HIERARCHY
+from io_mesh_w3d.common.structs.hlod import HLod, W3D_CHUNK_HLOD
+from io_mesh_w3d.common.structs.mesh import Mesh, W3D_CHUNK_MESH
+from io_mesh_w3d.common.structs.mesh_structs.shader_material import (FLOAT_PROPERTY, STRING_PROPERTY, ShaderMaterial,
+                                                                     ShaderMaterialHeader, ShaderMaterialProperty,
+                                                                     VEC4_PROPERTY)
+from io_mesh_w3d.common.structs.mesh_structs.texture import Texture
+from io_mesh_w3d.common.structs.mesh_structs.triangle import surface_types
+from io_mesh_w3d.common.utils.search_path import SearchPath
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.chunk_index import ChunkIndex
+from io_mesh_w3d.w3d.io_binary import BinaryWriter
+from io_mesh_w3d.w3d.parallel import MessageLog, create_executor
+from io_mesh_w3d.w3d.structs.compressed_animation import W3D_CHUNK_COMPRESSED_ANIMATION
+from io_mesh_w3d.w3d.structs.dazzle import W3D_CHUNK_DAZZLE
+from io_mesh_w3d.w3x.io_xml import create_node, create_root, find_root, write
+from io_mesh_w3d.w3x.structs.include import Include
+
+EXTENSIONS = ['.w3d', '.w3x']
+
+
+def find_files(paths, extensions=None):
+    extensions = extensions if extensions is not None else EXTENSIONS
+    result = []
+    for path in paths:
+        if not os.path.isdir(path):
+            result.append(path)
+            continue
+        for (directory, _, filenames) in sorted(os.walk(path)):
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in extensions:
+                    result.append(os.path.join(directory, filename))
+    return result
+
+
+def is_w3x(path):
+    return path.lower().endswith('.w3x')
+
+
+##########################################################################
+# Loading
+##########################################################################
+
+
+W3D_TARGETS = {
+    W3D_CHUNK_MESH: 'meshes',
+    W3D_CHUNK_HIERARCHY: 'hierarchy',
+    W3D_CHUNK_HLOD: 'hlod',
+    W3D_CHUNK_ANIMATION: 'animation',
+    W3D_CHUNK_COMPRESSED_ANIMATION: 'compressed_animation',
+    W3D_CHUNK_BOX: 'collision_boxes',
+    W3D_CHUNK_DAZZLE: 'dazzles'}
+
+W3X_TARGETS = {
+    'W3DMesh': ('meshes', Mesh.parse),
+    'W3DHierarchy': ('hierarchy', Hierarchy.parse),
+    'W3DContainer': ('hlod', HLod.parse),
+    'W3DAnimation': ('animation', Animation.parse),
+    'W3DCollisionBox': ('collision_boxes', CollisionBox.parse),
+    'Texture': ('textures', lambda context, node: Texture.parse(node))}
+
+
+def store(data_context, name, value):
+    target = getattr(data_context, name)
+    if isinstance(target, list):
+        target.append(value)
+    else:
+        setattr(data_context, name, value)
+
+
+def load_w3d(context, path):
+    data_context = DataContext()
+    index = ChunkIndex.from_file(path)
+    for entry in index:
+        if entry.chunk_type not in W3D_TARGETS:
+            context.info(f'-> skipping chunk {hex(entry.chunk_type)}')
+            continue
+        store(data_context, W3D_TARGETS[entry.chunk_type], index.decode(context, entry))
+    index.close()
+    return data_context, []
+
+
+def include_path(path, source):
+    # includes are matched case insensitively, e.g. ART:TestHiera_SKL.w3x refers to testhiera_skl.w3x
+    directory = os.path.dirname(path)
+    name = source[4:] if source.upper().startswith('ART:') else source
+    found = SearchPath([directory]).find([name])
+    return found if found is not None else os.path.join(directory, name)
+
+
+def load_w3x(context, path, resolve_includes=False, visited=None):
+    # with resolve_includes the meshes and collision boxes of included w3x files are merged
+    # into the result, hierarchies and animations are referenced by name and stay in their files
+    data_context = DataContext()
+    includes = []
+    root = find_root(context, path)
+    if root is None:
+        return data_context, includes
+
+    visited = visited if visited is not None else {os.path.abspath(path)}
+    for node in root:
+        if node.tag == 'Includes':
+            includes.extend(Include.parse(xml_include).source for xml_include in node)
+        elif node.tag in W3X_TARGETS:
+            (name, parse_func) = W3X_TARGETS[node.tag]
+            store(data_context, name, parse_func(context, node))
+        else:
+            context.warning(f'unsupported node {node.tag} in file: {path}')
+
+    if not resolve_includes:
+        return data_context, includes
+
+    for source in includes:
+        included = include_path(path, source)
+        if not is_w3x(included) or os.path.abspath(included) in visited:
+            continue
+        if not os.path.isfile(included):
+            context.warning(f'included file not found: {included}')
+            continue
+
+        visited.add(os.path.abspath(included))
+        (include_context, _) = load_w3x(context, included, True, visited)
+        data_context.meshes.extend(include_context.meshes)
+        data_context.collision_boxes.extend(include_context.collision_boxes)
+    return data_context, includes
+
+
+def load_file(context, path, resolve_includes=False):
+    if is_w3x(path):
+        context.file_format = 'W3X'
+        return load_w3x(context, path, resolve_includes)
+    context.file_format = 'W3D'
+    return load_w3d(context, path)
+
+
+##########################################################################
+# Saving
+##########################################################################
+
+
+def save_w3d(context, data_context, path):
+    file = BinaryWriter()
+    if data_context.hierarchy is not None:
+        # the pivot count is not part of w3x hierarchies
+        data_context.hierarchy.header.num_pivots = len(data_context.hierarchy.pivots)
+        data_context.hierarchy.write(file)
+
+    for box in data_context.collision_boxes:
+        box.write(file)
+
+    for dazzle in data_context.dazzles:
+        dazzle.write(file)
+
+    for mesh in data_context.meshes:
+        mesh.write(file)
+
+    if data_context.hlod is not None:
+        data_context.hlod.write(file)
+
+    if data_context.animation is not None:
+        data_context.animation.write(file)
+
+    if data_context.compressed_animation is not None:
+        data_context.compressed_animation.write(file)
+
+    if data_context.textures:
+        context.info(f'-> texture declarations can not be stored in w3d: {path}')
+    file.save(path)
+
+
+DEFAULT_W3D = 'DefaultW3D.fx'
+DEFAULT_SURFACE_TYPE = surface_types.index('Default')
+
+
+def color_vector(color):
+    return vecmath.Vector(color.to_vector_rgb() + (1.0,))
+
+
+def shader_material_from_vertex_material(vert_mat, texture):
+    # the same properties the exporter writes for the blender materials of imported vertex materials
+    info = vert_mat.vm_info
+    properties = [
+        ShaderMaterialProperty(FLOAT_PROPERTY, 'SpecularExponent', info.shininess),
+        ShaderMaterialProperty(VEC4_PROPERTY, 'DiffuseColor', color_vector(info.diffuse)),
+        ShaderMaterialProperty(VEC4_PROPERTY, 'SpecularColor', color_vector(info.specular)),
+        ShaderMaterialProperty(VEC4_PROPERTY, 'AmbientColor', vecmath.Vector(info.ambient.to_vector_rgba())),
+        ShaderMaterialProperty(VEC4_PROPERTY, 'EmissiveColor', color_vector(info.emissive))]
+    if texture is not None:
+        properties.append(ShaderMaterialProperty(STRING_PROPERTY, 'DiffuseTexture', texture.file))
+    if info.opacity != 1.0:
+        properties.append(ShaderMaterialProperty(FLOAT_PROPERTY, 'Opacity', info.opacity))
+    return ShaderMaterial(header=ShaderMaterialHeader(type_name=DEFAULT_W3D), properties=properties)
+
+
+def convert_vertex_materials(context, mesh):
+    # w3x meshes only have shader materials, so the vertex materials and the first texture
+    # of each material pass are converted like the w3x exporter does
+    if mesh.shader_materials or not mesh.vert_materials:
+        return
+
+    for mat_pass in mesh.material_passes:
+        vm_index = mat_pass.vertex_material_ids[0] if mat_pass.vertex_material_ids else 0
+        vert_mat = mesh.vert_materials[min(vm_index, len(mesh.vert_materials) - 1)]
+
+        texture = None
+        if mat_pass.tx_stages and mesh.textures:
+            stage = mat_pass.tx_stages[0]
+            tx_index = stage.tx_ids[0][0] if stage.tx_ids and len(stage.tx_ids[0]) else 0
+            texture = mesh.textures[min(tx_index, len(mesh.textures) - 1)]
+            if not mat_pass.tx_coords and stage.tx_coords:
+                mat_pass.tx_coords = stage.tx_coords[0]
+
+        mat_pass.shader_material_ids = [len(mesh.shader_materials)]
+        mesh.shader_materials.append(shader_material_from_vertex_material(vert_mat, texture))
+
+    if len(mesh.material_passes) > 1:
+        context.warning(f'only the texture coordinates of the first material pass of mesh '
+                        f'\'{mesh.identifier()}\' are supported in W3X file format!')
+
+
+def save_w3x(context, data_context, path):
+    # skeletons which are not part of the file are included by name like the exporter does
+    root = create_root()
+    includes = create_node(root, 'Includes')
+
+    hierarchy_name = ''
+    if data_context.hlod is not None:
+        hierarchy_name = data_context.hlod.hierarchy_name()
+    elif data_context.animation is not None:
+        hierarchy_name = data_context.animation.header.hierarchy_name
+
+    if data_context.hierarchy is None and hierarchy_name:
+        Include(type='all', source='ART:' + hierarchy_name + '.w3x').create(includes)
+
+    if data_context.hierarchy is not None:
+        data_context.hierarchy.create(root)
+
+    for box in data_context.collision_boxes:
+        box.create(root)
+
+    for mesh in data_context.meshes:
+        if any(triangle.surface_type != DEFAULT_SURFACE_TYPE for triangle in mesh.triangles):
+            context.warning(f'triangle surface types of mesh \'{mesh.identifier()}\' '
+                            f'are not supported in W3X file format!')
+        convert_vertex_materials(context, mesh)
+        mesh.create(root)
+
+    if data_context.hlod is not None:
+        data_context.hlod.create(root)
+
+    if data_context.animation is not None:
+        data_context.animation.create(root)
+
+    if data_context.compressed_animation is not None:
+        context.warning(f'compressed animations can not be stored in w3x, skipping it: {path}')
+
+    if data_context.dazzles:
+        context.warning(f'dazzles can not be stored in w3x, skipping them: {path}')
+    write(root, path)
+
+
+def save_file(context, data_context, path):
+    if is_w3x(path):
+        save_w3x(context, data_context, path)
+    else:
+        save_w3d(context, data_context, path)
+
+
+##########################################################################
+# Batch conversion
+##########################################################################
+
+
+def target_extension(target_format):
+    return '.w3x' if target_format == 'W3X' else '.w3d'
+
+
+def find_conversions(source, target, target_format):
+    # (source path, target path) pairs, the directory structure of source is mirrored in target
+    source_extension = '.w3d' if target_format == 'W3X' else '.w3x'
+    result = []
+    for path in find_files([source], [source_extension]):
+        relative = os.path.relpath(path, source) if os.path.isdir(source) else os.path.basename(path)
+        result.append((path, os.path.join(target, os.path.splitext(relative)[0] + target_extension(target_format))))
+    return result
+
+
+def convert_file(source, target):
+    # runs in the worker processes, the messages are returned instead of being reported
+    log = MessageLog()
+    try:
+        (data_context, _) = load_file(log, source, resolve_includes=True)
+        directory = os.path.dirname(target)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        save_file(log, data_context, target)
+    except Exception as e:
+        log.error(f'failed to convert {source}: {e}')
+    return log.messages
+
+
+class ConversionReport:
+    def __init__(self, converted=0, failed=None, seconds=0.0, action='converted'):
+        self.converted = converted
+        self.failed = failed if failed is not None else []
+        self.seconds = seconds
+        self.action = action
+
+    def files_per_second(self):
+        if self.seconds <= 0.0:
+            return 0.0
+        return (self.converted + len(self.failed)) / self.seconds
+
+    def format(self):
+        return f'{self.action} {self.converted} files in {self.seconds:.2f} s ' \
+            f'({self.files_per_second():.1f} files/s), {len(self.failed)} failed'
+
+
+def convert_files(context, conversions, max_workers=None, convert_func=convert_file, action='converted'):
+    # conversions run in a process pool, with max_workers of 1 or if the pool is not
+    # available the files are converted in this process. convert_func is called with
+    # the source and target path and returns the messages like convert_file
+    start = time.perf_counter()
+    executor = None
+    futures = []
+    if max_workers != 1 and len(conversions) > 1:
+        try:
+            executor = create_executor(max_workers)
+            futures = [executor.submit(convert_func, source, target) for (source, target) in conversions]
+        except (OSError, RuntimeError, ValueError):
+            executor = None
+            futures = []
+
+    report = ConversionReport(action=action)
+    for (index, (source, target)) in enumerate(conversions):
+        messages = None
+        if futures:
+            try:
+                messages = futures[index].result()
+            except Exception:
+                messages = None
+        if messages is None:
+            messages = convert_func(source, target)
+
+        for (level, msg) in messages:
+            getattr(context, level)(msg)
+
+        if any(level == 'error' for (level, _) in messages):
+            report.failed.append(source)
+        else:
+            report.converted += 1
+
+    if executor is not None:
+        executor.shutdown()
+    report.seconds = time.perf_counter() - start
+    return report
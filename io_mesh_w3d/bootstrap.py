@@ -0,0 +1,14 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import os
+import sys
+import types
+
+# the package __init__ registers the blender operators and imports bpy, so outside of blender
+# and in spawned worker processes the package is registered without running it.
+# this file is run by its path, importing it would run the package __init__
+if 'io_mesh_w3d' not in sys.modules:
+    package = types.ModuleType('io_mesh_w3d')
+    package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules['io_mesh_w3d'] = package
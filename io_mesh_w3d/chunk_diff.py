@@ -0,0 +1,298 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# structural diff of two w3d files. the top level chunks are paired by type and name,
+# byte identical chunks are skipped by their hash and only the others are decoded and
+# compared field by field.
+
+import hashlib
+from array import array
+
+from io_mesh_w3d.common.structs.animation import W3D_CHUNK_ANIMATION
+from io_mesh_w3d.common.structs.collision_box import W3D_CHUNK_BOX
+from io_mesh_w3d.common.structs.hierarchy import W3D_CHUNK_HIERARCHY
+from io_mesh_w3d.common.structs.hlod import W3D_CHUNK_HLOD
+from io_mesh_w3d.common.structs.mesh import W3D_CHUNK_MESH
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.chunk_index import ChunkIndex
+from io_mesh_w3d.w3d.io_binary import HEAD
+from io_mesh_w3d.w3d.structs.compressed_animation import W3D_CHUNK_COMPRESSED_ANIMATION
+from io_mesh_w3d.w3d.structs.dazzle import W3D_CHUNK_DAZZLE
+
+DEFAULT_TOLERANCE = 1e-5
+
+# element differences of a list which are printed one by one, more are summarized
+MAX_LISTED = 5
+
+STRUCT_NAMES = {
+    W3D_CHUNK_MESH: 'Mesh',
+    W3D_CHUNK_HIERARCHY: 'Hierarchy',
+    W3D_CHUNK_HLOD: 'HLod',
+    W3D_CHUNK_ANIMATION: 'Animation',
+    W3D_CHUNK_COMPRESSED_ANIMATION: 'CompressedAnimation',
+    W3D_CHUNK_BOX: 'CollisionBox',
+    W3D_CHUNK_DAZZLE: 'Dazzle'}
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return f'{value:g}'
+    if isinstance(value, vecmath.Matrix):
+        return str(tuple(tuple(float(f'{c:g}') for c in row) for row in value))
+    if isinstance(value, (vecmath.Vector, vecmath.Quaternion)):
+        return str(tuple(float(f'{c:g}') for c in value))
+    if isinstance(value, str):
+        return repr(value)
+    return str(value)
+
+
+class Difference:
+    # kind is one of value, length, array (a list of numbers or vectors) and elements
+    # (the same field of more than MAX_LISTED elements of a list of structs)
+    def __init__(self, kind='value', path='', struct='', old=None, new=None, delta=None, index=None, count=1,
+                 total=1):
+        self.kind = kind
+        self.path = path
+        self.struct = struct
+        self.old = old
+        self.new = new
+        self.delta = delta
+        self.index = index
+        self.count = count
+        self.total = total
+
+    def format(self):
+        where = f'{self.path} [{self.struct}]'
+        if self.kind == 'length':
+            return f'{where}: length {self.old} -> {self.new}'
+        if self.kind == 'array':
+            return f'{where}: {self.count} of {self.total} differ, max delta {self.delta:g} at [{self.index}]'
+        if self.kind == 'elements':
+            result = f'{where}: {self.count} of {self.total} differ'
+            if self.delta is not None:
+                result += f', max delta {self.delta:g}'
+            return result
+        return f'{where}: {format_value(self.old)} -> {format_value(self.new)}'
+
+    def to_dict(self):
+        result = {'kind': self.kind, 'path': self.path, 'struct': self.struct}
+        if self.kind in ['value', 'length']:
+            result['old'] = format_value(self.old)
+            result['new'] = format_value(self.new)
+        if self.kind in ['array', 'elements']:
+            result['count'] = self.count
+            result['total'] = self.total
+        if self.delta is not None:
+            result['delta'] = self.delta
+        if self.index is not None:
+            result['index'] = self.index
+        return result
+
+
+##########################################################################
+# Struct comparison
+##########################################################################
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def components(value):
+    if is_number(value):
+        return (value,)
+    if isinstance(value, vecmath.Matrix):
+        return tuple(c for row in value for c in row)
+    if isinstance(value, (vecmath.Vector, vecmath.Quaternion)):
+        return tuple(value)
+    return None
+
+
+def max_delta(old, new):
+    # largest absolute difference of two numbers, vectors or matrices, None for anything else
+    old_components = components(old)
+    new_components = components(new)
+    if old_components is None or new_components is None or len(old_components) != len(new_components):
+        return None
+    return max((abs(a - b) for (a, b) in zip(old_components, new_components)), default=0.0)
+
+
+def is_struct(value):
+    return hasattr(value, '__dict__') or hasattr(type(value), '__slots__')
+
+
+def struct_fields(value):
+    if hasattr(value, '__dict__'):
+        return list(vars(value))
+    return [name for cls in type(value).__mro__ for name in getattr(cls, '__slots__', ())]
+
+
+def join_path(path, name):
+    return path + '.' + name if path else name
+
+
+def compare_values(path, struct, old, new, tolerance, result):
+    delta = max_delta(old, new)
+    if delta is not None:
+        if delta > tolerance:
+            result.append(Difference('value', path, struct, old, new, delta=delta))
+    elif isinstance(old, (list, array)) and isinstance(new, (list, array)):
+        compare_lists(path, struct, old, new, tolerance, result)
+    elif type(old) == type(new) and is_struct(old):
+        compare_structs(path, old, new, tolerance, result)
+    elif old != new:
+        result.append(Difference('value', path, struct, old, new))
+
+
+def compare_lists(path, struct, old, new, tolerance, result):
+    if len(old) != len(new):
+        result.append(Difference('length', path, struct, len(old), len(new)))
+
+    count = min(len(old), len(new))
+    deltas = [max_delta(old[i], new[i]) for i in range(count)]
+    if count and None not in deltas:
+        differing = [i for i in range(count) if deltas[i] > tolerance]
+        if differing:
+            index = max(differing, key=lambda i: deltas[i])
+            result.append(Difference('array', path, struct, delta=deltas[index], index=index, count=len(differing),
+                                     total=count))
+        return
+
+    # differences of the elements are grouped by field, so that e.g. a changed
+    # distance of all triangles ends up in a single line
+    groups = {}
+    for i in range(count):
+        element = []
+        compare_values(f'{path}[{i}]', struct, old[i], new[i], tolerance, element)
+        for difference in element:
+            pattern = f'{path}[*]' + difference.path[len(f'{path}[{i}]'):]
+            groups.setdefault((pattern, difference.struct), []).append(difference)
+
+    for ((pattern, field), differences) in groups.items():
+        if len(differences) <= MAX_LISTED:
+            result.extend(differences)
+            continue
+        deltas = [difference.delta for difference in differences if difference.delta is not None]
+        result.append(Difference('elements', pattern, field, delta=max(deltas, default=None), count=len(differences),
+                                 total=count))
+
+
+def compare_structs(path, old, new, tolerance, result):
+    owner = type(old).__name__
+    for name in struct_fields(old):
+        compare_values(join_path(path, name), f'{owner}.{name}', getattr(old, name, None), getattr(new, name, None),
+                       tolerance, result)
+
+
+##########################################################################
+# Chunk comparison
+##########################################################################
+
+
+class ChunkDiff:
+    # status is one of same (byte identical), equivalent (equal within the tolerance),
+    # changed, added and removed
+    def __init__(self, status='same', chunk_type=0, name='', differences=None):
+        self.status = status
+        self.chunk_type = chunk_type
+        self.name = name
+        self.differences = differences if differences is not None else []
+
+    def label(self):
+        return f'{STRUCT_NAMES.get(self.chunk_type, hex(self.chunk_type))} {self.name}'.rstrip()
+
+    def to_dict(self):
+        return {
+            'status': self.status,
+            'chunk': STRUCT_NAMES.get(self.chunk_type, hex(self.chunk_type)),
+            'name': self.name,
+            'differences': [difference.to_dict() for difference in self.differences]}
+
+
+class FileDiff:
+    def __init__(self, old_path='', new_path='', chunks=None):
+        self.old_path = old_path
+        self.new_path = new_path
+        self.chunks = chunks if chunks is not None else []
+
+    def count(self, status):
+        return len([chunk for chunk in self.chunks if chunk.status == status])
+
+    def has_differences(self):
+        return any(chunk.status in ['changed', 'added', 'removed'] for chunk in self.chunks)
+
+    def format(self):
+        markers = {'changed': '~', 'added': '+', 'removed': '-'}
+        lines = []
+        for chunk in self.chunks:
+            if chunk.status not in markers:
+                continue
+            lines.append(f'{markers[chunk.status]} {chunk.label()}')
+            lines.extend('    ' + difference.format() for difference in chunk.differences)
+        lines.append(f'{self.count("same")} identical, {self.count("equivalent")} within tolerance, '
+                     f'{self.count("changed")} changed, {self.count("added")} added, {self.count("removed")} removed')
+        return lines
+
+    def to_dict(self):
+        return {
+            'old': self.old_path,
+            'new': self.new_path,
+            'chunks': [chunk.to_dict() for chunk in self.chunks if chunk.status != 'same']}
+
+
+def chunk_hash(index, entry):
+    index.io_stream.seek(entry.offset)
+    return hashlib.blake2b(index.io_stream.read(HEAD + entry.size), digest_size=16).digest()
+
+
+def pair_entries(old_index, new_index):
+    # entries with the same type and name are paired in the order they appear in the files
+    remaining = {}
+    for entry in new_index:
+        remaining.setdefault((entry.chunk_type, entry.identifier()), []).append(entry)
+
+    result = []
+    for entry in old_index:
+        candidates = remaining.get((entry.chunk_type, entry.identifier()))
+        result.append((entry, candidates.pop(0) if candidates else None))
+
+    for candidates in remaining.values():
+        result.extend((None, entry) for entry in candidates)
+    return result
+
+
+def compare_chunks(context, old_index, old_entry, new_index, new_entry, tolerance):
+    result = ChunkDiff('changed', old_entry.chunk_type, old_entry.identifier())
+    if chunk_hash(old_index, old_entry) == chunk_hash(new_index, new_entry):
+        result.status = 'same'
+        return result
+
+    old = old_index.decode(context, old_entry)
+    new = new_index.decode(context, new_entry)
+    if old is None or new is None:
+        result.differences.append(Difference('value', 'data', hex(old_entry.chunk_type), f'{old_entry.size} bytes',
+                                             f'{new_entry.size} bytes'))
+        return result
+
+    compare_structs('', old, new, tolerance, result.differences)
+    if not result.differences:
+        result.status = 'equivalent'
+    return result
+
+
+def diff_files(context, old_path, new_path, tolerance=DEFAULT_TOLERANCE):
+    old_index = ChunkIndex.from_file(old_path, use_mmap=True)
+    new_index = ChunkIndex.from_file(new_path, use_mmap=True)
+
+    result = FileDiff(old_path, new_path)
+    for (old_entry, new_entry) in pair_entries(old_index, new_index):
+        if new_entry is None:
+            result.chunks.append(ChunkDiff('removed', old_entry.chunk_type, old_entry.identifier()))
+        elif old_entry is None:
+            result.chunks.append(ChunkDiff('added', new_entry.chunk_type, new_entry.identifier()))
+        else:
+            result.chunks.append(compare_chunks(context, old_index, old_entry, new_index, new_entry, tolerance))
+
+    old_index.close()
+    new_index.close()
+    return result
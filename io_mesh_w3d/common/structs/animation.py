@@ -2,6 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 from io_mesh_w3d.w3d.structs.version import Version
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 from io_mesh_w3d.w3x.io_xml import *
 
@@ -14,6 +15,12 @@ CHANNEL_Q = 6
 CHANNEL_VIS = 15
 
 
+@schema(W3D_CHUNK_ANIMATION_HEADER, [
+    ('version', 'version'),
+    ('name', 'string'),
+    ('hierarchy_name', 'string'),
+    ('num_frames', 'ulong'),
+    ('frame_rate', 'ulong')])
 class AnimationHeader:
     def __init__(self, version=Version(major=4, minor=1), name='', hierarchy_name='', num_frames=0, frame_rate=0):
         self.version = version
@@ -22,27 +29,6 @@ class AnimationHeader:
         self.num_frames = num_frames
         self.frame_rate = frame_rate
 
-    @staticmethod
-    def read(io_stream):
-        return AnimationHeader(
-            version=Version.read(io_stream),
-            name=read_fixed_string(io_stream),
-            hierarchy_name=read_fixed_string(io_stream),
-            num_frames=read_ulong(io_stream),
-            frame_rate=read_ulong(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(44, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_ANIMATION_HEADER, io_stream, self.size(False))
-        self.version.write(io_stream)
-        write_fixed_string(self.name, io_stream)
-        write_fixed_string(self.hierarchy_name, io_stream)
-        write_ulong(self.num_frames, io_stream)
-        write_ulong(self.frame_rate, io_stream)
-
 
 W3D_CHUNK_ANIMATION_CHANNEL = 0x00000202
 
@@ -96,10 +82,10 @@ class AnimationChannel:
         write_ushort(self.unknown, io_stream)
 
         if self.vector_len == 1:
-            write_list(self.data, io_stream, write_float)
+            write_float_list(self.data, io_stream)
         else:
-            write_list(self.data, io_stream, write_quaternion)
-        write_list(self.pad_bytes, io_stream, write_ubyte)
+            write_quaternion_list(self.data, io_stream)
+        write_ubyte_list(self.pad_bytes, io_stream)
 
     @staticmethod
     def parse(xml_channel):
@@ -228,8 +214,9 @@ class AnimationBitChannel:
         channel.set('Pivot', str(self.pivot))
         channel.set('FirstFrame', str(self.first_frame))
 
+        # the data of binary bit channels are bools
         for value in self.data:
-            create_value(value, channel, 'Frame')
+            create_value(float(value), channel, 'Frame')
 
 
 W3D_CHUNK_ANIMATION = 0x00000200
@@ -279,12 +266,14 @@ class Animation:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_ANIMATION, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_ANIMATION, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
 
         for channel in self.channels:
             channel.write(io_stream)
 
+        end_chunk(io_stream, chunk)
+
     @staticmethod
     def parse(context, xml_animation):
         result = Animation(header=AnimationHeader())
@@ -1,7 +1,9 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+import struct
+
+from io_mesh_w3d.w3d import vecmath
 from io_mesh_w3d.common.structs.rgba import RGBA
 from io_mesh_w3d.w3d.utils.helpers import *
 from io_mesh_w3d.w3d.structs.version import Version
@@ -17,10 +19,13 @@ COLLISION_TYPE_VIS = 0x40
 COLLISION_TYPE_CAMERA = 0x80
 COLLISION_TYPE_VEHICLE = 0x100
 
+_collision_box = struct.Struct('<2L32s4B3f3f')
+
 
 class CollisionBox:
     def __init__(self, version=Version(), box_type=0, collision_types=0, name_='', color=RGBA(),
-                 center=Vector((0.0, 0.0, 0.0)), extend=Vector((0.0, 0.0, 0.0)), joypad_picking_only=False):
+                 center=vecmath.Vector((0.0, 0.0, 0.0)), extend=vecmath.Vector((0.0, 0.0, 0.0)),
+                 joypad_picking_only=False):
         self.version = version
         self.box_type = box_type
         self.collision_types = collision_types
@@ -46,16 +51,16 @@ class CollisionBox:
 
     @staticmethod
     def read(io_stream):
-        ver = Version.read(io_stream)
-        flags = read_ulong(io_stream)
+        (version, flags, name, r, g, b, a, c_x, c_y, c_z, e_x, e_y, e_z) = _collision_box.unpack(
+            io_stream.read(_collision_box.size))
         return CollisionBox(
-            version=ver,
+            version=Version(major=version >> 16, minor=version & 0xFFFF),
             box_type=(flags & ATTRIBUTE_MASK),
             collision_types=(flags & COLLISION_TYPE_MASK),
-            name_=read_long_fixed_string(io_stream),
-            color=RGBA.read(io_stream),
-            center=read_vector(io_stream),
-            extend=read_vector(io_stream))
+            name_=unpack_fixed_string(name, LARGE_STRING_LENGTH),
+            color=RGBA(r=r, g=g, b=b, a=a),
+            center=vecmath.Vector((c_x, c_y, c_z)),
+            extend=vecmath.Vector((e_x, e_y, e_z)))
 
     @staticmethod
     def size(include_head=True):
@@ -63,13 +68,20 @@ class CollisionBox:
 
     def write(self, io_stream):
         write_chunk_head(W3D_CHUNK_BOX, io_stream, self.size(False))
-
-        self.version.write(io_stream)
-        write_ulong((self.box_type & ATTRIBUTE_MASK) | (self.collision_types & COLLISION_TYPE_MASK), io_stream)
-        write_long_fixed_string(self.name_, io_stream)
-        self.color.write(io_stream)
-        write_vector(self.center, io_stream)
-        write_vector(self.extend, io_stream)
+        io_stream.write(_collision_box.pack(
+            (self.version.major << 16) | self.version.minor,
+            (self.box_type & ATTRIBUTE_MASK) | (self.collision_types & COLLISION_TYPE_MASK),
+            pack_fixed_string(self.name_, LARGE_STRING_LENGTH),
+            self.color.r,
+            self.color.g,
+            self.color.b,
+            self.color.a,
+            self.center.x,
+            self.center.y,
+            self.center.z,
+            self.extend.x,
+            self.extend.y,
+            self.extend.z))
 
     @staticmethod
     def parse(context, xml_collision_box):
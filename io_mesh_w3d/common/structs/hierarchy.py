@@ -1,44 +1,39 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector, Quaternion, Matrix
+import struct
+
+from io_mesh_w3d.w3d import vecmath
 from io_mesh_w3d.w3d.structs.version import Version
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 from io_mesh_w3d.w3x.io_xml import *
 
 W3D_CHUNK_HIERARCHY_HEADER = 0x00000101
 
 
+@schema(W3D_CHUNK_HIERARCHY_HEADER, [
+    ('version', 'version'),
+    ('name', 'string'),
+    ('num_pivots', 'ulong'),
+    ('center_pos', 'vector')])
 class HierarchyHeader:
-    def __init__(self, version=Version(major=4, minor=1), name='', num_pivots=0, center_pos=Vector((0.0, 0.0, 0.0))):
+    def __init__(self, version=Version(major=4, minor=1), name='', num_pivots=0,
+                 center_pos=vecmath.Vector((0.0, 0.0, 0.0))):
         self.version = version
         self.name = name
         self.num_pivots = num_pivots
         self.center_pos = center_pos
 
-    @staticmethod
-    def read(io_stream):
-        return HierarchyHeader(
-            version=Version.read(io_stream),
-            name=read_fixed_string(io_stream),
-            num_pivots=read_ulong(io_stream),
-            center_pos=read_vector(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(36, include_head)
 
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_HIERARCHY_HEADER, io_stream, self.size(False))
-        self.version.write(io_stream)
-        write_fixed_string(self.name, io_stream)
-        write_ulong(self.num_pivots, io_stream)
-        write_vector(self.center_pos, io_stream)
+_hierarchy_pivot = struct.Struct('<16sl3f3f4f')
 
 
 class HierarchyPivot:
-    def __init__(self, name='', name_id=None, parent_id=-1, translation=Vector(), euler_angles=Vector(),
-                 rotation=Quaternion(), fixup_matrix=Matrix()):
+    __slots__ = ('name', 'name_id', 'parent_id', 'translation', 'euler_angles', 'rotation', 'fixup_matrix')
+
+    def __init__(self, name='', name_id=None, parent_id=-1, translation=vecmath.Vector(), euler_angles=vecmath.Vector(),
+                 rotation=vecmath.Quaternion(), fixup_matrix=vecmath.Matrix()):
         self.name = name
         self.name_id = name_id
         self.parent_id = parent_id
@@ -49,23 +44,33 @@ class HierarchyPivot:
 
     @staticmethod
     def read(io_stream):
+        (name, parent_id, t_x, t_y, t_z, e_x, e_y, e_z, r_x, r_y, r_z, r_w) = _hierarchy_pivot.unpack(
+            io_stream.read(_hierarchy_pivot.size))
         return HierarchyPivot(
-            name=read_fixed_string(io_stream),
-            parent_id=read_long(io_stream),
-            translation=read_vector(io_stream),
-            euler_angles=read_vector(io_stream),
-            rotation=read_quaternion(io_stream))
+            name=unpack_fixed_string(name),
+            parent_id=parent_id,
+            translation=vecmath.Vector((t_x, t_y, t_z)),
+            euler_angles=vecmath.Vector((e_x, e_y, e_z)),
+            rotation=vecmath.Quaternion((r_w, r_x, r_y, r_z)))
 
     @staticmethod
     def size():
         return 60
 
     def write(self, io_stream):
-        write_fixed_string(self.name, io_stream)
-        write_long(self.parent_id, io_stream)
-        write_vector(self.translation, io_stream)
-        write_vector(self.euler_angles, io_stream)
-        write_quaternion(self.rotation, io_stream)
+        io_stream.write(_hierarchy_pivot.pack(
+            pack_fixed_string(self.name),
+            self.parent_id,
+            self.translation.x,
+            self.translation.y,
+            self.translation.z,
+            self.euler_angles.x,
+            self.euler_angles.y,
+            self.euler_angles.z,
+            self.rotation.x,
+            self.rotation.y,
+            self.rotation.z,
+            self.rotation.w))
 
     @staticmethod
     def parse(context, xml_pivot):
@@ -135,7 +140,7 @@ class Hierarchy:
             elif chunk_type == W3D_CHUNK_PIVOTS:
                 result.pivots = read_list(io_stream, subchunk_end, HierarchyPivot.read)
             elif chunk_type == W3D_CHUNK_PIVOT_FIXUPS:
-                result.pivot_fixups = read_list(io_stream, subchunk_end, read_vector)
+                result.pivot_fixups = read_vector_list(io_stream, subchunk_end)
             else:
                 skip_unknown_chunk(context, io_stream, chunk_type, chunk_size)
         return result
@@ -148,16 +153,18 @@ class Hierarchy:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_HIERARCHY, io_stream, self.size(False))
+        chunk = begin_chunk(W3D_CHUNK_HIERARCHY, io_stream)
         self.header.write(io_stream)
 
         if self.pivots:
-            write_chunk_head(W3D_CHUNK_PIVOTS, io_stream, list_size(self.pivots, False))
+            write_chunk_head(W3D_CHUNK_PIVOTS, io_stream, data_list_size(self.pivots, False, HierarchyPivot.size()))
             write_list(self.pivots, io_stream, HierarchyPivot.write)
 
         if self.pivot_fixups:
             write_chunk_head(W3D_CHUNK_PIVOT_FIXUPS, io_stream, vec_list_size(self.pivot_fixups, False))
-            write_list(self.pivot_fixups, io_stream, write_vector)
+            write_vector_list(self.pivot_fixups, io_stream)
+
+        end_chunk(io_stream, chunk)
 
     @staticmethod
     def parse(context, xml_hierarchy):
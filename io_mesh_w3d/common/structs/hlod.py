@@ -2,12 +2,18 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 from io_mesh_w3d.w3d.structs.version import Version
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 from io_mesh_w3d.w3x.io_xml import *
 
 W3D_CHUNK_HLOD_HEADER = 0x00000701
 
 
+@schema(W3D_CHUNK_HLOD_HEADER, [
+    ('version', 'version'),
+    ('lod_count', 'ulong'),
+    ('model_name', 'string'),
+    ('hierarchy_name', 'string')])
 class HLodHeader:
     def __init__(self, version=Version(major=1, minor=0), lod_count=1, model_name='', hierarchy_name=''):
         self.version = version
@@ -15,56 +21,27 @@ class HLodHeader:
         self.model_name = model_name
         self.hierarchy_name = hierarchy_name
 
-    @staticmethod
-    def read(io_stream):
-        return HLodHeader(
-            version=Version.read(io_stream),
-            lod_count=read_ulong(io_stream),
-            model_name=read_fixed_string(io_stream),
-            hierarchy_name=read_fixed_string(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(40, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_HLOD_HEADER, io_stream, self.size(False))
-        self.version.write(io_stream)
-        write_ulong(self.lod_count, io_stream)
-        write_fixed_string(self.model_name, io_stream)
-        write_fixed_string(self.hierarchy_name, io_stream)
-
 
 W3D_CHUNK_HLOD_SUB_OBJECT_ARRAY_HEADER = 0x00000703
 
 MAX_SCREEN_SIZE = 340282346638528859811704183484516925440.000000
 
 
+@schema(W3D_CHUNK_HLOD_SUB_OBJECT_ARRAY_HEADER, [
+    ('model_count', 'ulong'),
+    ('max_screen_size', 'float')])
 class HLodArrayHeader:
     def __init__(self, model_count=0, max_screen_size=MAX_SCREEN_SIZE):
         self.model_count = model_count
         self.max_screen_size = max_screen_size
 
-    @staticmethod
-    def read(io_stream):
-        return HLodArrayHeader(
-            model_count=read_ulong(io_stream),
-            max_screen_size=read_float(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(8, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_HLOD_SUB_OBJECT_ARRAY_HEADER, io_stream, self.size(False))
-        write_ulong(self.model_count, io_stream)
-        write_float(self.max_screen_size, io_stream)
-
 
 W3D_CHUNK_HLOD_SUB_OBJECT = 0x00000704
 
 
 class HLodSubObject:
+    __slots__ = ('bone_index', 'identifier', 'name', 'is_box')
+
     def __init__(self, bone_index=0, identifier='', name='', is_box=False):
         self.bone_index = bone_index
         self.identifier = identifier
@@ -147,9 +124,10 @@ class HLodBaseArray:
         return size
 
     def write_base(self, io_stream, chunk_id):
-        write_chunk_head(chunk_id, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(chunk_id, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
         write_list(self.sub_objects, io_stream, HLodSubObject.write)
+        end_chunk(io_stream, chunk)
 
 
 W3D_CHUNK_HLOD_LOD_ARRAY = 0x00000702
@@ -245,8 +223,7 @@ class HLod:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_HLOD, io_stream,
-                         self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_HLOD, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
         for lod_array in self.lod_arrays:
             lod_array.write(io_stream)
@@ -255,6 +232,7 @@ class HLod:
             self.aggregate_array.write(io_stream)
         if self.proxy_array is not None:
             self.proxy_array.write(io_stream)
+        end_chunk(io_stream, chunk)
 
     @staticmethod
     def parse(context, xml_container):
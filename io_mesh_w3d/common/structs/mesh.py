@@ -1,11 +1,12 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+from io_mesh_w3d.w3d import vecmath
 from io_mesh_w3d.common.structs.mesh_structs.aabbtree import *
 from io_mesh_w3d.common.structs.mesh_structs.shader_material import *
 from io_mesh_w3d.common.structs.mesh_structs.triangle import *
 from io_mesh_w3d.common.structs.mesh_structs.vertex_influence import *
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.structs.mesh_structs.prelit import *
 from io_mesh_w3d.w3d.structs.version import Version
 from io_mesh_w3d.w3x.structs.mesh_structs.bounding_box import *
@@ -37,6 +38,24 @@ VERTEX_CHANNEL_TANGENT = 0x20
 VERTEX_CHANNEL_BITANGENT = 0x40
 
 
+@schema(W3D_CHUNK_MESH_HEADER, [
+    ('version', 'version'),
+    ('attrs', 'ulong'),
+    ('mesh_name', 'string'),
+    ('container_name', 'string'),
+    ('face_count', 'ulong'),
+    ('vert_count', 'ulong'),
+    ('matl_count', 'ulong'),
+    ('damage_stage_count', 'ulong'),
+    ('sort_level', 'ulong'),
+    ('prelit_version', 'ulong'),
+    ('future_count', 'ulong'),
+    ('vert_channel_flags', 'ulong'),
+    ('face_channel_flags', 'ulong'),
+    ('min_corner', 'vector'),
+    ('max_corner', 'vector'),
+    ('sph_center', 'vector'),
+    ('sph_radius', 'float')])
 class MeshHeader:
     def __init__(
             self,
@@ -55,9 +74,9 @@ class MeshHeader:
             future_count=0,
             vert_channel_flags=0,
             face_channel_flags=1,
-            min_corner=Vector(),
-            max_corner=Vector(),
-            sph_center=Vector(),
+            min_corner=vecmath.Vector(),
+            max_corner=vecmath.Vector(),
+            sph_center=vecmath.Vector(),
             sph_radius=0.0):
         self.version = version
         self.attrs = attrs
@@ -77,52 +96,6 @@ class MeshHeader:
         self.sph_center = sph_center
         self.sph_radius = sph_radius
 
-    @staticmethod
-    def read(io_stream):
-        return MeshHeader(
-            version=Version.read(io_stream),
-            attrs=read_ulong(io_stream),
-            mesh_name=read_fixed_string(io_stream),
-            container_name=read_fixed_string(io_stream),
-            face_count=read_ulong(io_stream),
-            vert_count=read_ulong(io_stream),
-            matl_count=read_ulong(io_stream),
-            damage_stage_count=read_ulong(io_stream),
-            sort_level=read_ulong(io_stream),
-            prelit_version=read_ulong(io_stream),
-            future_count=read_ulong(io_stream),
-            vert_channel_flags=read_ulong(io_stream),
-            face_channel_flags=read_ulong(io_stream),
-            # bounding volumes
-            min_corner=read_vector(io_stream),
-            max_corner=read_vector(io_stream),
-            sph_center=read_vector(io_stream),
-            sph_radius=read_float(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(116, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_MESH_HEADER, io_stream, self.size(False))
-        self.version.write(io_stream)
-        write_ulong(self.attrs, io_stream)
-        write_fixed_string(self.mesh_name, io_stream)
-        write_fixed_string(self.container_name, io_stream)
-        write_ulong(self.face_count, io_stream)
-        write_ulong(self.vert_count, io_stream)
-        write_ulong(self.matl_count, io_stream)
-        write_ulong(self.damage_stage_count, io_stream)
-        write_ulong(self.sort_level, io_stream)
-        write_ulong(self.prelit_version, io_stream)
-        write_ulong(self.future_count, io_stream)
-        write_ulong(self.vert_channel_flags, io_stream)
-        write_ulong(self.face_channel_flags, io_stream)
-        write_vector(self.min_corner, io_stream)
-        write_vector(self.max_corner, io_stream)
-        write_vector(self.sph_center, io_stream)
-        write_float(self.sph_radius, io_stream)
-
 
 W3D_CHUNK_MESH = 0x00000000
 W3D_CHUNK_VERTICES = 0x00000002
@@ -165,6 +138,7 @@ class Mesh:
 
         # non struct properties
         self.multi_bone_skinned = False
+        self.triangle_ids = None
 
     def validate(self, context):
         if len(self.header.mesh_name) >= STRING_LENGTH and context.file_format == 'W3D':
@@ -206,71 +180,9 @@ class Mesh:
         return self.material_passes[0]
 
     @staticmethod
-    def read(context, io_stream, chunk_end):
-        result = Mesh()
-
-        while io_stream.tell() < chunk_end:
-            (chunk_type, chunk_size, subchunk_end) = read_chunk_head(io_stream)
-
-            if chunk_type == W3D_CHUNK_VERTICES:
-                result.verts = read_list(io_stream, subchunk_end, read_vector)
-            elif chunk_type == W3D_CHUNK_VERTICES_2:
-                context.info('-> vertices 2 chunk is not supported')
-                io_stream.seek(chunk_size, 1)
-            elif chunk_type == W3D_CHUNK_VERTEX_NORMALS:
-                result.normals = read_list(io_stream, subchunk_end, read_vector)
-            elif chunk_type == W3D_CHUNK_NORMALS_2:
-                context.info('-> normals 2 chunk is not supported')
-                io_stream.seek(chunk_size, 1)
-            elif chunk_type == W3D_CHUNK_MESH_USER_TEXT:
-                result.user_text = read_string(io_stream)
-            elif chunk_type == W3D_CHUNK_VERTEX_INFLUENCES:
-                result.vert_infs = read_list(io_stream, subchunk_end, VertexInfluence.read)
-            elif chunk_type == W3D_CHUNK_MESH_HEADER:
-                result.header = MeshHeader.read(io_stream)
-            elif chunk_type == W3D_CHUNK_TRIANGLES:
-                result.triangles = read_list(io_stream, subchunk_end, Triangle.read)
-            elif chunk_type == W3D_CHUNK_VERTEX_SHADE_INDICES:
-                result.shade_ids = read_list(io_stream, subchunk_end, read_long)
-            elif chunk_type == W3D_CHUNK_MATERIAL_INFO:
-                result.mat_info = MaterialInfo.read(io_stream)
-            elif chunk_type == W3D_CHUNK_SHADERS:
-                result.shaders = read_list(io_stream, subchunk_end, Shader.read)
-            elif chunk_type == W3D_CHUNK_VERTEX_MATERIALS:
-                result.vert_materials = read_chunk_array(context, io_stream, subchunk_end, W3D_CHUNK_VERTEX_MATERIAL,
-                                                         VertexMaterial.read)
-            elif chunk_type == W3D_CHUNK_TEXTURES:
-                result.textures = read_chunk_array(context, io_stream, subchunk_end, W3D_CHUNK_TEXTURE, Texture.read)
-            elif chunk_type == W3D_CHUNK_MATERIAL_PASS:
-                result.material_passes.append(MaterialPass.read(context, io_stream, subchunk_end))
-            elif chunk_type == W3D_CHUNK_SHADER_MATERIALS:
-                result.shader_materials = read_chunk_array(context, io_stream, subchunk_end, W3D_CHUNK_SHADER_MATERIAL,
-                                                           ShaderMaterial.read)
-            elif chunk_type == W3D_CHUNK_TANGENTS:
-                context.info('-> tangents are computed in blender')
-                io_stream.seek(chunk_size, 1)
-            elif chunk_type == W3D_CHUNK_BITANGENTS:
-                context.info('-> bitangents are computed in blender')
-                io_stream.seek(chunk_size, 1)
-            elif chunk_type == W3D_CHUNK_AABBTREE:
-                result.aabbtree = AABBTree.read(context, io_stream, subchunk_end)
-            elif chunk_type == W3D_CHUNK_PRELIT_UNLIT:
-                result.prelit_unlit = PrelitBase.read(context, io_stream, subchunk_end, chunk_type)
-            elif chunk_type == W3D_CHUNK_PRELIT_VERTEX:
-                result.prelit_vertex = PrelitBase.read(context, io_stream, subchunk_end, chunk_type)
-            elif chunk_type == W3D_CHUNK_PRELIT_LIGHTMAP_MULTI_PASS:
-                result.prelit_lightmap_multi_pass = PrelitBase.read(context, io_stream, subchunk_end, chunk_type)
-            elif chunk_type == W3D_CHUNK_PRELIT_LIGHTMAP_MULTI_TEXTURE:
-                result.prelit_lightmap_multi_texture = PrelitBase.read(context, io_stream, subchunk_end, chunk_type)
-            elif chunk_type == W3D_CHUNK_DEFORM:
-                context.info('-> deform chunk is not supported')
-                io_stream.seek(chunk_size, 1)
-            elif chunk_type == W3D_CHUNK_PS2_SHADERS:
-                context.info('-> ps2 shaders chunk is not supported')
-                io_stream.seek(chunk_size, 1)
-            else:
-                skip_unknown_chunk(context, io_stream, chunk_type, chunk_size)
-        return result
+    def read(context, io_stream, chunk_end, use_numpy=False, compact=False):
+        use_numpy = use_numpy and numpy is not None
+        return read_chunks(context, io_stream, chunk_end, Mesh(), MESH_READERS[(use_numpy, compact)])
 
     def size(self, include_head=True):
         size = const_size(0, include_head)
@@ -284,8 +196,8 @@ class Mesh:
             size += vec_list_size(self.normals_2)
         size += vec_list_size(self.tangents)
         size += vec_list_size(self.bitangents)
-        size += list_size(self.triangles)
-        size += list_size(self.vert_infs)
+        size += data_list_size(self.triangles, True, Triangle.size())
+        size += data_list_size(self.vert_infs, True, VertexInfluence.size())
         size += list_size(self.shaders)
         size += list_size(self.textures)
         size += long_list_size(self.shade_ids)
@@ -307,7 +219,7 @@ class Mesh:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_MESH, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_MESH, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
 
         if len(self.user_text) > 0:
@@ -318,68 +230,62 @@ class Mesh:
             write_string(self.user_text, io_stream)
 
         write_chunk_head(W3D_CHUNK_VERTICES, io_stream, vec_list_size(self.verts, False))
-        write_list(self.verts, io_stream, write_vector)
+        write_vector_list(self.verts, io_stream)
 
         if self.multi_bone_skinned and self.verts_2:
             write_chunk_head(W3D_CHUNK_VERTICES_2, io_stream, vec_list_size(self.verts_2, False))
-            write_list(self.verts_2, io_stream, write_vector)
+            write_vector_list(self.verts_2, io_stream)
 
         write_chunk_head(W3D_CHUNK_VERTEX_NORMALS, io_stream, vec_list_size(self.normals, False))
-        write_list(self.normals, io_stream, write_vector)
+        write_vector_list(self.normals, io_stream)
 
         if self.multi_bone_skinned and self.normals_2:
             write_chunk_head(W3D_CHUNK_NORMALS_2, io_stream, vec_list_size(self.normals_2, False))
-            write_list(self.normals_2, io_stream, write_vector)
+            write_vector_list(self.normals_2, io_stream)
 
         if self.tangents:
             write_chunk_head(W3D_CHUNK_TANGENTS, io_stream, vec_list_size(self.tangents, False))
-            write_list(self.tangents, io_stream, write_vector)
+            write_vector_list(self.tangents, io_stream)
 
         if self.bitangents:
             write_chunk_head(W3D_CHUNK_BITANGENTS, io_stream, vec_list_size(self.bitangents, False))
-            write_list(self.bitangents, io_stream, write_vector)
+            write_vector_list(self.bitangents, io_stream)
 
-        write_chunk_head(W3D_CHUNK_TRIANGLES, io_stream, list_size(self.triangles, False))
-        write_list(self.triangles, io_stream, Triangle.write)
+        write_chunk_head(W3D_CHUNK_TRIANGLES, io_stream, data_list_size(self.triangles, False, Triangle.size()))
+        Triangle.write_array(self.triangles, io_stream)
 
         if self.vert_infs:
-            write_chunk_head(W3D_CHUNK_VERTEX_INFLUENCES, io_stream, list_size(self.vert_infs, False))
-            write_list(self.vert_infs, io_stream, VertexInfluence.write)
+            write_chunk_head(
+                W3D_CHUNK_VERTEX_INFLUENCES,
+                io_stream,
+                data_list_size(self.vert_infs, False, VertexInfluence.size()))
+            VertexInfluence.write_array(self.vert_infs, io_stream)
 
         if self.shade_ids:
             write_chunk_head(W3D_CHUNK_VERTEX_SHADE_INDICES, io_stream, long_list_size(self.shade_ids, False))
-            write_list(self.shade_ids, io_stream, write_long)
+            write_long_list(self.shade_ids, io_stream)
 
         if self.mat_info is not None:
             self.mat_info.write(io_stream)
 
         if self.vert_materials:
-            write_chunk_head(
-                W3D_CHUNK_VERTEX_MATERIALS,
-                io_stream,
-                list_size(self.vert_materials, False),
-                has_sub_chunks=True)
+            vert_materials = begin_chunk(W3D_CHUNK_VERTEX_MATERIALS, io_stream, has_sub_chunks=True)
             write_list(self.vert_materials, io_stream, VertexMaterial.write)
+            end_chunk(io_stream, vert_materials)
 
         if self.shaders:
-            write_chunk_head(W3D_CHUNK_SHADERS, io_stream, list_size(self.shaders, False))
+            write_chunk_head(W3D_CHUNK_SHADERS, io_stream, data_list_size(self.shaders, False, Shader.size()))
             write_list(self.shaders, io_stream, Shader.write)
 
         if self.textures:
-            write_chunk_head(
-                W3D_CHUNK_TEXTURES,
-                io_stream,
-                list_size(self.textures, False),
-                has_sub_chunks=True)
+            textures = begin_chunk(W3D_CHUNK_TEXTURES, io_stream, has_sub_chunks=True)
             write_list(self.textures, io_stream, Texture.write)
+            end_chunk(io_stream, textures)
 
         if self.shader_materials:
-            write_chunk_head(
-                W3D_CHUNK_SHADER_MATERIALS,
-                io_stream,
-                list_size(self.shader_materials, False),
-                has_sub_chunks=True)
+            shader_materials = begin_chunk(W3D_CHUNK_SHADER_MATERIALS, io_stream, has_sub_chunks=True)
             write_list(self.shader_materials, io_stream, ShaderMaterial.write)
+            end_chunk(io_stream, shader_materials)
 
         if self.material_passes:
             write_list(self.material_passes, io_stream, MaterialPass.write)
@@ -399,6 +305,8 @@ class Mesh:
         if self.prelit_lightmap_multi_texture is not None:
             self.prelit_lightmap_multi_texture.write(io_stream)
 
+        end_chunk(io_stream, chunk)
+
     @staticmethod
     def parse(context, xml_mesh):
         result = Mesh()
@@ -576,3 +484,76 @@ class Mesh:
 
 W3D_CHUNK_DEFORM = 0x00000058
 W3D_CHUNK_PS2_SHADERS = 0x00000080
+
+
+##########################################################################
+# Sub chunk readers
+##########################################################################
+
+
+def read_triangle_views(context, io_stream, chunk_end, result):
+    position = io_stream.tell()
+    result.triangle_ids = read_array_view(io_stream, chunk_end, '<u4', 8)[:, :3]
+    io_stream.seek(position)
+    result.triangles = Triangle.read_array(io_stream, chunk_end)
+
+
+def read_compact_long_list(io_stream, chunk_end):
+    return read_typed_array('i', read_chunk_data(io_stream, chunk_end))
+
+
+MESH_CHUNKS = {
+    W3D_CHUNK_MESH_HEADER: record_field('header', MeshHeader.read),
+    W3D_CHUNK_MESH_USER_TEXT: record_field('user_text', read_string),
+    W3D_CHUNK_VERTICES: data_field('verts', read_vector_list),
+    W3D_CHUNK_VERTICES_2: unsupported('vertices 2 chunk is not supported'),
+    W3D_CHUNK_VERTEX_NORMALS: data_field('normals', read_vector_list),
+    W3D_CHUNK_NORMALS_2: unsupported('normals 2 chunk is not supported'),
+    W3D_CHUNK_VERTEX_INFLUENCES: data_field('vert_infs', VertexInfluence.read_array),
+    W3D_CHUNK_TRIANGLES: data_field('triangles', Triangle.read_array),
+    W3D_CHUNK_VERTEX_SHADE_INDICES: data_field('shade_ids', read_long_list),
+    W3D_CHUNK_MATERIAL_INFO: record_field('mat_info', MaterialInfo.read),
+    W3D_CHUNK_SHADERS: data_field('shaders', read_list, Shader.read),
+    W3D_CHUNK_VERTEX_MATERIALS: field('vert_materials', read_chunk_array, W3D_CHUNK_VERTEX_MATERIAL,
+                                      VertexMaterial.read),
+    W3D_CHUNK_TEXTURES: field('textures', read_chunk_array, W3D_CHUNK_TEXTURE, Texture.read),
+    W3D_CHUNK_MATERIAL_PASS: item('material_passes', MaterialPass.read),
+    W3D_CHUNK_SHADER_MATERIALS: field('shader_materials', read_chunk_array, W3D_CHUNK_SHADER_MATERIAL,
+                                      ShaderMaterial.read),
+    W3D_CHUNK_TANGENTS: unsupported('tangents are computed in blender'),
+    W3D_CHUNK_BITANGENTS: unsupported('bitangents are computed in blender'),
+    W3D_CHUNK_AABBTREE: field('aabbtree', AABBTree.read),
+    W3D_CHUNK_PRELIT_UNLIT: field('prelit_unlit', PrelitBase.read, W3D_CHUNK_PRELIT_UNLIT),
+    W3D_CHUNK_PRELIT_VERTEX: field('prelit_vertex', PrelitBase.read, W3D_CHUNK_PRELIT_VERTEX),
+    W3D_CHUNK_PRELIT_LIGHTMAP_MULTI_PASS: field('prelit_lightmap_multi_pass', PrelitBase.read,
+                                                W3D_CHUNK_PRELIT_LIGHTMAP_MULTI_PASS),
+    W3D_CHUNK_PRELIT_LIGHTMAP_MULTI_TEXTURE: field('prelit_lightmap_multi_texture', PrelitBase.read,
+                                                   W3D_CHUNK_PRELIT_LIGHTMAP_MULTI_TEXTURE),
+    W3D_CHUNK_DEFORM: unsupported('deform chunk is not supported'),
+    W3D_CHUNK_PS2_SHADERS: unsupported('ps2 shaders chunk is not supported')}
+
+# compact meshes keep the per vertex and per face data in flat typed arrays which behave like lists
+MESH_COMPACT_CHUNKS = {
+    W3D_CHUNK_VERTICES: data_field('verts', VectorArray.read),
+    W3D_CHUNK_VERTEX_NORMALS: data_field('normals', VectorArray.read),
+    W3D_CHUNK_VERTEX_INFLUENCES: data_field('vert_infs', VertexInfluenceArray.read),
+    W3D_CHUNK_TRIANGLES: data_field('triangles', TriangleArray.read),
+    W3D_CHUNK_VERTEX_SHADE_INDICES: data_field('shade_ids', read_compact_long_list),
+    W3D_CHUNK_MATERIAL_PASS: item('material_passes', MaterialPass.read, True)}
+
+# with numpy the vertex data and triangle indices are read only array views on the chunk data
+# instead of lists of Vectors, such meshes are meant to be imported and can not be written again
+MESH_NUMPY_CHUNKS = {
+    W3D_CHUNK_VERTICES: data_field('verts', read_array_view, '<f4', 3),
+    W3D_CHUNK_VERTEX_NORMALS: data_field('normals', read_array_view, '<f4', 3),
+    W3D_CHUNK_TANGENTS: data_field('tangents', read_array_view, '<f4', 3),
+    W3D_CHUNK_BITANGENTS: data_field('bitangents', read_array_view, '<f4', 3),
+    W3D_CHUNK_VERTEX_SHADE_INDICES: data_field('shade_ids', read_array_view, '<i4'),
+    W3D_CHUNK_TRIANGLES: read_triangle_views}
+
+# keyed by (use_numpy, compact)
+MESH_READERS = {
+    (False, False): MESH_CHUNKS,
+    (False, True): {**MESH_CHUNKS, **MESH_COMPACT_CHUNKS},
+    (True, False): {**MESH_CHUNKS, **MESH_NUMPY_CHUNKS},
+    (True, True): {**MESH_CHUNKS, **MESH_COMPACT_CHUNKS, **MESH_NUMPY_CHUNKS}}
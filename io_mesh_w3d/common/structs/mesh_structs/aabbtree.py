@@ -1,7 +1,10 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+import struct
+
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 from io_mesh_w3d.w3d.io_binary import *
 from io_mesh_w3d.w3x.io_xml import *
@@ -9,33 +12,19 @@ from io_mesh_w3d.w3x.io_xml import *
 W3D_CHUNK_AABBTREE_HEADER = 0x00000091
 
 
+@schema(W3D_CHUNK_AABBTREE_HEADER, [
+    ('node_count', 'ulong'),
+    ('poly_count', 'ulong'),
+    padding(24)])
 class AABBTreeHeader:
     def __init__(self, node_count=0, poly_count=0):
         self.node_count = node_count
         self.poly_count = poly_count  # num tris of mesh
 
-    @staticmethod
-    def read(io_stream):
-        result = AABBTreeHeader(
-            node_count=read_ulong(io_stream),
-            poly_count=read_ulong(io_stream))
-
-        read_padding(io_stream, 24)
-        return result
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(32, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_AABBTREE_HEADER, io_stream, self.size(False))
-        write_ulong(self.node_count, io_stream)
-        write_ulong(self.poly_count, io_stream)
-
-        write_padding(io_stream, 24)
-
 
 class Children:
+    __slots__ = ('front', 'back')
+
     def __init__(self, front=0, back=0):
         self.front = front
         self.back = back
@@ -53,6 +42,8 @@ class Children:
 
 
 class Polys:
+    __slots__ = ('begin', 'count')
+
     def __init__(self, begin=0, count=0):
         self.begin = begin
         self.count = count
@@ -69,8 +60,14 @@ class Polys:
         xml_polys.set('Count', str(self.count))
 
 
+_aabbtree_node = struct.Struct('<6f2l')
+
+
 class AABBTreeNode:
-    def __init__(self, min=Vector((0.0, 0.0, 0.0)), max=Vector((0.0, 0.0, 0.0)), children=None, polys=None):
+    __slots__ = ('min', 'max', 'children', 'polys')
+
+    def __init__(self, min=vecmath.Vector((0.0, 0.0, 0.0)), max=vecmath.Vector((0.0, 0.0, 0.0)), children=None,
+                 polys=None):
         self.min = min
         self.max = max
         self.children = children
@@ -78,23 +75,47 @@ class AABBTreeNode:
 
     @staticmethod
     def read(io_stream):
-        node = AABBTreeNode(
-            min=read_vector(io_stream),
-            max=read_vector(io_stream))
-        node.children = Children(
-            front=read_long(io_stream),
-            back=read_long(io_stream))
-        return node
+        (min_x, min_y, min_z, max_x, max_y, max_z, front, back) = _aabbtree_node.unpack(
+            io_stream.read(_aabbtree_node.size))
+        return AABBTreeNode(
+            min=vecmath.Vector((min_x, min_y, min_z)),
+            max=vecmath.Vector((max_x, max_y, max_z)),
+            children=Children(front=front, back=back))
+
+    @staticmethod
+    def read_array(io_stream, chunk_end):
+        return [AABBTreeNode(min=vecmath.Vector((min_x, min_y, min_z)),
+                             max=vecmath.Vector((max_x, max_y, max_z)),
+                             children=Children(front=front, back=back))
+                for (min_x, min_y, min_z, max_x, max_y, max_z, front, back)
+                in read_records(io_stream, chunk_end, _aabbtree_node)]
 
     @staticmethod
     def size():
         return 32
 
     def write(self, io_stream):
-        write_vector(self.min, io_stream)
-        write_vector(self.max, io_stream)
-        write_long(self.children.front, io_stream)
-        write_long(self.children.back, io_stream)
+        io_stream.write(_aabbtree_node.pack(
+            self.min.x,
+            self.min.y,
+            self.min.z,
+            self.max.x,
+            self.max.y,
+            self.max.z,
+            self.children.front,
+            self.children.back))
+
+    @staticmethod
+    def write_array(nodes, io_stream):
+        io_stream.write(b''.join([_aabbtree_node.pack(
+            node.min.x,
+            node.min.y,
+            node.min.z,
+            node.max.x,
+            node.max.y,
+            node.max.z,
+            node.children.front,
+            node.children.back) for node in nodes]))
 
     @staticmethod
     def parse(xml_node):
@@ -145,9 +166,9 @@ class AABBTree:
             if chunk_type == W3D_CHUNK_AABBTREE_HEADER:
                 result.header = AABBTreeHeader.read(io_stream)
             elif chunk_type == W3D_CHUNK_AABBTREE_POLYINDICES:
-                result.poly_indices = read_list(io_stream, subchunk_end, read_long)
+                result.poly_indices = read_long_list(io_stream, subchunk_end)
             elif chunk_type == W3D_CHUNK_AABBTREE_NODES:
-                result.nodes = read_list(io_stream, subchunk_end, AABBTreeNode.read)
+                result.nodes = AABBTreeNode.read_array(io_stream, subchunk_end)
             else:
                 skip_unknown_chunk(context, io_stream, chunk_type, chunk_size)
         return result
@@ -160,19 +181,21 @@ class AABBTree:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_AABBTREE, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_AABBTREE, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
 
         if self.poly_indices:
             write_chunk_head(W3D_CHUNK_AABBTREE_POLYINDICES, io_stream, long_list_size(self.poly_indices, False))
-            write_list(self.poly_indices, io_stream, write_long)
+            write_long_list(self.poly_indices, io_stream)
 
         if self.nodes:
             write_chunk_head(
                 W3D_CHUNK_AABBTREE_NODES,
                 io_stream,
-                list_size(self.nodes, False))
-            write_list(self.nodes, io_stream, AABBTreeNode.write)
+                data_list_size(self.nodes, False, AABBTreeNode.size()))
+            AABBTreeNode.write_array(self.nodes, io_stream)
+
+        end_chunk(io_stream, chunk)
 
     @staticmethod
     def parse(xml_aabbtree):
@@ -1,7 +1,8 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 from io_mesh_w3d.w3x.io_xml import *
 
@@ -13,29 +14,16 @@ W3D_NORMTYPE_COLORS = 5
 W3D_NORMTYPE_ALPHA = 7
 
 
+@schema(W3D_CHUNK_SHADER_MATERIAL_HEADER, [
+    ('version', 'ubyte'),
+    ('type_name', 'long_string'),
+    ('technique', 'long')])
 class ShaderMaterialHeader:
     def __init__(self, version=1, type_name='', technique=0):
         self.version = version
         self.type_name = type_name
         self.technique = technique
 
-    @staticmethod
-    def read(io_stream):
-        return ShaderMaterialHeader(
-            version=read_ubyte(io_stream),
-            type_name=read_long_fixed_string(io_stream),
-            technique=read_long(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(37, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_SHADER_MATERIAL_HEADER, io_stream, self.size(False))
-        write_ubyte(self.version, io_stream)
-        write_long_fixed_string(self.type_name, io_stream)
-        write_long(self.technique, io_stream)
-
 
 W3D_CHUNK_SHADER_MATERIAL_PROPERTY = 0x53
 
@@ -49,7 +37,7 @@ BOOL_PROPERTY = 7
 
 
 class ShaderMaterialProperty:
-    def __init__(self, type=0, name='', value=Vector((1.0, 1.0, 1.0, 1.0))):
+    def __init__(self, type=0, name='', value=vecmath.Vector((1.0, 1.0, 1.0, 1.0))):
         self.type = type
         self.name = name
         self.value = value
@@ -68,7 +56,7 @@ class ShaderMaterialProperty:
         result = ShaderMaterialProperty(
             type=prop_type,
             name=name,
-            value=Vector((1.0, 1.0, 1.0, 1.0)))
+            value=vecmath.Vector((1.0, 1.0, 1.0, 1.0)))
 
         if result.type == STRING_PROPERTY:
             read_long(io_stream)  # num chars
@@ -131,7 +119,7 @@ class ShaderMaterialProperty:
         type_name = xml_constant.tag
         constant = ShaderMaterialProperty(
             name=xml_constant.get('Name'),
-            value=Vector((1.0, 1.0, 1.0, 1.0)))
+            value=vecmath.Vector((1.0, 1.0, 1.0, 1.0)))
 
         values = []
         for xml_value in xml_constant.findall('Value'):
@@ -235,9 +223,10 @@ class ShaderMaterial:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_SHADER_MATERIAL, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_SHADER_MATERIAL, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
         write_list(self.properties, io_stream, ShaderMaterialProperty.write)
+        end_chunk(io_stream, chunk)
 
     @staticmethod
     def parse(xml_fx_shader):
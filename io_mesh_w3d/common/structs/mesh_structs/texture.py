@@ -69,12 +69,13 @@ class Texture:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_TEXTURE, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_TEXTURE, io_stream, has_sub_chunks=True)
         write_chunk_head(W3D_CHUNK_TEXTURE_NAME, io_stream, text_size(self.file, False))
         write_string(self.file, io_stream)
 
         if self.texture_info is not None:
             self.texture_info.write(io_stream)
+        end_chunk(io_stream, chunk)
 
     @staticmethod
     def parse(xml_texture):
@@ -1,7 +1,11 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+import struct
+import sys
+from array import array
+
+from io_mesh_w3d.w3d import vecmath
 from io_mesh_w3d.w3d.io_binary import *
 from io_mesh_w3d.w3x.io_xml import *
 
@@ -40,9 +44,13 @@ surface_types = [
     'UnderwaterDirt',
     'UnderwaterTiberiumDirt']
 
+_triangle = struct.Struct('<4L4f')
+
 
 class Triangle:
-    def __init__(self, vert_ids=None, surface_type=13, normal=Vector((0.0, 0.0, 0.0)), distance=0.0):
+    __slots__ = ('vert_ids', 'surface_type', 'normal', 'distance')
+
+    def __init__(self, vert_ids=None, surface_type=13, normal=vecmath.Vector((0.0, 0.0, 0.0)), distance=0.0):
         self.vert_ids = vert_ids if vert_ids is not None else []
         self.surface_type = surface_type
         self.normal = normal
@@ -67,23 +75,48 @@ class Triangle:
 
     @staticmethod
     def read(io_stream):
+        (v0, v1, v2, surface_type, x, y, z, distance) = _triangle.unpack(io_stream.read(_triangle.size))
         return Triangle(
-            vert_ids=[read_ulong(io_stream), read_ulong(io_stream), read_ulong(io_stream)],
-            surface_type=read_ulong(io_stream),
-            normal=read_vector(io_stream),
-            distance=read_float(io_stream))
+            vert_ids=[v0, v1, v2],
+            surface_type=surface_type,
+            normal=vecmath.Vector((x, y, z)),
+            distance=distance)
+
+    @staticmethod
+    def read_array(io_stream, chunk_end):
+        return [Triangle(vert_ids=[v0, v1, v2], surface_type=surface_type, normal=vecmath.Vector((x, y, z)),
+                         distance=distance)
+                for (v0, v1, v2, surface_type, x, y, z, distance) in read_records(io_stream, chunk_end, _triangle)]
 
     @staticmethod
     def size():
         return 32
 
     def write(self, io_stream):
-        write_ulong(self.vert_ids[0], io_stream)
-        write_ulong(self.vert_ids[1], io_stream)
-        write_ulong(self.vert_ids[2], io_stream)
-        write_ulong(self.surface_type, io_stream)
-        write_vector(self.normal, io_stream)
-        write_float(self.distance, io_stream)
+        io_stream.write(_triangle.pack(
+            self.vert_ids[0],
+            self.vert_ids[1],
+            self.vert_ids[2],
+            self.surface_type,
+            self.normal.x,
+            self.normal.y,
+            self.normal.z,
+            self.distance))
+
+    @staticmethod
+    def write_array(triangles, io_stream):
+        if isinstance(triangles, TriangleArray):
+            io_stream.write(triangles.tobytes())
+            return
+        io_stream.write(b''.join([_triangle.pack(
+            tri.vert_ids[0],
+            tri.vert_ids[1],
+            tri.vert_ids[2],
+            tri.surface_type,
+            tri.normal.x,
+            tri.normal.y,
+            tri.normal.z,
+            tri.distance) for tri in triangles]))
 
     @staticmethod
     def parse(xml_triangle):
@@ -105,3 +138,81 @@ class Triangle:
         create_vector(self.normal, triangle, 'Nrm')
         xml_distance = create_node(triangle, 'Dist')
         xml_distance.text = format(self.distance)
+
+
+class TriangleArray:
+    # compact list of triangles, each field is stored in its own flat typed array
+    # and Triangle objects are only created when an element is accessed
+    def __init__(self):
+        self.vert_ids = array('I')
+        self.surface_types = array('I')
+        self.normals = VectorArray()
+        self.distances = array('f')
+
+    @staticmethod
+    def read(io_stream, chunk_end):
+        data = read_chunk_data(io_stream, chunk_end)
+        data = data[:len(data) - len(data) % _triangle.size]
+        ints = read_typed_array('I', data)
+        floats = read_typed_array('f', data)
+        count = len(data) // _triangle.size
+
+        result = TriangleArray()
+        result.vert_ids = array('I', bytes(count * 12))
+        result.normals.data = array('f', bytes(count * 12))
+        for i in range(3):
+            result.vert_ids[i::3] = ints[i::8]
+            result.normals.data[i::3] = floats[4 + i::8]
+        result.surface_types = ints[3::8]
+        result.distances = floats[7::8]
+        return result
+
+    def __len__(self):
+        return len(self.surface_types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('triangle array index out of range')
+        return Triangle(
+            vert_ids=list(self.vert_ids[index * 3:index * 3 + 3]),
+            surface_type=self.surface_types[index],
+            normal=self.normals[index],
+            distance=self.distances[index])
+
+    def __setitem__(self, index, triangle):
+        if index < 0:
+            index += len(self)
+        self.vert_ids[index * 3:index * 3 + 3] = array('I', triangle.vert_ids)
+        self.surface_types[index] = triangle.surface_type
+        self.normals[index] = triangle.normal
+        self.distances[index] = triangle.distance
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, triangle):
+        self.vert_ids.extend(triangle.vert_ids)
+        self.surface_types.append(triangle.surface_type)
+        self.normals.append(triangle.normal)
+        self.distances.append(triangle.distance)
+
+    def tobytes(self):
+        count = len(self)
+        data = bytearray(count * _triangle.size)
+        ints = memoryview(data).cast('I')
+        floats = memoryview(data).cast('f')
+        for i in range(3):
+            ints[i::8] = self.vert_ids[i::3]
+            floats[4 + i::8] = self.normals.data[i::3]
+        ints[3::8] = self.surface_types
+        floats[7::8] = self.distances
+        ints.release()
+        floats.release()
+        if sys.byteorder == 'big':
+            data = typed_array_bytes(array('I', data))
+        return bytes(data)
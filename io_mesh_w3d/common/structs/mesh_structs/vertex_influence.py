@@ -1,11 +1,18 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
+import struct
+from array import array
+
 from io_mesh_w3d.w3d.io_binary import *
 from io_mesh_w3d.w3x.io_xml import *
 
+_vertex_influence = struct.Struct('<4H')
+
 
 class VertexInfluence:
+    __slots__ = ('bone_idx', 'xtra_idx', 'bone_inf', 'xtra_inf')
+
     def __init__(self, bone_idx=0, xtra_idx=0, bone_inf=0.0, xtra_inf=0.0):
         self.bone_idx = bone_idx
         self.xtra_idx = xtra_idx
@@ -14,21 +21,39 @@ class VertexInfluence:
 
     @staticmethod
     def read(io_stream):
+        (bone_idx, xtra_idx, bone_inf, xtra_inf) = _vertex_influence.unpack(io_stream.read(_vertex_influence.size))
         return VertexInfluence(
-            bone_idx=read_ushort(io_stream),
-            xtra_idx=read_ushort(io_stream),
-            bone_inf=read_ushort(io_stream) / 100,
-            xtra_inf=read_ushort(io_stream) / 100)
+            bone_idx=bone_idx,
+            xtra_idx=xtra_idx,
+            bone_inf=bone_inf / 100,
+            xtra_inf=xtra_inf / 100)
+
+    @staticmethod
+    def read_array(io_stream, chunk_end):
+        return [VertexInfluence(bone_idx=bone_idx, xtra_idx=xtra_idx, bone_inf=bone_inf / 100, xtra_inf=xtra_inf / 100)
+                for (bone_idx, xtra_idx, bone_inf, xtra_inf) in read_records(io_stream, chunk_end, _vertex_influence)]
 
     @staticmethod
     def size():
         return 8
 
     def write(self, io_stream):
-        write_ushort(self.bone_idx, io_stream)
-        write_ushort(self.xtra_idx, io_stream)
-        write_ushort(int(self.bone_inf * 100), io_stream)
-        write_ushort(int(self.xtra_inf * 100), io_stream)
+        io_stream.write(_vertex_influence.pack(
+            self.bone_idx,
+            self.xtra_idx,
+            int(self.bone_inf * 100),
+            int(self.xtra_inf * 100)))
+
+    @staticmethod
+    def write_array(influences, io_stream):
+        if isinstance(influences, VertexInfluenceArray):
+            io_stream.write(influences.tobytes())
+            return
+        io_stream.write(b''.join([_vertex_influence.pack(
+            inf.bone_idx,
+            inf.xtra_idx,
+            int(inf.bone_inf * 100),
+            int(inf.xtra_inf * 100)) for inf in influences]))
 
     @staticmethod
     def parse(xml_vertex_influence, xml_vertex_influence2=None):
@@ -50,3 +75,46 @@ class VertexInfluence:
             influence2 = create_node(parent2, 'I')
             influence2.set('Bone', str(self.xtra_idx))
             influence2.set('Weight', format(self.xtra_inf))
+
+
+class VertexInfluenceArray:
+    # compact list of vertex influences, the raw bone indices and weights of all vertices
+    # are stored in one flat array and VertexInfluence objects are only created on access
+    def __init__(self, data=None):
+        self.data = data if data is not None else array('H')
+
+    @staticmethod
+    def read(io_stream, chunk_end):
+        data = read_chunk_data(io_stream, chunk_end)
+        return VertexInfluenceArray(read_typed_array('H', data[:len(data) - len(data) % _vertex_influence.size]))
+
+    def __len__(self):
+        return len(self.data) // 4
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('vertex influence array index out of range')
+        (bone_idx, xtra_idx, bone_inf, xtra_inf) = self.data[index * 4:index * 4 + 4]
+        return VertexInfluence(
+            bone_idx=bone_idx,
+            xtra_idx=xtra_idx,
+            bone_inf=bone_inf / 100,
+            xtra_inf=xtra_inf / 100)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, influence):
+        self.data.extend([
+            influence.bone_idx,
+            influence.xtra_idx,
+            int(influence.bone_inf * 100),
+            int(influence.xtra_inf * 100)])
+
+    def tobytes(self):
+        return typed_array_bytes(self.data)
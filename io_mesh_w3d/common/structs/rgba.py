@@ -1,11 +1,17 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
+import struct
+
 from io_mesh_w3d.w3d.io_binary import *
 from io_mesh_w3d.w3x.io_xml import *
 
+_rgba = struct.Struct('<4B')
+
 
 class RGBA:
+    __slots__ = ('r', 'g', 'b', 'a')
+
     def __init__(self, vec=None, a=None, scale=255, r=0, g=0, b=0):
         if vec is None:
             self.r = r
@@ -27,10 +33,12 @@ class RGBA:
 
     @staticmethod
     def read(io_stream):
-        return RGBA(r=read_ubyte(io_stream),
-                    g=read_ubyte(io_stream),
-                    b=read_ubyte(io_stream),
-                    a=read_ubyte(io_stream))
+        (r, g, b, a) = _rgba.unpack(io_stream.read(_rgba.size))
+        return RGBA(r=r, g=g, b=b, a=a)
+
+    @staticmethod
+    def read_array(io_stream, chunk_end):
+        return [RGBA(r=r, g=g, b=b, a=a) for (r, g, b, a) in read_records(io_stream, chunk_end, _rgba)]
 
     @staticmethod
     def read_f(io_stream):
@@ -51,10 +59,11 @@ class RGBA:
         return 4
 
     def write(self, io_stream):
-        write_ubyte(self.r, io_stream)
-        write_ubyte(self.g, io_stream)
-        write_ubyte(self.b, io_stream)
-        write_ubyte(self.a, io_stream)
+        io_stream.write(_rgba.pack(self.r, self.g, self.b, self.a))
+
+    @staticmethod
+    def write_array(colors, io_stream):
+        io_stream.write(b''.join([_rgba.pack(color.r, color.g, color.b, color.a) for color in colors]))
 
     def write_f(self, io_stream):
         write_float(self.r / 255, io_stream)
@@ -0,0 +1,135 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import mmap
+import os
+import struct
+
+BIG_MAGICS = [b'BIGF', b'BIG4']
+
+# the archive size is stored little endian, everything else in the index big endian
+_big_header = struct.Struct('<4sL')
+_big_counts = struct.Struct('>2L')
+_big_entry = struct.Struct('>2L')
+
+
+def normalize_name(name):
+    return name.replace('\\', '/').lower()
+
+
+class BigEntry:
+    def __init__(self, name='', offset=0, size=0):
+        self.name = name
+        self.offset = offset
+        self.size = size
+
+
+def decode_name(name):
+    # the names are stored in the windows code page of the game, bytes which are undefined
+    # in cp1252 are kept as latin-1
+    try:
+        return name.decode('cp1252')
+    except UnicodeDecodeError:
+        return name.decode('latin-1')
+
+
+def read_big_index(data):
+    try:
+        (count, _) = _big_counts.unpack_from(data, _big_header.size)
+    except struct.error:
+        raise ValueError('truncated .big index')
+
+    entries = []
+    position = _big_header.size + _big_counts.size
+    for _ in range(count):
+        if position + _big_entry.size > len(data):
+            raise ValueError('truncated .big index')
+        (offset, size) = _big_entry.unpack_from(data, position)
+        position += _big_entry.size
+        end = data.find(b'\x00', position)
+        if end == -1:
+            raise ValueError('truncated .big index')
+        name = decode_name(data[position:end])
+        position = end + 1
+        entries.append(BigEntry(name=name, offset=offset, size=size))
+    return entries
+
+
+class BigArchive:
+    # index of a SAGE .big archive, the archive is memory mapped and the entries are
+    # sliced out of the mapping when they are read
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries = read_big_index(self.data)
+        self.lookup = {normalize_name(entry.name): entry for entry in self.entries}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def find(self, name):
+        return self.lookup.get(normalize_name(name))
+
+    def read(self, name):
+        entry = self.find(name)
+        if entry is None:
+            return None
+        return self.data[entry.offset:entry.offset + entry.size]
+
+    def close(self):
+        self.data.close()
+
+
+def is_big_archive(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as file:
+        return file.read(4) in BIG_MAGICS
+
+
+_archives = {}
+
+
+def open_big_archive(path):
+    # the same archives are searched over and over again for meshes, skeletons and textures,
+    # so they are kept open until the file changes or the import is finished
+    key = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    if key in _archives and _archives[key][0] == mtime:
+        return _archives[key][1]
+
+    if key in _archives:
+        _archives[key][1].close()
+    archive = BigArchive(path)
+    _archives[key] = (mtime, archive)
+    return archive
+
+
+def close_big_archives():
+    # the archives are closed at the end of each import
+    for (_, archive) in _archives.values():
+        archive.close()
+    _archives.clear()
+
+
+def write_big_archive(path, files, magic=b'BIGF'):
+    # files is a list of (name, data) tuples, names use backslashes like the game archives
+    names = [name.replace('/', '\\').encode('cp1252') + b'\x00' for (name, _) in files]
+    index_size = _big_header.size + _big_counts.size + sum(_big_entry.size + len(name) for name in names)
+
+    offset = index_size
+    index = []
+    for (name, (_, data)) in zip(names, files):
+        index.append(_big_entry.pack(offset, len(data)) + name)
+        offset += len(data)
+
+    with open(path, 'wb') as file:
+        file.write(_big_header.pack(magic, offset))
+        file.write(_big_counts.pack(len(files), index_size))
+        file.write(b''.join(index))
+        for (_, data) in files:
+            file.write(data)
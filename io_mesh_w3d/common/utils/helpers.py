@@ -4,8 +4,13 @@
 import bpy
 import os
 import sys
+import zipfile
 from mathutils import Quaternion, Matrix, Vector
 from bpy_extras.image_utils import load_image
+from io_mesh_w3d.asset_index import find_indexed_asset
+from io_mesh_w3d.common.utils.big_archive import *
+from io_mesh_w3d.common.utils.search_path import *
+from io_mesh_w3d.w3d.io_binary import BinaryReader
 
 
 def make_transform_matrix(loc, rot):
@@ -26,15 +31,70 @@ def switch_to_pose(rig, pose):
         bpy.context.view_layer.update()
 
 
-def insensitive_path(path):
-    # find the io_stream on unix
+def insensitive_path(context, path):
+    # find the io_stream on unix, during an import the directory listings of its search path are reused
     directory = os.path.dirname(path)
-    name = os.path.basename(path)
-
-    for io_stream_name in os.listdir(directory):
-        if io_stream_name.lower() == name.lower():
-            path = os.path.join(directory, io_stream_name)
-    return path
+    if directory and not os.path.isdir(directory):
+        return path
+
+    search_path = getattr(context, 'search_path', None)
+    if search_path is None:
+        search_path = SearchPath([directory])
+    found = search_path.find_in(directory, [os.path.basename(path)])
+    return found if found is not None else path
+
+
+def find_archive_member(path):
+    # path/to/pack.zip/member/name.w3d refers to a member of the zip or .big archive path/to/pack.zip
+    found = split_archive_path(path)
+    if found is None or found[0] == path:
+        return None
+    (archive, member) = found
+
+    if is_big_archive(archive):
+        entry = open_big_archive(archive).find(member)
+        return (archive, entry.name) if entry is not None else None
+
+    if not zipfile.is_zipfile(archive):
+        return None
+    with zipfile.ZipFile(archive) as zip_file:
+        for name in zip_file.namelist():
+            if name.lower() == member.lower():
+                return archive, name
+    return None
+
+
+def read_archive_member(path):
+    found = find_archive_member(path)
+    if found is None:
+        return None
+    (archive, name) = found
+    if is_big_archive(archive):
+        return open_big_archive(archive).read(name)
+    with zipfile.ZipFile(archive) as zip_file:
+        return zip_file.read(name)
+
+
+def open_archive_member(path):
+    found = find_archive_member(path)
+    if found is None:
+        return None
+    (archive, name) = found
+    if is_big_archive(archive):
+        return BinaryReader(open_big_archive(archive).read(name))
+    return zipfile.ZipFile(archive).open(name)
+
+
+def file_exists(path):
+    return os.path.exists(path) or find_archive_member(path) is not None
+
+
+def load_image_data(name, data):
+    # images from archives are packed into the blend file instead of being extracted
+    img = bpy.data.images.new(name, width=1, height=1)
+    img.pack(data=data, data_len=len(data))
+    img.source = 'FILE'
+    return img
 
 
 def get_collection(hlod=None, index=''):
@@ -111,6 +171,12 @@ def create_uvlayer_2(context, mesh, b_mesh, tris, mat_pass):
 extensions = ['.dds', '.tga', '.jpg', '.jpeg', '.png', '.bmp']
 
 
+def texture_search_path(context):
+    # the directory of the imported file is searched first, then the configured search paths
+    directories = [os.path.dirname(context.filepath)] + split_search_paths(getattr(context, 'texture_paths', ''))
+    return SearchPath(directories)
+
+
 def find_texture(context, file, name=None):
     file = file.rsplit('.', 1)[0]
     if name is None:
@@ -123,17 +189,32 @@ def find_texture(context, file, name=None):
         if combined in bpy.data.images:
             return bpy.data.images[combined]
 
-    path = insensitive_path(os.path.dirname(context.filepath))
-    filepath = path + os.path.sep + file
+    directory = os.path.dirname(context.filepath)
+    filepath = directory + os.path.sep + file
+    search_path = getattr(context, 'search_path', None)
+    if search_path is None:
+        search_path = texture_search_path(context)
 
     img = None
-    for extension in extensions:
-        img = load_image(filepath + extension, check_existing=True)
+    for found in search_path.candidates([file + extension for extension in extensions]):
+        if os.path.isfile(found):
+            img = load_image(found, check_existing=True)
+        else:
+            data = read_archive_member(found)
+            img = load_image_data(file, data) if data is not None else None
         if img is not None:
-            context.info('loaded texture: ' + filepath + extension)
+            context.info('loaded texture: ' + found)
             img.name = file
             break
 
+    if img is None:
+        indexed = find_indexed_asset(context, 'image', file)
+        if indexed is not None:
+            img = load_image(indexed, check_existing=True)
+        if img is not None:
+            context.info('loaded texture: ' + indexed)
+            img.name = file
+
     if img is None:
         context.warning(
             f'texture not found: {filepath} {extensions}. Make sure it is right next to the file you are importing!')
@@ -3,18 +3,35 @@
 
 import bpy
 import bmesh
+from mathutils import Vector
 from io_mesh_w3d.common.utils.material_import import *
 
 
+def fill_mesh_from_arrays(mesh, verts, triangles):
+    # like from_pydata, but the numpy arrays are copied by foreach_set without creating python objects
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set('co', numpy.ascontiguousarray(verts, dtype=numpy.float32).ravel())
+    mesh.loops.add(len(triangles) * 3)
+    mesh.loops.foreach_set('vertex_index', numpy.ascontiguousarray(triangles, dtype=numpy.int32).ravel())
+    mesh.polygons.add(len(triangles))
+    mesh.polygons.foreach_set('loop_start', numpy.arange(0, len(triangles) * 3, 3, dtype=numpy.int32))
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set('loop_total', numpy.full(len(triangles), 3, dtype=numpy.int32))
+    mesh.update(calc_edges=True)
+
+
 def create_mesh(context, mesh_struct, coll):
     context.info(f'creating mesh \'{mesh_struct.name()}\'')
 
-    triangles = []
-    for triangle in mesh_struct.triangles:
-        triangles.append(tuple(triangle.vert_ids))
-
     mesh = bpy.data.meshes.new(mesh_struct.name())
-    mesh.from_pydata(mesh_struct.verts, [], triangles)
+    if mesh_struct.triangle_ids is not None:
+        triangles = mesh_struct.triangle_ids
+        fill_mesh_from_arrays(mesh, mesh_struct.verts, triangles)
+    else:
+        triangles = []
+        for triangle in mesh_struct.triangles:
+            triangles.append(tuple(triangle.vert_ids))
+        mesh.from_pydata(mesh_struct.verts, [], triangles)
 
     # fix repeated opeing bug: blender will rename the new mesh with .001, .002 suffix
     # we need to save the actual name of the mesh!
@@ -146,10 +163,10 @@ def rig_mesh(mesh_struct, hierarchy, rig, sub_object=None):
                     mesh_ob.vertex_groups.new(name=xtra_pivot.name)
                 mesh_ob.vertex_groups[xtra_pivot.name].add([i], xtra_weight, 'ADD')
 
-            mesh.vertices[i].co = matrix @ mesh_struct.verts[i]
+            mesh.vertices[i].co = matrix @ Vector(mesh_struct.verts[i])
 
             _, rotation, _ = matrix.decompose()
-            normals[i] = rotation @ mesh_struct.normals[i]
+            normals[i] = rotation @ Vector(mesh_struct.normals[i])
 
         modifier = mesh_ob.modifiers.new(rig.name, 'ARMATURE')
         modifier.object = rig
@@ -0,0 +1,129 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import os
+import re
+import zipfile
+
+from io_mesh_w3d.common.utils.big_archive import *
+
+
+class DirectoryIndex:
+    # lower case names of the entries of a directory mapped to their paths
+    def __init__(self, directory):
+        self.directory = directory
+        self.lookup = {}
+        with os.scandir(directory or os.curdir) as entries:
+            for entry in entries:
+                self.lookup[entry.name.lower()] = os.path.join(directory, entry.name)
+
+    def __len__(self):
+        return len(self.lookup)
+
+    def find(self, name):
+        return self.lookup.get(name.lower())
+
+
+def split_search_paths(paths):
+    # search paths of the import settings are separated by semicolons
+    return [path.strip() for path in paths.split(';') if path.strip()]
+
+
+def split_reference(name):
+    # references may contain subdirectories with either separator, e.g. 'sub\tex.dds'
+    return [part for part in re.split(r'[\\/]', name) if part]
+
+
+def split_archive_path(path):
+    # path/to/pack.big/art/textures refers to art/textures inside the .big or zip archive path/to/pack.big
+    archive = path
+    while not os.path.isfile(archive):
+        parent = os.path.dirname(archive)
+        if not parent or parent == archive:
+            return None
+        archive = parent
+
+    if archive == path:
+        return archive, ''
+    return archive, os.path.relpath(path, archive).replace(os.path.sep, '/')
+
+
+def archive_members(archive):
+    if is_big_archive(archive):
+        return [entry.name for entry in open_big_archive(archive)]
+    if zipfile.is_zipfile(archive):
+        with zipfile.ZipFile(archive) as zip_file:
+            return zip_file.namelist()
+    return None
+
+
+class ArchiveIndex:
+    # lower case names of the members and subdirectories of a directory inside an archive
+    # mapped to their paths, e.g. of TexturesZH.big/Art/Textures
+    def __init__(self, directory, members, prefix):
+        self.directory = directory
+        self.lookup = {}
+        prefix = split_reference(prefix.lower())
+        level = len(prefix)
+        for member in members:
+            parts = split_reference(member)
+            if len(parts) > level and [part.lower() for part in parts[:level]] == prefix:
+                self.lookup[parts[level].lower()] = os.path.join(directory, parts[level])
+
+    def __len__(self):
+        return len(self.lookup)
+
+    def find(self, name):
+        return self.lookup.get(name.lower())
+
+
+class SearchPath:
+    # directories which are searched in order for files with case insensitive names,
+    # e.g. the directory of the imported file followed by the art of the mod and the game.
+    # the directories are listed once and kept as long as the search path, which is
+    # created for each import. directories inside archives yield the paths of the members
+    def __init__(self, directories):
+        self.directories = [directory for directory in directories if directory is not None]
+        self.indices = {}
+
+    def open_index(self, directory):
+        if directory not in self.indices:
+            try:
+                self.indices[directory] = DirectoryIndex(directory)
+            except OSError:
+                self.indices[directory] = self.open_archive_index(directory)
+        return self.indices[directory]
+
+    def open_archive_index(self, directory):
+        # search paths and references may point into archives, e.g. TexturesZH.big/Art/Textures
+        found = split_archive_path(directory)
+        if found is None:
+            return None
+        (archive, prefix) = found
+        try:
+            members = archive_members(archive)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+        return ArchiveIndex(directory, members, prefix) if members is not None else None
+
+    def find_in(self, directory, parts):
+        # the subdirectories of a reference are matched case insensitively as well
+        for part in parts[:-1]:
+            index = self.open_index(directory)
+            directory = index.find(part) if index is not None else None
+            if directory is None:
+                return None
+        index = self.open_index(directory)
+        return index.find(parts[-1]) if index is not None else None
+
+    def candidates(self, names):
+        # all files with one of the names, ordered by directory and then by name
+        for directory in self.directories:
+            for name in names:
+                parts = split_reference(name)
+                path = self.find_in(directory, parts) if parts else None
+                if path is not None:
+                    yield path
+
+    def find(self, names):
+        return next(self.candidates(names), None)
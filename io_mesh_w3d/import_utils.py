@@ -3,6 +3,7 @@
 
 import bpy
 
+from io_mesh_w3d.asset_index import open_asset_index
 from io_mesh_w3d.common.utils.mesh_import import *
 from io_mesh_w3d.common.utils.hierarchy_import import *
 from io_mesh_w3d.common.utils.animation_import import *
@@ -10,6 +11,42 @@ from io_mesh_w3d.common.utils.box_import import *
 from io_mesh_w3d.w3d.utils.dazzle_import import *
 
 
+def open_import(context):
+    # the directories of the texture search path are listed and the asset index is opened
+    # once for the whole import, archives stay open until the import is closed
+    context.search_path = texture_search_path(context)
+    context.asset_database = open_asset_index(context)
+
+
+def close_import(context):
+    if context.asset_database is not None:
+        context.asset_database.close()
+    context.asset_database = None
+    context.search_path = None
+    close_big_archives()
+
+
+def get_selection(context, names=None):
+    if names is None:
+        names = context.mesh_names.split(',')
+    names = [name.strip() for name in names if name.strip()]
+    if not names:
+        return None
+    return set(names)
+
+
+def is_selected(selection, identifier):
+    return selection is None or identifier in selection or identifier.split('.')[-1] in selection
+
+
+def filter_hlod(hlod, selection):
+    if hlod is None or selection is None:
+        return
+    for lod_array in hlod.lod_arrays:
+        lod_array.sub_objects = [obj for obj in lod_array.sub_objects if is_selected(selection, obj.identifier)]
+        lod_array.header.model_count = len(lod_array.sub_objects)
+
+
 def create_data(context, meshes, hlod=None, hierarchy=None, boxes=None, animation=None, compressed_animation=None,
                 dazzles=None):
     boxes = boxes if boxes is not None else []
@@ -0,0 +1,451 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# headless recomputation of the mesh data which is derived from the vertices and triangles:
+# triangle planes, bounding box and sphere, tangents and bitangents and missing vertex normals.
+# only the affected sub chunks of w3d meshes and elements of w3x meshes are replaced, everything
+# else is written back unchanged. with numpy all meshes are processed with array operations,
+# without it the same is done with the vecmath types.
+
+import os
+from array import array
+from functools import partial
+
+from io_mesh_w3d.batch_convert import convert_files, find_files, is_w3x
+from io_mesh_w3d.common.structs.mesh import (Mesh, VERTEX_CHANNEL_BITANGENT, VERTEX_CHANNEL_NORMAL,
+                                             VERTEX_CHANNEL_TANGENT, W3D_CHUNK_BITANGENTS, W3D_CHUNK_MESH,
+                                             W3D_CHUNK_MESH_HEADER, W3D_CHUNK_TANGENTS, W3D_CHUNK_TRIANGLES,
+                                             W3D_CHUNK_VERTEX_NORMALS, W3D_CHUNK_VERTICES, W3D_CHUNK_VERTICES_2)
+from io_mesh_w3d.common.structs.mesh_structs.triangle import Triangle, TriangleArray
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.chunk_index import ChunkIndex
+from io_mesh_w3d.w3d.io_binary import (BinaryReader, BinaryWriter, HEAD, VectorArray, begin_chunk, end_chunk,
+                                       read_chunk_head, write_chunk_head, write_vector_list)
+from io_mesh_w3d.w3d.parallel import MessageLog
+from io_mesh_w3d.w3d.utils.helpers import data_list_size, vec_list_size
+from io_mesh_w3d.w3x.io_xml import create_named_root, create_object_list, create_vector, find_root, write
+from io_mesh_w3d.w3x.structs.mesh_structs.bounding_box import BoundingBox
+from io_mesh_w3d.w3x.structs.mesh_structs.bounding_sphere import BoundingSphere
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+PARTS = ['planes', 'bounds', 'sphere', 'normals', 'tangents']
+
+# uv triangles with a smaller area do not define a tangent direction
+MIN_UV_AREA = 1e-12
+
+W3D_FIELD_CHUNKS = {
+    'header': W3D_CHUNK_MESH_HEADER,
+    'normals': W3D_CHUNK_VERTEX_NORMALS,
+    'tangents': W3D_CHUNK_TANGENTS,
+    'bitangents': W3D_CHUNK_BITANGENTS,
+    'triangles': W3D_CHUNK_TRIANGLES}
+
+
+##########################################################################
+# Geometry
+##########################################################################
+
+
+def vertex_ids(triangles):
+    if isinstance(triangles, TriangleArray):
+        return [tuple(triangles.vert_ids[i:i + 3]) for i in range(0, len(triangles.vert_ids), 3)]
+    return [tuple(triangle.vert_ids) for triangle in triangles]
+
+
+def vertex_ids_numpy(triangles):
+    if isinstance(triangles, TriangleArray):
+        return numpy.frombuffer(triangles.vert_ids, dtype=numpy.uint32).reshape(-1, 3).astype(numpy.int64)
+    return numpy.array(vertex_ids(triangles), dtype=numpy.int64).reshape(-1, 3)
+
+
+def vectors(values, width=3):
+    return [vecmath.Vector(tuple(value)[:width]) for value in values]
+
+
+def vectors_numpy(values, width=3):
+    if isinstance(values, VectorArray):
+        data = numpy.frombuffer(values.data, dtype=numpy.float32).reshape(-1, values.width)
+    else:
+        data = numpy.array([tuple(value)[:width] for value in values], dtype=numpy.float64).reshape(-1, width)
+    return data[:, :width].astype(numpy.float64)
+
+
+def vector_array(rows):
+    return VectorArray(3, array('f', [c for row in rows for c in row]))
+
+
+def normalize_rows(rows):
+    lengths = numpy.linalg.norm(rows, axis=1)[:, None]
+    return numpy.divide(rows, lengths, out=numpy.zeros_like(rows), where=lengths > 0.0)
+
+
+def triangle_planes(verts, ids):
+    # the distance is the one of the plane from the origin: dot(normal, p) for all points p of the triangle
+    normals = []
+    distances = []
+    for (a, b, c) in ids:
+        normal = (verts[b] - verts[a]).cross(verts[c] - verts[a]).normalized()
+        normals.append(normal)
+        distances.append(normal.dot(verts[a]))
+    return normals, distances
+
+
+def triangle_planes_numpy(verts, ids):
+    p0 = verts[ids[:, 0]]
+    normals = normalize_rows(numpy.cross(verts[ids[:, 1]] - p0, verts[ids[:, 2]] - p0))
+    return normals.tolist(), numpy.einsum('ij,ij->i', normals, p0).tolist()
+
+
+def bounding_box(verts):
+    return vecmath.Vector([min(vert[i] for vert in verts) for i in range(3)]), \
+        vecmath.Vector([max(vert[i] for vert in verts) for i in range(3)])
+
+
+def bounding_box_numpy(verts):
+    return vecmath.Vector(verts.min(axis=0).tolist()), vecmath.Vector(verts.max(axis=0).tolist())
+
+
+def grow_sphere(center, radius, points):
+    # like the exporter the sphere is enlarged for each point outside of it, the enlarged
+    # sphere contains the previous one so points once inside stay inside
+    for point in points:
+        offset = point - center
+        distance = offset.length
+        if distance > radius:
+            delta = (distance - radius) / 2
+            radius += delta
+            center = center + offset * (delta / distance)
+    return center, radius
+
+
+def bounding_sphere(verts):
+    x = max(verts, key=lambda vert: (vert - verts[0]).length)
+    y = max(verts, key=lambda vert: (vert - x).length)
+    half = (x - y) / 2
+    return grow_sphere(y + half, half.length, verts)
+
+
+def bounding_sphere_numpy(verts):
+    x = verts[numpy.argmax(((verts - verts[0]) ** 2).sum(axis=1))]
+    y = verts[numpy.argmax(((verts - x) ** 2).sum(axis=1))]
+    half = (x - y) / 2
+    (center, radius) = (y + half, float(numpy.linalg.norm(half)))
+    outside = numpy.linalg.norm(verts - center, axis=1) > radius
+    return grow_sphere(vecmath.Vector(center.tolist()), radius, vectors(verts[outside].tolist()))
+
+
+def vertex_normals(verts, ids):
+    # area weighted average of the normals of the adjacent triangles
+    normals = [vecmath.Vector() for _ in verts]
+    for (a, b, c) in ids:
+        normal = (verts[b] - verts[a]).cross(verts[c] - verts[a])
+        for i in (a, b, c):
+            normals[i] += normal
+    return [normal.normalized() for normal in normals]
+
+
+def vertex_normals_numpy(verts, ids):
+    faces = numpy.cross(verts[ids[:, 1]] - verts[ids[:, 0]], verts[ids[:, 2]] - verts[ids[:, 0]])
+    normals = numpy.zeros_like(verts)
+    for i in range(3):
+        numpy.add.at(normals, ids[:, i], faces)
+    return normalize_rows(normals)
+
+
+def tangent_frame(normal, tangent, bitangent):
+    # orthogonalized like blender does, the w3d tangent is the negated blender
+    # bitangent and the w3d bitangent the blender tangent (3ds max orientation)
+    tangent = (tangent - normal * normal.dot(tangent)).normalized()
+    sign = -1.0 if normal.cross(tangent).dot(bitangent) < 0.0 else 1.0
+    return normal.cross(tangent) * -sign, tangent
+
+
+def vertex_tangents(verts, normals, uvs, ids):
+    tangents = [vecmath.Vector() for _ in verts]
+    bitangents = [vecmath.Vector() for _ in verts]
+    for (a, b, c) in ids:
+        (e1, e2) = (verts[b] - verts[a], verts[c] - verts[a])
+        (du1, dv1) = (uvs[b][0] - uvs[a][0], uvs[b][1] - uvs[a][1])
+        (du2, dv2) = (uvs[c][0] - uvs[a][0], uvs[c][1] - uvs[a][1])
+        area = du1 * dv2 - du2 * dv1
+        if abs(area) < MIN_UV_AREA:
+            continue
+        tangent = (e1 * dv2 - e2 * dv1) / area
+        bitangent = (e2 * du1 - e1 * du2) / area
+        for i in (a, b, c):
+            tangents[i] += tangent
+            bitangents[i] += bitangent
+
+    frames = [tangent_frame(normals[i].normalized(), tangents[i], bitangents[i]) for i in range(len(verts))]
+    return [frame[0] for frame in frames], [frame[1] for frame in frames]
+
+
+def vertex_tangents_numpy(verts, normals, uvs, ids):
+    (e1, e2) = (verts[ids[:, 1]] - verts[ids[:, 0]], verts[ids[:, 2]] - verts[ids[:, 0]])
+    (d1, d2) = (uvs[ids[:, 1]] - uvs[ids[:, 0]], uvs[ids[:, 2]] - uvs[ids[:, 0]])
+    area = d1[:, 0] * d2[:, 1] - d2[:, 0] * d1[:, 1]
+    scale = numpy.divide(1.0, area, out=numpy.zeros_like(area), where=numpy.abs(area) >= MIN_UV_AREA)[:, None]
+    face_tangents = (e1 * d2[:, 1:2] - e2 * d1[:, 1:2]) * scale
+    face_bitangents = (e2 * d1[:, 0:1] - e1 * d2[:, 0:1]) * scale
+
+    tangents = numpy.zeros_like(verts)
+    bitangents = numpy.zeros_like(verts)
+    for i in range(3):
+        numpy.add.at(tangents, ids[:, i], face_tangents)
+        numpy.add.at(bitangents, ids[:, i], face_bitangents)
+
+    normals = normalize_rows(normals)
+    tangents = normalize_rows(tangents - normals * numpy.einsum('ij,ij->i', normals, tangents)[:, None])
+    crossed = numpy.cross(normals, tangents)
+    sign = numpy.where(numpy.einsum('ij,ij->i', crossed, bitangents) < 0.0, -1.0, 1.0)[:, None]
+    return (crossed * -sign).tolist(), tangents.tolist()
+
+
+##########################################################################
+# Meshes
+##########################################################################
+
+
+def texture_coordinates(mesh):
+    for mat_pass in mesh.material_passes:
+        if mat_pass.tx_coords:
+            return mat_pass.tx_coords
+        if mat_pass.tx_stages and mat_pass.tx_stages[0].tx_coords:
+            return mat_pass.tx_stages[0].tx_coords[0]
+    return None
+
+
+def recompute_mesh(context, mesh, parts=None, use_numpy=True, has_tangents=False):
+    # returns the names of the mesh fields which were recomputed. tangents are only computed for
+    # meshes with shader materials (like the exporter does) or which already have tangents
+    parts = parts if parts is not None else PARTS
+    use_numpy = use_numpy and numpy is not None
+    if mesh.header is None or not mesh.verts:
+        return []
+
+    if use_numpy:
+        (verts, ids) = (vectors_numpy(mesh.verts), vertex_ids_numpy(mesh.triangles))
+    else:
+        (verts, ids) = (vectors(mesh.verts), vertex_ids(mesh.triangles))
+    if len(ids) and (ids.max() if use_numpy else max(max(row) for row in ids)) >= len(verts):
+        context.error(f'mesh \'{mesh.identifier()}\' has triangles with invalid vertex indices')
+        return []
+
+    fields = []
+    if 'planes' in parts and len(ids):
+        (normals, distances) = triangle_planes_numpy(verts, ids) if use_numpy else triangle_planes(verts, ids)
+        if isinstance(mesh.triangles, TriangleArray):
+            mesh.triangles.normals = vector_array(normals)
+            mesh.triangles.distances = array('f', distances)
+        else:
+            for (triangle, normal, distance) in zip(mesh.triangles, normals, distances):
+                triangle.normal = vecmath.Vector(normal)
+                triangle.distance = distance
+        fields.append('triangles')
+
+    if 'bounds' in parts:
+        (mesh.header.min_corner, mesh.header.max_corner) = \
+            bounding_box_numpy(verts) if use_numpy else bounding_box(verts)
+    if 'sphere' in parts:
+        (mesh.header.sph_center, mesh.header.sph_radius) = \
+            bounding_sphere_numpy(verts) if use_numpy else bounding_sphere(verts)
+
+    normals = None
+    if len(mesh.normals) == len(verts):
+        normals = vectors_numpy(mesh.normals) if use_numpy else vectors(mesh.normals)
+    elif 'normals' in parts:
+        normals = vertex_normals_numpy(verts, ids) if use_numpy else vertex_normals(verts, ids)
+        mesh.normals = vector_array(normals.tolist() if use_numpy else normals)
+        mesh.header.vert_channel_flags |= VERTEX_CHANNEL_NORMAL
+        fields.append('normals')
+
+    uvs = texture_coordinates(mesh)
+    if 'tangents' in parts and normals is not None and (mesh.shader_materials or mesh.tangents or has_tangents):
+        if uvs is None or len(uvs) != len(verts):
+            context.info(f'-> mesh \'{mesh.identifier()}\' has no texture coordinates to compute tangents from')
+        else:
+            uvs = vectors_numpy(uvs, 2) if use_numpy else vectors(uvs, 2)
+            (tangents, bitangents) = vertex_tangents_numpy(verts, normals, uvs, ids) if use_numpy \
+                else vertex_tangents(verts, normals, uvs, ids)
+            (mesh.tangents, mesh.bitangents) = (vector_array(tangents), vector_array(bitangents))
+            mesh.header.vert_channel_flags |= VERTEX_CHANNEL_TANGENT | VERTEX_CHANNEL_BITANGENT
+            fields.extend(['tangents', 'bitangents'])
+
+    mesh.header.vert_count = len(verts)
+    mesh.header.face_count = len(ids)
+    return ['header'] + fields
+
+
+##########################################################################
+# Files
+##########################################################################
+
+
+def field_chunk(mesh, field):
+    io_stream = BinaryWriter()
+    if field == 'header':
+        mesh.header.write(io_stream)
+    elif field == 'triangles':
+        write_chunk_head(W3D_CHUNK_TRIANGLES, io_stream, data_list_size(mesh.triangles, False, Triangle.size()))
+        Triangle.write_array(mesh.triangles, io_stream)
+    else:
+        data = getattr(mesh, field)
+        write_chunk_head(W3D_FIELD_CHUNKS[field], io_stream, vec_list_size(data, False))
+        write_vector_list(data, io_stream)
+    return io_stream.getvalue()
+
+
+def split_chunks(data):
+    # (chunk type, bytes of the whole chunk) of each sub chunk of a chunk
+    io_stream = BinaryReader(data)
+    io_stream.seek(HEAD)
+    result = []
+    while io_stream.tell() + HEAD <= len(data):
+        start = io_stream.tell()
+        (chunk_type, _, chunk_end) = read_chunk_head(io_stream)
+        result.append((chunk_type, data[start:chunk_end]))
+        io_stream.seek(chunk_end)
+    return result
+
+
+def insert_chunk(chunks, chunk_type, data, anchors, after):
+    positions = [i for (i, (other, _)) in enumerate(chunks) if other in anchors]
+    if not positions:
+        chunks.append((chunk_type, data))
+    elif after:
+        chunks.insert(positions[-1] + 1, (chunk_type, data))
+    else:
+        chunks.insert(positions[0], (chunk_type, data))
+
+
+def recompute_mesh_chunk(context, data, parts, use_numpy):
+    chunks = split_chunks(data)
+    types = [chunk_type for (chunk_type, _) in chunks]
+    mesh = Mesh.read(context, BinaryReader(data[HEAD:]), len(data) - HEAD, False, True)
+    fields = recompute_mesh(context, mesh, parts, use_numpy, W3D_CHUNK_TANGENTS in types)
+    if not fields:
+        return None
+
+    for field in fields:
+        chunk_type = W3D_FIELD_CHUNKS[field]
+        if chunk_type in types:
+            chunks[types.index(chunk_type)] = (chunk_type, field_chunk(mesh, field))
+        elif field == 'normals':
+            insert_chunk(chunks, chunk_type, field_chunk(mesh, field), [W3D_CHUNK_VERTICES, W3D_CHUNK_VERTICES_2],
+                         True)
+        else:
+            # the sub chunks are kept in the order the exporter writes them
+            insert_chunk(chunks, chunk_type, field_chunk(mesh, field), [W3D_CHUNK_TRIANGLES], False)
+        types = [chunk_type for (chunk_type, _) in chunks]
+
+    io_stream = BinaryWriter()
+    chunk = begin_chunk(W3D_CHUNK_MESH, io_stream, has_sub_chunks=True)
+    for (_, chunk_data) in chunks:
+        io_stream.write(chunk_data)
+    end_chunk(io_stream, chunk)
+    return io_stream.getvalue()
+
+
+def recompute_w3d(context, source, target, parts=None, use_numpy=True):
+    index = ChunkIndex.from_file(source)
+    source_data = index.io_stream.data
+    io_stream = BinaryWriter()
+    count = 0
+    end = 0
+    for entry in index:
+        end = entry.offset + HEAD + entry.size
+        data = source_data[entry.offset:end]
+        if entry.chunk_type == W3D_CHUNK_MESH:
+            recomputed = recompute_mesh_chunk(context, data, parts, use_numpy)
+            if recomputed is not None:
+                (data, count) = (recomputed, count + 1)
+        io_stream.write(data)
+    io_stream.write(source_data[end:])
+    index.close()
+    io_stream.save(target)
+    return count
+
+
+W3X_FIELD_ELEMENTS = {
+    'header': ['BoundingBox', 'BoundingSphere'],
+    'normals': ['Normals'],
+    'tangents': ['Tangents'],
+    'bitangents': ['Binormals'],
+    'triangles': ['Triangles']}
+
+
+def field_elements(mesh, field):
+    parent = create_named_root('W3DMesh')
+    if field == 'header':
+        BoundingBox(min=mesh.header.min_corner, max=mesh.header.max_corner).create(parent)
+        BoundingSphere(center=mesh.header.sph_center, radius=mesh.header.sph_radius).create(parent)
+    elif field == 'triangles':
+        create_object_list(parent, 'Triangles', mesh.triangles, Triangle.create)
+    else:
+        (name, item) = {'normals': ('Normals', 'N'), 'tangents': ('Tangents', 'T'),
+                        'bitangents': ('Binormals', 'B')}[field]
+        create_object_list(parent, name, getattr(mesh, field), create_vector, item)
+    return list(parent)
+
+
+def recompute_w3x(context, source, target, parts=None, use_numpy=True):
+    root = find_root(context, source)
+    if root is None:
+        return 0
+
+    count = 0
+    for xml_mesh in root.findall('W3DMesh'):
+        mesh = Mesh.parse(context, xml_mesh)
+        fields = recompute_mesh(context, mesh, parts, use_numpy)
+        if not fields:
+            continue
+        count += 1
+        for field in fields:
+            for element in field_elements(mesh, field):
+                tags = [child.tag for child in xml_mesh]
+                if element.tag in tags:
+                    xml_mesh[tags.index(element.tag)] = element
+                    continue
+                anchors = {'BoundingBox': [], 'BoundingSphere': ['BoundingBox'], 'Normals': ['Vertices'],
+                           'Tangents': ['Vertices', 'Normals'],
+                           'Binormals': ['Vertices', 'Normals', 'Tangents']}[element.tag]
+                positions = [i for (i, tag) in enumerate(tags) if tag in anchors]
+                xml_mesh.insert(positions[-1] + 1 if positions else 0, element)
+    write(root, target)
+    return count
+
+
+def recompute_file(source, target=None, parts=None, use_numpy=True):
+    # runs in the worker processes like convert_file, the file is rewritten in place without a target
+    log = MessageLog()
+    target = target if target is not None else source
+    try:
+        directory = os.path.dirname(target)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        recompute = recompute_w3x if is_w3x(source) else recompute_w3d
+        count = recompute(log, source, target, parts, use_numpy)
+        log.info(f'-> recomputed {count} meshes: {target}')
+    except Exception as e:
+        log.error(f'failed to recompute {source}: {e}')
+    return log.messages
+
+
+def find_recomputations(source, target=None):
+    # (source path, target path) pairs, without a target the files are rewritten in place
+    result = []
+    for path in find_files([source]):
+        if target is None:
+            result.append((path, path))
+            continue
+        relative = os.path.relpath(path, source) if os.path.isdir(source) else os.path.basename(path)
+        result.append((path, os.path.join(target, relative)))
+    return result
+
+
+def recompute_files(context, recomputations, parts=None, max_workers=None):
+    return convert_files(context, recomputations, max_workers, partial(recompute_file, parts=parts), 'recomputed')
@@ -0,0 +1,307 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# checks the references between the files of a mod directory: container and animation
+# hierarchies, container sub objects, textures, bone indices and w3x includes. only the
+# chunks holding names and references are decoded, everything else is skipped unread.
+
+import os
+import time
+
+from io_mesh_w3d.batch_convert import EXTENSIONS, find_files, include_path, is_w3x
+from io_mesh_w3d.common.structs.animation import AnimationHeader, W3D_CHUNK_ANIMATION, W3D_CHUNK_ANIMATION_HEADER
+from io_mesh_w3d.common.structs.collision_box import CollisionBox, W3D_CHUNK_BOX
+from io_mesh_w3d.common.structs.hierarchy import HierarchyHeader, W3D_CHUNK_HIERARCHY, W3D_CHUNK_HIERARCHY_HEADER
+from io_mesh_w3d.common.structs.hlod import HLod, W3D_CHUNK_HLOD
+from io_mesh_w3d.common.structs.mesh import (GEOMETRY_TYPE_SKIN, MeshHeader, W3D_CHUNK_MESH, W3D_CHUNK_MESH_HEADER,
+                                             W3D_CHUNK_SHADER_MATERIALS, W3D_CHUNK_VERTEX_INFLUENCES)
+from io_mesh_w3d.common.structs.mesh_structs.shader_material import (STRING_PROPERTY, ShaderMaterial,
+                                                                     W3D_CHUNK_SHADER_MATERIAL)
+from io_mesh_w3d.common.structs.mesh_structs.texture import Texture, W3D_CHUNK_TEXTURE, W3D_CHUNK_TEXTURES
+from io_mesh_w3d.w3d.io_binary import BinaryReader, HEAD, read_chunk_data, read_chunk_head, read_typed_array
+from io_mesh_w3d.w3d.parallel import MessageLog, create_executor
+from io_mesh_w3d.w3d.structs.compressed_animation import (CompressedAnimationHeader, W3D_CHUNK_COMPRESSED_ANIMATION,
+                                                          W3D_CHUNK_COMPRESSED_ANIMATION_HEADER)
+from io_mesh_w3d.w3d.utils.helpers import read_chunk_array
+from io_mesh_w3d.w3x.io_xml import find_root
+
+TEXTURE_EXTENSIONS = ['.dds', '.tga', '.jpg', '.jpeg', '.png', '.bmp']
+
+
+class FileReferences:
+    # names defined and referenced by a single file, created in the worker processes
+    def __init__(self, path=''):
+        self.path = path
+        self.hierarchies = []  # (name, pivot count)
+        self.containers = []  # (name, hierarchy name, [(identifier, bone index)])
+        self.meshes = []  # (identifier, is skin, max bone index, [texture names])
+        self.collision_boxes = []
+        self.animations = []  # (name, hierarchy name)
+        self.textures = []  # (id, file) of w3x texture declarations
+        self.includes = []
+        self.error = None
+
+
+def name_key(name):
+    return name.lower()
+
+
+def texture_key(name):
+    return os.path.splitext(os.path.basename(name.replace('\\', '/')))[0].lower()
+
+
+##########################################################################
+# W3D
+##########################################################################
+
+
+def scan_mesh(context, io_stream, chunk_end, result):
+    identifier = ''
+    is_skin = False
+    max_bone = -1
+    textures = []
+
+    while io_stream.tell() < chunk_end:
+        (chunk_type, _, subchunk_end) = read_chunk_head(io_stream)
+
+        if chunk_type == W3D_CHUNK_MESH_HEADER:
+            header = MeshHeader.read(io_stream)
+            identifier = header.container_name + '.' + header.mesh_name if header.container_name \
+                else header.mesh_name
+            is_skin = (header.attrs & GEOMETRY_TYPE_SKIN) == GEOMETRY_TYPE_SKIN
+        elif chunk_type == W3D_CHUNK_VERTEX_INFLUENCES:
+            # bone_idx, xtra_idx, bone_inf, xtra_inf per vertex
+            data = read_typed_array('H', read_chunk_data(io_stream, subchunk_end))
+            max_bone = max(max(data[0::4], default=-1), max(data[1::4], default=-1))
+        elif chunk_type == W3D_CHUNK_TEXTURES:
+            textures.extend(texture.file for texture in
+                            read_chunk_array(context, io_stream, subchunk_end, W3D_CHUNK_TEXTURE, Texture.read))
+        elif chunk_type == W3D_CHUNK_SHADER_MATERIALS:
+            for material in read_chunk_array(context, io_stream, subchunk_end, W3D_CHUNK_SHADER_MATERIAL,
+                                             ShaderMaterial.read):
+                textures.extend(prop.value for prop in material.properties
+                                if prop.type == STRING_PROPERTY and prop.value)
+        io_stream.seek(subchunk_end)
+
+    result.meshes.append((identifier, is_skin, max_bone, list(dict.fromkeys(textures))))
+
+
+def scan_hierarchy(context, io_stream, chunk_end, result):
+    (chunk_type, _, _) = read_chunk_head(io_stream)
+    if chunk_type == W3D_CHUNK_HIERARCHY_HEADER:
+        header = HierarchyHeader.read(io_stream)
+        result.hierarchies.append((header.name, header.num_pivots))
+
+
+def scan_hlod(context, io_stream, chunk_end, result):
+    hlod = HLod.read(context, io_stream, chunk_end)
+    sub_objects = [(obj.identifier, obj.bone_index) for array in hlod.lod_arrays for obj in array.sub_objects]
+    result.containers.append((hlod.model_name(), hlod.hierarchy_name(), sub_objects))
+
+
+def scan_animation(context, io_stream, chunk_end, result):
+    (chunk_type, _, _) = read_chunk_head(io_stream)
+    if chunk_type == W3D_CHUNK_ANIMATION_HEADER:
+        header = AnimationHeader.read(io_stream)
+        result.animations.append((header.name, header.hierarchy_name))
+
+
+def scan_compressed_animation(context, io_stream, chunk_end, result):
+    (chunk_type, _, _) = read_chunk_head(io_stream)
+    if chunk_type == W3D_CHUNK_COMPRESSED_ANIMATION_HEADER:
+        header = CompressedAnimationHeader.read(io_stream)
+        result.animations.append((header.name, header.hierarchy_name))
+
+
+def scan_box(context, io_stream, chunk_end, result):
+    result.collision_boxes.append(CollisionBox.read(io_stream).name_)
+
+
+W3D_SCANNERS = {
+    W3D_CHUNK_MESH: scan_mesh,
+    W3D_CHUNK_HIERARCHY: scan_hierarchy,
+    W3D_CHUNK_HLOD: scan_hlod,
+    W3D_CHUNK_ANIMATION: scan_animation,
+    W3D_CHUNK_COMPRESSED_ANIMATION: scan_compressed_animation,
+    W3D_CHUNK_BOX: scan_box}
+
+
+def scan_w3d(context, path, result):
+    # memory mapped, so the pages of skipped chunks are never read
+    io_stream = BinaryReader.from_file(path, use_mmap=True)
+    filesize = io_stream.seek(0, 2)
+    io_stream.seek(0)
+
+    while io_stream.tell() + HEAD <= filesize:
+        (chunk_type, _, chunk_end) = read_chunk_head(io_stream)
+        if chunk_type in W3D_SCANNERS:
+            W3D_SCANNERS[chunk_type](context, io_stream, chunk_end, result)
+        io_stream.seek(chunk_end)
+    io_stream.close()
+
+
+##########################################################################
+# W3X
+##########################################################################
+
+
+def scan_w3x(context, path, result):
+    root = find_root(context, path)
+    if root is None:
+        raise ValueError('not a valid w3x file')
+
+    for node in root:
+        if node.tag == 'Includes':
+            result.includes.extend(xml_include.get('source') for xml_include in node)
+        elif node.tag == 'W3DHierarchy':
+            result.hierarchies.append((node.get('id'), len(node.findall('Pivot'))))
+        elif node.tag == 'W3DContainer':
+            sub_objects = [(xml_object.findtext('RenderObject/*', ''), int(xml_object.get('BoneIndex', 0)))
+                           for xml_object in node.findall('SubObject')]
+            result.containers.append((node.get('id'), node.get('Hierarchy', ''), sub_objects))
+        elif node.tag == 'W3DMesh':
+            bones = [int(xml_influence.get('Bone')) for xml_influence in node.iterfind('BoneInfluences/I')]
+            textures = [xml_value.text for xml_value in node.iterfind('FXShader/Constants/Texture/Value')
+                        if xml_value.text]
+            result.meshes.append((node.get('id'), node.get('GeometryType') == 'Skin', max(bones, default=-1),
+                                  list(dict.fromkeys(textures))))
+        elif node.tag == 'W3DCollisionBox':
+            result.collision_boxes.append(node.get('id'))
+        elif node.tag == 'W3DAnimation':
+            result.animations.append((node.get('id'), node.get('Hierarchy', '')))
+        elif node.tag == 'Texture':
+            result.textures.append((node.get('id'), node.get('File')))
+
+
+def scan_file(path):
+    result = FileReferences(path)
+    log = MessageLog()
+    try:
+        if is_w3x(path):
+            scan_w3x(log, path, result)
+        else:
+            scan_w3d(log, path, result)
+    except Exception as e:
+        result.error = str(e)
+    return result
+
+
+def scan_files(paths, max_workers=None):
+    if max_workers != 1 and len(paths) > 1:
+        try:
+            with create_executor(max_workers) as executor:
+                return list(executor.map(scan_file, paths, chunksize=max(1, min(64, len(paths) // 32))))
+        except (OSError, RuntimeError, ValueError):
+            pass
+    return [scan_file(path) for path in paths]
+
+
+##########################################################################
+# Validation
+##########################################################################
+
+
+class Problem:
+    def __init__(self, kind='', path='', subject='', reference=''):
+        self.kind = kind
+        self.path = path
+        self.subject = subject
+        self.reference = reference
+
+    def to_dict(self):
+        return {'kind': self.kind, 'file': self.path, 'subject': self.subject, 'reference': self.reference}
+
+    def format(self):
+        return f'{self.path}: {self.kind}: {self.subject} -> {self.reference}'
+
+
+class ValidationReport:
+    def __init__(self, files=0, problems=None, seconds=0.0):
+        self.files = files
+        self.problems = problems if problems is not None else []
+        self.seconds = seconds
+
+    def to_dict(self):
+        return {
+            'files': self.files,
+            'seconds': round(self.seconds, 3),
+            'problems': [problem.to_dict() for problem in self.problems]}
+
+    def format(self):
+        lines = [problem.format() for problem in self.problems]
+        lines.append(f'checked {self.files} files in {self.seconds:.2f} s, {len(self.problems)} problems')
+        return lines
+
+
+def check_references(scans, texture_files, known_paths=None):
+    # resolves the references of all files against the names defined in any of them
+    known_paths = known_paths if known_paths is not None else set()
+    hierarchies = {}
+    objects = {}
+    texture_ids = set()
+    texture_names = {texture_key(name) for name in texture_files}
+
+    for scan in scans:
+        for (name, pivot_count) in scan.hierarchies:
+            hierarchies.setdefault(name_key(name), pivot_count)
+        for mesh in scan.meshes:
+            objects.setdefault(name_key(mesh[0]), mesh)
+        for name in scan.collision_boxes:
+            objects.setdefault(name_key(name), None)
+        texture_ids.update(name_key(id) for (id, _) in scan.textures)
+
+    problems = []
+    for scan in scans:
+        if scan.error is not None:
+            problems.append(Problem('unreadable_file', scan.path, '', scan.error))
+            continue
+
+        for (name, hierarchy_name, sub_objects) in scan.containers:
+            pivot_count = hierarchies.get(name_key(hierarchy_name))
+            if pivot_count is None:
+                problems.append(Problem('missing_hierarchy', scan.path, name, hierarchy_name))
+
+            for (identifier, bone_index) in sub_objects:
+                if name_key(identifier) not in objects:
+                    problems.append(Problem('missing_sub_object', scan.path, name, identifier))
+                    continue
+                if pivot_count is None:
+                    continue
+                if bone_index >= pivot_count:
+                    problems.append(Problem('bone_index_out_of_range', scan.path, identifier,
+                                            f'{hierarchy_name} bone {bone_index} of {pivot_count}'))
+                mesh = objects[name_key(identifier)]
+                if mesh is not None and mesh[1] and mesh[2] >= pivot_count:
+                    problems.append(Problem('bone_index_out_of_range', scan.path, identifier,
+                                            f'{hierarchy_name} vertex influence bone {mesh[2]} of {pivot_count}'))
+
+        for (name, hierarchy_name) in scan.animations:
+            if name_key(hierarchy_name) not in hierarchies:
+                problems.append(Problem('missing_hierarchy', scan.path, name, hierarchy_name))
+
+        for (identifier, _, _, textures) in scan.meshes:
+            for texture in textures:
+                if texture_key(texture) not in texture_names and name_key(texture) not in texture_ids:
+                    problems.append(Problem('missing_texture', scan.path, identifier, texture))
+
+        for (id, file) in scan.textures:
+            if not file or texture_key(file) not in texture_names:
+                problems.append(Problem('missing_texture', scan.path, id, file or ''))
+
+        for source in scan.includes:
+            included = include_path(scan.path, source)
+            if os.path.abspath(included).lower() not in known_paths and not os.path.exists(included):
+                problems.append(Problem('missing_include', scan.path, '', source))
+    return problems
+
+
+def validate(paths, max_workers=None):
+    start = time.perf_counter()
+    files = find_files(paths, EXTENSIONS + TEXTURE_EXTENSIONS)
+    models = [path for path in files if os.path.splitext(path)[1].lower() in EXTENSIONS]
+    texture_files = [path for path in files if os.path.splitext(path)[1].lower() in TEXTURE_EXTENSIONS]
+
+    scans = scan_files(models, max_workers)
+    known_paths = {os.path.abspath(path).lower() for path in files}
+    problems = check_references(scans, texture_files, known_paths)
+    return ValidationReport(len(models), problems, time.perf_counter() - start)
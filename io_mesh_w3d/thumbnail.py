@@ -0,0 +1,515 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# headless preview rendering of models: the meshes shown by the highest lod of the container
+# are posed with the rest pose of the hierarchy and rasterized flat shaded on the cpu into png
+# thumbnails. dds and tga textures next to the model are decoded and mapped onto the meshes.
+# rendering needs numpy.
+
+import math
+import os
+import struct
+import zlib
+from functools import partial
+
+from io_mesh_w3d.batch_convert import EXTENSIONS, convert_files, find_files, load_file
+from io_mesh_w3d.common.structs.mesh_structs.shader_material import STRING_PROPERTY, VEC3_PROPERTY, VEC4_PROPERTY
+from io_mesh_w3d.common.structs.mesh_structs.vertex_influence import VertexInfluenceArray
+from io_mesh_w3d.common.utils.search_path import SearchPath
+from io_mesh_w3d.mesh_recompute import normalize_rows, texture_coordinates, vectors_numpy, vertex_ids_numpy
+from io_mesh_w3d.reference_validator import texture_key
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.parallel import MessageLog
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+THUMBNAIL_SIZE = 128
+DECODED_TEXTURE_EXTENSIONS = ['.dds', '.tga']
+
+# the model is seen from the front right and above, the light comes from the upper left
+VIEW_YAW = 35.0
+VIEW_PITCH = 25.0
+LIGHT = (-0.4, 0.5, 0.75)  # right, up and towards the camera
+AMBIENT = 0.35
+BASE_COLOR = (0.7, 0.7, 0.7)
+MARGIN = 0.05
+
+# upper bound of the pixels tested at once, keeps the memory of the fragment arrays small
+MAX_FRAGMENTS = 1 << 20
+
+
+##########################################################################
+# PNG
+##########################################################################
+
+
+def png_chunk(chunk_type, data):
+    return struct.pack('>L', len(data)) + chunk_type + data + \
+        struct.pack('>L', zlib.crc32(chunk_type + data) & 0xFFFFFFFF)
+
+
+def write_png(path, width, height, pixels):
+    # pixels are the rgba bytes of the rows from top to bottom
+    stride = width * 4
+    rows = b''.join(b'\x00' + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    with open(path, 'wb') as file:
+        file.write(b'\x89PNG\r\n\x1a\n')
+        file.write(png_chunk(b'IHDR', struct.pack('>LLBBBBB', width, height, 8, 6, 0, 0, 0)))
+        file.write(png_chunk(b'IDAT', zlib.compress(rows, 6)))
+        file.write(png_chunk(b'IEND', b''))
+
+
+##########################################################################
+# Textures
+##########################################################################
+
+
+def unpack_565(values):
+    (r, g, b) = ((values >> 11) & 31, (values >> 5) & 63, values & 31)
+    return numpy.stack([r * 255 // 31, g * 255 // 63, b * 255 // 31], axis=-1)
+
+
+def block_indices(data, count):
+    # the 2 bit (colors) or 3 bit (alpha) indices of the 16 pixels of each block, packed little endian
+    bits = 2 if count == 4 else 3
+    values = numpy.zeros(len(data), dtype=numpy.uint64)
+    for i in range(data.shape[1]):
+        values |= data[:, i].astype(numpy.uint64) << numpy.uint64(8 * i)
+    shifts = numpy.arange(16, dtype=numpy.uint64) * numpy.uint64(bits)
+    return ((values[:, None] >> shifts) & numpy.uint64(count - 1)).astype(numpy.int64)
+
+
+def decode_color_blocks(blocks, dxt1):
+    c0 = blocks[:, 0].astype(numpy.int64) | blocks[:, 1].astype(numpy.int64) << 8
+    c1 = blocks[:, 2].astype(numpy.int64) | blocks[:, 3].astype(numpy.int64) << 8
+    (p0, p1) = (unpack_565(c0), unpack_565(c1))
+    four = ((c0 > c1) | (not dxt1))[:, None]
+    p2 = numpy.where(four, (2 * p0 + p1) // 3, (p0 + p1) // 2)
+    p3 = numpy.where(four, (p0 + 2 * p1) // 3, 0)
+    colors = numpy.stack([p0, p1, p2, p3], axis=1)
+    alphas = numpy.full((len(blocks), 4), 255)
+    alphas[:, 3] = numpy.where(four[:, 0], 255, 0)
+    indices = block_indices(blocks[:, 4:8], 4)
+    rows = numpy.arange(len(blocks))[:, None]
+    return colors[rows, indices], alphas[rows, indices]
+
+
+def decode_dxt5_alpha(blocks):
+    (a0, a1) = (blocks[:, 0].astype(numpy.int64), blocks[:, 1].astype(numpy.int64))
+    weights = numpy.arange(1, 7)
+    eight = (a0[:, None] * (7 - weights) + a1[:, None] * weights) // 7
+    six = (a0[:, None] * (5 - weights[:4]) + a1[:, None] * weights[:4]) // 5
+    six = numpy.concatenate([six, numpy.zeros((len(blocks), 1), numpy.int64),
+                             numpy.full((len(blocks), 1), 255)], axis=1)
+    palette = numpy.concatenate([a0[:, None], a1[:, None], numpy.where((a0 > a1)[:, None], eight, six)], axis=1)
+    return palette[numpy.arange(len(blocks))[:, None], block_indices(blocks[:, 2:8], 8)]
+
+
+def decode_dxt(data, width, height, four_cc):
+    (columns, rows) = ((width + 3) // 4, (height + 3) // 4)
+    block_size = 8 if four_cc == b'DXT1' else 16
+    blocks = numpy.frombuffer(data, dtype=numpy.uint8, count=columns * rows * block_size).reshape(-1, block_size)
+
+    if four_cc == b'DXT1':
+        (colors, alphas) = decode_color_blocks(blocks, True)
+    else:
+        (colors, _) = decode_color_blocks(blocks[:, 8:], False)
+        if four_cc == b'DXT5':
+            alphas = decode_dxt5_alpha(blocks)
+        else:
+            nibbles = numpy.stack([blocks[:, :8] & 15, blocks[:, :8] >> 4], axis=-1).reshape(-1, 16)
+            alphas = nibbles.astype(numpy.int64) * 17
+
+    pixels = numpy.concatenate([colors, alphas[:, :, None]], axis=2).reshape(rows, columns, 4, 4, 4)
+    pixels = pixels.transpose(0, 2, 1, 3, 4).reshape(rows * 4, columns * 4, 4)
+    return pixels[:height, :width].astype(numpy.uint8)
+
+
+def decode_masked(data, width, height, bit_count, masks):
+    step = bit_count // 8
+    raw = numpy.frombuffer(data, dtype=numpy.uint8, count=width * height * step).reshape(-1, step)
+    values = numpy.zeros(len(raw), dtype=numpy.uint32)
+    for i in range(step):
+        values |= raw[:, i].astype(numpy.uint32) << numpy.uint32(8 * i)
+
+    channels = []
+    for mask in masks:
+        if not mask:
+            channels.append(numpy.full(len(values), 255, dtype=numpy.uint32))
+            continue
+        shift = (mask & -mask).bit_length() - 1
+        channels.append(((values & numpy.uint32(mask)) >> numpy.uint32(shift)) * 255 // (mask >> shift))
+    return numpy.stack(channels, axis=-1).reshape(height, width, 4).astype(numpy.uint8)
+
+
+def decode_dds(data):
+    # top level image of dxt1, dxt3, dxt5 and uncompressed 24 or 32 bit textures as
+    # rgba rows from top to bottom, None for other formats
+    if len(data) < 128 or data[:4] != b'DDS ':
+        return None
+    (height, width) = struct.unpack_from('<2L', data, 12)
+    (pf_flags, four_cc, bit_count) = struct.unpack_from('<L4sL', data, 80)
+    masks = struct.unpack_from('<4L', data, 92)
+
+    if pf_flags & 0x4:
+        if four_cc not in [b'DXT1', b'DXT3', b'DXT5']:
+            return None
+        return decode_dxt(data[128:], width, height, four_cc)
+    if bit_count not in [24, 32]:
+        return None
+    return decode_masked(data[128:], width, height, bit_count, masks if pf_flags & 0x1 else masks[:3] + (0,))
+
+
+def decode_tga(data):
+    # uncompressed and run length encoded true color or grayscale images, None for others
+    if len(data) < 18:
+        return None
+    (id_length, color_map_type, image_type) = struct.unpack_from('<3B', data, 0)
+    (width, height, bit_count, descriptor) = struct.unpack_from('<2H2B', data, 12)
+    if color_map_type != 0 or image_type not in [2, 3, 10, 11] or bit_count not in [8, 24, 32]:
+        return None
+
+    step = bit_count // 8
+    offset = 18 + id_length
+    count = width * height
+    if image_type in [2, 3]:
+        raw = data[offset:offset + count * step]
+    else:
+        raw = bytearray()
+        while len(raw) < count * step and offset < len(data):
+            header = data[offset]
+            offset += 1
+            if header & 0x80:
+                raw += data[offset:offset + step] * ((header & 0x7F) + 1)
+                offset += step
+            else:
+                raw += data[offset:offset + ((header + 1) * step)]
+                offset += (header + 1) * step
+
+    pixels = numpy.frombuffer(bytes(raw[:count * step]), dtype=numpy.uint8).reshape(height, width, step)
+    if step == 1:
+        pixels = numpy.concatenate([pixels.repeat(3, axis=2), numpy.full((height, width, 1), 255, numpy.uint8)], axis=2)
+    elif step == 3:
+        pixels = numpy.concatenate([pixels[:, :, 2::-1], numpy.full((height, width, 1), 255, numpy.uint8)], axis=2)
+    else:
+        pixels = pixels[:, :, [2, 1, 0, 3]]
+    # without the top left origin bit the rows are stored from bottom to top
+    return pixels if descriptor & 0x20 else pixels[::-1]
+
+
+def find_texture_file(search_path, name):
+    return search_path.find([texture_key(name) + extension for extension in DECODED_TEXTURE_EXTENSIONS])
+
+
+def load_texture(context, search_path, name, cache):
+    key = texture_key(name)
+    if key in cache:
+        return cache[key]
+
+    image = None
+    path = find_texture_file(search_path, name)
+    if path is None:
+        context.info(f'-> texture not found: {name}')
+    else:
+        with open(path, 'rb') as file:
+            data = file.read()
+        image = decode_dds(data) if path.lower().endswith('.dds') else decode_tga(data)
+        if image is None:
+            context.info(f'-> unsupported texture format: {path}')
+    cache[key] = image
+    return image
+
+
+##########################################################################
+# Models
+##########################################################################
+
+
+def rotation_matrix(rotation):
+    (w, x, y, z) = vecmath.Quaternion(rotation).normalized()
+    return numpy.array([
+        [1.0 - 2.0 * (y * y + z * z), 2.0 * (x * y - w * z), 2.0 * (x * z + w * y)],
+        [2.0 * (x * y + w * z), 1.0 - 2.0 * (x * x + z * z), 2.0 * (y * z - w * x)],
+        [2.0 * (x * z - w * y), 2.0 * (y * z + w * x), 1.0 - 2.0 * (x * x + y * y)]])
+
+
+def pivot_matrices(hierarchy):
+    # rest pose matrices of the pivots in model space, parents are stored before their children
+    matrices = []
+    for (i, pivot) in enumerate(hierarchy.pivots if hierarchy is not None else []):
+        matrix = numpy.identity(4)
+        matrix[:3, :3] = rotation_matrix(pivot.rotation)
+        matrix[:3, 3] = tuple(pivot.translation)[:3]
+        if 0 <= pivot.parent_id < i:
+            matrix = matrices[pivot.parent_id] @ matrix
+        matrices.append(matrix)
+    return matrices
+
+
+def find_hierarchy(context, search_path, data_context):
+    # like the importer the hierarchy of a container is loaded from the file named after it
+    hierarchy = data_context.hierarchy
+    hlod = data_context.hlod
+    if hierarchy is not None or hlod is None or hlod.hierarchy_name() == hlod.model_name():
+        return hierarchy
+
+    found = search_path.find([hlod.hierarchy_name() + extension for extension in EXTENSIONS])
+    if found is not None:
+        (skeleton, _) = load_file(MessageLog(), found)
+        if skeleton.hierarchy is not None:
+            return skeleton.hierarchy
+    context.info(f'-> hierarchy not found: {hlod.hierarchy_name()}')
+    return None
+
+
+def shown_meshes(data_context):
+    # (mesh, bone index) of the visible meshes of the highest lod, the importer shows the last lod array
+    meshes = [mesh for mesh in data_context.meshes if mesh.header is not None and not mesh.is_hidden()]
+    hlod = data_context.hlod
+    if hlod is None or not hlod.lod_arrays:
+        return [(mesh, 0) for mesh in meshes]
+
+    by_name = {}
+    for mesh in meshes:
+        by_name[mesh.name().lower()] = mesh
+        by_name[mesh.identifier().lower()] = mesh
+    result = []
+    for sub_object in hlod.lod_arrays[-1].sub_objects:
+        mesh = by_name.get(sub_object.identifier.lower(), by_name.get(sub_object.name.lower()))
+        if mesh is not None:
+            result.append((mesh, sub_object.bone_index))
+    return result
+
+
+def bone_indices(vert_infs):
+    if isinstance(vert_infs, VertexInfluenceArray):
+        return numpy.frombuffer(vert_infs.data, dtype=numpy.uint16)[0::4].astype(numpy.int64)
+    return numpy.array([vert_inf.bone_idx for vert_inf in vert_infs], dtype=numpy.int64)
+
+
+def posed_vertices(mesh, matrices, bone_index):
+    # skinned vertices are stored relative to the pivot of their bone, rigid meshes relative to their pivot
+    verts = vectors_numpy(mesh.verts)
+    if not matrices:
+        return verts
+
+    if mesh.is_skin() and len(mesh.vert_infs) == len(verts):
+        bones = bone_indices(mesh.vert_infs)
+        bones[bones >= len(matrices)] = 0
+        stack = numpy.array(matrices)[bones]
+        return numpy.einsum('nij,nj->ni', stack[:, :3, :3], verts) + stack[:, :3, 3]
+
+    matrix = matrices[bone_index] if 0 <= bone_index < len(matrices) else numpy.identity(4)
+    return verts @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def mesh_color(mesh):
+    if mesh.vert_materials:
+        diffuse = mesh.vert_materials[0].vm_info.diffuse
+        return (diffuse.r / 255.0, diffuse.g / 255.0, diffuse.b / 255.0)
+    for material in mesh.shader_materials:
+        for prop in material.properties:
+            if prop.name == 'DiffuseColor' and prop.type in [VEC3_PROPERTY, VEC4_PROPERTY]:
+                return tuple(prop.value)[:3]
+    return BASE_COLOR
+
+
+def mesh_texture_name(mesh, texture_files):
+    # texture_files maps the ids of w3x texture declarations to their files
+    names = [texture.file for texture in mesh.textures]
+    for material in mesh.shader_materials:
+        names.extend(prop.value for prop in material.properties
+                     if prop.type == STRING_PROPERTY and prop.name == 'DiffuseTexture' and prop.value)
+    for name in names:
+        return texture_files.get(name.lower(), name)
+    return None
+
+
+class Scene:
+    # triangles of all meshes in model space, the textures are referenced by index
+    def __init__(self):
+        self.verts = []
+        self.ids = []
+        self.colors = []
+        self.uvs = []
+        self.texture_ids = []
+        self.textures = []
+
+
+def build_scene(context, path, data_context):
+    # the directory of the model is listed once for the hierarchy and all textures
+    scene = Scene()
+    search_path = SearchPath([os.path.dirname(path)])
+    matrices = pivot_matrices(find_hierarchy(context, search_path, data_context))
+    texture_files = {texture.id.lower(): texture.file for texture in data_context.textures if texture.id}
+    cache = {}
+    offset = 0
+    for (mesh, bone_index) in shown_meshes(data_context):
+        verts = posed_vertices(mesh, matrices, bone_index)
+        ids = vertex_ids_numpy(mesh.triangles)
+        if not len(ids) or ids.max() >= len(verts):
+            continue
+
+        texture_id = -1
+        uvs = texture_coordinates(mesh)
+        name = mesh_texture_name(mesh, texture_files)
+        if name is not None and uvs is not None and len(uvs) == len(verts):
+            image = load_texture(context, search_path, name, cache)
+            if image is not None:
+                if not any(image is texture for texture in scene.textures):
+                    scene.textures.append(image)
+                texture_id = next(i for (i, texture) in enumerate(scene.textures) if texture is image)
+
+        scene.verts.append(verts)
+        scene.ids.append(ids + offset)
+        scene.uvs.append(vectors_numpy(uvs, 2) if texture_id >= 0 else numpy.zeros((len(verts), 2)))
+        scene.colors.append(numpy.tile(mesh_color(mesh), (len(ids), 1)))
+        scene.texture_ids.append(numpy.full(len(ids), texture_id))
+        offset += len(verts)
+    return scene
+
+
+##########################################################################
+# Rasterizing
+##########################################################################
+
+
+def view_basis():
+    # right, up and towards the camera in model space, z is up
+    (yaw, pitch) = (math.radians(VIEW_YAW), math.radians(VIEW_PITCH))
+    back = numpy.array([math.sin(yaw) * math.cos(pitch), -math.cos(yaw) * math.cos(pitch), math.sin(pitch)])
+    right = numpy.cross(-back, (0.0, 0.0, 1.0))
+    right /= numpy.linalg.norm(right)
+    return right, numpy.cross(right, -back), back
+
+
+def fragments(screen, depth, ids, size):
+    # (pixel, depth, triangle, barycentric coordinates) of all pixel centers covered by the triangles.
+    # triangles are processed in batches of similar screen size so that the tested pixel grids stay small
+    corners = screen[ids]
+    low = numpy.clip(numpy.ceil(corners.min(axis=1) - 0.5), 0, size - 1).astype(numpy.int64)
+    high = numpy.clip(numpy.floor(corners.max(axis=1) - 0.5), 0, size - 1).astype(numpy.int64)
+    (e1, e2) = (corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    area = e1[:, 0] * e2[:, 1] - e1[:, 1] * e2[:, 0]
+    valid = (numpy.abs(area) > 1e-12) & (high >= low).all(axis=1) & \
+        (corners.max(axis=1) >= 0.5).all(axis=1) & (corners.min(axis=1) <= size - 0.5).all(axis=1)
+    extent = (high - low + 1).max(axis=1)
+    grids = 2 ** numpy.ceil(numpy.log2(numpy.maximum(extent, 1))).astype(numpy.int64)
+
+    result = []
+    for grid in numpy.unique(grids[valid]):
+        (gy, gx) = numpy.divmod(numpy.arange(grid * grid), grid)
+        selected = numpy.nonzero(valid & (grids == grid))[0]
+        batch = max(1, MAX_FRAGMENTS // (grid * grid))
+        for start in range(0, len(selected), batch):
+            tris = selected[start:start + batch]
+            (px, py) = (low[tris, 0:1] + gx, low[tris, 1:2] + gy)
+            (dx, dy) = (px + 0.5 - corners[tris, 0, 0:1], py + 0.5 - corners[tris, 0, 1:2])
+            b1 = (dx * e2[tris, 1:2] - dy * e2[tris, 0:1]) / area[tris, None]
+            b2 = (e1[tris, 0:1] * dy - e1[tris, 1:2] * dx) / area[tris, None]
+            inside = (px <= high[tris, 0:1]) & (py <= high[tris, 1:2]) & (b1 >= -1e-7) & (b2 >= -1e-7) & \
+                (b1 + b2 <= 1.0 + 1e-7)
+
+            (rows, columns) = numpy.nonzero(inside)
+            tri = tris[rows]
+            (b1, b2) = (b1[rows, columns], b2[rows, columns])
+            z = depth[ids[tri]]
+            result.append((py[rows, columns] * size + px[rows, columns],
+                           z[:, 0] + b1 * (z[:, 1] - z[:, 0]) + b2 * (z[:, 2] - z[:, 0]), tri, b1, b2))
+
+    if not result:
+        return tuple(numpy.zeros(0, dtype) for dtype in [numpy.int64, float, numpy.int64, float, float])
+    return tuple(numpy.concatenate(values) for values in zip(*result))
+
+
+def rasterize(scene, size=THUMBNAIL_SIZE):
+    # rgba rows from top to bottom, the background is transparent
+    image = numpy.zeros((size * size, 4), dtype=numpy.uint8)
+    if not scene.verts:
+        return image.reshape(size, size, 4)
+
+    verts = numpy.concatenate(scene.verts)
+    ids = numpy.concatenate(scene.ids)
+    (right, up, back) = view_basis()
+
+    # orthographic projection which fits the model into the image
+    (x, y) = (verts @ right, verts @ up)
+    extent = max(x.max() - x.min(), y.max() - y.min(), 1e-6)
+    scale = size * (1.0 - 2.0 * MARGIN) / extent
+    screen = numpy.stack([(x - (x.max() + x.min()) / 2) * scale + size / 2,
+                          ((y.max() + y.min()) / 2 - y) * scale + size / 2], axis=1)
+    (pixels, depth, tris, b1, b2) = fragments(screen, verts @ back, ids, size)
+
+    # the nearest fragment of each pixel is visible
+    order = numpy.lexsort((-depth, pixels))
+    (pixels, tris, b1, b2) = (pixels[order], tris[order], b1[order], b2[order])
+    first = numpy.ones(len(pixels), dtype=bool)
+    first[1:] = pixels[1:] != pixels[:-1]
+    (pixels, tris, b1, b2) = (pixels[first], tris[first], b1[first], b2[first])
+
+    # flat shading with the face normals, faces seen from behind are lit like their front
+    corners = verts[ids]
+    normals = normalize_rows(numpy.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]))
+    light = right * LIGHT[0] + up * LIGHT[1] + back * LIGHT[2]
+    light /= numpy.linalg.norm(light)
+    shade = AMBIENT + (1.0 - AMBIENT) * numpy.abs(normals @ light)
+
+    colors = numpy.concatenate(scene.colors)[tris]
+    texture_ids = numpy.concatenate(scene.texture_ids)[tris]
+    if scene.textures:
+        uvs = numpy.concatenate(scene.uvs)[ids[tris]]
+        uvs = uvs[:, 0] + b1[:, None] * (uvs[:, 1] - uvs[:, 0]) + b2[:, None] * (uvs[:, 2] - uvs[:, 0])
+        for (index, texture) in enumerate(scene.textures):
+            textured = texture_ids == index
+            (height, width) = texture.shape[:2]
+            # the texture coordinates have their origin at the bottom left like in blender
+            columns = numpy.floor(uvs[textured, 0] * width).astype(numpy.int64) % width
+            rows = numpy.floor((1.0 - uvs[textured, 1]) * height).astype(numpy.int64) % height
+            colors[textured] = texture[rows, columns, :3] / 255.0
+
+    image[pixels, :3] = numpy.clip(colors * shade[tris, None] * 255.0 + 0.5, 0, 255).astype(numpy.uint8)
+    image[pixels, 3] = 255
+    return image.reshape(size, size, 4)
+
+
+##########################################################################
+# Files
+##########################################################################
+
+
+def render_thumbnail(source, target, size=THUMBNAIL_SIZE):
+    # runs in the worker processes like convert_file
+    log = MessageLog()
+    try:
+        if numpy is None:
+            raise RuntimeError('numpy is required to render thumbnails')
+        (data_context, _) = load_file(log, source, resolve_includes=True)
+        scene = build_scene(log, source, data_context)
+        if not scene.verts:
+            log.info(f'-> no meshes to render: {source}')
+            return log.messages
+
+        directory = os.path.dirname(target)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_png(target, size, size, rasterize(scene, size).tobytes())
+        log.info(f'-> rendered {sum(len(ids) for ids in scene.ids)} triangles: {target}')
+    except Exception as e:
+        log.error(f'failed to render {source}: {e}')
+    return log.messages
+
+
+def find_thumbnails(source, target):
+    # (source path, png path) pairs, the directory structure of source is mirrored in target
+    result = []
+    for path in find_files([source]):
+        relative = os.path.relpath(path, source) if os.path.isdir(source) else os.path.basename(path)
+        result.append((path, os.path.join(target, os.path.splitext(relative)[0] + '.png')))
+    return result
+
+
+def render_thumbnails(context, thumbnails, size=THUMBNAIL_SIZE, max_workers=None):
+    return convert_files(context, thumbnails, max_workers, partial(render_thumbnail, size=size), 'rendered')
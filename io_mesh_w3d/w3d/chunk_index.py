@@ -0,0 +1,136 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+from io_mesh_w3d.common.structs.collision_box import *
+from io_mesh_w3d.common.structs.hierarchy import *
+from io_mesh_w3d.common.structs.hlod import *
+from io_mesh_w3d.common.structs.mesh import *
+from io_mesh_w3d.common.structs.animation import *
+from io_mesh_w3d.w3d.structs.dazzle import *
+from io_mesh_w3d.w3d.structs.compressed_animation import *
+
+# header sub chunk type and offset of the name inside of it for each named top level chunk
+HEADER_NAMES = {
+    W3D_CHUNK_MESH: (W3D_CHUNK_MESH_HEADER, 8),
+    W3D_CHUNK_HIERARCHY: (W3D_CHUNK_HIERARCHY_HEADER, 4),
+    W3D_CHUNK_HLOD: (W3D_CHUNK_HLOD_HEADER, 8),
+    W3D_CHUNK_ANIMATION: (W3D_CHUNK_ANIMATION_HEADER, 4),
+    W3D_CHUNK_COMPRESSED_ANIMATION: (W3D_CHUNK_COMPRESSED_ANIMATION_HEADER, 4)}
+
+
+def read_box(context, io_stream, chunk_end):
+    return CollisionBox.read(io_stream)
+
+
+READERS = {
+    W3D_CHUNK_MESH: Mesh.read,
+    W3D_CHUNK_HIERARCHY: Hierarchy.read,
+    W3D_CHUNK_HLOD: HLod.read,
+    W3D_CHUNK_ANIMATION: Animation.read,
+    W3D_CHUNK_COMPRESSED_ANIMATION: CompressedAnimation.read,
+    W3D_CHUNK_BOX: read_box,
+    W3D_CHUNK_DAZZLE: Dazzle.read}
+
+
+class ChunkEntry:
+    def __init__(self, chunk_type=0, offset=0, size=0, name='', container_name=''):
+        self.chunk_type = chunk_type
+        self.offset = offset
+        self.size = size
+        self.name = name
+        self.container_name = container_name
+
+    def end(self):
+        return self.offset + HEAD + self.size
+
+    def identifier(self):
+        if self.container_name:
+            return self.container_name + '.' + self.name
+        return self.name
+
+
+def read_entry_names(io_stream, chunk_type, chunk_end):
+    if chunk_type == W3D_CHUNK_BOX:
+        io_stream.seek(8, 1)
+        return read_long_fixed_string(io_stream), ''
+
+    if io_stream.tell() + HEAD > chunk_end:
+        return '', ''
+    (sub_type, _, subchunk_end) = read_chunk_head(io_stream)
+
+    if chunk_type == W3D_CHUNK_DAZZLE:
+        if sub_type == W3D_CHUNK_DAZZLE_NAME:
+            return read_string(io_stream), ''
+        return '', ''
+
+    (header_type, name_offset) = HEADER_NAMES[chunk_type]
+    if sub_type != header_type or subchunk_end > chunk_end:
+        return '', ''
+    io_stream.seek(name_offset, 1)
+    name = read_fixed_string(io_stream)
+    if chunk_type != W3D_CHUNK_MESH:
+        return name, ''
+    return name, read_fixed_string(io_stream)
+
+
+class ChunkIndex:
+    # table of contents of the top level chunks of a w3d file, built from the chunk heads
+    # only, the entries are decoded on demand
+    def __init__(self, io_stream, entries=None):
+        self.io_stream = io_stream
+        self.entries = entries if entries is not None else []
+        self.decoded = {}
+
+    @staticmethod
+    def from_file(path, use_mmap=False):
+        return ChunkIndex.read(BinaryReader.from_file(path, use_mmap))
+
+    @staticmethod
+    def read(io_stream):
+        result = ChunkIndex(io_stream)
+        filesize = io_stream.seek(0, 2)
+        io_stream.seek(0)
+
+        while io_stream.tell() + HEAD <= filesize:
+            offset = io_stream.tell()
+            (chunk_type, chunk_size, chunk_end) = read_chunk_head(io_stream)
+            entry = ChunkEntry(chunk_type=chunk_type, offset=offset, size=chunk_size)
+
+            if chunk_type in HEADER_NAMES or chunk_type in [W3D_CHUNK_BOX, W3D_CHUNK_DAZZLE]:
+                (entry.name, entry.container_name) = read_entry_names(io_stream, chunk_type, chunk_end)
+            result.entries.append(entry)
+            io_stream.seek(chunk_end)
+        return result
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def filter(self, chunk_type=None, names=None):
+        result = []
+        for entry in self.entries:
+            if chunk_type is not None and entry.chunk_type != chunk_type:
+                continue
+            if names is not None and entry.name not in names and entry.identifier() not in names:
+                continue
+            result.append(entry)
+        return result
+
+    def decode(self, context, entry):
+        if entry.offset in self.decoded:
+            return self.decoded[entry.offset]
+
+        if entry.chunk_type not in READERS:
+            context.info(f'-> chunk {hex(entry.chunk_type)} can not be decoded')
+            return None
+
+        self.io_stream.seek(entry.offset + HEAD)
+        result = READERS[entry.chunk_type](context, self.io_stream, entry.end())
+        self.decoded[entry.offset] = result
+        return result
+
+    def close(self):
+        self.decoded = {}
+        self.io_stream.close()
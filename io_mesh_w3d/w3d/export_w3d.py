@@ -1,6 +1,8 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
+from io_mesh_w3d.w3d.io_binary import BinaryWriter
+
 
 def save(context, export_settings, data_context):
     filepath = context.filepath
@@ -12,7 +14,7 @@ def save(context, export_settings, data_context):
     export_mode = export_settings['mode']
     context.info(f'export mode: {export_mode}')
 
-    file = open(filepath, 'wb')
+    file = BinaryWriter()
 
     if export_mode == 'M':
         if len(data_context.meshes) > 1:
@@ -53,6 +55,6 @@ def save(context, export_settings, data_context):
         context.error(f'unsupported export mode \'{export_mode}\', aborting export!')
         return {'CANCELLED'}
 
-    file.close()
+    file.save(filepath)
     context.info('finished')
     return {'FINISHED'}
@@ -2,6 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 from io_mesh_w3d.import_utils import *
+from io_mesh_w3d.asset_index import find_indexed_asset
 from io_mesh_w3d.common.structs.collision_box import *
 from io_mesh_w3d.common.structs.data_context import *
 from io_mesh_w3d.common.structs.hierarchy import *
@@ -9,92 +10,124 @@ from io_mesh_w3d.common.structs.hlod import *
 from io_mesh_w3d.common.structs.mesh import *
 from io_mesh_w3d.w3d.structs.dazzle import *
 from io_mesh_w3d.w3d.structs.compressed_animation import *
+from io_mesh_w3d.w3d.chunk_index import *
+from io_mesh_w3d.w3d.parallel import *
 
 
-def load_file(context, data_context, path=None):
-    if path is None:
-        path = context.filepath
+##########################################################################
+# Unsupported
+##########################################################################
 
-    path = insensitive_path(path)
-    context.info(f'Loading file: {path}')
+W3D_CHUNK_MORPH_ANIMATION = 0x000002C0
+W3D_CHUNK_HMODEL = 0x00000300
+W3D_CHUNK_LODMODEL = 0x00000400
+W3D_CHUNK_COLLECTION = 0x00000420
+W3D_CHUNK_POINTS = 0x00000440
+W3D_CHUNK_LIGHT = 0x00000460
+W3D_CHUNK_EMITTER = 0x00000500
+W3D_CHUNK_AGGREGATE = 0x00000600
+W3D_CHUNK_NULL_OBJECT = 0x00000750
+W3D_CHUNK_LIGHTSCAPE = 0x00000800
+W3D_CHUNK_SOUNDROBJ = 0x00000A00
 
-    if not os.path.exists(path):
-        context.error(f'file not found: {path}')
-        return
 
-    file = open(path, 'rb')
-    filesize = os.path.getsize(path)
+##########################################################################
+# Chunk readers
+##########################################################################
 
-    while file.tell() < filesize:
-        chunk_type, chunk_size, chunk_end = read_chunk_head(file)
 
-        if chunk_type == W3D_CHUNK_MESH:
-            data_context.meshes.append(Mesh.read(context, file, chunk_end))
-        elif chunk_type == W3D_CHUNK_HIERARCHY:
-            if data_context.hierarchy is None:
-                data_context.hierarchy = Hierarchy.read(context, file, chunk_end)
-            else:
-                context.warning('-> already got one hierarchy chunk (skipping this one)!')
-                file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_HLOD:
-            if data_context.hlod is None:
-                data_context.hlod = HLod.read(context, file, chunk_end)
-            else:
-                context.warning('-> already got one hlod chunk (skipping this one)!')
-                file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_ANIMATION:
-            if data_context.animation is None and data_context.compressed_animation is None:
-                data_context.animation = Animation.read(context, file, chunk_end)
-            else:
-                context.warning('-> already got one animation chunk (skipping this one)!')
-                file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_COMPRESSED_ANIMATION:
-            if data_context.animation is None and data_context.compressed_animation is None:
-                data_context.compressed_animation = CompressedAnimation.read(context, file, chunk_end)
-            else:
-                context.warning('-> already got one animation chunk (skipping this one)!')
-                file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_BOX:
-            data_context.collision_boxes.append(CollisionBox.read(file))
-        elif chunk_type == W3D_CHUNK_DAZZLE:
-            data_context.dazzles.append(Dazzle.read(context, file, chunk_end))
-        elif chunk_type == W3D_CHUNK_MORPH_ANIMATION:
-            context.info('-> morph animation chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_HMODEL:
-            context.info('-> hmodel chnuk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_LODMODEL:
-            context.info('-> lodmodel chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_COLLECTION:
-            context.info('-> collection chunk not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_POINTS:
-            context.info('-> points chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_LIGHT:
-            context.info('-> light chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_EMITTER:
-            context.info('-> emitter chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_AGGREGATE:
-            context.info('-> aggregate chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_NULL_OBJECT:
-            context.info('-> null object chunkt is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_LIGHTSCAPE:
-            context.info('-> lightscape chunk is not supported')
-            file.seek(chunk_size, 1)
-        elif chunk_type == W3D_CHUNK_SOUNDROBJ:
-            context.info('-> soundobj chunk is not supported')
-            file.seek(chunk_size, 1)
+def read_mesh(context, io_stream, chunk_end):
+    return Mesh.read(context, io_stream, chunk_end, context.use_numpy, context.use_compact)
+
+
+def single_field(name, read_func, kind, exclusive=()):
+    # only the first chunk of a kind is read, the following ones are skipped
+    def read(context, io_stream, chunk_end, data_context):
+        if any(getattr(data_context, other) is not None for other in (name,) + exclusive):
+            context.warning(f'-> already got one {kind} chunk (skipping this one)!')
+            io_stream.seek(chunk_end)
         else:
-            skip_unknown_chunk(context, file, chunk_type, chunk_size)
+            setattr(data_context, name, read_func(context, io_stream, chunk_end))
+    return read
+
+
+FILE_CHUNKS = {
+    W3D_CHUNK_MESH: item('meshes', read_mesh),
+    W3D_CHUNK_HIERARCHY: single_field('hierarchy', Hierarchy.read, 'hierarchy'),
+    W3D_CHUNK_HLOD: single_field('hlod', HLod.read, 'hlod'),
+    W3D_CHUNK_ANIMATION: single_field('animation', Animation.read, 'animation', ('compressed_animation',)),
+    W3D_CHUNK_COMPRESSED_ANIMATION: single_field('compressed_animation', CompressedAnimation.read, 'animation',
+                                                 ('animation',)),
+    W3D_CHUNK_BOX: item('collision_boxes', read_box),
+    W3D_CHUNK_DAZZLE: item('dazzles', Dazzle.read),
+    W3D_CHUNK_MORPH_ANIMATION: unsupported('morph animation chunk is not supported'),
+    W3D_CHUNK_HMODEL: unsupported('hmodel chnuk is not supported'),
+    W3D_CHUNK_LODMODEL: unsupported('lodmodel chunk is not supported'),
+    W3D_CHUNK_COLLECTION: unsupported('collection chunk not supported'),
+    W3D_CHUNK_POINTS: unsupported('points chunk is not supported'),
+    W3D_CHUNK_LIGHT: unsupported('light chunk is not supported'),
+    W3D_CHUNK_EMITTER: unsupported('emitter chunk is not supported'),
+    W3D_CHUNK_AGGREGATE: unsupported('aggregate chunk is not supported'),
+    W3D_CHUNK_NULL_OBJECT: unsupported('null object chunkt is not supported'),
+    W3D_CHUNK_LIGHTSCAPE: unsupported('lightscape chunk is not supported'),
+    W3D_CHUNK_SOUNDROBJ: unsupported('soundobj chunk is not supported')}
+
+
+def peek_identifier(io_stream, chunk_type, chunk_end):
+    position = io_stream.tell()
+    (name, container_name) = read_entry_names(io_stream, chunk_type, chunk_end)
+    io_stream.seek(position)
+    return ChunkEntry(name=name, container_name=container_name).identifier()
+
+
+def load_file(context, data_context, path=None, selection=None, io_stream=None):
+    # io_stream can be any readable binary stream, it does not have to support seek and tell
+    if path is None:
+        path = context.filepath
 
-    file.close()
+    path = insensitive_path(context, path)
+    context.info(f'Loading file: {path}')
+
+    # only the readers opened here are closed, streams of the caller stay open
+    opened = io_stream is None
+    if io_stream is None and not os.path.exists(path):
+        io_stream = open_archive_member(path)
+        if io_stream is None:
+            context.error(f'file not found: {path}')
+            return
+
+    if io_stream is None:
+        file = BinaryReader.from_file(path, context.use_mmap)
+    elif isinstance(io_stream, (BinaryReader, MappedReader)):
+        file = io_stream
+    else:
+        file = StreamReader(io_stream)
+
+    # with parallel decoding the mesh chunks are decoded in worker processes while the file is read
+    decoder = MeshDecoder(context.use_compact) if context.use_parallel else None
+
+    try:
+        while not file.at_end():
+            chunk_type, chunk_size, chunk_end = read_chunk_head(file)
+
+            if isinstance(file, StreamReader) and chunk_type in FILE_CHUNKS:
+                file.buffer(chunk_end)
+
+            if chunk_type in [W3D_CHUNK_MESH, W3D_CHUNK_BOX, W3D_CHUNK_DAZZLE] \
+                    and not is_selected(selection, peek_identifier(file, chunk_type, chunk_end)):
+                file.seek(chunk_end)
+            elif chunk_type == W3D_CHUNK_MESH and decoder is not None:
+                decoder.submit(read_chunk_data(file, chunk_end))
+            elif chunk_type in FILE_CHUNKS:
+                FILE_CHUNKS[chunk_type](context, file, chunk_end, data_context)
+            else:
+                skip_unknown_chunk(context, file, chunk_type, chunk_size)
+
+        if decoder is not None:
+            data_context.meshes.extend(decoder.finish(context))
+    finally:
+        if opened:
+            file.close()
 
 
 ##########################################################################
@@ -102,10 +135,20 @@ def load_file(context, data_context, path=None):
 ##########################################################################
 
 
-def load(context):
+def load(context, names=None):
+    open_import(context)
+    try:
+        return load_data(context, names)
+    finally:
+        close_import(context)
+
+
+def load_data(context, names=None):
     data_context = DataContext()
+    selection = get_selection(context, names)
 
-    load_file(context, data_context)
+    load_file(context, data_context, selection=selection)
+    filter_hlod(data_context.hlod, selection)
 
     hierarchy = data_context.hierarchy
     hlod = data_context.hlod
@@ -114,18 +157,20 @@ def load(context):
 
     if hierarchy is None:
         sklpath = None
+        hierarchy_name = None
 
         if hlod and hlod.header.model_name != hlod.header.hierarchy_name:
-            sklpath = os.path.dirname(context.filepath) + os.path.sep + \
-                hlod.header.hierarchy_name.lower() + '.w3d'
+            hierarchy_name = hlod.header.hierarchy_name
 
         # if we load a animation file afterwards and need the hierarchy again
         elif animation and animation.header.name != '':
-            sklpath = os.path.dirname(context.filepath) + os.path.sep + \
-                animation.header.hierarchy_name.lower() + '.w3d'
+            hierarchy_name = animation.header.hierarchy_name
         elif compressed_animation and compressed_animation.header.name != '':
-            sklpath = os.path.dirname(context.filepath) + os.path.sep + \
-                compressed_animation.header.hierarchy_name.lower() + '.w3d'
+            hierarchy_name = compressed_animation.header.hierarchy_name
+
+        if hierarchy_name:
+            sklpath = find_indexed_asset(context, 'hierarchy', hierarchy_name, '.w3d') or \
+                os.path.dirname(context.filepath) + os.path.sep + hierarchy_name.lower() + '.w3d'
 
         if sklpath:
             load_file(context, data_context, sklpath)
@@ -143,20 +188,3 @@ def load(context):
                 data_context.compressed_animation,
                 data_context.dazzles)
     return {'FINISHED'}
-
-
-##########################################################################
-# Unsupported
-##########################################################################
-
-W3D_CHUNK_MORPH_ANIMATION = 0x000002C0
-W3D_CHUNK_HMODEL = 0x00000300
-W3D_CHUNK_LODMODEL = 0x00000400
-W3D_CHUNK_COLLECTION = 0x00000420
-W3D_CHUNK_POINTS = 0x00000440
-W3D_CHUNK_LIGHT = 0x00000460
-W3D_CHUNK_EMITTER = 0x00000500
-W3D_CHUNK_AGGREGATE = 0x00000600
-W3D_CHUNK_NULL_OBJECT = 0x00000750
-W3D_CHUNK_LIGHTSCAPE = 0x00000800
-W3D_CHUNK_SOUNDROBJ = 0x00000A00
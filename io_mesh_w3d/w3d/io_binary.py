@@ -1,16 +1,302 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
+import io
+import mmap
+import os
 import struct
+import sys
+from array import array
 
-from mathutils import Vector, Quaternion
+from io_mesh_w3d.w3d import vecmath
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 HEAD = 8  # chunk_type(long) + chunk_size(long)
 STRING_LENGTH = 16
 LARGE_STRING_LENGTH = STRING_LENGTH * 2
 
+_long = struct.Struct('<l')
+_ulong = struct.Struct('<L')
+_short = struct.Struct('<h')
+_ushort = struct.Struct('<H')
+_float = struct.Struct('<f')
+_byte = struct.Struct('<b')
+_ubyte = struct.Struct('<B')
+_vector2 = struct.Struct('<2f')
+_vector = struct.Struct('<3f')
+_vector4 = struct.Struct('<4f')
+_chunk_head = struct.Struct('<LL')
+_fixed_string = struct.Struct(f'{STRING_LENGTH}s')
+_long_fixed_string = struct.Struct(f'{LARGE_STRING_LENGTH}s')
+
+
+class BinaryReader(io.BytesIO):
+    # in-memory replacement for a binary file object, the whole data is loaded once
+    # and all reads are served from the buffer by moving the cursor
+    def __init__(self, data):
+        super().__init__(data)
+        self.data = data
+
+    @staticmethod
+    def from_file(path, use_mmap=False):
+        if use_mmap and os.path.getsize(path) > 0:
+            return MappedReader(path)
+        with open(path, 'rb') as file:
+            return BinaryReader(file.read())
+
+    def size(self):
+        return len(self.data)
+
+    def at_end(self):
+        return self.tell() >= len(self.data)
+
+    def read_string(self):
+        start = self.tell()
+        end = self.data.find(b'\x00', start)
+        if end < 0:
+            end = len(self.data)
+        self.seek(end + 1)
+        return self.data[start:end].decode('utf-8')
+
+    def read_view(self, size):
+        start = self.tell()
+        self.seek(min(start + size, len(self.data)))
+        return memoryview(self.data)[start:start + size]
+
+
+class MappedReader:
+    # read only memory mapping of a file with the same cursor interface as BinaryReader,
+    # reads are served from the os page cache and record lists are decoded from slices
+    # of the mapping without copying them first
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def read(self, size=-1):
+        return self.data.read(size)
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.data.tell()
+        elif whence == 2:
+            offset += len(self.data)
+        self.data.seek(min(max(offset, 0), len(self.data)))
+        return self.data.tell()
+
+    def tell(self):
+        return self.data.tell()
+
+    def size(self):
+        return len(self.data)
+
+    def at_end(self):
+        return self.data.tell() >= len(self.data)
+
+    def read_string(self):
+        start = self.data.tell()
+        end = self.data.find(b'\x00', start)
+        if end < 0:
+            end = len(self.data)
+        self.seek(end + 1)
+        return self.data[start:end].decode('utf-8')
+
+    def read_view(self, size):
+        start = self.data.tell()
+        self.seek(size, 1)
+        return memoryview(self.data)[start:start + size]
+
+    def close(self):
+        try:
+            self.data.close()
+        except BufferError:
+            # numpy views still reference the mapping, it is released along with the last of them
+            pass
+
+
+class StreamReader:
+    # reader for streams which can not seek like zip members or pipes, the position is tracked
+    # here and forward seeks read and discard the skipped data
+    # buffer(end) keeps the data up to end in memory so the chunk readers can seek inside of it
+    def __init__(self, io_stream, block_size=1 << 16):
+        self.io_stream = io_stream
+        self.block_size = block_size
+        self.stream_position = 0
+        self.lookahead = b''
+        self.window_start = 0
+        self.window = BinaryReader(b'')
+
+    def read_stream(self, size):
+        # streams may return less data than requested before they are exhausted
+        parts = [self.lookahead]
+        count = len(self.lookahead)
+        self.lookahead = b''
+        while size < 0 or count < size:
+            data = self.io_stream.read(size - count if size >= 0 else self.block_size)
+            if not data:
+                break
+            parts.append(data)
+            count += len(data)
+        data = b''.join(parts)
+        if 0 <= size < len(data):
+            (data, self.lookahead) = (data[:size], data[size:])
+        self.stream_position += len(data)
+        return data
+
+    def reset_window(self):
+        self.window_start = self.stream_position
+        self.window = BinaryReader(b'')
+
+    def buffer(self, end):
+        start = self.tell()
+        data = self.window.read() + self.read_stream(max(end - self.stream_position, 0))
+        self.window_start = start
+        self.window = BinaryReader(data)
+
+    def read(self, size=-1):
+        data = self.window.read(size)
+        if size < 0 or len(data) < size:
+            data += self.read_stream(size - len(data) if size >= 0 else -1)
+            self.reset_window()
+        return data
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.tell()
+        elif whence == 2:
+            raise io.UnsupportedOperation('can not seek relative to the end of a stream')
+        if offset < self.window_start:
+            raise io.UnsupportedOperation('can not seek backwards in a stream')
+
+        if offset <= self.window_start + self.window.size():
+            self.window.seek(offset - self.window_start)
+            return offset
+
+        while self.stream_position < offset:
+            if not self.read_stream(min(offset - self.stream_position, self.block_size)):
+                break
+        self.reset_window()
+        return self.stream_position
+
+    def tell(self):
+        return self.window_start + self.window.tell()
+
+    def at_end(self):
+        if not self.window.at_end() or self.lookahead:
+            return False
+        self.lookahead = self.io_stream.read(1)
+        return not self.lookahead
+
+    def read_string(self):
+        if self.window.data.find(b'\x00', self.window.tell()) >= 0:
+            return self.window.read_string()
+        str_buf = []
+        byte = self.read(1)
+        while byte and byte != b'\x00':
+            str_buf.append(byte)
+            byte = self.read(1)
+        return (b''.join(str_buf)).decode('utf-8')
+
+    def read_view(self, size):
+        if self.window.tell() + size <= self.window.size():
+            return self.window.read_view(size)
+        return memoryview(self.read(size))
+
+    def close(self):
+        self.io_stream.close()
+
+
+class BinaryWriter:
+    # in-memory replacement for a binary file object, everything is serialized into
+    # one growable buffer which is written to disk at once
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def tell(self):
+        return len(self.data)
+
+    def getvalue(self):
+        return bytes(self.data)
+
+    def save(self, path):
+        with open(path, 'wb') as file:
+            file.write(self.data)
+
+
+def read_typed_array(typecode, data):
+    # w3d data is little endian
+    result = array(typecode)
+    result.frombytes(data[:len(data) - len(data) % result.itemsize])
+    if sys.byteorder == 'big':
+        result.byteswap()
+    return result
+
+
+def typed_array_bytes(data):
+    if sys.byteorder == 'big':
+        data = array(data.typecode, data)
+        data.byteswap()
+    return data.tobytes()
+
+
+class VectorArray:
+    # compact list of vectors, the components are stored in one flat float array
+    # and Vector objects are only created when an element is accessed
+    def __init__(self, width=3, data=None):
+        self.width = width
+        self.data = data if data is not None else array('f')
+
+    @staticmethod
+    def read(io_stream, chunk_end, width=3):
+        data = read_chunk_data(io_stream, chunk_end)
+        return VectorArray(width, read_typed_array('f', data[:len(data) - len(data) % (4 * width)]))
+
+    def __len__(self):
+        return len(self.data) // self.width
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('vector array index out of range')
+        start = index * self.width
+        if self.width == 2:
+            return vecmath.Vector((self.data[start], self.data[start + 1], 0))
+        return vecmath.Vector(self.data[start:start + self.width])
+
+    def __setitem__(self, index, vec):
+        if index < 0:
+            index += len(self)
+        start = index * self.width
+        self.data[start:start + self.width] = array('f', tuple(vec)[:self.width])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def append(self, vec):
+        self.data.extend(tuple(vec)[:self.width])
+
+    def copy(self):
+        return VectorArray(self.width, array('f', self.data))
+
+    def tobytes(self):
+        return typed_array_bytes(self.data)
+
 
 def read_string(io_stream):
+    if isinstance(io_stream, (BinaryReader, MappedReader, StreamReader)):
+        return io_stream.read_string()
+
     str_buf = []
     byte = io_stream.read(1)
     while ord(byte) != 0:
@@ -20,156 +306,124 @@ def read_string(io_stream):
 
 
 def write_string(string, io_stream):
-    io_stream.write(bytes(string, 'UTF-8'))
-    io_stream.write(struct.pack('B', 0b0))
+    io_stream.write(bytes(string, 'UTF-8') + b'\x00')
 
 
-def read_fixed_string(io_stream):
-    return ((str(io_stream.read(STRING_LENGTH)))[2:18]).split('\\')[0]
+def unpack_fixed_string(data, length=STRING_LENGTH):
+    return ((str(data))[2:length + 2]).split('\\')[0]
 
 
-def write_fixed_string(string, io_stream):
-    # truncate the string to 16
-    nullbytes = STRING_LENGTH - len(string)
-    if nullbytes < 0:
+def pack_fixed_string(string, length=STRING_LENGTH):
+    # truncate the string to length, the struct codec pads it with null bytes
+    if len(string) > length:
         print('Warning: Fixed string is too long!')
+    return bytes(string, 'UTF-8')[0:length]
+
+
+def read_fixed_string(io_stream):
+    return unpack_fixed_string(io_stream.read(STRING_LENGTH))
+
 
-    io_stream.write(bytes(string, 'UTF-8')[0:STRING_LENGTH])
-    i = 0
-    while i < nullbytes:
-        io_stream.write(struct.pack('B', 0b0))
-        i += 1
+def write_fixed_string(string, io_stream):
+    io_stream.write(_fixed_string.pack(pack_fixed_string(string)))
 
 
 def read_long_fixed_string(io_stream):
-    return ((str(io_stream.read(LARGE_STRING_LENGTH)))[2:34]).split('\\')[0]
+    return unpack_fixed_string(io_stream.read(LARGE_STRING_LENGTH), LARGE_STRING_LENGTH)
 
 
 def write_long_fixed_string(string, io_stream):
-    # truncate the string to 32
-    nullbytes = LARGE_STRING_LENGTH - len(string)
-    if nullbytes < 0:
-        print('Warning: Fixed string was too long!')
-
-    io_stream.write(bytes(string, 'UTF-8')[0:LARGE_STRING_LENGTH])
-    i = 0
-    while i < nullbytes:
-        io_stream.write(struct.pack('B', 0b0))
-        i += 1
+    io_stream.write(_long_fixed_string.pack(pack_fixed_string(string, LARGE_STRING_LENGTH)))
 
 
 def read_long(io_stream):
-    return struct.unpack('<l', io_stream.read(4))[0]
+    return _long.unpack(io_stream.read(_long.size))[0]
 
 
 def write_long(num, io_stream):
-    io_stream.write(struct.pack('<l', num))
+    io_stream.write(_long.pack(num))
 
 
 def read_ulong(io_stream):
-    return struct.unpack('<L', io_stream.read(4))[0]
+    return _ulong.unpack(io_stream.read(_ulong.size))[0]
 
 
 def write_ulong(num, io_stream):
-    io_stream.write(struct.pack('<L', num))
+    io_stream.write(_ulong.pack(num))
 
 
 def read_short(io_stream):
-    return struct.unpack('<h', io_stream.read(2))[0]
+    return _short.unpack(io_stream.read(_short.size))[0]
 
 
 def write_short(num, io_stream):
-    io_stream.write(struct.pack('<h', num))
+    io_stream.write(_short.pack(num))
 
 
 def read_ushort(io_stream):
-    return struct.unpack('<H', io_stream.read(2))[0]
+    return _ushort.unpack(io_stream.read(_ushort.size))[0]
 
 
 def write_ushort(num, io_stream):
-    io_stream.write(struct.pack('<H', num))
+    io_stream.write(_ushort.pack(num))
 
 
 def read_float(io_stream):
-    return struct.unpack('<f', io_stream.read(4))[0]
+    return _float.unpack(io_stream.read(_float.size))[0]
 
 
 def write_float(num, io_stream):
-    io_stream.write(struct.pack('<f', num))
+    io_stream.write(_float.pack(num))
 
 
 def read_byte(io_stream):
-    return struct.unpack('<b', io_stream.read(1))[0]
+    return _byte.unpack(io_stream.read(_byte.size))[0]
 
 
 def write_byte(byte, io_stream):
-    io_stream.write(struct.pack('<b', byte))
+    io_stream.write(_byte.pack(byte))
 
 
 def read_ubyte(io_stream):
-    return struct.unpack('<B', io_stream.read(1))[0]
+    return _ubyte.unpack(io_stream.read(_ubyte.size))[0]
 
 
 def write_ubyte(byte, io_stream):
-    io_stream.write(struct.pack('<B', byte))
+    io_stream.write(_ubyte.pack(byte))
 
 
 def read_vector(io_stream):
-    vec = Vector((0, 0, 0))
-    vec.x = read_float(io_stream)
-    vec.y = read_float(io_stream)
-    vec.z = read_float(io_stream)
-    return vec
+    return vecmath.Vector(_vector.unpack(io_stream.read(12)))
 
 
 def write_vector(vec, io_stream):
-    write_float(vec.x, io_stream)
-    write_float(vec.y, io_stream)
-    write_float(vec.z, io_stream)
+    io_stream.write(_vector.pack(vec.x, vec.y, vec.z))
 
 
 def read_vector4(io_stream):
-    vec = Vector((0, 0, 0, 0))
-    vec.x = read_float(io_stream)
-    vec.y = read_float(io_stream)
-    vec.z = read_float(io_stream)
-    vec.w = read_float(io_stream)
-    return vec
+    return vecmath.Vector(_vector4.unpack(io_stream.read(16)))
 
 
 def write_vector4(vec, io_stream):
-    write_float(vec.x, io_stream)
-    write_float(vec.y, io_stream)
-    write_float(vec.z, io_stream)
-    write_float(vec.w, io_stream)
+    io_stream.write(_vector4.pack(vec.x, vec.y, vec.z, vec.w))
 
 
 def read_quaternion(io_stream):
-    quat = Quaternion((0, 0, 0, 0))
-    quat.x = read_float(io_stream)
-    quat.y = read_float(io_stream)
-    quat.z = read_float(io_stream)
-    quat.w = read_float(io_stream)
-    return quat
+    (x, y, z, w) = _vector4.unpack(io_stream.read(16))
+    return vecmath.Quaternion((w, x, y, z))
 
 
 def write_quaternion(quat, io_stream):
-    write_float(quat.x, io_stream)
-    write_float(quat.y, io_stream)
-    write_float(quat.z, io_stream)
-    write_float(quat.w, io_stream)
+    io_stream.write(_vector4.pack(quat.x, quat.y, quat.z, quat.w))
 
 
 def read_vector2(io_stream):
-    vec = Vector((0, 0, 0))
-    vec.x = read_float(io_stream)
-    vec.y = read_float(io_stream)
-    return vec
+    (x, y) = _vector2.unpack(io_stream.read(8))
+    return vecmath.Vector((x, y, 0))
 
 
 def write_vector2(vec, io_stream):
-    write_float(vec.x, io_stream)
-    write_float(vec.y, io_stream)
+    io_stream.write(_vector2.pack(vec.x, vec.y))
 
 
 def read_channel_value(io_stream, channel_type):
@@ -186,17 +440,39 @@ def write_channel_value(data, io_stream, channel_type):
 
 
 def read_chunk_head(io_stream):
-    chunk_type = read_ulong(io_stream)
-    chunk_size = read_ulong(io_stream) & 0x7FFFFFFF
+    (chunk_type, chunk_size) = _chunk_head.unpack(io_stream.read(HEAD))
+    chunk_size &= 0x7FFFFFFF
     chunk_end = io_stream.tell() + chunk_size
     return chunk_type, chunk_size, chunk_end
 
 
 def write_chunk_head(chunk_id, io_stream, size, has_sub_chunks=False):
-    write_ulong(chunk_id, io_stream)
     if has_sub_chunks:
         size |= 0x80000000
-    write_ulong(size, io_stream)
+    io_stream.write(_chunk_head.pack(chunk_id, size))
+
+
+def begin_chunk(chunk_id, io_stream, has_sub_chunks=False):
+    # writes the chunk head with a placeholder size, end_chunk patches in the actual size
+    # once the chunk body is written, so no size pre-pass over the children is required
+    head = io_stream.tell()
+    write_chunk_head(chunk_id, io_stream, 0, has_sub_chunks)
+    return head, has_sub_chunks
+
+
+def end_chunk(io_stream, chunk):
+    (head, has_sub_chunks) = chunk
+    end = io_stream.tell()
+    size = end - head - HEAD
+    if has_sub_chunks:
+        size |= 0x80000000
+
+    if isinstance(io_stream, BinaryWriter):
+        _ulong.pack_into(io_stream.data, head + 4, size)
+    else:
+        io_stream.seek(head + 4)
+        write_ulong(size, io_stream)
+        io_stream.seek(end)
 
 
 def write_list(data, io_stream, write_func, par1=None):
@@ -207,6 +483,40 @@ def write_list(data, io_stream, write_func, par1=None):
             write_func(datum, io_stream)
 
 
+def write_long_list(data, io_stream):
+    io_stream.write(struct.pack(f'<{len(data)}l', *data))
+
+
+def write_ulong_list(data, io_stream):
+    io_stream.write(struct.pack(f'<{len(data)}L', *data))
+
+
+def write_float_list(data, io_stream):
+    io_stream.write(struct.pack(f'<{len(data)}f', *data))
+
+
+def write_ubyte_list(data, io_stream):
+    io_stream.write(bytes(data))
+
+
+def write_vector_list(data, io_stream):
+    if isinstance(data, VectorArray):
+        io_stream.write(data.tobytes())
+        return
+    io_stream.write(b''.join([_vector.pack(vec.x, vec.y, vec.z) for vec in data]))
+
+
+def write_vector2_list(data, io_stream):
+    if isinstance(data, VectorArray):
+        io_stream.write(data.tobytes())
+        return
+    io_stream.write(b''.join([_vector2.pack(vec.x, vec.y) for vec in data]))
+
+
+def write_quaternion_list(data, io_stream):
+    io_stream.write(b''.join([_vector4.pack(quat.x, quat.y, quat.z, quat.w) for quat in data]))
+
+
 def read_list(io_stream, chunk_end, read_func):
     result = []
     while io_stream.tell() < chunk_end:
@@ -214,6 +524,45 @@ def read_list(io_stream, chunk_end, read_func):
     return result
 
 
+def read_chunk_data(io_stream, chunk_end):
+    size = chunk_end - io_stream.tell()
+    if isinstance(io_stream, (BinaryReader, MappedReader, StreamReader)):
+        return io_stream.read_view(size)
+    return io_stream.read(size)
+
+
+def read_records(io_stream, chunk_end, codec):
+    # decodes all fixed size records up to chunk_end from a single read
+    data = read_chunk_data(io_stream, chunk_end)
+    return codec.iter_unpack(data[:len(data) - len(data) % codec.size])
+
+
+def read_array_view(io_stream, chunk_end, dtype, width=1):
+    # numpy array over the chunk data up to chunk_end, the data is not copied
+    dtype = numpy.dtype(dtype)
+    data = read_chunk_data(io_stream, chunk_end)
+    result = numpy.frombuffer(data, dtype=dtype, count=len(data) // dtype.itemsize)
+    if width > 1:
+        result = result[:len(result) - len(result) % width].reshape(-1, width)
+    return result
+
+
+def read_long_list(io_stream, chunk_end):
+    return [value for (value,) in read_records(io_stream, chunk_end, _long)]
+
+
+def read_ulong_list(io_stream, chunk_end):
+    return [value for (value,) in read_records(io_stream, chunk_end, _ulong)]
+
+
+def read_vector_list(io_stream, chunk_end):
+    return [vecmath.Vector(vec) for vec in read_records(io_stream, chunk_end, _vector)]
+
+
+def read_vector2_list(io_stream, chunk_end):
+    return [vecmath.Vector((x, y, 0)) for (x, y) in read_records(io_stream, chunk_end, _vector2)]
+
+
 def read_fixed_list(io_stream, count, read_func, par1=None):
     result = []
     for _ in range(count):
@@ -229,5 +578,4 @@ def read_padding(io_stream, count):
 
 
 def write_padding(io_stream, count):
-    for _ in range(count):
-        write_ubyte(0, io_stream)
+    io_stream.write(bytes(count))
@@ -0,0 +1,90 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import multiprocessing
+import os
+import runpy
+from concurrent.futures import ProcessPoolExecutor
+
+from io_mesh_w3d.common.structs.mesh import *
+
+
+class MessageLog:
+    # stands in for the operator in the worker processes, the messages are reported
+    # by the importing process once the mesh is handed back
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg):
+        self.messages.append(('info', msg))
+
+    def warning(self, msg):
+        self.messages.append(('warning', msg))
+
+    def error(self, msg):
+        self.messages.append(('error', msg))
+
+
+def decode_mesh(data, compact=False):
+    log = MessageLog()
+    mesh = Mesh.read(log, BinaryReader(data), len(data), False, compact)
+    return mesh, log.messages
+
+
+BOOTSTRAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bootstrap.py')
+
+
+def create_executor(max_workers=None):
+    # blender is multi-threaded and must not be forked, the spawned workers register
+    # the package without its bpy dependent __init__ before they import anything from it
+    return ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=runpy.run_path, initargs=(BOOTSTRAP_PATH,))
+
+
+class MeshDecoder:
+    # decodes the data of mesh chunks in a process pool, the meshes are returned in the order
+    # the chunks were submitted in. if the pool is not available or breaks the remaining
+    # meshes are decoded in this process. the workers decode compact meshes with use_compact,
+    # their arrays are unpickled much faster than the lists of vector and triangle objects
+    def __init__(self, compact=False, max_workers=None):
+        self.compact = compact
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count()
+        self.executor = None
+        self.failed = False
+        self.jobs = []
+
+    def submit(self, data):
+        data = bytes(data)
+        future = None
+        if not self.failed:
+            try:
+                if self.executor is None:
+                    self.executor = create_executor(self.max_workers)
+                future = self.executor.submit(decode_mesh, data, self.compact)
+            except (OSError, RuntimeError, ValueError):
+                self.failed = True
+        self.jobs.append((data, future))
+
+    def finish(self, context):
+        meshes = []
+        try:
+            for (data, future) in self.jobs:
+                result = None
+                if future is not None:
+                    try:
+                        result = future.result()
+                    except Exception:
+                        result = None
+                if result is None:
+                    result = decode_mesh(data, self.compact)
+
+                (mesh, messages) = result
+                for (level, msg) in messages:
+                    getattr(context, level)(msg)
+                meshes.append(mesh)
+        finally:
+            self.jobs = []
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+        return meshes
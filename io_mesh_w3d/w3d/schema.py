@@ -0,0 +1,165 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import struct
+
+from io_mesh_w3d.w3d import vecmath
+from io_mesh_w3d.w3d.structs.version import Version
+from io_mesh_w3d.w3d.utils.helpers import *
+
+##########################################################################
+# fixed size structs
+##########################################################################
+
+# field type: (struct format, number of unpacked values, decode function, encode function)
+# fields without decode and encode functions are passed through unchanged
+FIELD_TYPES = {
+    'byte': ('b', 1, None, None),
+    'ubyte': ('B', 1, None, None),
+    'short': ('h', 1, None, None),
+    'ushort': ('H', 1, None, None),
+    'long': ('l', 1, None, None),
+    'ulong': ('L', 1, None, None),
+    'float': ('f', 1, None, None),
+    'version': ('L', 1,
+                lambda values: Version(major=values[0] >> 16, minor=values[0] & 0xFFFF),
+                lambda version: ((version.major << 16) | version.minor,)),
+    'string': (f'{STRING_LENGTH}s', 1,
+               lambda values: unpack_fixed_string(values[0]),
+               lambda string: (pack_fixed_string(string),)),
+    'long_string': (f'{LARGE_STRING_LENGTH}s', 1,
+                    lambda values: unpack_fixed_string(values[0], LARGE_STRING_LENGTH),
+                    lambda string: (pack_fixed_string(string, LARGE_STRING_LENGTH),)),
+    'vector': ('3f', 3,
+               lambda values: vecmath.Vector(values),
+               lambda vec: (vec.x, vec.y, vec.z)),
+    'quaternion': ('4f', 4,
+                   lambda values: vecmath.Quaternion((values[3], values[0], values[1], values[2])),
+                   lambda quat: (quat.x, quat.y, quat.z, quat.w))}
+
+
+def padding(count):
+    return None, f'{count}x'
+
+
+class Schema:
+    # compiles a list of (name, field type) pairs into a single struct codec, fields
+    # created with padding(count) are zero bytes which are skipped on read
+    def __init__(self, chunk_type, fields):
+        self.chunk_type = chunk_type
+        self.fields = fields
+        self.decoders = []
+        self.encoders = []
+
+        formats = ['<']
+        index = 0
+        for (name, type_) in fields:
+            if name is None:
+                formats.append(type_)
+                continue
+            (format_, count, decode, encode) = FIELD_TYPES[type_]
+            formats.append(format_)
+            self.decoders.append((name, index, index + count, decode))
+            self.encoders.append((name, encode))
+            index += count
+        self.codec = struct.Struct(''.join(formats))
+
+    def unpack(self, data):
+        values = self.codec.unpack(data)
+        result = {}
+        for (name, start, end, decode) in self.decoders:
+            result[name] = values[start] if decode is None else decode(values[start:end])
+        return result
+
+    def pack(self, obj):
+        values = []
+        for (name, encode) in self.encoders:
+            if encode is None:
+                values.append(getattr(obj, name))
+            else:
+                values.extend(encode(getattr(obj, name)))
+        return self.codec.pack(*values)
+
+
+def schema(chunk_type, fields):
+    # class decorator which generates read, size and write for a fixed size struct, the keyword
+    # arguments of the constructor have to match the field names
+    # structs with a chunk_type of None are written without a chunk head
+    compiled = Schema(chunk_type, fields)
+    data_size = compiled.codec.size
+
+    def decorate(cls):
+        def read(io_stream):
+            return cls(**compiled.unpack(io_stream.read(data_size)))
+
+        def size(include_head=True):
+            return const_size(data_size, include_head and chunk_type is not None)
+
+        def write(self, io_stream):
+            if chunk_type is not None:
+                write_chunk_head(chunk_type, io_stream, data_size)
+            io_stream.write(compiled.pack(self))
+
+        cls.schema = compiled
+        cls.read = staticmethod(read)
+        cls.size = staticmethod(size)
+        cls.write = write
+        return cls
+    return decorate
+
+
+##########################################################################
+# sub chunk dispatch
+##########################################################################
+
+# a sub chunk table maps chunk types to readers(context, io_stream, chunk_end, result)
+# which store the decoded chunk on the result object
+
+
+def field(name, read_func, *args):
+    def read(context, io_stream, chunk_end, result):
+        setattr(result, name, read_func(context, io_stream, chunk_end, *args))
+    return read
+
+
+def data_field(name, read_func, *args):
+    def read(context, io_stream, chunk_end, result):
+        setattr(result, name, read_func(io_stream, chunk_end, *args))
+    return read
+
+
+def record_field(name, read_func):
+    def read(context, io_stream, chunk_end, result):
+        setattr(result, name, read_func(io_stream))
+    return read
+
+
+def item(name, read_func, *args):
+    def read(context, io_stream, chunk_end, result):
+        getattr(result, name).append(read_func(context, io_stream, chunk_end, *args))
+    return read
+
+
+def data_item(name, read_func, *args):
+    def read(context, io_stream, chunk_end, result):
+        getattr(result, name).append(read_func(io_stream, chunk_end, *args))
+    return read
+
+
+def unsupported(message):
+    def read(context, io_stream, chunk_end, result):
+        context.info(f'-> {message}')
+        io_stream.seek(chunk_end)
+    return read
+
+
+def read_chunks(context, io_stream, chunk_end, result, readers):
+    while io_stream.tell() < chunk_end:
+        (chunk_type, chunk_size, subchunk_end) = read_chunk_head(io_stream)
+
+        reader = readers.get(chunk_type)
+        if reader is None:
+            skip_unknown_chunk(context, io_stream, chunk_type, chunk_size)
+        else:
+            reader(context, io_stream, subchunk_end, result)
+    return result
@@ -2,6 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 from io_mesh_w3d.w3d.structs.version import Version
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 
 W3D_CHUNK_COMPRESSED_ANIMATION = 0x00000280
@@ -14,6 +15,13 @@ TIME_CODED_FLAVOR = 0
 ADAPTIVE_DELTA_FLAVOR = 1
 
 
+@schema(W3D_CHUNK_COMPRESSED_ANIMATION_HEADER, [
+    ('version', 'version'),
+    ('name', 'string'),
+    ('hierarchy_name', 'string'),
+    ('num_frames', 'ulong'),
+    ('frame_rate', 'ushort'),
+    ('flavor', 'ushort')])
 class CompressedAnimationHeader:
     def __init__(
             self,
@@ -30,31 +38,10 @@ class CompressedAnimationHeader:
         self.frame_rate = frame_rate
         self.flavor = flavor
 
-    @staticmethod
-    def read(io_stream):
-        return CompressedAnimationHeader(
-            version=Version.read(io_stream),
-            name=read_fixed_string(io_stream),
-            hierarchy_name=read_fixed_string(io_stream),
-            num_frames=read_ulong(io_stream),
-            frame_rate=read_ushort(io_stream),
-            flavor=read_ushort(io_stream))
-
-    @staticmethod
-    def size(include_head=True):
-        return const_size(44, include_head)
-
-    def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_COMPRESSED_ANIMATION_HEADER, io_stream, self.size(False))
-        self.version.write(io_stream)
-        write_fixed_string(self.name, io_stream)
-        write_fixed_string(self.hierarchy_name, io_stream)
-        write_ulong(self.num_frames, io_stream)
-        write_ushort(self.frame_rate, io_stream)
-        write_ushort(self.flavor, io_stream)
-
 
 class TimeCodedDatum:
+    __slots__ = ('time_code', 'interpolated', 'value')
+
     def __init__(self, time_code=0, interpolated=False, value=None):
         self.time_code = time_code
         self.interpolated = interpolated
@@ -114,15 +101,18 @@ class TimeCodedAnimationChannel:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_COMPRESSED_ANIMATION_CHANNEL, io_stream, self.size(False))
+        chunk = begin_chunk(W3D_CHUNK_COMPRESSED_ANIMATION_CHANNEL, io_stream)
         write_ulong(self.num_time_codes, io_stream)
         write_ushort(self.pivot, io_stream)
         write_ubyte(self.vector_len, io_stream)
         write_ubyte(self.type, io_stream)
         write_list(self.time_codes, io_stream, TimeCodedDatum.write, self.type)
+        end_chunk(io_stream, chunk)
 
 
 class AdaptiveDeltaBlock:
+    __slots__ = ('vector_index', 'block_index', 'delta_bytes')
+
     def __init__(self, vector_index=0, block_index=0, delta_bytes=None):
         self.vector_index = vector_index
         self.block_index = block_index
@@ -205,7 +195,7 @@ class AdaptiveDeltaAnimationChannel:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_COMPRESSED_ANIMATION_CHANNEL, io_stream, self.size(False))
+        chunk = begin_chunk(W3D_CHUNK_COMPRESSED_ANIMATION_CHANNEL, io_stream)
         write_ulong(self.num_time_codes, io_stream)
         write_ushort(self.pivot, io_stream)
         write_ubyte(self.vector_len, io_stream)
@@ -213,6 +203,7 @@ class AdaptiveDeltaAnimationChannel:
         write_float(self.scale, io_stream)
         self.data.write(io_stream, self.type)
         write_padding(io_stream, 3)
+        end_chunk(io_stream, chunk)
 
 
 class AdaptiveDeltaMotionAnimationChannel:
@@ -238,6 +229,8 @@ class AdaptiveDeltaMotionAnimationChannel:
 
 
 class TimeCodedBitDatum:
+    __slots__ = ('time_code', 'value')
+
     def __init__(self, time_code=0, value=False):
         self.time_code = time_code
         self.value = value
@@ -287,12 +280,13 @@ class TimeCodedBitChannel:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_COMPRESSED_BIT_CHANNEL, io_stream, self.size(False))
+        chunk = begin_chunk(W3D_CHUNK_COMPRESSED_BIT_CHANNEL, io_stream)
         write_ulong(self.num_time_codes, io_stream)
         write_ushort(self.pivot, io_stream)
         write_ubyte(self.type, io_stream)
         write_ubyte(self.default_value, io_stream)
         write_list(self.time_codes, io_stream, TimeCodedBitDatum.write)
+        end_chunk(io_stream, chunk)
 
 
 class MotionChannel:
@@ -359,8 +353,7 @@ class MotionChannel:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_COMPRESSED_ANIMATION_MOTION_CHANNEL,
-                         io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_COMPRESSED_ANIMATION_MOTION_CHANNEL, io_stream, has_sub_chunks=True)
         write_ubyte(0, io_stream)
         write_ubyte(self.delta_type, io_stream)
         write_ubyte(self.vector_len, io_stream)
@@ -372,6 +365,7 @@ class MotionChannel:
             self.write_time_coded_data(io_stream)
         else:
             self.data.write(io_stream, self.type)
+        end_chunk(io_stream, chunk)
 
 
 class CompressedAnimation:
@@ -431,9 +425,10 @@ class CompressedAnimation:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_COMPRESSED_ANIMATION, io_stream, self.size(), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_COMPRESSED_ANIMATION, io_stream, has_sub_chunks=True)
         self.header.write(io_stream)
         write_list(self.time_coded_channels, io_stream, TimeCodedAnimationChannel.write)
         write_list(self.adaptive_delta_channels, io_stream, AdaptiveDeltaAnimationChannel.write)
         write_list(self.time_coded_bit_channels, io_stream, TimeCodedBitChannel.write)
         write_list(self.motion_channels, io_stream, MotionChannel.write)
+        end_chunk(io_stream, chunk)
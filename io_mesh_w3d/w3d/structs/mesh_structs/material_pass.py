@@ -2,6 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 from io_mesh_w3d.common.structs.rgba import RGBA
+from io_mesh_w3d.w3d.schema import *
 from io_mesh_w3d.w3d.utils.helpers import *
 
 W3D_CHUNK_TEXTURE_STAGE = 0x00000048
@@ -17,21 +18,8 @@ class TextureStage:
         self.tx_coords = tx_coords if tx_coords is not None else []
 
     @staticmethod
-    def read(context, io_stream, chunk_end):
-        result = TextureStage()
-
-        while io_stream.tell() < chunk_end:
-            (chunk_type, chunk_size, subchunk_end) = read_chunk_head(io_stream)
-
-            if chunk_type == W3D_CHUNK_TEXTURE_IDS:
-                result.tx_ids.append(read_list(io_stream, subchunk_end, read_long))
-            elif chunk_type == W3D_CHUNK_STAGE_TEXCOORDS:
-                result.tx_coords.append(read_list(io_stream, subchunk_end, read_vector2))
-            elif chunk_type == W3D_CHUNK_PER_FACE_TEXCOORD_IDS:
-                result.per_face_tx_coords.append(read_list(io_stream, subchunk_end, read_vector))
-            else:
-                skip_unknown_chunk(context, io_stream, chunk_type, chunk_size)
-        return result
+    def read(context, io_stream, chunk_end, compact=False):
+        return read_chunks(context, io_stream, chunk_end, TextureStage(), TEXTURE_STAGE_READERS[compact])
 
     def size(self, include_head=True):
         size = const_size(0, include_head)
@@ -44,20 +32,32 @@ class TextureStage:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_TEXTURE_STAGE, io_stream,
-                         self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_TEXTURE_STAGE, io_stream, has_sub_chunks=True)
 
         for tx_ids in self.tx_ids:
             write_chunk_head(W3D_CHUNK_TEXTURE_IDS, io_stream, long_list_size(tx_ids, False))
-            write_list(tx_ids, io_stream, write_long)
+            write_long_list(tx_ids, io_stream)
 
         for tx_coords in self.tx_coords:
             write_chunk_head(W3D_CHUNK_STAGE_TEXCOORDS, io_stream, vec2_list_size(tx_coords, False))
-            write_list(tx_coords, io_stream, write_vector2)
+            write_vector2_list(tx_coords, io_stream)
 
         for per_face_tx_coords in self.per_face_tx_coords:
             write_chunk_head(W3D_CHUNK_PER_FACE_TEXCOORD_IDS, io_stream, vec_list_size(per_face_tx_coords, False))
-            write_list(per_face_tx_coords, io_stream, write_vector)
+            write_vector_list(per_face_tx_coords, io_stream)
+
+        end_chunk(io_stream, chunk)
+
+
+TEXTURE_STAGE_CHUNKS = {
+    W3D_CHUNK_TEXTURE_IDS: data_item('tx_ids', read_long_list),
+    W3D_CHUNK_STAGE_TEXCOORDS: data_item('tx_coords', read_vector2_list),
+    W3D_CHUNK_PER_FACE_TEXCOORD_IDS: data_item('per_face_tx_coords', read_vector_list)}
+
+# keyed by compact
+TEXTURE_STAGE_READERS = {
+    False: TEXTURE_STAGE_CHUNKS,
+    True: {**TEXTURE_STAGE_CHUNKS, W3D_CHUNK_STAGE_TEXCOORDS: data_item('tx_coords', VectorArray.read, 2)}}
 
 
 W3D_CHUNK_MATERIAL_PASS = 0x00000038
@@ -83,31 +83,8 @@ class MaterialPass:
         self.tx_coords_2 = tx_coords if tx_coords is not None else []
 
     @staticmethod
-    def read(context, io_stream, chunk_end):
-        result = MaterialPass()
-
-        while io_stream.tell() < chunk_end:
-            (chunk_type, chunk_size, subchunk_end) = read_chunk_head(io_stream)
-
-            if chunk_type == W3D_CHUNK_VERTEX_MATERIAL_IDS:
-                result.vertex_material_ids = read_list(io_stream, subchunk_end, read_ulong)
-            elif chunk_type == W3D_CHUNK_SHADER_IDS:
-                result.shader_ids = read_list(io_stream, subchunk_end, read_ulong)
-            elif chunk_type == W3D_CHUNK_DCG:
-                result.dcg = read_list(io_stream, subchunk_end, RGBA.read)
-            elif chunk_type == W3D_CHUNK_DIG:
-                result.dig = read_list(io_stream, subchunk_end, RGBA.read)
-            elif chunk_type == W3D_CHUNK_SCG:
-                result.scg = read_list(io_stream, subchunk_end, RGBA.read)
-            elif chunk_type == W3D_CHUNK_SHADER_MATERIAL_ID:
-                result.shader_material_ids = read_list(io_stream, subchunk_end, read_ulong)
-            elif chunk_type == W3D_CHUNK_TEXTURE_STAGE:
-                result.tx_stages.append(TextureStage.read(context, io_stream, subchunk_end))
-            elif chunk_type == W3D_CHUNK_STAGE_TEXCOORDS:
-                result.tx_coords = read_list(io_stream, subchunk_end, read_vector2)
-            else:
-                skip_unknown_chunk(context, io_stream, chunk_type, chunk_size)
-        return result
+    def read(context, io_stream, chunk_end, compact=False):
+        return read_chunks(context, io_stream, chunk_end, MaterialPass(), MATERIAL_PASS_READERS[compact])
 
     def size(self, include_head=True):
         size = const_size(0, include_head)
@@ -123,37 +100,57 @@ class MaterialPass:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_MATERIAL_PASS, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_MATERIAL_PASS, io_stream, has_sub_chunks=True)
 
         if self.vertex_material_ids:
             write_chunk_head(W3D_CHUNK_VERTEX_MATERIAL_IDS, io_stream,
                              long_list_size(self.vertex_material_ids, False))
-            write_list(self.vertex_material_ids, io_stream, write_ulong)
+            write_ulong_list(self.vertex_material_ids, io_stream)
 
         if self.shader_ids:
             write_chunk_head(W3D_CHUNK_SHADER_IDS, io_stream, long_list_size(self.shader_ids, False))
-            write_list(self.shader_ids, io_stream, write_ulong)
+            write_ulong_list(self.shader_ids, io_stream)
 
         if self.dcg:
-            write_chunk_head(W3D_CHUNK_DCG, io_stream, list_size(self.dcg, False))
-            write_list(self.dcg, io_stream, RGBA.write)
+            write_chunk_head(W3D_CHUNK_DCG, io_stream, data_list_size(self.dcg, False, RGBA.size()))
+            RGBA.write_array(self.dcg, io_stream)
 
         if self.dig:
-            write_chunk_head(W3D_CHUNK_DIG, io_stream, list_size(self.dig, False))
-            write_list(self.dig, io_stream, RGBA.write)
+            write_chunk_head(W3D_CHUNK_DIG, io_stream, data_list_size(self.dig, False, RGBA.size()))
+            RGBA.write_array(self.dig, io_stream)
 
         if self.scg:
-            write_chunk_head(W3D_CHUNK_SCG, io_stream, list_size(self.scg, False))
-            write_list(self.scg, io_stream, RGBA.write)
+            write_chunk_head(W3D_CHUNK_SCG, io_stream, data_list_size(self.scg, False, RGBA.size()))
+            RGBA.write_array(self.scg, io_stream)
 
         if self.shader_material_ids:
             write_chunk_head(W3D_CHUNK_SHADER_MATERIAL_ID, io_stream,
                              long_list_size(self.shader_material_ids, False))
-            write_list(self.shader_material_ids, io_stream, write_ulong)
+            write_ulong_list(self.shader_material_ids, io_stream)
 
         write_list(self.tx_stages, io_stream, TextureStage.write)
 
         if self.tx_coords:
             write_chunk_head(W3D_CHUNK_STAGE_TEXCOORDS, io_stream,
                              vec2_list_size(self.tx_coords, False))
-            write_list(self.tx_coords, io_stream, write_vector2)
+            write_vector2_list(self.tx_coords, io_stream)
+
+        end_chunk(io_stream, chunk)
+
+
+MATERIAL_PASS_CHUNKS = {
+    W3D_CHUNK_VERTEX_MATERIAL_IDS: data_field('vertex_material_ids', read_ulong_list),
+    W3D_CHUNK_SHADER_IDS: data_field('shader_ids', read_ulong_list),
+    W3D_CHUNK_DCG: data_field('dcg', RGBA.read_array),
+    W3D_CHUNK_DIG: data_field('dig', RGBA.read_array),
+    W3D_CHUNK_SCG: data_field('scg', RGBA.read_array),
+    W3D_CHUNK_SHADER_MATERIAL_ID: data_field('shader_material_ids', read_ulong_list),
+    W3D_CHUNK_TEXTURE_STAGE: item('tx_stages', TextureStage.read),
+    W3D_CHUNK_STAGE_TEXCOORDS: data_field('tx_coords', read_vector2_list)}
+
+# keyed by compact
+MATERIAL_PASS_READERS = {
+    False: MATERIAL_PASS_CHUNKS,
+    True: {**MATERIAL_PASS_CHUNKS,
+           W3D_CHUNK_TEXTURE_STAGE: item('tx_stages', TextureStage.read, True),
+           W3D_CHUNK_STAGE_TEXCOORDS: data_field('tx_coords', VectorArray.read, 2)}}
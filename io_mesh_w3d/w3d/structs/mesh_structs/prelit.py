@@ -61,31 +61,25 @@ class PrelitBase:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(self.type, io_stream,
-                         self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(self.type, io_stream, has_sub_chunks=True)
 
         self.mat_info.write(io_stream)
 
         if self.vert_materials:
-            write_chunk_head(
-                W3D_CHUNK_VERTEX_MATERIALS,
-                io_stream,
-                list_size(self.vert_materials, False),
-                has_sub_chunks=True)
+            vert_materials = begin_chunk(W3D_CHUNK_VERTEX_MATERIALS, io_stream, has_sub_chunks=True)
             write_list(self.vert_materials, io_stream, VertexMaterial.write)
+            end_chunk(io_stream, vert_materials)
 
         if self.shaders:
-            write_chunk_head(W3D_CHUNK_SHADERS, io_stream,
-                             list_size(self.shaders, False))
+            write_chunk_head(W3D_CHUNK_SHADERS, io_stream, data_list_size(self.shaders, False, Shader.size()))
             write_list(self.shaders, io_stream, Shader.write)
 
         if self.textures:
-            write_chunk_head(
-                W3D_CHUNK_TEXTURES,
-                io_stream,
-                list_size(self.textures, False),
-                has_sub_chunks=True)
+            textures = begin_chunk(W3D_CHUNK_TEXTURES, io_stream, has_sub_chunks=True)
             write_list(self.textures, io_stream, Texture.write)
+            end_chunk(io_stream, textures)
 
         if self.material_passes:
             write_list(self.material_passes, io_stream, MaterialPass.write)
+
+        end_chunk(io_stream, chunk)
@@ -98,7 +98,7 @@ class VertexMaterial:
         return size
 
     def write(self, io_stream):
-        write_chunk_head(W3D_CHUNK_VERTEX_MATERIAL, io_stream, self.size(False), has_sub_chunks=True)
+        chunk = begin_chunk(W3D_CHUNK_VERTEX_MATERIAL, io_stream, has_sub_chunks=True)
         write_chunk_head(W3D_CHUNK_VERTEX_MATERIAL_NAME, io_stream, text_size(self.vm_name, False))
         write_string(self.vm_name, io_stream)
 
@@ -112,3 +112,5 @@ class VertexMaterial:
         if self.vm_args_1 != '':
             write_chunk_head(W3D_CHUNK_VERTEX_MAPPER_ARGS1, io_stream, text_size(self.vm_args_1, False))
             write_string(self.vm_args_1, io_stream)
+
+        end_chunk(io_stream, chunk)
@@ -0,0 +1,156 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# small vector, quaternion and matrix types of the struct core. they are plain lists with
+# named components, so creating, indexing and iterating them runs at list speed and they
+# can be pickled without registering reducers. values handed to blender are converted to
+# mathutils with its constructors, e.g. mathutils.Vector(vec), which accept any sequence.
+# other modules use them through the module, e.g. vecmath.Vector, so that star importing
+# them never replaces the mathutils types of the blender modules.
+# this module must not import mathutils
+
+import math
+
+
+def _component(index):
+    return property(lambda self: self[index], lambda self, value: self.__setitem__(index, value))
+
+
+class _Sequence(list):
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return list.__eq__(self, other)
+        try:
+            return len(self) == len(other) and all(a == b for (a, b) in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'{type(self).__name__}({tuple(self)})'
+
+    def copy(self):
+        return type(self)(self)
+
+    def to_tuple(self):
+        return tuple(self)
+
+
+class Vector(_Sequence):
+    __slots__ = ()
+
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        list.__init__(self, values)
+
+    x = _component(0)
+    y = _component(1)
+    z = _component(2)
+    w = _component(3)
+
+    @property
+    def xy(self):
+        return Vector(self[:2])
+
+    @property
+    def xyz(self):
+        return Vector(self[:3])
+
+    def __add__(self, other):
+        return Vector([a + b for (a, b) in zip(self, other)])
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return Vector([a - b for (a, b) in zip(self, other)])
+
+    def __rsub__(self, other):
+        return Vector([b - a for (a, b) in zip(self, other)])
+
+    def __mul__(self, scalar):
+        return Vector([a * scalar for a in self])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar):
+        return Vector([a / scalar for a in self])
+
+    def __neg__(self):
+        return Vector([-a for a in self])
+
+    def __iadd__(self, other):
+        self[:] = [a + b for (a, b) in zip(self, other)]
+        return self
+
+    def __isub__(self, other):
+        self[:] = [a - b for (a, b) in zip(self, other)]
+        return self
+
+    def __imul__(self, scalar):
+        self[:] = [a * scalar for a in self]
+        return self
+
+    def dot(self, other):
+        return sum(a * b for (a, b) in zip(self, other))
+
+    def cross(self, other):
+        return Vector((self[1] * other[2] - self[2] * other[1],
+                       self[2] * other[0] - self[0] * other[2],
+                       self[0] * other[1] - self[1] * other[0]))
+
+    @property
+    def length(self):
+        return math.sqrt(self.dot(self))
+
+    def normalized(self):
+        length = self.length
+        return Vector([a / length for a in self]) if length > 0.0 else self.copy()
+
+    def normalize(self):
+        self[:] = self.normalized()
+
+
+class Quaternion(_Sequence):
+    # components in the order w, x, y, z like mathutils
+    __slots__ = ()
+
+    def __init__(self, values=(1.0, 0.0, 0.0, 0.0)):
+        list.__init__(self, values)
+
+    w = _component(0)
+    x = _component(1)
+    y = _component(2)
+    z = _component(3)
+
+    def normalized(self):
+        length = math.sqrt(sum(a * a for a in self))
+        return Quaternion([a / length for a in self]) if length > 0.0 else self.copy()
+
+    def normalize(self):
+        self[:] = self.normalized()
+
+
+class Matrix(_Sequence):
+    # list of row vectors, the w3x fixup matrices only have 3 rows of 4 columns
+    __slots__ = ()
+
+    def __init__(self, rows=None):
+        if rows is None:
+            rows = [[1.0 if i == j else 0.0 for j in range(4)] for i in range(4)]
+        list.__init__(self, (Vector(row) for row in rows))
+
+    @staticmethod
+    def Identity(size):
+        return Matrix([[1.0 if i == j else 0.0 for j in range(size)] for i in range(size)])
+
+    def copy(self):
+        return Matrix(self)
+
+    def to_tuple(self):
+        return tuple(tuple(row) for row in self)
@@ -0,0 +1,701 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# headless inspection and conversion of w3d and w3x files. run it with the w3dtool.py script in
+# the repository root. this module and the tool modules it uses (batch_convert, reference_validator,
+# asset_index, chunk_diff, mesh_recompute and thumbnail) only use the struct layer and must not import bpy
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+from io_mesh_w3d.asset_index import AssetIndex, validate_indexed
+from io_mesh_w3d.batch_convert import W3X_TARGETS, convert_files, find_conversions, find_files, is_w3x, load_file
+from io_mesh_w3d.chunk_diff import DEFAULT_TOLERANCE, diff_files
+from io_mesh_w3d.common.structs.mesh import MESH_CHUNKS, Mesh, W3D_CHUNK_MESH
+from io_mesh_w3d.mesh_recompute import PARTS, find_recomputations, recompute_files
+from io_mesh_w3d.reference_validator import validate
+from io_mesh_w3d.thumbnail import THUMBNAIL_SIZE, find_thumbnails, render_thumbnails
+from io_mesh_w3d.w3d import chunk_index
+from io_mesh_w3d.w3d.chunk_index import ChunkIndex, READERS
+from io_mesh_w3d.w3d.io_binary import BinaryReader, HEAD
+from io_mesh_w3d.w3d.parallel import MessageLog
+from io_mesh_w3d.w3d.schema import read_chunks
+from io_mesh_w3d.w3x.io_xml import find_root
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# chunk_index imports the chunk types of all struct modules
+CHUNK_NAMES = {}
+for (_name, _value) in vars(chunk_index).items():
+    if _name.startswith('W3D_CHUNK_') and isinstance(_value, int):
+        CHUNK_NAMES.setdefault(_value, _name)
+
+_chunk_head = struct.Struct('<2L')
+
+
+class ConsoleLog:
+    # stands in for the operator, warnings and errors are printed right away
+    def __init__(self, file_format='W3D', verbose=False, stream=None):
+        self.file_format = file_format
+        self.verbose = verbose
+        self.stream = stream if stream is not None else sys.stderr
+        self.errors = 0
+
+    def info(self, msg):
+        if self.verbose:
+            print(msg, file=self.stream)
+
+    def warning(self, msg):
+        print(f'WARNING: {msg}', file=self.stream)
+
+    def error(self, msg):
+        self.errors += 1
+        print(f'ERROR: {msg}', file=self.stream)
+
+
+def chunk_name(chunk_type):
+    return CHUNK_NAMES.get(chunk_type, 'UNKNOWN')
+
+
+##########################################################################
+# Chunk tree
+##########################################################################
+
+
+class ChunkNode:
+    def __init__(self, chunk_type=0, offset=0, size=0, children=None):
+        self.chunk_type = chunk_type
+        self.offset = offset
+        self.size = size
+        self.children = children if children is not None else []
+
+
+def read_chunk_tree(context, io_stream, chunk_end, nested=False):
+    # chunks with the sub chunk flag set in their head are descended into. not every writer
+    # sets the flag correctly, so if the data of a flagged chunk is not a sequence of chunks
+    # it is shown as a leaf instead
+    result = []
+    while io_stream.tell() < chunk_end:
+        offset = io_stream.tell()
+        subchunk_end = chunk_end + 1
+        if offset + HEAD <= chunk_end:
+            (chunk_type, chunk_size) = _chunk_head.unpack(io_stream.read(HEAD))
+            subchunk_end = io_stream.tell() + (chunk_size & 0x7FFFFFFF)
+
+        if subchunk_end > chunk_end:
+            if nested:
+                return None
+            context.error(f'truncated chunk at offset {offset}')
+            break
+
+        node = ChunkNode(chunk_type=chunk_type, offset=offset, size=chunk_size & 0x7FFFFFFF)
+        if chunk_size & 0x80000000:
+            node.children = read_chunk_tree(context, io_stream, subchunk_end, True) or []
+        io_stream.seek(subchunk_end)
+        result.append(node)
+    return result
+
+
+def read_file_chunks(context, path):
+    io_stream = BinaryReader.from_file(path)
+    filesize = io_stream.seek(0, 2)
+    io_stream.seek(0)
+    result = read_chunk_tree(context, io_stream, filesize)
+    io_stream.close()
+    return result
+
+
+def format_chunk_tree(nodes, max_depth=None, depth=0):
+    lines = []
+    for node in nodes:
+        lines.append(f'{"  " * depth}{node.chunk_type:#010x} {chunk_name(node.chunk_type)} ({node.size} bytes)')
+        if max_depth is None or depth + 1 < max_depth:
+            lines.extend(format_chunk_tree(node.children, max_depth, depth + 1))
+    return lines
+
+
+def format_element_tree(element, max_depth=None, depth=0):
+    # runs of equally named leaf elements like vertices are collapsed into a single line
+    identifier = element.get('id')
+    lines = [f'{"  " * depth}{element.tag}' + (f' "{identifier}"' if identifier is not None else '')]
+    if max_depth is not None and depth + 1 >= max_depth:
+        return lines
+
+    children = list(element)
+    index = 0
+    while index < len(children):
+        child = children[index]
+        count = 1
+        while index + count < len(children) and children[index + count].tag == child.tag \
+                and len(child) == 0 and len(children[index + count]) == 0:
+            count += 1
+
+        if count > 1:
+            lines.append(f'{"  " * (depth + 1)}{child.tag} x {count}')
+        else:
+            lines.extend(format_element_tree(child, max_depth, depth + 1))
+        index += count
+    return lines
+
+
+def file_tree(context, path, max_depth=None):
+    if is_w3x(path):
+        root = find_root(context, path)
+        return [] if root is None else format_element_tree(root, max_depth)
+
+    return format_chunk_tree(read_file_chunks(context, path), max_depth)
+
+
+def count_chunks(nodes, result):
+    for node in nodes:
+        (count, size) = result.get(node.chunk_type, (0, 0))
+        result[node.chunk_type] = (count + 1, size + node.size)
+        count_chunks(node.children, result)
+    return result
+
+
+##########################################################################
+# Summaries
+##########################################################################
+
+
+def summarize(data_context, includes=None):
+    result = {
+        'hierarchy': None,
+        'hlod': None,
+        'meshes': [],
+        'animations': [],
+        'collision_boxes': [box.name_ for box in data_context.collision_boxes],
+        'dazzles': [dazzle.name_ for dazzle in data_context.dazzles],
+        'textures': [texture.id for texture in data_context.textures],
+        'includes': includes if includes is not None else []}
+
+    if data_context.hierarchy is not None:
+        result['hierarchy'] = {
+            'name': data_context.hierarchy.name(),
+            'pivots': len(data_context.hierarchy.pivots)}
+
+    if data_context.hlod is not None:
+        result['hlod'] = {
+            'name': data_context.hlod.model_name(),
+            'hierarchy': data_context.hlod.hierarchy_name(),
+            'lods': [[obj.identifier for obj in array.sub_objects] for array in data_context.hlod.lod_arrays]}
+
+    for mesh in data_context.meshes:
+        result['meshes'].append({
+            'name': mesh.identifier(),
+            'vertices': len(mesh.verts),
+            'triangles': len(mesh.triangles),
+            'materials': len(mesh.vert_materials) + len(mesh.shader_materials),
+            'textures': [texture.file for texture in mesh.textures],
+            'skinned': mesh.is_skin()})
+
+    animation = data_context.animation
+    if animation is not None:
+        result['animations'].append({
+            'name': animation.header.name,
+            'hierarchy': animation.header.hierarchy_name,
+            'frames': animation.header.num_frames,
+            'frame_rate': animation.header.frame_rate,
+            'channels': len(animation.channels),
+            'compressed': False})
+
+    animation = data_context.compressed_animation
+    if animation is not None:
+        result['animations'].append({
+            'name': animation.header.name,
+            'hierarchy': animation.header.hierarchy_name,
+            'frames': animation.header.num_frames,
+            'frame_rate': animation.header.frame_rate,
+            'channels': len(animation.time_coded_channels) + len(animation.adaptive_delta_channels)
+            + len(animation.time_coded_bit_channels) + len(animation.motion_channels),
+            'compressed': True})
+    return result
+
+
+def format_summary(path, summary):
+    lines = [path]
+    if summary['hierarchy'] is not None:
+        hierarchy = summary['hierarchy']
+        lines.append(f'  hierarchy  {hierarchy["name"]} ({hierarchy["pivots"]} pivots)')
+
+    if summary['hlod'] is not None:
+        hlod = summary['hlod']
+        objects = sum(len(lod) for lod in hlod['lods'])
+        lines.append(f'  container  {hlod["name"]} -> {hlod["hierarchy"]} '
+                     f'({len(hlod["lods"])} lods, {objects} sub objects)')
+
+    for mesh in summary['meshes']:
+        lines.append(f'  mesh       {mesh["name"]} ({mesh["vertices"]} vertices, {mesh["triangles"]} triangles, '
+                     f'{mesh["materials"]} materials' + (', skinned)' if mesh['skinned'] else ')'))
+
+    for animation in summary['animations']:
+        kind = 'compressed animation' if animation['compressed'] else 'animation'
+        lines.append(f'  {kind:<10} {animation["name"]} -> {animation["hierarchy"]} '
+                     f'({animation["frames"]} frames at {animation["frame_rate"]} fps, '
+                     f'{animation["channels"]} channels)')
+
+    for (kind, key) in [('box', 'collision_boxes'), ('dazzle', 'dazzles'), ('texture', 'textures'),
+                        ('include', 'includes')]:
+        for name in summary[key]:
+            lines.append(f'  {kind:<10} {name}')
+    return lines
+
+
+##########################################################################
+# Statistics
+##########################################################################
+
+
+class Statistics:
+    def __init__(self):
+        self.files = 0
+        self.failed = []
+        self.meshes = 0
+        self.vertices = 0
+        self.triangles = 0
+        self.hierarchies = 0
+        self.pivots = 0
+        self.animations = 0
+        self.frames = 0
+        self.collision_boxes = 0
+        self.chunks = {}
+        self.elements = {}
+
+    def add(self, summary):
+        self.meshes += len(summary['meshes'])
+        self.vertices += sum(mesh['vertices'] for mesh in summary['meshes'])
+        self.triangles += sum(mesh['triangles'] for mesh in summary['meshes'])
+        if summary['hierarchy'] is not None:
+            self.hierarchies += 1
+            self.pivots += summary['hierarchy']['pivots']
+        self.animations += len(summary['animations'])
+        self.frames += sum(animation['frames'] for animation in summary['animations'])
+        self.collision_boxes += len(summary['collision_boxes'])
+
+    def add_chunks(self, nodes):
+        count_chunks(nodes, self.chunks)
+
+    def add_elements(self, root):
+        for node in root:
+            self.elements[node.tag] = self.elements.get(node.tag, 0) + 1
+
+    def to_dict(self):
+        result = {key: value for (key, value) in vars(self).items() if key not in ['chunks', 'elements']}
+        result['chunks'] = {chunk_name(chunk_type): {'count': count, 'bytes': size}
+                            for (chunk_type, (count, size)) in sorted(self.chunks.items())}
+        result['elements'] = dict(sorted(self.elements.items()))
+        return result
+
+    def format(self):
+        lines = [f'files:           {self.files} ({len(self.failed)} failed)',
+                 f'meshes:          {self.meshes}',
+                 f'vertices:        {self.vertices}',
+                 f'triangles:       {self.triangles}',
+                 f'hierarchies:     {self.hierarchies} ({self.pivots} pivots)',
+                 f'animations:      {self.animations} ({self.frames} frames)',
+                 f'collision boxes: {self.collision_boxes}']
+
+        if self.chunks:
+            lines.append('chunks:')
+            for (chunk_type, (count, size)) in sorted(self.chunks.items(), key=lambda item: -item[1][1]):
+                lines.append(f'  {chunk_type:#010x} {chunk_name(chunk_type):<48} {count:>8} {size:>12} bytes')
+
+        if self.elements:
+            lines.append('elements:')
+            for (tag, count) in sorted(self.elements.items(), key=lambda item: -item[1]):
+                lines.append(f'  {tag:<59} {count:>8}')
+
+        for path in self.failed:
+            lines.append(f'failed: {path}')
+        return lines
+
+
+def collect_statistics(context, paths):
+    statistics = Statistics()
+    for path in find_files(paths):
+        statistics.files += 1
+        errors = context.errors
+        try:
+            if is_w3x(path):
+                root = find_root(context, path)
+                if root is not None:
+                    statistics.add_elements(root)
+            else:
+                statistics.add_chunks(read_file_chunks(context, path))
+            statistics.add(summarize(*load_file(context, path)))
+        except Exception as e:
+            context.error(f'failed to read {path}: {e}')
+
+        if context.errors > errors:
+            statistics.failed.append(path)
+    return statistics
+
+
+##########################################################################
+# Profiling
+##########################################################################
+
+
+def distribution(values):
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'total': sum(ordered),
+        'min': ordered[0],
+        'median': ordered[len(ordered) // 2],
+        'mean': sum(ordered) / len(ordered),
+        'p90': ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))],
+        'max': ordered[-1]}
+
+
+class Profile:
+    # where the bytes and the decode time of a corpus go. chunk counts and bytes include the
+    # nested chunks, decode times are inclusive and only measured for top level chunks and
+    # for the sub chunks of meshes
+    def __init__(self):
+        self.files = 0
+        self.failed = []
+        self.bytes = 0
+        self.seconds = 0.0
+        self.chunks = {}
+        self.decode_seconds = {}
+        self.elements = {}
+        self.vertices = []
+        self.triangles = []
+        self.material_passes = []
+        self.messages = {}
+        self.mesh_readers = {chunk_type: self.timed(chunk_type, reader) for (chunk_type, reader) in MESH_CHUNKS.items()}
+
+    def timed(self, chunk_type, reader):
+        def read(context, io_stream, chunk_end, result):
+            start = time.perf_counter()
+            reader(context, io_stream, chunk_end, result)
+            self.add_time(chunk_type, time.perf_counter() - start)
+        return read
+
+    def add_time(self, chunk_type, seconds):
+        self.decode_seconds[chunk_type] = self.decode_seconds.get(chunk_type, 0.0) + seconds
+
+    def add_element(self, tag, seconds):
+        (count, total) = self.elements.get(tag, (0, 0.0))
+        self.elements[tag] = (count + 1, total + seconds)
+
+    def add_mesh(self, mesh):
+        self.vertices.append(len(mesh.verts))
+        self.triangles.append(len(mesh.triangles))
+        self.material_passes.append(len(mesh.material_passes))
+
+    def add_messages(self, messages):
+        for message in messages:
+            self.messages[message] = self.messages.get(message, 0) + 1
+
+    def to_dict(self):
+        return {
+            'files': self.files,
+            'failed': self.failed,
+            'bytes': self.bytes,
+            'seconds': self.seconds,
+            'chunks': {chunk_name(chunk_type): {'id': chunk_type, 'count': count, 'bytes': size,
+                                                'decode_seconds': self.decode_seconds.get(chunk_type)}
+                       for (chunk_type, (count, size)) in sorted(self.chunks.items())},
+            'elements': {tag: {'count': count, 'decode_seconds': seconds}
+                         for (tag, (count, seconds)) in sorted(self.elements.items())},
+            'meshes': {
+                'vertices': distribution(self.vertices),
+                'triangles': distribution(self.triangles),
+                'material_passes': distribution(self.material_passes)},
+            'messages': [{'level': level, 'message': msg, 'count': count}
+                         for ((level, msg), count) in sorted(self.messages.items(), key=lambda item: -item[1])]}
+
+    def format(self):
+        lines = [f'files: {self.files} ({len(self.failed)} failed), {self.bytes} bytes, {self.seconds:.3f} s']
+
+        if self.chunks:
+            lines.append(f'  {"chunk":<59} {"count":>8} {"bytes":>12} {"share":>7} {"decode ms":>10}')
+            for (chunk_type, (count, size)) in sorted(self.chunks.items(), key=lambda item: -item[1][1]):
+                share = 100.0 * size / self.bytes if self.bytes else 0.0
+                milliseconds = '-'
+                if chunk_type in self.decode_seconds:
+                    milliseconds = f'{1000.0 * self.decode_seconds[chunk_type]:.2f}'
+                lines.append(f'  {chunk_type:#010x} {chunk_name(chunk_type):<48} {count:>8} {size:>12} '
+                             f'{share:>6.1f}% {milliseconds:>10}')
+
+        if self.elements:
+            lines.append(f'  {"element":<59} {"count":>8} {"decode ms":>10}')
+            for (tag, (count, seconds)) in sorted(self.elements.items(), key=lambda item: -item[1][1]):
+                lines.append(f'  {tag:<59} {count:>8} {1000.0 * seconds:>10.2f}')
+
+        if self.vertices:
+            lines.append(f'  {"per mesh":<16} {"min":>8} {"median":>8} {"mean":>10} {"p90":>8} {"max":>8} '
+                         f'{"total":>10}')
+            for (name, values) in [('vertices', self.vertices), ('triangles', self.triangles),
+                                   ('material passes', self.material_passes)]:
+                d = distribution(values)
+                lines.append(f'  {name:<16} {d["min"]:>8} {d["median"]:>8} {d["mean"]:>10.1f} {d["p90"]:>8} '
+                             f'{d["max"]:>8} {d["total"]:>10}')
+
+        if self.messages:
+            lines.append('  reader messages:')
+            for ((level, msg), count) in sorted(self.messages.items(), key=lambda item: -item[1]):
+                lines.append(f'  {count:>8} {level:<8} {msg}')
+
+        for path in self.failed:
+            lines.append(f'failed: {path}')
+        return lines
+
+
+def profile_w3d(profile, log, path):
+    count_chunks(read_file_chunks(log, path), profile.chunks)
+
+    index = ChunkIndex.from_file(path)
+    for entry in index:
+        start = time.perf_counter()
+        if entry.chunk_type == W3D_CHUNK_MESH:
+            index.io_stream.seek(entry.offset + HEAD)
+            profile.add_mesh(read_chunks(log, index.io_stream, entry.end(), Mesh(), profile.mesh_readers))
+        elif entry.chunk_type in READERS:
+            index.decode(log, entry)
+        else:
+            log.info(f'-> unsupported chunk {chunk_name(entry.chunk_type)} ({hex(entry.chunk_type)})')
+            continue
+        profile.add_time(entry.chunk_type, time.perf_counter() - start)
+    index.close()
+
+
+def profile_w3x(profile, log, path):
+    root = find_root(log, path)
+    if root is None:
+        raise ValueError('not a valid w3x file')
+
+    for node in root:
+        if node.tag not in W3X_TARGETS:
+            log.info(f'-> unsupported node {node.tag}')
+            continue
+        start = time.perf_counter()
+        result = W3X_TARGETS[node.tag][1](log, node)
+        profile.add_element(node.tag, time.perf_counter() - start)
+        if node.tag == 'W3DMesh':
+            profile.add_mesh(result)
+
+
+def profile_files(context, paths):
+    profile = Profile()
+    start = time.perf_counter()
+    for path in find_files(paths):
+        profile.files += 1
+        log = MessageLog()
+        try:
+            profile.bytes += os.path.getsize(path)
+            if is_w3x(path):
+                profile_w3x(profile, log, path)
+            else:
+                profile_w3d(profile, log, path)
+        except Exception as e:
+            log.error(f'failed to read {path}: {e}')
+
+        # the messages of the readers are aggregated, the errors are also reported right away
+        profile.add_messages(message for message in log.messages if message[0] != 'error')
+        for (_, msg) in [message for message in log.messages if message[0] == 'error']:
+            context.error(msg)
+            profile.failed.append(path)
+    profile.failed = list(dict.fromkeys(profile.failed))
+    profile.seconds = time.perf_counter() - start
+    return profile
+
+
+##########################################################################
+# Command line
+##########################################################################
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog='w3dtool',
+                                     description='Inspect and convert W3D and W3X files without Blender.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print info messages of the readers')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    tree = commands.add_parser('tree', help='print the chunk tree of w3d files or the element tree of w3x files')
+    tree.add_argument('paths', nargs='+')
+    tree.add_argument('-d', '--depth', type=int, default=None, help='maximum depth of the printed tree')
+
+    info = commands.add_parser('info', help='print the meshes, hierarchies, containers and animations of files')
+    info.add_argument('paths', nargs='+', help='files or directories which are searched recursively')
+    info.add_argument('--json', action='store_true', help='print the summaries as json')
+
+    stats = commands.add_parser('stats', help='print statistics over all files')
+    stats.add_argument('paths', nargs='+', help='files or directories which are searched recursively')
+    stats.add_argument('--json', action='store_true', help='print the statistics as json')
+
+    profile = commands.add_parser('profile', help='print where the bytes and the decode time of files go')
+    profile.add_argument('paths', nargs='+', help='files or directories which are searched recursively')
+    profile.add_argument('--json', action='store_true', help='print the profile as json')
+
+    convert = commands.add_parser('convert', help='convert a file or a directory tree between w3d and w3x')
+    convert.add_argument('source', help='file or directory which is searched recursively')
+    convert.add_argument('target', help='output directory, the directory structure of source is kept')
+    convert.add_argument('--to', choices=['w3d', 'w3x'], required=True, help='format to convert to')
+    convert.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+
+    recompute = commands.add_parser('recompute',
+                                    help='recompute triangle planes, bounds, normals and tangents of meshes')
+    recompute.add_argument('source', help='file or directory which is searched recursively')
+    recompute.add_argument('target', nargs='?', default=None,
+                           help='output directory, without it the files are rewritten in place')
+    recompute.add_argument('--parts', default=','.join(PARTS),
+                           help=f'comma separated parts to recompute (default: {",".join(PARTS)})')
+    recompute.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+
+    thumbnail = commands.add_parser('thumbnail', help='render png previews of models, needs numpy')
+    thumbnail.add_argument('source', help='file or directory which is searched recursively')
+    thumbnail.add_argument('target', help='output directory, the directory structure of source is kept')
+    thumbnail.add_argument('--size', type=int, default=THUMBNAIL_SIZE, help='width and height in pixels')
+    thumbnail.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+
+    validate = commands.add_parser('validate', help='check the references between all files of a mod directory')
+    validate.add_argument('paths', nargs='+', help='files or directories which are searched recursively')
+    validate.add_argument('--json', action='store_true', help='print the report as json')
+    validate.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    validate.add_argument('--index', default=None, help='asset index to update and validate against')
+
+    index = commands.add_parser('index', help='create or update the sqlite asset index of art trees')
+    index.add_argument('database', help='index file, created if it does not exist')
+    index.add_argument('paths', nargs='+', help='search paths, later paths (mods) override earlier ones (base game)')
+    index.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+
+    deps = commands.add_parser('deps', help='print the dependencies of files from the asset index')
+    deps.add_argument('database', help='index file created with the index command')
+    deps.add_argument('paths', nargs='+')
+
+    diff = commands.add_parser('diff', help='compare two w3d files chunk by chunk')
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('-t', '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                      help='maximum difference of numbers which are considered equal')
+    diff.add_argument('--json', action='store_true', help='print the differences as json')
+    return parser
+
+
+def run_command(args, out):
+    context = ConsoleLog(verbose=args.verbose)
+
+    if args.command == 'convert':
+        conversions = find_conversions(args.source, args.target, args.to.upper())
+        report = convert_files(context, conversions, args.jobs)
+        print(report.format(), file=out)
+        return 1 if report.failed else 0
+
+    if args.command == 'recompute':
+        parts = [part.strip() for part in args.parts.split(',') if part.strip()]
+        unknown = [part for part in parts if part not in PARTS]
+        if unknown:
+            context.error(f'unknown parts {", ".join(unknown)}, expected some of {", ".join(PARTS)}')
+            return 2
+        report = recompute_files(context, find_recomputations(args.source, args.target), parts, args.jobs)
+        print(report.format(), file=out)
+        return 1 if report.failed else 0
+
+    if args.command == 'thumbnail':
+        if numpy is None:
+            context.error('numpy is required to render thumbnails')
+            return 2
+        report = render_thumbnails(context, find_thumbnails(args.source, args.target), args.size, args.jobs)
+        print(report.format(), file=out)
+        return 1 if report.failed else 0
+
+    if args.command == 'diff':
+        try:
+            result = diff_files(context, args.old, args.new, args.tolerance)
+        except Exception as e:
+            context.error(f'failed to compare {args.old} and {args.new}: {e}')
+            return 2
+        if args.json:
+            print(json.dumps(result.to_dict(), indent=2), file=out)
+        else:
+            print('\n'.join(result.format()), file=out)
+        return 1 if result.has_differences() else 0
+
+    if args.command == 'index':
+        asset_index = AssetIndex(args.database)
+        print(asset_index.update(args.paths, args.jobs).format(), file=out)
+        asset_index.close()
+        return 0
+
+    if args.command == 'deps':
+        asset_index = AssetIndex(args.database)
+        missing = 0
+        for path in args.paths:
+            print(path, file=out)
+            for (subject, kind, name, resolved) in asset_index.dependencies(path):
+                missing += resolved is None
+                print(f'  {subject + " " if subject else ""}{kind} {name} -> {resolved or "not found"}', file=out)
+        asset_index.close()
+        return 1 if missing else 0
+
+    if args.command == 'validate':
+        if args.index is not None:
+            report = validate_indexed(args.index, args.paths, args.jobs)
+        else:
+            report = validate(args.paths, args.jobs)
+        if args.json:
+            print(json.dumps(report.to_dict(), indent=2), file=out)
+        else:
+            print('\n'.join(report.format()), file=out)
+        return 1 if report.problems else 0
+
+    if args.command == 'profile':
+        profile = profile_files(context, args.paths)
+        if args.json:
+            print(json.dumps(profile.to_dict(), indent=2), file=out)
+        else:
+            print('\n'.join(profile.format()), file=out)
+        return 1 if profile.failed else 0
+
+    if args.command == 'stats':
+        statistics = collect_statistics(context, args.paths)
+        if args.json:
+            print(json.dumps(statistics.to_dict(), indent=2), file=out)
+        else:
+            print('\n'.join(statistics.format()), file=out)
+        return 1 if statistics.failed else 0
+
+    summaries = {}
+    for path in find_files(args.paths):
+        try:
+            if args.command == 'tree':
+                lines = [path] + file_tree(context, path, args.depth)
+            elif args.json:
+                summaries[path] = summarize(*load_file(context, path))
+                continue
+            else:
+                lines = format_summary(path, summarize(*load_file(context, path)))
+        except Exception as e:
+            context.error(f'failed to read {path}: {e}')
+            continue
+        print('\n'.join(lines), file=out)
+
+    if summaries:
+        print(json.dumps(summaries, indent=2), file=out)
+    return 1 if context.errors else 0
+
+
+def main(argv=None, out=None):
+    args = create_parser().parse_args(argv)
+    out = out if out is not None else sys.stdout
+    try:
+        return run_command(args, out)
+    except BrokenPipeError:
+        # the output is piped into a command like head which exited early, stdout is pointed
+        # to devnull so that flushing it at exit does not fail again
+        if out is sys.stdout:
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
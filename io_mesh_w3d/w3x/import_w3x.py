@@ -2,6 +2,8 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 from io_mesh_w3d.import_utils import *
+from io_mesh_w3d.asset_index import find_indexed_asset
+from io_mesh_w3d.batch_convert import include_path
 from io_mesh_w3d.common.structs.animation import *
 from io_mesh_w3d.common.structs.collision_box import *
 from io_mesh_w3d.common.structs.data_context import *
@@ -14,28 +16,38 @@ from io_mesh_w3d.common.utils.hierarchy_export import *
 from io_mesh_w3d.common.utils.hlod_export import *
 
 
-def load_file(context, data_context, path=None):
+def load_file(context, data_context, path=None, selection=None, io_stream=None):
+    # io_stream can be any readable binary stream, includes are resolved relative to path
     if path is None:
         path = context.filepath
 
     context.info(f'Loading file: {path}')
 
-    if not os.path.exists(path):
-        context.error(f'file not found: {path}')
-        return
-
-    root = find_root(context, path)
+    # only the archive members opened here are closed, streams of the caller stay open
+    opened = False
+    if io_stream is None and not os.path.exists(path):
+        io_stream = open_archive_member(path)
+        if io_stream is None:
+            context.error(f'file not found: {path}')
+            return
+        opened = True
+
+    try:
+        root = find_root(context, path if io_stream is None else io_stream)
+    finally:
+        if opened:
+            io_stream.close()
     if root is None:
         return
 
-    directory = os.path.dirname(path)
     for node in root:
         if node.tag == 'Includes':
             for xml_include in node:
                 include = Include.parse(xml_include)
-                source = include.source.replace('ART:', '')
-                load_file(context, data_context, os.path.join(directory, source))
+                load_file(context, data_context, include_path(path, include.source), selection)
 
+        elif node.tag in ['W3DMesh', 'W3DCollisionBox'] and not is_selected(selection, node.get('id')):
+            continue
         elif node.tag == 'W3DMesh':
             data_context.meshes.append(Mesh.parse(context, node))
         elif node.tag == 'W3DCollisionBox':
@@ -60,15 +72,25 @@ skl_find_hint = ['', '_HRC', '_SKL']
 ctr_find_hint = ['', '_CTR']
 
 
-def load(context):
+def load(context, names=None):
+    open_import(context)
+    try:
+        return load_data(context, names)
+    finally:
+        close_import(context)
+
+
+def load_data(context, names=None):
     data_context = DataContext(
         meshes=[],
         textures=[],
         collision_boxes=[],
         hierarchy=None,
         hlod=None)
+    selection = get_selection(context, names)
 
-    load_file(context, data_context)
+    load_file(context, data_context, selection=selection)
+    filter_hlod(data_context.hlod, selection)
 
     directory = os.path.dirname(context.filepath) + os.path.sep
 
@@ -86,8 +108,10 @@ def load(context):
             for array in data_context.hlod.lod_arrays:
                 for obj in array.sub_objects:
                     path = directory + obj.identifier + '.w3x'
-                    if os.path.exists(path):
-                        load_file(context, data_context, path)
+                    if not file_exists(path):
+                        path = find_indexed_asset(context, 'mesh', obj.identifier, '.w3x') or path
+                    if file_exists(path):
+                        load_file(context, data_context, path, selection)
 
         if len(objidentifiers) > len(data_context.meshes) + len(data_context.collision_boxes):
             context.warning('Not all meshes loaded!')
@@ -104,28 +128,39 @@ def load(context):
         ctr_paths_try = []
         for hint in ctr_find_hint:
             ctr_path = directory + container_name + hint + '.w3x'
-            if os.path.exists(ctr_path) and ctr_path != context.filepath:
+            if file_exists(ctr_path) and ctr_path != context.filepath:
                 ctr_paths_try.append(ctr_path)
 
         for ctr_path in ctr_paths_try:
             context.info(ctr_path)
-            if load_file(context, data_context, ctr_path):
+            if load_file(context, data_context, ctr_path, selection):
                 if data_context.hlod:
                     break
+        filter_hlod(data_context.hlod, selection)
 
     # if not loaded w3d hierarchy, we need to find it
     if data_context.hierarchy is None:
         context.info('Looking for the hierarcy file..')
         skl_paths_try = []
+        hierarchy_names = []
+        if data_context.hlod:
+            hierarchy_names.append(data_context.hlod.hierarchy_name())
+        if data_context.animation:
+            hierarchy_names.append(data_context.animation.header.hierarchy_name)
+        for hierarchy_name in hierarchy_names:
+            skl_path = find_indexed_asset(context, 'hierarchy', hierarchy_name, '.w3x')
+            if skl_path is not None and skl_path != context.filepath:
+                skl_paths_try.append(skl_path)
+
         if data_context.hlod:
             for hint in skl_find_hint:
                 skl_path = directory + data_context.hlod.hierarchy_name() + hint + '.w3x'
-                if skl_path not in skl_paths_try and os.path.exists(skl_path) and skl_path != context.filepath:
+                if skl_path not in skl_paths_try and file_exists(skl_path) and skl_path != context.filepath:
                     skl_paths_try.append(skl_path)
         if data_context.animation:
             for hint in skl_find_hint:
                 skl_path = directory + data_context.animation.header.hierarchy_name + hint + '.w3x'
-                if skl_path not in skl_paths_try and os.path.exists(skl_path) and skl_path != context.filepath:
+                if skl_path not in skl_paths_try and file_exists(skl_path) and skl_path != context.filepath:
                     skl_paths_try.append(skl_path)
 
         for skl_path in skl_paths_try:
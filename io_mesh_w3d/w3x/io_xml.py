@@ -2,7 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 import xml.etree.ElementTree as ET
-from mathutils import Vector, Quaternion, Matrix
+from io_mesh_w3d.w3d import vecmath
 
 
 def create_node(self, identifier):
@@ -115,7 +115,7 @@ def parse_float(xml_obj, id, default=0.0):
 
 
 def parse_vector2(xml_vector2):
-    return Vector((
+    return vecmath.Vector((
         parse_float(xml_vector2, 'X'),
         parse_float(xml_vector2, 'Y')))
 
@@ -127,7 +127,7 @@ def create_vector2(vec2, parent, name):
 
 
 def parse_vector(xml_vector):
-    return Vector((
+    return vecmath.Vector((
         parse_float(xml_vector, 'X'),
         parse_float(xml_vector, 'Y'),
         parse_float(xml_vector, 'Z')))
@@ -141,7 +141,7 @@ def create_vector(vec, parent, name):
 
 
 def parse_quaternion(xml_quaternion):
-    return Quaternion((
+    return vecmath.Quaternion((
         parse_float(xml_quaternion, 'W', 1.0),
         parse_float(xml_quaternion, 'X'),
         parse_float(xml_quaternion, 'Y'),
@@ -157,7 +157,7 @@ def create_quaternion(quat, parent, identifier='Rotation'):
 
 
 def parse_matrix(xml_matrix):
-    return Matrix((
+    return vecmath.Matrix((
         [parse_float(xml_matrix, 'M00', 1.0),
          parse_float(xml_matrix, 'M01'),
          parse_float(xml_matrix, 'M02'),
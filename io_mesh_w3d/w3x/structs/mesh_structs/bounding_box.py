@@ -1,12 +1,12 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+from io_mesh_w3d.w3d import vecmath
 from io_mesh_w3d.w3x.io_xml import *
 
 
 class BoundingBox:
-    def __init__(self, min=Vector((0, 0, 0)), max=Vector((0, 0, 0))):
+    def __init__(self, min=vecmath.Vector((0, 0, 0)), max=vecmath.Vector((0, 0, 0))):
         self.min = min
         self.max = max
 
@@ -1,12 +1,12 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector
+from io_mesh_w3d.w3d import vecmath
 from io_mesh_w3d.w3x.io_xml import *
 
 
 class BoundingSphere:
-    def __init__(self, radius=0.0, center=Vector((0, 0, 0))):
+    def __init__(self, radius=0.0, center=vecmath.Vector((0, 0, 0))):
         self.radius = radius
         self.center = center
 
@@ -0,0 +1,71 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# compares memory usage and creation throughput of the per element records against
+# the same classes without __slots__, run it with the python of blender:
+#   blender -b --python tests/benchmark_records.py
+
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mathutils import Vector, Quaternion
+from io_mesh_w3d.common.structs.hierarchy import HierarchyPivot
+from io_mesh_w3d.common.structs.hlod import HLodSubObject
+from io_mesh_w3d.common.structs.mesh_structs.aabbtree import AABBTreeNode, Children, Polys
+from io_mesh_w3d.common.structs.mesh_structs.triangle import Triangle
+from io_mesh_w3d.common.structs.mesh_structs.vertex_influence import VertexInfluence
+from io_mesh_w3d.common.structs.rgba import RGBA
+from io_mesh_w3d.w3d.structs.compressed_animation import TimeCodedDatum, TimeCodedBitDatum, AdaptiveDeltaBlock
+
+RECORDS = [
+    (Triangle, lambda cls: cls(vert_ids=[1, 2, 3], surface_type=13, normal=Vector((0.0, 0.0, 1.0)), distance=2.0)),
+    (VertexInfluence, lambda cls: cls(bone_idx=3, xtra_idx=4, bone_inf=0.25, xtra_inf=0.75)),
+    (TimeCodedDatum, lambda cls: cls(time_code=12, interpolated=True, value=1.5)),
+    (TimeCodedBitDatum, lambda cls: cls(time_code=12, value=True)),
+    (AdaptiveDeltaBlock, lambda cls: cls(vector_index=1, block_index=33, delta_bytes=[0] * 8)),
+    (RGBA, lambda cls: cls(r=1, g=2, b=3, a=4)),
+    (HierarchyPivot, lambda cls: cls(name='pivot', parent_id=0, translation=Vector(), euler_angles=Vector(),
+                                     rotation=Quaternion())),
+    (HLodSubObject, lambda cls: cls(bone_index=1, identifier='container.mesh', name='mesh')),
+    (AABBTreeNode, lambda cls: cls(min=Vector(), max=Vector(), children=Children(front=1, back=2))),
+    (Children, lambda cls: cls(front=1, back=2)),
+    (Polys, lambda cls: cls(begin=1, count=2))]
+
+
+def without_slots(cls):
+    # the same record class with an instance __dict__, as the records were before
+    members = {key: value for (key, value) in cls.__dict__.items()
+               if key not in cls.__slots__ and key != '__slots__'}
+    return type(cls.__name__, (), members)
+
+
+def allocated_size(cls, create, count):
+    tracemalloc.start()
+    records = [create(cls) for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def creation_time(cls, create, count):
+    return min(timeit.repeat(lambda: create(cls), number=count, repeat=3))
+
+
+def main(count=100000):
+    print(f'{"record":<20}{"bytes (dict)":>14}{"bytes (slots)":>15}{"us (dict)":>11}{"us (slots)":>12}')
+    for (cls, create) in RECORDS:
+        plain = without_slots(cls)
+        dict_size = allocated_size(plain, create, count) / count
+        slots_size = allocated_size(cls, create, count) / count
+        dict_time = creation_time(plain, create, count) / count * 1e6
+        slots_time = creation_time(cls, create, count) / count * 1e6
+        print(f'{cls.__name__:<20}{dict_size:>14.1f}{slots_size:>15.1f}{dict_time:>11.3f}{slots_time:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -15,6 +15,19 @@ class TestAABBTree(TestCase):
 
         self.write_read_test(expected, W3D_CHUNK_AABBTREE, AABBTree.read, compare_aabbtrees, self, True)
 
+    def test_node_write_matches_field_encoding(self):
+        node = get_aabbtree_node()
+
+        expected = io.BytesIO()
+        write_vector(node.min, expected)
+        write_vector(node.max, expected)
+        write_long(node.children.front, expected)
+        write_long(node.children.back, expected)
+
+        actual = io.BytesIO()
+        node.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
     def test_write_read_empty(self):
         expected = get_aabbtree_empty()
 
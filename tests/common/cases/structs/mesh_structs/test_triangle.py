@@ -19,5 +19,65 @@ class TestTriangle(TestCase):
         actual = Triangle.read(io_stream)
         compare_triangles(self, expected, actual)
 
+    def test_write_matches_field_encoding(self):
+        triangle = get_triangle()
+
+        expected = io.BytesIO()
+        write_ulong(triangle.vert_ids[0], expected)
+        write_ulong(triangle.vert_ids[1], expected)
+        write_ulong(triangle.vert_ids[2], expected)
+        write_ulong(triangle.surface_type, expected)
+        write_vector(triangle.normal, expected)
+        write_float(triangle.distance, expected)
+
+        actual = io.BytesIO()
+        triangle.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
+    def test_read_array(self):
+        expecteds = [get_triangle(), get_triangle(vert_ids=[4, 5, 6], surface_type=2, distance=-3.5)]
+
+        io_stream = io.BytesIO()
+        write_list(expecteds, io_stream, Triangle.write)
+        io_stream = io.BytesIO(io_stream.getvalue())
+
+        actuals = Triangle.read_array(io_stream, 64)
+        self.assertEqual(2, len(actuals))
+        for i, expected in enumerate(expecteds):
+            compare_triangles(self, expected, actuals[i])
+
+    def test_write_array(self):
+        triangles = [get_triangle(), get_triangle(vert_ids=[4, 5, 6], surface_type=2, distance=-3.5)]
+
+        expected = io.BytesIO()
+        write_list(triangles, expected, Triangle.write)
+
+        actual = io.BytesIO()
+        Triangle.write_array(triangles, actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
+    def test_triangle_array(self):
+        triangles = [get_triangle(), get_triangle(vert_ids=[4, 5, 6], surface_type=2, distance=-3.5)]
+
+        expected = io.BytesIO()
+        Triangle.write_array(triangles, expected)
+
+        actual = TriangleArray.read(io.BytesIO(expected.getvalue()), 64)
+        self.assertEqual(2, len(actual))
+        for i, triangle in enumerate(triangles):
+            compare_triangles(self, triangle, actual[i])
+        compare_triangles(self, triangles[1], actual[-1])
+        self.assertEqual(expected.getvalue(), actual.tobytes())
+
+        io_stream = io.BytesIO()
+        Triangle.write_array(actual, io_stream)
+        self.assertEqual(expected.getvalue(), io_stream.getvalue())
+
+        actual[0] = triangles[1]
+        actual.append(triangles[0])
+        self.assertEqual(3, len(actual))
+        compare_triangles(self, triangles[1], actual[0])
+        compare_triangles(self, triangles[0], actual[2])
+
     def test_write_read_xml(self):
         self.write_read_xml_test(get_triangle(), 'T', Triangle.parse, compare_triangles)
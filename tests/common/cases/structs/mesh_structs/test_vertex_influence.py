@@ -4,6 +4,8 @@
 import io
 from tests.common.helpers.mesh_structs.vertex_influence import *
 from tests.utils import TestCase
+from io_mesh_w3d.common.structs.mesh_structs.vertex_influence import *
+from io_mesh_w3d.w3d.io_binary import *
 from io_mesh_w3d.w3x.io_xml import *
 
 
@@ -20,6 +22,49 @@ class TestVertexInfluence(TestCase):
         actual = VertexInfluence.read(io_stream)
         compare_vertex_influences(self, expected, actual)
 
+    def test_write_matches_field_encoding(self):
+        influence = get_vertex_influence()
+
+        expected = io.BytesIO()
+        write_ushort(influence.bone_idx, expected)
+        write_ushort(influence.xtra_idx, expected)
+        write_ushort(int(influence.bone_inf * 100), expected)
+        write_ushort(int(influence.xtra_inf * 100), expected)
+
+        actual = io.BytesIO()
+        influence.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
+    def test_read_array(self):
+        expecteds = [get_vertex_influence(), get_vertex_influence(bone=7, xtra=0, bone_inf=1.0, xtra_inf=0.0)]
+
+        io_stream = io.BytesIO()
+        for expected in expecteds:
+            expected.write(io_stream)
+        io_stream = io.BytesIO(io_stream.getvalue())
+
+        actuals = VertexInfluence.read_array(io_stream, 16)
+        self.assertEqual(2, len(actuals))
+        for i, expected in enumerate(expecteds):
+            compare_vertex_influences(self, expected, actuals[i])
+
+    def test_vertex_influence_array(self):
+        expecteds = [get_vertex_influence(), get_vertex_influence(bone=7, xtra=0, bone_inf=1.0, xtra_inf=0.0)]
+
+        io_stream = io.BytesIO()
+        VertexInfluence.write_array(expecteds, io_stream)
+        data = io_stream.getvalue()
+
+        actuals = VertexInfluenceArray.read(io.BytesIO(data), 16)
+        self.assertEqual(2, len(actuals))
+        for i, expected in enumerate(expecteds):
+            compare_vertex_influences(self, expected, actuals[i])
+        self.assertEqual(data, actuals.tobytes())
+
+        actuals.append(expecteds[0])
+        self.assertEqual(3, len(actuals))
+        compare_vertex_influences(self, expecteds[0], actuals[2])
+
     def test_write_read_xml(self):
         expected = get_vertex_influence()
         root = create_root()
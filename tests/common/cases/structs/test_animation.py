@@ -89,6 +89,19 @@ class TestAnimation(TestCase):
     def test_write_read_minimal_xml(self):
         self.write_read_xml_test(get_animation_minimal(), 'W3DAnimation', Animation.parse, compare_animations, self)
 
+    def test_bit_channel_write_read_create_parse(self):
+        data = [0.0, 1.0, 1.0, 1.0, 0.0, 0.0, 1.0, 0.0, 1.0]
+        io_stream = io.BytesIO()
+        AnimationBitChannel(last_frame=len(data) - 1, data=data).write(io_stream)
+        io_stream = io.BytesIO(io_stream.getvalue())
+        read_chunk_head(io_stream)
+
+        root = create_root()
+        AnimationBitChannel.read(io_stream).create(root)
+        actual = AnimationBitChannel.parse(root[0])
+
+        self.assertEqual(data, actual.data)
+
     def test_parse_invalid_identifier(self):
         root = create_root()
         xml_animation = create_node(root, 'W3DAnimation')
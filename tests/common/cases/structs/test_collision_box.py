@@ -1,6 +1,7 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
+import io
 from tests.common.helpers.collision_box import *
 from tests.utils import TestCase
 from unittest.mock import patch
@@ -15,6 +16,25 @@ class TestCollisionBox(TestCase):
 
         self.write_read_test(expected, W3D_CHUNK_BOX, CollisionBox.read, compare_collision_boxes)
 
+    def test_write_matches_field_encoding(self):
+        box = get_collision_box()
+
+        expected = io.BytesIO()
+        write_chunk_head(W3D_CHUNK_BOX, expected, 68)
+        box.version.write(expected)
+        write_ulong((box.box_type & ATTRIBUTE_MASK) | (box.collision_types & COLLISION_TYPE_MASK), expected)
+        write_long_fixed_string(box.name_, expected)
+        write_ubyte(box.color.r, expected)
+        write_ubyte(box.color.g, expected)
+        write_ubyte(box.color.b, expected)
+        write_ubyte(box.color.a, expected)
+        write_vector(box.center, expected)
+        write_vector(box.extend, expected)
+
+        actual = io.BytesIO()
+        box.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
     def test_validate(self):
         box = get_collision_box()
         self.file_format = 'W3D'
@@ -17,6 +17,20 @@ class TestHierarchy(TestCase):
 
         self.write_read_test(expected, W3D_CHUNK_HIERARCHY, Hierarchy.read, compare_hierarchies, self, True)
 
+    def test_pivot_write_matches_field_encoding(self):
+        pivot = get_hierarchy_pivot(name='pivot', parent=3)
+
+        expected = io.BytesIO()
+        write_fixed_string(pivot.name, expected)
+        write_long(pivot.parent_id, expected)
+        write_vector(pivot.translation, expected)
+        write_vector(pivot.euler_angles, expected)
+        write_quaternion(pivot.rotation, expected)
+
+        actual = io.BytesIO()
+        pivot.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
     def test_write_read_minimal(self):
         expected = get_hierarchy_minimal()
 
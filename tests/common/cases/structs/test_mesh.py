@@ -2,6 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 import io
+import unittest
 from tests.common.helpers.mesh import *
 from tests.utils import TestCase
 from unittest.mock import patch, call
@@ -13,6 +14,33 @@ def clear_tangents(mesh):
 
 
 class TestMesh(TestCase):
+    def test_header_write_matches_field_encoding(self):
+        header = get_mesh_header(name='mesh_name', skin=True)
+
+        expected = io.BytesIO()
+        write_chunk_head(W3D_CHUNK_MESH_HEADER, expected, 116)
+        header.version.write(expected)
+        write_ulong(header.attrs, expected)
+        write_fixed_string(header.mesh_name, expected)
+        write_fixed_string(header.container_name, expected)
+        write_ulong(header.face_count, expected)
+        write_ulong(header.vert_count, expected)
+        write_ulong(header.matl_count, expected)
+        write_ulong(header.damage_stage_count, expected)
+        write_ulong(header.sort_level, expected)
+        write_ulong(header.prelit_version, expected)
+        write_ulong(header.future_count, expected)
+        write_ulong(header.vert_channel_flags, expected)
+        write_ulong(header.face_channel_flags, expected)
+        write_vector(header.min_corner, expected)
+        write_vector(header.max_corner, expected)
+        write_vector(header.sph_center, expected)
+        write_float(header.sph_radius, expected)
+
+        actual = io.BytesIO()
+        header.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
     def test_write_read(self):
         expected = get_mesh()
 
@@ -45,6 +73,66 @@ class TestMesh(TestCase):
 
         self.write_read_test(expected, W3D_CHUNK_MESH, Mesh.read, compare_meshes, self, True)
 
+    def test_read_compact(self):
+        expected = get_mesh(skin=True)
+        io_stream = BinaryWriter()
+        expected.write(io_stream)
+        data = io_stream.getvalue()
+
+        io_stream = BinaryReader(data)
+        (_, _, chunk_end) = read_chunk_head(io_stream)
+        actual = Mesh.read(self, io_stream, chunk_end, compact=True)
+
+        self.assertTrue(isinstance(actual.verts, VectorArray))
+        self.assertTrue(isinstance(actual.triangles, TriangleArray))
+        self.assertTrue(isinstance(actual.vert_infs, VertexInfluenceArray))
+        self.assertTrue(isinstance(actual.material_passes[0].tx_stages[0].tx_coords[0], VectorArray))
+        clear_tangents(expected)
+        compare_meshes(self, expected, actual)
+
+        io_stream = BinaryReader(data)
+        (_, _, chunk_end) = read_chunk_head(io_stream)
+        mesh = Mesh.read(self, io_stream, chunk_end)
+
+        expected_stream = BinaryWriter()
+        mesh.write(expected_stream)
+        io_stream = BinaryWriter()
+        actual.write(io_stream)
+        self.assertEqual(actual.size(), io_stream.tell())
+        self.assertEqual(expected_stream.getvalue(), io_stream.getvalue())
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_read_numpy(self):
+        expected = get_mesh(skin=True)
+        io_stream = BinaryWriter()
+        expected.write(io_stream)
+
+        io_stream = BinaryReader(io_stream.getvalue())
+        (_, _, chunk_end) = read_chunk_head(io_stream)
+        actual = Mesh.read(self, io_stream, chunk_end, use_numpy=True)
+
+        self.assertEqual((len(expected.verts), 3), actual.verts.shape)
+        self.assertEqual((len(expected.normals), 3), actual.normals.shape)
+        for i, vert in enumerate(expected.verts):
+            compare_vectors(self, vert, Vector(actual.verts[i]))
+            compare_vectors(self, expected.normals[i], Vector(actual.normals[i]))
+        self.assertEqual(expected.shade_ids, actual.shade_ids.tolist())
+        self.assertEqual([triangle.vert_ids for triangle in expected.triangles], actual.triangle_ids.tolist())
+        self.assertEqual(len(expected.triangles), len(actual.triangles))
+
+    def test_read_numpy_not_available(self):
+        expected = get_mesh()
+        io_stream = io.BytesIO()
+        expected.write(io_stream)
+        io_stream.seek(0)
+        (_, _, chunk_end) = read_chunk_head(io_stream)
+
+        with patch('io_mesh_w3d.common.structs.mesh.numpy', None):
+            actual = Mesh.read(self, io_stream, chunk_end, use_numpy=True)
+
+        self.assertIsNone(actual.triangle_ids)
+        compare_meshes(self, expected, actual)
+
     def test_validate(self):
         mesh = get_mesh()
         self.file_format = 'W3D'
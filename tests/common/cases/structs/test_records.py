@@ -0,0 +1,23 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+from tests.benchmark_records import *
+from tests.utils import TestCase
+
+
+class TestRecords(TestCase):
+    def test_records_have_no_instance_dict(self):
+        for (cls, create) in RECORDS:
+            self.assertFalse(hasattr(create(cls), '__dict__'), cls.__name__)
+
+    def test_records_without_slots_keep_api(self):
+        for (cls, create) in RECORDS:
+            plain = without_slots(cls)
+            self.assertTrue(hasattr(create(plain), '__dict__'))
+            for name in ['read', 'write', 'parse', 'create']:
+                self.assertEqual(hasattr(cls, name), hasattr(plain, name))
+
+    def test_records_use_less_memory(self):
+        for (cls, create) in RECORDS:
+            self.assertLess(allocated_size(cls, create, 1000), allocated_size(without_slots(cls), create, 1000),
+                            cls.__name__)
@@ -4,6 +4,7 @@
 import io
 from tests.common.helpers.rgba import *
 from tests.utils import TestCase
+from io_mesh_w3d.w3d.io_binary import *
 
 
 class TestRGBA(TestCase):
@@ -16,6 +17,30 @@ class TestRGBA(TestCase):
 
         compare_rgbas(self, expected, RGBA.read(io_stream))
 
+    def test_write_matches_field_encoding(self):
+        rgba = RGBA(r=244, g=123, b=33, a=99)
+
+        expected = io.BytesIO()
+        write_ubyte(rgba.r, expected)
+        write_ubyte(rgba.g, expected)
+        write_ubyte(rgba.b, expected)
+        write_ubyte(rgba.a, expected)
+
+        actual = io.BytesIO()
+        rgba.write(actual)
+        self.assertEqual(expected.getvalue(), actual.getvalue())
+
+    def test_read_array(self):
+        expecteds = [get_rgba(), RGBA(r=244, g=123, b=33, a=99)]
+
+        io_stream = io.BytesIO()
+        for expected in expecteds:
+            expected.write(io_stream)
+        io_stream = io.BytesIO(io_stream.getvalue())
+
+        actuals = RGBA.read_array(io_stream, 8)
+        self.assertEqual(expecteds, actuals)
+
     def test_write_read_f(self):
         expected = RGBA(r=244, g=123, b=33, a=99)
 
@@ -0,0 +1,92 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import os
+
+from io_mesh_w3d.common.utils.big_archive import *
+from tests.utils import TestCase
+
+
+class TestBigArchive(TestCase):
+    def write_archive(self, path=None):
+        if path is None:
+            path = self.outpath() + 'archive.big'
+        write_big_archive(path, [
+            ('Art\\W3D\\Model.w3d', b'model data'),
+            ('Art/Textures/Texture.dds', b'texture'),
+            ('empty.ini', b'')])
+        return path
+
+    def test_read_index(self):
+        archive = BigArchive(self.write_archive())
+
+        self.assertEqual(3, len(archive))
+        self.assertEqual(['Art\\W3D\\Model.w3d', 'Art\\Textures\\Texture.dds', 'empty.ini'],
+                         [entry.name for entry in archive])
+        self.assertEqual([10, 7, 0], [entry.size for entry in archive])
+        first = archive.entries[0]
+        self.assertEqual(archive.entries[1].offset, first.offset + first.size)
+        archive.close()
+
+    def test_find_and_read(self):
+        archive = BigArchive(self.write_archive())
+
+        self.assertEqual('Art\\W3D\\Model.w3d', archive.find('art/w3d/model.w3d').name)
+        self.assertEqual(b'model data', archive.read('ART\\W3D\\MODEL.W3D'))
+        self.assertEqual(b'texture', archive.read('art/textures/texture.dds'))
+        self.assertEqual(b'', archive.read('empty.ini'))
+        self.assertIsNone(archive.find('art/w3d/missing.w3d'))
+        self.assertIsNone(archive.read('art/w3d/missing.w3d'))
+        archive.close()
+
+    def test_read_index_with_windows_names(self):
+        path = self.outpath() + 'names.big'
+        write_big_archive(path, [('Art\\Textures\\Textur\xe9.dds', b'texture')])
+        archive = BigArchive(path)
+
+        self.assertEqual('Art\\Textures\\Textur\xe9.dds', archive.entries[0].name)
+        self.assertEqual(b'texture', archive.read('art/textures/textur\xe9.dds'))
+        archive.close()
+
+        self.assertEqual('\u20ac', decode_name(b'\x80'))
+        self.assertEqual('\x81', decode_name(b'\x81'))
+
+    def test_read_truncated_index(self):
+        with open(self.write_archive(), 'rb') as file:
+            data = file.read()
+
+        for size in [4, 12, 20, 30]:
+            with self.assertRaises(ValueError):
+                read_big_index(data[:size])
+
+    def test_is_big_archive(self):
+        path = self.write_archive()
+        self.assertTrue(is_big_archive(path))
+
+        other = self.outpath() + 'other.big'
+        with open(other, 'wb') as file:
+            file.write(b'no archive')
+        self.assertFalse(is_big_archive(other))
+        self.assertFalse(is_big_archive(self.outpath() + 'missing.big'))
+
+    def test_open_big_archive_is_cached(self):
+        path = self.write_archive()
+        archive = open_big_archive(path)
+        self.assertTrue(archive is open_big_archive(path))
+
+        write_big_archive(path, [('other.ini', b'other')])
+        os.utime(path, (os.path.getatime(path), os.path.getmtime(path) + 10))
+        reopened = open_big_archive(path)
+        self.assertFalse(archive is reopened)
+        self.assertEqual(b'other', reopened.read('other.ini'))
+
+    def test_close_big_archives(self):
+        path = self.write_archive()
+        archive = open_big_archive(path)
+
+        close_big_archives()
+        self.assertTrue(archive.data.closed)
+        reopened = open_big_archive(path)
+        self.assertFalse(archive is reopened)
+        self.assertEqual(b'texture', reopened.read('art/textures/texture.dds'))
+        close_big_archives()
@@ -2,11 +2,12 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 import bpy
+import zipfile
 from tests.utils import TestCase
 from shutil import copyfile
 from os.path import dirname as up
 from io_mesh_w3d.common.utils.helpers import *
-from unittest.mock import patch, call
+from unittest.mock import patch, call, MagicMock
 
 
 class FakeClass:
@@ -60,6 +61,52 @@ class TestHelpers(TestCase):
 
                 report_func.assert_called_with(f'loaded texture: {self.outpath()}texture.tga')
 
+    def test_texture_in_search_path(self):
+        textures = self.outpath() + 'mod' + os.path.sep + 'textures'
+        os.makedirs(textures, exist_ok=True)
+        copyfile(up(up(up(self.relpath()))) + '/testfiles/texture.dds', textures + os.path.sep + 'Texture.dds')
+        self.texture_paths = self.outpath() + 'missing;' + textures
+
+        with (patch.object(self, 'info')) as report_func:
+            find_texture(self, 'texture')
+
+            report_func.assert_called_with(f'loaded texture: {textures}{os.path.sep}Texture.dds')
+
+        # reset scene
+        bpy.ops.wm.read_homefile(use_empty=True)
+
+    def test_texture_in_subdirectory(self):
+        textures = self.outpath() + 'Sub'
+        os.makedirs(textures, exist_ok=True)
+        copyfile(up(up(up(self.relpath()))) + '/testfiles/texture.dds', textures + os.path.sep + 'Texture.dds')
+
+        for reference in ['sub/texture.dds', 'sub\\texture.dds']:
+            with (patch.object(self, 'info')) as report_func:
+                find_texture(self, reference)
+
+                report_func.assert_called_with(f'loaded texture: {textures}{os.path.sep}Texture.dds')
+
+            # reset scene
+            bpy.ops.wm.read_homefile(use_empty=True)
+
+    def test_texture_falls_back_to_next_candidate_if_loading_fails(self):
+        textures = self.outpath() + 'fallback'
+        os.makedirs(textures, exist_ok=True)
+        copyfile(up(up(up(self.relpath()))) + '/testfiles/texture.dds', self.outpath() + 'texture.dds')
+        copyfile(up(up(up(self.relpath()))) + '/testfiles/texture.dds', textures + os.path.sep + 'texture.dds')
+        self.texture_paths = textures
+
+        with (patch('io_mesh_w3d.common.utils.helpers.load_image', side_effect=[None, MagicMock()])) as load_func, \
+                (patch.object(self, 'info')) as report_func:
+            find_texture(self, 'texture')
+
+            self.assertEqual([call(self.outpath() + 'texture.dds', check_existing=True),
+                              call(textures + os.path.sep + 'texture.dds', check_existing=True)],
+                             load_func.call_args_list)
+            report_func.assert_called_with(f'loaded texture: {textures}{os.path.sep}texture.dds')
+
+        os.remove(self.outpath() + 'texture.dds')
+
     def test_invalid_texture_file_extension(self):
         extensions = ['.invalid']
 
@@ -76,6 +123,80 @@ class TestHelpers(TestCase):
 
                 report_func.assert_called()
 
+    def test_texture_in_big_archive(self):
+        with open(up(up(up(self.relpath()))) + '/testfiles/texture.dds', 'rb') as file:
+            data = file.read()
+        archive = self.outpath() + 'textures.big'
+        write_big_archive(archive, [('Art\\Texture.dds', data)])
+        self.filepath = os.path.join(archive, 'art', 'model.w3d')
+
+        with (patch.object(self, 'info')) as report_func:
+            img = find_texture(self, 'texture')
+
+            report_func.assert_called_with(f'loaded texture: {os.path.join(archive, "art", "Texture.dds")}')
+        self.assertIsNotNone(img.packed_file)
+
+        # reset scene
+        bpy.ops.wm.read_homefile(use_empty=True)
+
+    def test_texture_search_path_into_big_archive(self):
+        with open(up(up(up(self.relpath()))) + '/testfiles/texture.dds', 'rb') as file:
+            data = file.read()
+        archive = self.outpath() + 'TexturesZH.big'
+        write_big_archive(archive, [('Art\\Textures\\Texture.dds', data)])
+        self.filepath = self.outpath() + 'model.w3d'
+        self.texture_paths = os.path.join(archive, 'Art', 'Textures')
+
+        with (patch.object(self, 'info')) as report_func:
+            img = find_texture(self, 'texture')
+
+            report_func.assert_called_with(f'loaded texture: {os.path.join(archive, "Art", "Textures", "Texture.dds")}')
+        self.assertIsNotNone(img.packed_file)
+
+        # reset scene
+        self.texture_paths = ''
+        bpy.ops.wm.read_homefile(use_empty=True)
+
+    def test_insensitive_path(self):
+        directory = self.outpath() + 'insensitive' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        with open(directory + 'Model.W3D', 'wb') as file:
+            file.write(b'data')
+
+        self.assertEqual(directory + 'Model.W3D', insensitive_path(self, directory + 'model.w3d'))
+        self.assertEqual(directory + 'missing.w3d', insensitive_path(self, directory + 'missing.w3d'))
+
+        # during an import the directory is listed once by the search path of the import
+        self.search_path = SearchPath([])
+        with (patch('io_mesh_w3d.common.utils.search_path.DirectoryIndex', side_effect=DirectoryIndex)) as create_index:
+            for _ in range(3):
+                self.assertEqual(directory + 'Model.W3D', insensitive_path(self, directory + 'MODEL.w3d'))
+            self.assertEqual(1, create_index.call_count)
+        self.search_path = None
+
+    def test_archive_members(self):
+        zip_path = self.outpath() + 'pack.zip'
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            archive.writestr('Art/Model.w3d', b'zip data')
+        big_path = self.outpath() + 'pack.big'
+        write_big_archive(big_path, [('Art\\Model.w3d', b'big data')])
+
+        for (path, expected) in [(zip_path, b'zip data'), (big_path, b'big data')]:
+            member = os.path.join(path, 'art', 'model.w3d')
+            self.assertTrue(file_exists(member))
+            self.assertEqual(expected, read_archive_member(member))
+            io_stream = open_archive_member(member)
+            self.assertEqual(expected, io_stream.read())
+            io_stream.close()
+
+            missing = os.path.join(path, 'art', 'missing.w3d')
+            self.assertFalse(file_exists(missing))
+            self.assertIsNone(read_archive_member(missing))
+            self.assertIsNone(open_archive_member(missing))
+
+        self.assertIsNone(find_archive_member(zip_path))
+        self.assertIsNone(find_archive_member(self.outpath() + 'missing' + os.path.sep + 'model.w3d'))
+
     def test_call_create_uv_layer_without_tx_coords(self):
         fake_mat_pass = FakeClass()
 
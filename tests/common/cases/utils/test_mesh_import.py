@@ -2,6 +2,7 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 import bpy
+import unittest
 
 from io_mesh_w3d.common.utils.mesh_import import *
 from io_mesh_w3d.common.utils.hierarchy_import import *
@@ -35,6 +36,24 @@ class TestMeshImportUtils(TestCase):
             loop = [loop for loop in mesh.loops if loop.vertex_index == i][0]
             compare_vectors(self, mesh_struct.normals[i], loop.normal)
 
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_import_numpy_mesh(self):
+        expected = get_mesh('testmesh')
+        io_stream = BinaryWriter()
+        expected.write(io_stream)
+        io_stream = BinaryReader(io_stream.getvalue())
+        (_, _, chunk_end) = read_chunk_head(io_stream)
+        mesh_struct = Mesh.read(self, io_stream, chunk_end, use_numpy=True)
+
+        create_mesh(self, mesh_struct, bpy.context.scene.collection)
+
+        mesh = bpy.data.meshes['testmesh']
+        self.assertEqual(len(expected.verts), len(mesh.vertices))
+        for i, vertex in enumerate(mesh.vertices):
+            compare_vectors(self, expected.verts[i], vertex.co)
+        self.assertEqual([list(triangle.vert_ids) for triangle in expected.triangles],
+                         [list(polygon.vertices) for polygon in mesh.polygons])
+
     def test_invalid_faces_are_removed(self):
         mesh_name = 'testmesh'
         mesh_struct = get_mesh(mesh_name)
@@ -0,0 +1,91 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import os
+import zipfile
+from unittest.mock import patch
+
+from io_mesh_w3d.common.utils.search_path import *
+from tests.utils import TestCase
+
+
+class TestSearchPath(TestCase):
+    def create_files(self, directory, names):
+        os.makedirs(directory, exist_ok=True)
+        for name in names:
+            with open(os.path.join(directory, name), 'wb') as file:
+                file.write(b'data')
+        return directory
+
+    def test_find_is_case_insensitive(self):
+        directory = self.create_files(self.outpath() + 'textures', ['Texture.DDS', 'other.tga'])
+        search_path = SearchPath([directory])
+
+        self.assertEqual(os.path.join(directory, 'Texture.DDS'), search_path.find(['texture.dds']))
+        self.assertEqual(os.path.join(directory, 'other.tga'), search_path.find(['OTHER.dds', 'Other.TGA']))
+        self.assertIsNone(search_path.find(['missing.dds']))
+
+    def test_directories_are_searched_in_order(self):
+        model = self.create_files(self.outpath() + 'model', ['a.tga'])
+        mod = self.create_files(self.outpath() + 'mod', ['a.dds', 'b.dds'])
+        game = self.create_files(self.outpath() + 'game', ['b.dds', 'c.dds'])
+        search_path = SearchPath([model, self.outpath() + 'missing', mod, game])
+
+        self.assertEqual(os.path.join(model, 'a.tga'), search_path.find(['a.dds', 'a.tga']))
+        self.assertEqual(os.path.join(mod, 'b.dds'), search_path.find(['b.dds']))
+        self.assertEqual(os.path.join(game, 'c.dds'), search_path.find(['c.dds']))
+
+    def test_find_in_subdirectories(self):
+        directory = self.create_files(self.outpath() + 'art' + os.path.sep + 'Sub', ['Tex.dds'])
+        search_path = SearchPath([self.outpath() + 'art'])
+
+        self.assertEqual(os.path.join(directory, 'Tex.dds'), search_path.find(['sub/tex.dds']))
+        self.assertEqual(os.path.join(directory, 'Tex.dds'), search_path.find(['SUB\\tex.dds']))
+        self.assertIsNone(search_path.find(['other\\tex.dds']))
+        self.assertIsNone(search_path.find(['sub\\tex.dds\\tex.dds']))
+        self.assertIsNone(search_path.find(['']))
+
+    def test_candidates(self):
+        mod = self.create_files(self.outpath() + 'candidates_mod', ['a.dds'])
+        game = self.create_files(self.outpath() + 'candidates_game', ['A.tga', 'a.dds'])
+        search_path = SearchPath([mod, game])
+
+        self.assertEqual([os.path.join(mod, 'a.dds'), os.path.join(game, 'A.tga'), os.path.join(game, 'a.dds')],
+                         list(search_path.candidates(['a.tga', 'a.dds'])))
+
+    def test_directories_are_listed_once(self):
+        directory = self.create_files(self.outpath() + 'listed', ['a.dds'])
+        search_path = SearchPath([directory, self.outpath() + 'missing'])
+
+        with patch('io_mesh_w3d.common.utils.search_path.DirectoryIndex',
+                   side_effect=DirectoryIndex) as create_index:
+            for _ in range(3):
+                self.assertIsNotNone(search_path.find(['A.dds']))
+                self.assertIsNone(search_path.find(['b.dds']))
+            self.assertEqual(2, create_index.call_count)
+
+            self.create_files(directory, ['B.dds'])
+            self.assertEqual(os.path.join(directory, 'B.dds'), SearchPath([directory]).find(['b.dds']))
+            self.assertEqual(3, create_index.call_count)
+
+    def test_find_in_archives(self):
+        big = self.outpath() + 'TexturesZH.big'
+        write_big_archive(big, [('Art\\Textures\\Tex.dds', b'big'), ('Art\\Textures\\Sub\\Other.tga', b'big'),
+                                ('Data\\INI\\Object.ini', b'ini')])
+        zip_path = self.outpath() + 'textures.zip'
+        with zipfile.ZipFile(zip_path, 'w') as archive:
+            archive.writestr('Art/Textures/Zip.dds', b'zip')
+        search_path = SearchPath([os.path.join(big, 'art', 'textures'), os.path.join(zip_path, 'Art', 'Textures'),
+                                  os.path.join(big, 'missing')])
+
+        textures = os.path.join(big, 'art', 'textures')
+        self.assertEqual(os.path.join(textures, 'Tex.dds'), search_path.find(['TEX.dds']))
+        self.assertEqual(os.path.join(textures, 'Sub', 'Other.tga'), search_path.find(['sub\\other.tga']))
+        self.assertEqual(os.path.join(zip_path, 'Art', 'Textures', 'Zip.dds'), search_path.find(['zip.dds']))
+        self.assertIsNone(search_path.find(['object.ini']))
+        self.assertEqual(os.path.join(big, 'Data'), SearchPath([big]).find(['data']))
+        close_big_archives()
+
+    def test_split_search_paths(self):
+        self.assertEqual(['mod/art', 'C:\\game\\art'], split_search_paths(' mod/art ;;C:\\game\\art;'))
+        self.assertEqual([], split_search_paths(''))
@@ -1,7 +1,7 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
-from mathutils import Vector, Quaternion, Matrix
+from io_mesh_w3d.w3d.vecmath import Vector, Quaternion, Matrix
 
 
 def get_vec(x=0.0, y=0.0, z=0.0):
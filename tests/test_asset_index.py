@@ -0,0 +1,182 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+import os
+
+from io_mesh_w3d.w3dtool import main
+from io_mesh_w3d.asset_index import *
+from io_mesh_w3d.reference_validator import validate
+from io_mesh_w3d.w3x.structs.include import *
+from tests.common.helpers.animation import get_animation
+from tests.common.helpers.collision_box import get_collision_box
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.hlod import get_hlod
+from tests.common.helpers.mesh import get_mesh
+from tests.utils import *
+
+
+class TestAssetIndex(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def touch(self, path, data=b''):
+        with open(path, 'wb') as file:
+            file.write(data)
+
+    def create_tree(self, name):
+        # base game with skeleton, model and texture, mod with an animation and a replaced texture
+        base = self.outpath() + name + os.path.sep + 'game' + os.path.sep
+        mod = self.outpath() + name + os.path.sep + 'mod' + os.path.sep
+        os.makedirs(base + 'textures', exist_ok=True)
+        os.makedirs(mod, exist_ok=True)
+        self.write_w3d(base + 'skeleton.w3d', [get_hierarchy()])
+        self.write_w3d(base + 'model.w3d', [get_mesh(name='sword', skin=True), get_mesh(name='soldier'),
+                                            get_mesh(name='TRUNK'), get_mesh(name='PICK'),
+                                            get_mesh(name='Brakelight'), get_collision_box(),
+                                            get_hlod('containerName', 'TestHierarchy')])
+        self.touch(base + 'textures' + os.path.sep + 'texture.dds')
+        self.write_w3d(mod + 'walk.w3d', [get_animation()])
+        self.touch(mod + 'Texture.tga')
+        return base, mod
+
+    def test_update_and_find(self):
+        (base, mod) = self.create_tree('find')
+        index = AssetIndex()
+
+        report = index.update([base, mod])
+
+        self.assertEqual(5, report.files)
+        self.assertEqual(5, report.scanned)
+        self.assertEqual(os.path.abspath(base + 'skeleton.w3d'), index.find('hierarchy', 'testhierarchy'))
+        self.assertEqual(os.path.abspath(base + 'model.w3d'), index.find('mesh', 'containerName.sword'))
+        self.assertEqual(os.path.abspath(base + 'model.w3d'), index.find('collision_box', 'containerName.BOUNDINGBOX'))
+        self.assertEqual(os.path.abspath(mod + 'Texture.tga'), index.find('image', 'texture.dds'))
+        self.assertEqual(os.path.abspath(base + 'textures' + os.path.sep + 'texture.dds'),
+                         index.find('image', 'texture', '.dds'))
+        self.assertIsNone(index.find('hierarchy', 'TestHierarchy', '.w3x'))
+        self.assertIsNone(index.find('hierarchy', 'OtherHierarchy'))
+
+        # the search path order decides which of the textures is used
+        index.update([mod, base])
+        self.assertEqual(os.path.abspath(base + 'textures' + os.path.sep + 'texture.dds'),
+                         index.find('image', 'texture'))
+        index.close()
+
+    def test_incremental_update(self):
+        (base, mod) = self.create_tree('incremental')
+        path = self.outpath() + 'incremental.db'
+        if os.path.exists(path):
+            os.remove(path)
+
+        index = AssetIndex(path)
+        self.assertEqual(5, index.update([base, mod]).scanned)
+        index.close()
+
+        index = AssetIndex(path)
+        report = index.update([base, mod])
+        self.assertEqual((5, 0, 0), (report.files, report.scanned, report.removed))
+
+        self.write_w3d(base + 'skeleton.w3d', [get_hierarchy('OtherHierarchy')])
+        os.remove(mod + 'walk.w3d')
+        report = index.update([base, mod])
+
+        self.assertEqual((4, 1, 1), (report.files, report.scanned, report.removed))
+        self.assertIsNone(index.find('hierarchy', 'TestHierarchy'))
+        self.assertEqual(os.path.abspath(base + 'skeleton.w3d'), index.find('hierarchy', 'OtherHierarchy'))
+        self.assertEqual([], index.dependents('hierarchy', get_animation().header.hierarchy_name)[1:])
+        self.assertTrue(report.format().startswith('indexed 4 files in '))
+        index.close()
+
+    def test_find_indexed_asset(self):
+        (base, mod) = self.create_tree('lookup')
+        path = self.outpath() + 'lookup.db'
+        if os.path.exists(path):
+            os.remove(path)
+        index = AssetIndex(path)
+        index.update([base, mod])
+        index.close()
+
+        self.assertIsNone(find_indexed_asset(self, 'hierarchy', 'TestHierarchy'))
+        self.assertIsNone(open_asset_index(self))
+
+        self.asset_index = path
+        self.asset_database = open_asset_index(self)
+        self.assertEqual(os.path.abspath(base + 'skeleton.w3d'),
+                         find_indexed_asset(self, 'hierarchy', 'TestHierarchy', '.w3d'))
+        self.assertEqual(os.path.abspath(mod + 'Texture.tga'), find_indexed_asset(self, 'image', 'texture'))
+
+        # opened read only
+        with self.assertRaises(sqlite3.OperationalError):
+            self.asset_database.connection.execute('DELETE FROM files')
+        self.asset_database.close()
+
+    def test_dependencies_and_dependents(self):
+        (base, mod) = self.create_tree('dependencies')
+        index = AssetIndex()
+        index.update([base, mod])
+
+        dependencies = index.dependencies(base + 'model.w3d')
+
+        self.assertEqual(('containerName', 'hierarchy', 'TestHierarchy', os.path.abspath(base + 'skeleton.w3d')),
+                         dependencies[0])
+        self.assertIn(('containerName', 'sub_object', 'containerName.BOUNDINGBOX', os.path.abspath(base + 'model.w3d')),
+                      dependencies)
+        self.assertIn(('containerName.sword', 'texture', 'texture.dds', os.path.abspath(mod + 'Texture.tga')),
+                      dependencies)
+        self.assertEqual([(os.path.abspath(base + 'model.w3d'), 'containerName'),
+                          (os.path.abspath(mod + 'walk.w3d'), get_animation().header.name)],
+                         index.dependents('hierarchy', 'TESTHIERARCHY'))
+        index.close()
+
+    def test_include_dependencies_are_case_insensitive(self):
+        directory = self.outpath() + 'include_dependencies' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        write_struct(get_hierarchy(xml=True), directory + 'testhiera_skl.w3x')
+        root = create_root()
+        includes = create_node(root, 'Includes')
+        for source in ['ART:TestHiera_SKL.w3x', 'ART:missing.w3x']:
+            Include(type='all', source=source).create(includes)
+        write(root, directory + 'model.w3x')
+        index = AssetIndex()
+        index.update([directory])
+
+        self.assertEqual([('', 'include', 'ART:TestHiera_SKL.w3x', os.path.abspath(directory + 'testhiera_skl.w3x')),
+                          ('', 'include', 'ART:missing.w3x', None)],
+                         index.dependencies(directory + 'model.w3x'))
+        index.close()
+
+    def test_validate_indexed(self):
+        (base, mod) = self.create_tree('validate')
+        self.write_w3d(mod + 'other.w3d', [get_animation('OtherHierarchy'), get_hlod('Other', 'MissingHierarchy')])
+        path = self.outpath() + 'validate.db'
+        if os.path.exists(path):
+            os.remove(path)
+
+        expected = validate([base, mod])
+        report = validate_indexed(path, [base, mod])
+
+        self.assertEqual(expected.files, report.files)
+        self.assertEqual(sorted(problem.to_dict().items() for problem in expected.problems),
+                         sorted(problem.to_dict().items() for problem in report.problems))
+        self.assertEqual(['missing_hierarchy', 'missing_hierarchy'], [problem.kind for problem in report.problems])
+
+    def test_main_index(self):
+        (base, mod) = self.create_tree('main')
+        path = self.outpath() + 'main.db'
+        if os.path.exists(path):
+            os.remove(path)
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['index', path, base, mod], out))
+        self.assertTrue(out.getvalue().startswith('indexed 5 files in '))
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['deps', path, mod + 'walk.w3d'], out))
+        self.assertEqual(f'{mod}walk.w3d\n  {get_animation().header.name} hierarchy TestHierarchy -> '
+                         f'{os.path.abspath(base + "skeleton.w3d")}\n', out.getvalue())
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['validate', '--index', path, base, mod], out))
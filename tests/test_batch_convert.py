@@ -0,0 +1,162 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import os
+from unittest.mock import patch
+
+from io_mesh_w3d.batch_convert import *
+from tests.common.helpers.animation import get_animation, compare_animations
+from tests.common.helpers.collision_box import get_collision_box
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.hlod import get_hlod, compare_hlods
+from tests.common.helpers.mesh import get_mesh
+from tests.mathutils import *
+from tests.utils import *
+
+
+class TestBatchConvert(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def test_find_conversions(self):
+        source = self.outpath() + 'source' + os.path.sep
+        os.makedirs(source + 'units', exist_ok=True)
+        self.write_w3d(source + 'a.w3d', [get_hierarchy()])
+        self.write_w3d(source + 'units' + os.path.sep + 'b.W3D', [get_hierarchy()])
+        write_struct(get_hierarchy(), source + 'c.w3x')
+
+        conversions = find_conversions(source, 'target', 'W3X')
+
+        self.assertEqual([(source + 'a.w3d', os.path.join('target', 'a.w3x')),
+                          (source + 'units' + os.path.sep + 'b.W3D', os.path.join('target', 'units', 'b.w3x'))],
+                         conversions)
+        self.assertEqual([(source + 'c.w3x', os.path.join('target', 'c.w3d'))],
+                         find_conversions(source, 'target', 'W3D'))
+        self.assertEqual([(source + 'a.w3d', os.path.join('target', 'a.w3x'))],
+                         find_conversions(source + 'a.w3d', 'target', 'W3X'))
+
+    def test_convert_w3d_to_w3x_and_back(self):
+        hierarchy = get_hierarchy()
+        hlod = get_hlod('containerName', 'TestHierarchy')
+        box = get_collision_box()
+        animation = get_animation()
+        source = self.outpath() + 'w3d' + os.path.sep
+        os.makedirs(source, exist_ok=True)
+        self.write_w3d(source + 'model.w3d', [hierarchy, box, get_mesh(name='sword'), get_mesh(name='shield'), hlod])
+        self.write_w3d(source + 'animation.w3d', [animation])
+
+        report = convert_files(self, find_conversions(source, self.outpath() + 'w3x', 'W3X'))
+        self.assertEqual(2, report.converted)
+        self.assertEqual([], report.failed)
+
+        report = convert_files(self, find_conversions(self.outpath() + 'w3x', self.outpath() + 'back', 'W3D'), 1)
+        self.assertEqual(2, report.converted)
+
+        (data_context, _) = load_file(self, self.outpath() + 'back' + os.path.sep + 'model.w3d')
+        self.assertEqual(hierarchy.name(), data_context.hierarchy.name())
+        self.assertEqual(len(hierarchy.pivots), data_context.hierarchy.header.num_pivots)
+        self.assertEqual([pivot.name for pivot in hierarchy.pivots],
+                         [pivot.name for pivot in data_context.hierarchy.pivots])
+        compare_hlods(self, hlod, data_context.hlod, xml=True)
+        self.assertEqual(box.name_, data_context.collision_boxes[0].name_)
+        compare_vectors(self, box.extend, data_context.collision_boxes[0].extend)
+        self.assertEqual(['containerName.sword', 'containerName.shield'],
+                         [mesh.identifier() for mesh in data_context.meshes])
+        self.assertEqual(8, len(data_context.meshes[0].verts))
+        self.assertEqual(12, len(data_context.meshes[1].triangles))
+
+        (data_context, _) = load_file(self, self.outpath() + 'back' + os.path.sep + 'animation.w3d')
+        compare_animations(self, animation, data_context.animation)
+
+    def test_convert_vertex_materials_to_w3x(self):
+        mesh = get_mesh(name='sword')
+        self.write_w3d(self.outpath() + 'legacy.w3d', [mesh])
+
+        messages = convert_file(self.outpath() + 'legacy.w3d', self.outpath() + 'legacy.w3x')
+
+        self.assertEqual([('warning', 'triangle surface types of mesh \'containerName.sword\' '
+                                      'are not supported in W3X file format!'),
+                          ('warning', 'only the texture coordinates of the first material pass of mesh '
+                                      '\'containerName.sword\' are supported in W3X file format!')],
+                         [message for message in messages if message[0] != 'info'])
+
+        (data_context, _) = load_file(self, self.outpath() + 'legacy.w3x')
+        actual = data_context.meshes[0]
+        self.assertEqual(['DefaultW3D.fx', 'DefaultW3D.fx'],
+                         [material.header.type_name for material in actual.shader_materials])
+        textures = [prop.value for prop in actual.shader_materials[0].properties if prop.name == 'DiffuseTexture']
+        self.assertEqual(['texture.dds'], textures)
+        self.assertEqual(len(mesh.verts), len(actual.material_passes[0].tx_coords))
+        for (expected, uv) in zip(mesh.material_passes[0].tx_stages[0].tx_coords[0],
+                                  actual.material_passes[0].tx_coords):
+            compare_vectors2(self, expected, uv)
+
+    def test_convert_w3x_resolves_includes(self):
+        directory = self.outpath() + 'includes' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        write_struct(get_hierarchy(), directory + 'TestHierarchy.w3x')
+        write_struct(get_mesh(name='sword'), directory + 'containername.SWORD.w3x')
+
+        root = create_root()
+        includes = create_node(root, 'Includes')
+        for source in ['ART:TestHierarchy.w3x', 'ART:containerName.sword.w3x', 'ART:missing.w3x', 'ART:texture.xml']:
+            Include(type='all', source=source).create(includes)
+        get_mesh(name='shield').create(root)
+        get_hlod('containerName', 'TestHierarchy').create(root)
+        write(root, directory + 'containerName.w3x')
+
+        messages = convert_file(directory + 'containerName.w3x', directory + 'containerName.w3d')
+
+        self.assertEqual([('warning', f'included file not found: {directory}missing.w3x')],
+                         [message for message in messages if message[0] != 'info'])
+
+        (data_context, _) = load_file(self, directory + 'containerName.w3d')
+        self.assertIsNone(data_context.hierarchy)
+        self.assertEqual('containerName', data_context.hlod.model_name())
+        self.assertEqual(['containerName.shield', 'containerName.sword'],
+                         [mesh.identifier() for mesh in data_context.meshes])
+
+    def test_include_path_is_case_insensitive(self):
+        directory = self.outpath() + 'include_path' + os.path.sep
+        os.makedirs(directory + 'Sub', exist_ok=True)
+        write_struct(get_hierarchy(), directory + 'testhiera_skl.w3x')
+        write_struct(get_hierarchy(), directory + 'Sub' + os.path.sep + 'Other.w3x')
+
+        self.assertEqual(directory + 'testhiera_skl.w3x',
+                         include_path(directory + 'model.w3x', 'ART:TestHiera_SKL.w3x'))
+        self.assertEqual(os.path.join(directory + 'Sub', 'Other.w3x'),
+                         include_path(directory + 'model.w3x', 'art:sub\\other.w3x'))
+        self.assertEqual(directory + 'missing.w3x', include_path(directory + 'model.w3x', 'ART:missing.w3x'))
+
+    def test_convert_w3d_to_w3x_includes_hierarchy(self):
+        path = self.outpath() + 'hlod_only.w3d'
+        self.write_w3d(path, [get_hlod('containerName', 'TestHierarchy')])
+
+        self.assertEqual([], [message for message in convert_file(path, self.outpath() + 'hlod_only.w3x')
+                              if message[0] != 'info'])
+
+        (_, includes) = load_file(self, self.outpath() + 'hlod_only.w3x')
+        self.assertEqual(['ART:TestHierarchy.w3x'], includes)
+
+    def test_convert_files_without_process_pool(self):
+        source = self.outpath() + 'fallback' + os.path.sep
+        os.makedirs(source, exist_ok=True)
+        self.write_w3d(source + 'a.w3d', [get_hierarchy()])
+        self.write_w3d(source + 'b.w3d', [get_hierarchy('OtherHierarchy')])
+        with open(source + 'broken.w3d', 'wb') as file:
+            file.write(b'\x00\x00\x00\x00\xff\x00\x00\x00')
+
+        with (patch('io_mesh_w3d.batch_convert.create_executor', side_effect=OSError)) as create_func, \
+                (patch.object(self, 'error')) as error_func:
+            report = convert_files(self, find_conversions(source, self.outpath() + 'fallback_out', 'W3X'))
+
+            create_func.assert_called_once()
+            error_func.assert_called_once()
+
+        self.assertEqual(2, report.converted)
+        self.assertEqual([source + 'broken.w3d'], report.failed)
+        self.assertTrue(report.format().startswith('converted 2 files in '))
+        self.assertTrue(report.format().endswith('files/s), 1 failed'))
+        self.assertTrue(os.path.exists(self.outpath() + 'fallback_out' + os.path.sep + 'b.w3x'))
@@ -0,0 +1,118 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+import json
+from unittest.mock import patch
+
+from io_mesh_w3d.w3dtool import main
+from io_mesh_w3d.chunk_diff import *
+from tests.common.helpers.animation import get_animation
+from tests.common.helpers.collision_box import get_collision_box
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.mesh import get_mesh
+from tests.mathutils import *
+from tests.utils import *
+
+
+class TestChunkDiff(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def test_identical_files_are_not_decoded(self):
+        structs = [get_hierarchy(), get_mesh(name='sword'), get_animation()]
+        self.write_w3d(self.outpath() + 'old.w3d', structs)
+        self.write_w3d(self.outpath() + 'new.w3d', structs)
+
+        with (patch.object(ChunkIndex, 'decode')) as decode_func:
+            result = diff_files(self, self.outpath() + 'old.w3d', self.outpath() + 'new.w3d')
+
+            decode_func.assert_not_called()
+
+        self.assertEqual(['same'] * 3, [chunk.status for chunk in result.chunks])
+        self.assertFalse(result.has_differences())
+        self.assertEqual(['3 identical, 0 within tolerance, 0 changed, 0 added, 0 removed'], result.format())
+
+    def test_mesh_differences(self):
+        self.write_w3d(self.outpath() + 'old.w3d', [get_mesh(name='sword', shader_mats=True)])
+        mesh = get_mesh(name='sword', shader_mats=True)
+        mesh.header.sph_radius += 1.0
+        mesh.verts[3] = mesh.verts[3] + Vector((0.0, 0.5, 0.0))
+        mesh.verts[5] = mesh.verts[5] + Vector((0.0, 0.0, 0.25))
+        mesh.shader_materials[0].properties[9].value = 'other_env.tga'
+        for triangle in mesh.triangles:
+            triangle.distance += 0.5
+        mesh.triangles[0].surface_type = 3
+        self.write_w3d(self.outpath() + 'new.w3d', [mesh])
+
+        result = diff_files(self, self.outpath() + 'old.w3d', self.outpath() + 'new.w3d')
+
+        self.assertEqual('changed', result.chunks[0].status)
+        self.assertEqual('Mesh containerName.sword', result.chunks[0].label())
+        lines = result.format()
+        self.assertEqual('~ Mesh containerName.sword', lines[0])
+        self.assertIn('    header.sph_radius [MeshHeader.sph_radius]: 0 -> 1', lines)
+        self.assertIn('    verts [Mesh.verts]: 2 of 8 differ, max delta 0.5 at [3]', lines)
+        self.assertIn('    shader_materials[0].properties[9].value [ShaderMaterialProperty.value]: '
+                      '\'texture_env.tga\' -> \'other_env.tga\'', lines)
+        self.assertIn('    triangles[*].distance [Triangle.distance]: 12 of 12 differ, max delta 0.5', lines)
+        self.assertIn('    triangles[0].surface_type [Triangle.surface_type]: 1 -> 3', lines)
+        self.assertTrue(result.has_differences())
+
+    def test_differences_within_tolerance(self):
+        self.write_w3d(self.outpath() + 'old.w3d', [get_mesh(name='sword')])
+        mesh = get_mesh(name='sword')
+        mesh.verts[0] = mesh.verts[0] + Vector((0.001, 0.0, 0.0))
+        self.write_w3d(self.outpath() + 'new.w3d', [mesh])
+
+        result = diff_files(self, self.outpath() + 'old.w3d', self.outpath() + 'new.w3d', tolerance=0.01)
+        self.assertEqual('equivalent', result.chunks[0].status)
+        self.assertFalse(result.has_differences())
+
+        result = diff_files(self, self.outpath() + 'old.w3d', self.outpath() + 'new.w3d')
+        self.assertEqual('changed', result.chunks[0].status)
+
+    def test_animation_channel_differences(self):
+        self.write_w3d(self.outpath() + 'old.w3d', [get_animation()])
+        animation = get_animation()
+        animation.channels[1].data[2] += 2.0
+        animation.channels.pop()
+        self.write_w3d(self.outpath() + 'new.w3d', [animation])
+
+        result = diff_files(self, self.outpath() + 'old.w3d', self.outpath() + 'new.w3d')
+
+        differences = [difference.format() for difference in result.chunks[0].differences]
+        self.assertIn(f'channels [Animation.channels]: length {len(get_animation().channels)} -> '
+                      f'{len(animation.channels)}', differences)
+        self.assertIn('channels[1].data [AnimationChannel.data]: 1 of '
+                      f'{len(animation.channels[1].data)} differ, max delta 2 at [2]', differences)
+
+    def test_added_and_removed_chunks(self):
+        self.write_w3d(self.outpath() + 'old.w3d', [get_hierarchy(), get_collision_box()])
+        self.write_w3d(self.outpath() + 'new.w3d', [get_hierarchy('OtherHierarchy'), get_collision_box()])
+
+        result = diff_files(self, self.outpath() + 'old.w3d', self.outpath() + 'new.w3d')
+
+        self.assertEqual([('removed', 'Hierarchy TestHierarchy'), ('same', 'CollisionBox containerName.BOUNDINGBOX'),
+                          ('added', 'Hierarchy OtherHierarchy')],
+                         [(chunk.status, chunk.label()) for chunk in result.chunks])
+
+    def test_main_diff(self):
+        self.write_w3d(self.outpath() + 'old.w3d', [get_hierarchy()])
+        hierarchy = get_hierarchy()
+        hierarchy.pivots[1].translation = Vector((1.0, 2.0, 3.0))
+        self.write_w3d(self.outpath() + 'new.w3d', [hierarchy])
+
+        out = io.StringIO()
+        self.assertEqual(1, main(['diff', '--json', self.outpath() + 'old.w3d', self.outpath() + 'new.w3d'], out))
+        chunks = json.loads(out.getvalue())['chunks']
+        self.assertEqual('Hierarchy', chunks[0]['chunk'])
+        self.assertEqual({'kind': 'value', 'path': 'pivots[1].translation', 'struct': 'HierarchyPivot.translation',
+                          'old': format_value(get_hierarchy().pivots[1].translation), 'new': '(1.0, 2.0, 3.0)',
+                          'delta': chunks[0]['differences'][0]['delta']},
+                         chunks[0]['differences'][0])
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['diff', self.outpath() + 'old.w3d', self.outpath() + 'old.w3d'], out))
@@ -0,0 +1,179 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+import os
+import unittest
+
+from io_mesh_w3d.w3dtool import main
+from io_mesh_w3d.mesh_recompute import *
+from io_mesh_w3d.common.structs.mesh import *
+from io_mesh_w3d.w3x.structs.include import *
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.mesh import get_mesh
+from tests.mathutils import *
+from tests.utils import *
+
+
+def get_quad():
+    # unit quad in the xy plane, the uvs follow x and y
+    mesh = get_mesh(name='quad', shader_mats=True)
+    mesh.verts = [get_vec(0.0, 0.0, 0.0), get_vec(1.0, 0.0, 0.0), get_vec(1.0, 1.0, 0.0), get_vec(0.0, 1.0, 0.0)]
+    mesh.normals = [get_vec(0.0, 0.0, 1.0)] * 4
+    mesh.tangents = []
+    mesh.bitangents = []
+    mesh.triangles = [Triangle(vert_ids=[0, 1, 2]), Triangle(vert_ids=[0, 2, 3])]
+    mesh.shade_ids = []
+    mesh.aabbtree = None
+    mesh.material_passes[0].tx_coords = [get_vec2(0.0, 0.0), get_vec2(1.0, 0.0), get_vec2(1.0, 1.0),
+                                         get_vec2(0.0, 1.0)]
+    mesh.material_passes[0].dcg = []
+    mesh.material_passes[0].dig = []
+    mesh.material_passes[0].scg = []
+    return mesh
+
+
+class TestMeshRecompute(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def read_meshes(self, path):
+        index = ChunkIndex.from_file(path)
+        result = [index.decode(self, entry) for entry in index.filter(W3D_CHUNK_MESH)]
+        index.close()
+        return result
+
+    def assert_geometry(self, mesh):
+        for triangle in mesh.triangles:
+            (a, b, c) = [mesh.verts[i] for i in triangle.vert_ids]
+            self.assertAlmostEqual(1.0, triangle.normal.length, 5)
+            self.assertAlmostEqual(0.0, triangle.normal.dot(b - a), 5)
+            self.assertAlmostEqual(0.0, triangle.normal.dot(c - a), 5)
+            self.assertAlmostEqual(triangle.normal.dot(a), triangle.distance, 5)
+
+        for i in range(3):
+            self.assertAlmostEqual(min(vert[i] for vert in mesh.verts), mesh.header.min_corner[i], 5)
+            self.assertAlmostEqual(max(vert[i] for vert in mesh.verts), mesh.header.max_corner[i], 5)
+        for vert in mesh.verts:
+            self.assertLessEqual((vert - mesh.header.sph_center).length, mesh.header.sph_radius + 1e-5)
+
+    def test_recompute_w3d(self):
+        mesh = get_mesh(name='sword')
+        for triangle in mesh.triangles:
+            triangle.normal = get_vec(0.0, 0.0, 0.0)
+        mesh.header.min_corner = get_vec(5.0, 5.0, 5.0)
+        mesh.header.sph_radius = 0.0
+        self.write_w3d(self.outpath() + 'stale.w3d', [get_hierarchy(), mesh])
+
+        messages = recompute_file(self.outpath() + 'stale.w3d', self.outpath() + 'fixed.w3d', use_numpy=False)
+
+        self.assertEqual([('info', f'-> recomputed 1 meshes: {self.outpath()}fixed.w3d')], messages)
+        (fixed,) = self.read_meshes(self.outpath() + 'fixed.w3d')
+        self.assert_geometry(fixed)
+        self.assertEqual(get_mesh().user_text, fixed.user_text)
+        self.assertEqual([tuple(vert) for vert in mesh.verts], [tuple(vert) for vert in fixed.verts])
+
+        # chunks other than meshes are copied unchanged
+        with open(self.outpath() + 'stale.w3d', 'rb') as file:
+            stale = file.read()
+        with open(self.outpath() + 'fixed.w3d', 'rb') as file:
+            self.assertEqual(stale[:get_hierarchy().size()], file.read()[:get_hierarchy().size()])
+
+    def test_unsupported_sub_chunks_are_kept(self):
+        io_stream = BinaryWriter()
+        get_mesh(name='sword', shader_mats=True, skin=True).write(io_stream)
+        chunks = split_chunks(io_stream.getvalue())
+        deform = struct.pack('<LL4s', W3D_CHUNK_DEFORM, 4, b'data')
+        chunks = [chunk for chunk in chunks if chunk[0] not in [W3D_CHUNK_TANGENTS, W3D_CHUNK_BITANGENTS]]
+        chunks.append((W3D_CHUNK_DEFORM, deform))
+
+        data = BinaryWriter()
+        chunk = begin_chunk(W3D_CHUNK_MESH, data, has_sub_chunks=True)
+        for (_, chunk_data) in chunks:
+            data.write(chunk_data)
+        end_chunk(data, chunk)
+
+        result = split_chunks(recompute_mesh_chunk(self, data.getvalue(), PARTS, False))
+
+        types = [chunk_type for (chunk_type, _) in result]
+        self.assertIn(W3D_CHUNK_VERTICES_2, types)
+        self.assertIn(W3D_CHUNK_NORMALS_2, types)
+        self.assertEqual(deform, result[-1][1])
+        self.assertEqual([W3D_CHUNK_TANGENTS, W3D_CHUNK_BITANGENTS, W3D_CHUNK_TRIANGLES],
+                         types[types.index(W3D_CHUNK_TANGENTS):types.index(W3D_CHUNK_TRIANGLES) + 1])
+
+    def test_tangents(self):
+        mesh = get_quad()
+
+        self.assertEqual(['header', 'triangles', 'tangents', 'bitangents'], recompute_mesh(self, mesh, use_numpy=False))
+
+        for i in range(4):
+            compare_vectors(self, get_vec(0.0, -1.0, 0.0), mesh.tangents[i])
+            compare_vectors(self, get_vec(1.0, 0.0, 0.0), mesh.bitangents[i])
+        self.assertEqual(VERTEX_CHANNEL_TANGENT | VERTEX_CHANNEL_BITANGENT,
+                         mesh.header.vert_channel_flags & (VERTEX_CHANNEL_TANGENT | VERTEX_CHANNEL_BITANGENT))
+
+    def test_missing_normals(self):
+        mesh = get_quad()
+        mesh.normals = []
+
+        self.assertIn('normals', recompute_mesh(self, mesh, ['normals'], use_numpy=False))
+        for normal in mesh.normals:
+            compare_vectors(self, get_vec(0.0, 0.0, 1.0), normal)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_numpy_and_python_agree(self):
+        meshes = [get_mesh(name='sword', shader_mats=True), get_mesh(name='sword', shader_mats=True)]
+        meshes[0].normals = []
+        meshes[1].normals = []
+
+        recompute_mesh(self, meshes[0], use_numpy=False)
+        recompute_mesh(self, meshes[1], use_numpy=True)
+
+        (expected, actual) = meshes
+        for (a, b) in zip(expected.triangles, actual.triangles):
+            compare_vectors(self, a.normal, b.normal)
+            self.assertAlmostEqual(a.distance, b.distance, 5)
+        for name in ['min_corner', 'max_corner', 'sph_center']:
+            compare_vectors(self, getattr(expected.header, name), getattr(actual.header, name))
+        self.assertAlmostEqual(expected.header.sph_radius, actual.header.sph_radius, 5)
+        for name in ['normals', 'tangents', 'bitangents']:
+            for (a, b) in zip(getattr(expected, name), getattr(actual, name)):
+                compare_vectors(self, a, b)
+
+    def test_recompute_w3x_in_place(self):
+        root = create_root()
+        includes = create_node(root, 'Includes')
+        Include(type='all', source='ART:TestHierarchy.w3x').create(includes)
+        mesh = get_mesh(name='sword')
+        mesh.header.max_corner = get_vec(0.0, 0.0, 0.0)
+        mesh.create(root)
+        write(root, self.outpath() + 'sword.w3x')
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['recompute', '-j', '1', self.outpath() + 'sword.w3x'], out))
+        self.assertTrue(out.getvalue().startswith('recomputed 1 files in '))
+
+        root = find_root(self, self.outpath() + 'sword.w3x')
+        self.assertEqual(['Includes', 'W3DMesh'], [child.tag for child in root])
+        fixed = Mesh.parse(self, root.find('W3DMesh'))
+        self.assert_geometry(fixed)
+        self.assertEqual([child.tag for child in root.find('W3DMesh')].count('Triangles'), 1)
+
+    def test_main_recompute(self):
+        source = self.outpath() + 'recompute' + os.path.sep
+        os.makedirs(source, exist_ok=True)
+        self.write_w3d(source + 'a.w3d', [get_mesh(name='sword')])
+        self.write_w3d(source + 'b.w3d', [get_hierarchy()])
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['recompute', '-j', '1', '--parts', 'planes,bounds', source,
+                                  self.outpath() + 'recomputed'], out))
+        self.assertTrue(out.getvalue().startswith('recomputed 2 files in '))
+        self.assertTrue(os.path.isfile(os.path.join(self.outpath() + 'recomputed', 'b.w3d')))
+        (fixed,) = self.read_meshes(os.path.join(self.outpath() + 'recomputed', 'a.w3d'))
+        self.assertEqual(0.0, fixed.header.sph_radius)
+
+        self.assertEqual(2, main(['recompute', '--parts', 'planes,colors', source], io.StringIO()))
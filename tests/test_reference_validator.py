@@ -0,0 +1,152 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+import json
+import os
+from unittest.mock import patch
+
+from io_mesh_w3d.w3dtool import main
+from io_mesh_w3d.reference_validator import *
+from io_mesh_w3d.w3x.structs.include import *
+from tests.common.helpers.animation import get_animation
+from tests.common.helpers.collision_box import get_collision_box
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.hlod import get_hlod
+from tests.common.helpers.mesh import get_mesh
+from tests.utils import *
+
+
+class TestReferenceValidator(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def touch(self, path):
+        with open(path, 'wb') as file:
+            file.write(b'')
+
+    def problems(self, report):
+        return sorted((problem.kind, os.path.basename(problem.path), problem.subject, problem.reference)
+                      for problem in report.problems)
+
+    def test_scan_w3d(self):
+        path = self.outpath() + 'scan.w3d'
+        self.write_w3d(path, [get_hierarchy(), get_mesh(name='sword', skin=True),
+                              get_mesh(name='soldier', shader_mats=True), get_hlod('containerName', 'TestHierarchy'),
+                              get_collision_box(), get_animation('OtherHierarchy')])
+
+        result = scan_file(path)
+
+        self.assertIsNone(result.error)
+        self.assertEqual([('TestHierarchy', 8)], result.hierarchies)
+        self.assertEqual('containerName', result.containers[0][0])
+        self.assertEqual('TestHierarchy', result.containers[0][1])
+        self.assertEqual(('containerName.sword', 7), result.containers[0][2][0])
+        self.assertEqual(('containerName.sword', True, 4, ['texture.dds']), result.meshes[0])
+        self.assertEqual('containerName.soldier', result.meshes[1][0])
+        self.assertFalse(result.meshes[1][1])
+        self.assertIn('texture_env.tga', result.meshes[1][3])
+        self.assertEqual(['containerName.BOUNDINGBOX'], result.collision_boxes)
+        self.assertEqual([(get_animation().header.name, 'OtherHierarchy')], result.animations)
+
+    def test_validate_w3d(self):
+        directory = self.outpath() + 'validate' + os.path.sep
+        os.makedirs(directory + 'textures', exist_ok=True)
+        self.write_w3d(directory + 'skeleton.w3d', [get_hierarchy()])
+        self.write_w3d(directory + 'model.w3d', [get_mesh(name='sword', skin=True), get_mesh(name='soldier'),
+                                                 get_mesh(name='TRUNK'), get_mesh(name='PICK'),
+                                                 get_collision_box(), get_hlod('containerName', 'TestHierarchy')])
+        self.write_w3d(directory + 'animation.w3d', [get_animation('OtherHierarchy')])
+        self.touch(directory + 'textures' + os.path.sep + 'TEXTURE.dds')
+        with open(directory + 'broken.w3d', 'wb') as file:
+            file.write(b'\x00\x00\x00\x00\xff\x00\x00\x00')
+
+        report = validate([directory])
+
+        self.assertEqual(4, report.files)
+        problems = self.problems(report)
+        self.assertEqual([('missing_hierarchy', 'animation.w3d', get_animation().header.name, 'OtherHierarchy'),
+                          ('missing_sub_object', 'model.w3d', 'containerName', 'containerName.Brakelight')],
+                         problems[:2])
+        self.assertEqual(('unreadable_file', 'broken.w3d', ''), problems[2][:3])
+
+    def test_validate_bone_indices(self):
+        directory = self.outpath() + 'bones' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        hierarchy = get_hierarchy()
+        hierarchy.pivots = hierarchy.pivots[:2]
+        hierarchy.header.num_pivots = 2
+        self.write_w3d(directory + 'skeleton.w3d', [hierarchy])
+        self.write_w3d(directory + 'model.w3d', [get_mesh(name='sword', skin=True), get_mesh(name='soldier'),
+                                                 get_mesh(name='TRUNK'), get_mesh(name='PICK'),
+                                                 get_mesh(name='Brakelight'), get_collision_box(),
+                                                 get_hlod('containerName', 'TestHierarchy')])
+        self.touch(directory + 'texture.dds')
+
+        report = validate([directory], max_workers=1)
+
+        self.assertEqual([('bone_index_out_of_range', 'model.w3d', 'containerName.sword', 'TestHierarchy bone 7 of 2'),
+                          ('bone_index_out_of_range', 'model.w3d', 'containerName.sword',
+                           'TestHierarchy vertex influence bone 4 of 2'),
+                          ('bone_index_out_of_range', 'model.w3d', 'containerName.TRUNK', 'TestHierarchy bone 6 of 2')],
+                         [(problem.kind, os.path.basename(problem.path), problem.subject, problem.reference)
+                          for problem in report.problems])
+
+    def test_validate_w3x(self):
+        directory = self.outpath() + 'validate_w3x' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        write_struct(get_hierarchy(xml=True), directory + 'TestHierarchy.w3x')
+        write_struct(get_mesh(name='sword', skin=True, shader_mats=True), directory + 'containerName.sword.w3x')
+        self.touch(directory + 'texture_env.tga')
+
+        root = create_root()
+        includes = create_node(root, 'Includes')
+        for source in ['ART:TestHierarchy.w3x', 'ART:containerName.sword.w3x', 'ART:missing.w3x']:
+            Include(type='all', source=source).create(includes)
+        Texture(id='texture_scroll.dds', file='texture_scroll.dds').create(root)
+        get_hlod('containerName', 'TestHierarchy').create(root)
+        write(root, directory + 'containerName.w3x')
+
+        report = validate([directory])
+        problems = self.problems(report)
+
+        self.assertEqual(3, report.files)
+        self.assertIn(('missing_include', 'containerName.w3x', '', 'ART:missing.w3x'), problems)
+        self.assertIn(('missing_texture', 'containerName.w3x', 'texture_scroll.dds', 'texture_scroll.dds'), problems)
+        self.assertIn(('missing_sub_object', 'containerName.w3x', 'containerName', 'containerName.soldier'), problems)
+        self.assertNotIn('missing_hierarchy', [problem[0] for problem in problems])
+        self.assertNotIn(('missing_texture', 'containerName.sword.w3x', 'containerName.sword', 'texture_scroll.dds'),
+                         problems)
+        self.assertNotIn('bone_index_out_of_range', [problem[0] for problem in problems])
+
+    def test_scan_files_without_process_pool(self):
+        directory = self.outpath() + 'fallback_scan' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        self.write_w3d(directory + 'a.w3d', [get_hierarchy()])
+        self.write_w3d(directory + 'b.w3d', [get_hierarchy('OtherHierarchy')])
+
+        with (patch('io_mesh_w3d.reference_validator.create_executor', side_effect=OSError)) as create_func:
+            scans = scan_files(find_files([directory]))
+
+            create_func.assert_called_once()
+
+        self.assertEqual([[('TestHierarchy', 8)], [('OtherHierarchy', 8)]], [scan.hierarchies for scan in scans])
+
+    def test_main_validate(self):
+        directory = self.outpath() + 'main_validate' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        self.write_w3d(directory + 'animation.w3d', [get_animation()])
+
+        out = io.StringIO()
+        self.assertEqual(1, main(['validate', '--json', directory], out))
+        report = json.loads(out.getvalue())
+        self.assertEqual(1, report['files'])
+        self.assertEqual([{'kind': 'missing_hierarchy', 'file': directory + 'animation.w3d',
+                           'subject': get_animation().header.name, 'reference': 'TestHierarchy'}], report['problems'])
+
+        self.write_w3d(directory + 'skeleton.w3d', [get_hierarchy()])
+        out = io.StringIO()
+        self.assertEqual(0, main(['validate', directory], out))
+        self.assertTrue(out.getvalue().startswith('checked 2 files in '))
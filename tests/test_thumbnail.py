@@ -0,0 +1,166 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+import os
+import unittest
+from unittest.mock import patch
+
+from io_mesh_w3d.w3dtool import main
+from io_mesh_w3d.thumbnail import *
+from io_mesh_w3d.common.structs.data_context import *
+from io_mesh_w3d.common.structs.hlod import *
+from io_mesh_w3d.common.utils.search_path import *
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.hlod import get_hlod_header, get_hlod_array_header, get_hlod_sub_object
+from tests.common.helpers.mesh import get_mesh
+from tests.mathutils import *
+from tests.utils import *
+
+
+def dds_data(width, height, four_cc=b'', bit_count=0, masks=(0, 0, 0, 0), data=b''):
+    pf_flags = 0x4 if four_cc else 0x41
+    header = struct.pack('<4s7L', b'DDS ', 124, 0x1007, height, width, 0, 0, 1) + bytes(44)
+    header += struct.pack('<2L4s5L', 32, pf_flags, four_cc, bit_count, *masks) + bytes(20)
+    return header + data
+
+
+def read_png(path):
+    with open(path, 'rb') as file:
+        data = file.read()
+    (width, height) = struct.unpack_from('>2L', data, 16)
+    (length,) = struct.unpack_from('>L', data, 33)
+    rows = zlib.decompress(data[41:41 + length])
+    stride = width * 4 + 1
+    return width, height, [rows[y * stride + 1:(y + 1) * stride] for y in range(height)]
+
+
+class TestThumbnail(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def test_write_png(self):
+        write_png(self.outpath() + 'pixels.png', 2, 1, bytes([255, 0, 0, 255, 0, 0, 255, 128]))
+
+        (width, height, rows) = read_png(self.outpath() + 'pixels.png')
+
+        self.assertEqual((2, 1), (width, height))
+        self.assertEqual([bytes([255, 0, 0, 255, 0, 0, 255, 128])], rows)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_decode_dds_dxt1(self):
+        # red and blue end points, the first row uses all four palette entries
+        block = struct.pack('<2H4B', 0xF800, 0x001F, 0xE4, 0, 0, 0)
+
+        image = decode_dds(dds_data(4, 4, b'DXT1', data=block))
+
+        self.assertEqual((4, 4, 4), image.shape)
+        self.assertEqual([[255, 0, 0, 255], [0, 0, 255, 255], [170, 0, 85, 255], [85, 0, 170, 255]],
+                         image[0].tolist())
+        self.assertEqual([255, 0, 0, 255], image[3, 3].tolist())
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_decode_dds_dxt5(self):
+        alpha = bytes([255, 0, 136, 0, 0, 0, 0, 0])
+        block = alpha + struct.pack('<2H4B', 0xFFFF, 0xFFFF, 0, 0, 0, 0)
+
+        image = decode_dds(dds_data(4, 4, b'DXT5', data=block))
+
+        self.assertEqual([255, 0, 218, 255], image[0, :, 3].tolist())
+        self.assertEqual([255, 255, 255], image[0, 0, :3].tolist())
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_decode_dds_uncompressed(self):
+        data = bytes([1, 2, 3, 4, 5, 6, 7, 8])
+        masks = (0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000)
+
+        image = decode_dds(dds_data(2, 1, bit_count=32, masks=masks, data=data))
+
+        self.assertEqual([[3, 2, 1, 4], [7, 6, 5, 8]], image[0].tolist())
+        self.assertIsNone(decode_dds(dds_data(4, 4, b'ATI2', data=bytes(16))))
+        self.assertIsNone(decode_dds(b'not a dds file'))
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_decode_tga(self):
+        # bottom to top rows of blue, green (bgr) pixels
+        header = struct.pack('<3B5B4H2B', 0, 0, 2, 0, 0, 0, 0, 0, 0, 0, 1, 2, 24, 0)
+        image = decode_tga(header + bytes([255, 0, 0, 0, 255, 0]))
+
+        self.assertEqual([[[0, 255, 0, 255]], [[0, 0, 255, 255]]], image.tolist())
+
+        # run length encoded with top left origin: a run of two red pixels and one raw white pixel
+        header = struct.pack('<3B5B4H2B', 0, 0, 10, 0, 0, 0, 0, 0, 0, 0, 3, 1, 32, 0x28)
+        image = decode_tga(header + bytes([0x81, 0, 0, 255, 255, 0x00, 255, 255, 255, 128]))
+
+        self.assertEqual([[[255, 0, 0, 255], [255, 0, 0, 255], [255, 255, 255, 128]]], image.tolist())
+        self.assertIsNone(decode_tga(struct.pack('<3B5B4H2B', 0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 1, 1, 8, 0)))
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_pivot_matrices(self):
+        hierarchy = get_hierarchy()
+        hierarchy.pivots = hierarchy.pivots[:2]
+        hierarchy.pivots[0].translation = get_vec(0.0, 0.0, 1.0)
+        hierarchy.pivots[0].rotation = get_quat(0.7071068, 0.0, 0.0, 0.7071068)
+        hierarchy.pivots[1].translation = get_vec(1.0, 0.0, 0.0)
+        hierarchy.pivots[1].rotation = get_quat(1.0, 0.0, 0.0, 0.0)
+
+        matrices = pivot_matrices(hierarchy)
+
+        self.assertEqual(2, len(matrices))
+        for (expected, actual) in zip([0.0, 1.0, 1.0], matrices[1][:3, 3]):
+            self.assertAlmostEqual(expected, actual, 5)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_rasterize_cube(self):
+        data_context = DataContext(meshes=[get_mesh(name='cube')])
+        data_context.meshes[0].vert_materials = []
+
+        image = rasterize(build_scene(self, self.outpath() + 'cube.w3d', data_context), 32)
+
+        self.assertEqual((32, 32, 4), image.shape)
+        self.assertEqual([0, 0, 0, 0], image[0, 0].tolist())
+        self.assertEqual(255, image[16, 16, 3])
+        # the faces facing the light are brighter than the others
+        self.assertGreater(len(numpy.unique(image[image[:, :, 3] == 255][:, 0])), 1)
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_render_textured_container(self):
+        source = self.outpath() + 'thumbnail' + os.path.sep
+        os.makedirs(source, exist_ok=True)
+        hlod = HLod(
+            header=get_hlod_header('containerName', 'TestHierarchy'),
+            lod_arrays=[HLodLodArray(header=get_hlod_array_header(1),
+                                     sub_objects=[get_hlod_sub_object(bone=1, name='containerName.sword')])])
+        self.write_w3d(source + 'sword.w3d', [get_mesh(name='sword'), hlod])
+        self.write_w3d(source + 'testhierarchy.w3d', [get_hierarchy()])
+        with open(source + 'TEXTURE.dds', 'wb') as file:
+            file.write(dds_data(4, 4, b'DXT1', data=struct.pack('<2H4B', 0xF800, 0xF800, 0, 0, 0, 0)))
+
+        with (patch('io_mesh_w3d.common.utils.search_path.DirectoryIndex', side_effect=DirectoryIndex)) as create_index:
+            messages = render_thumbnail(source + 'sword.w3d', self.outpath() + 'sword.png', 16)
+
+            # the directory is listed once for the hierarchy and the texture
+            self.assertEqual(1, create_index.call_count)
+        self.assertEqual([('info', f'-> rendered 12 triangles: {self.outpath()}sword.png')], messages)
+        (width, height, rows) = read_png(self.outpath() + 'sword.png')
+        self.assertEqual((16, 16), (width, height))
+        (r, g, b, a) = rows[8][32:36]
+        self.assertEqual((0, 0, 255), (g, b, a))
+        self.assertGreater(r, 0)
+        self.assertEqual(bytes(4), rows[0][:4])
+
+    @unittest.skipIf(numpy is None, 'numpy is not available')
+    def test_main_thumbnail(self):
+        source = self.outpath() + 'thumbnails' + os.path.sep
+        os.makedirs(source + 'units', exist_ok=True)
+        self.write_w3d(source + 'units' + os.path.sep + 'a.w3d', [get_mesh(name='sword')])
+        self.write_w3d(source + 'b.w3d', [get_hierarchy()])
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['thumbnail', '-j', '1', '--size', '8', source, self.outpath() + 'previews'], out))
+
+        self.assertTrue(out.getvalue().startswith('rendered 2 files in '))
+        self.assertEqual((8, 8), read_png(os.path.join(self.outpath() + 'previews', 'units', 'a.png'))[:2])
+        self.assertFalse(os.path.exists(os.path.join(self.outpath() + 'previews', 'b.png')))
@@ -0,0 +1,224 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+import json
+import os
+from unittest.mock import patch
+
+from io_mesh_w3d.w3dtool import *
+from io_mesh_w3d.common.structs.mesh import *
+from io_mesh_w3d.common.structs.mesh_structs.texture import *
+from tests.common.helpers.animation import get_animation
+from tests.common.helpers.collision_box import get_collision_box
+from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.hlod import get_hlod
+from tests.common.helpers.mesh import get_mesh
+from tests.w3d.helpers.compressed_animation import get_compressed_animation
+from tests.utils import *
+
+
+class TestW3dTool(TestCase):
+    def write_w3d(self, path, structs):
+        with open(path, 'wb') as file:
+            for struct in structs:
+                struct.write(file)
+
+    def test_chunk_tree(self):
+        path = self.outpath() + 'tree.w3d'
+        self.write_w3d(path, [get_hierarchy(), get_mesh(name='sword')])
+
+        lines = file_tree(self, path)
+
+        self.assertTrue(lines[0].startswith('0x00000100 W3D_CHUNK_HIERARCHY'))
+        self.assertTrue(lines[1].startswith('0x00000000 W3D_CHUNK_MESH ('))
+        self.assertTrue(lines[2].startswith('  0x0000001f W3D_CHUNK_MESH_HEADER (116 bytes)'))
+        self.assertIn('    0x0000002b W3D_CHUNK_VERTEX_MATERIAL (172 bytes)', lines)
+
+        self.assertEqual(2, len(file_tree(self, path, 1)))
+        self.assertTrue(all(line.startswith('  ') for line in file_tree(self, path, 2)[2:]))
+
+    def test_chunk_tree_flagged_chunk_without_sub_chunks(self):
+        io_stream = io.BytesIO()
+        write_chunk_head(W3D_CHUNK_MESH, io_stream, HEAD + 3, has_sub_chunks=True)
+        write_chunk_head(W3D_CHUNK_MESH_USER_TEXT, io_stream, 3, has_sub_chunks=True)
+        write_string('ab', io_stream)
+        data = io_stream.getvalue()
+
+        nodes = read_chunk_tree(self, BinaryReader(data), len(data))
+
+        self.assertEqual(['0x00000000 W3D_CHUNK_MESH (11 bytes)', '  0x0000000c W3D_CHUNK_MESH_USER_TEXT (3 bytes)'],
+                         format_chunk_tree(nodes))
+
+    def test_chunk_tree_truncated_file(self):
+        io_stream = io.BytesIO()
+        get_hierarchy().write(io_stream)
+        data = io_stream.getvalue() + io_stream.getvalue()[:20]
+
+        with (patch.object(self, 'error')) as error_func:
+            nodes = read_chunk_tree(self, BinaryReader(data), len(data))
+
+            error_func.assert_called_once_with(f'truncated chunk at offset {len(data) - 20}')
+
+        self.assertEqual(1, len(nodes))
+
+    def test_element_tree(self):
+        path = self.outpath() + 'tree.w3x'
+        write_struct(get_mesh(name='sword'), path)
+
+        lines = file_tree(self, path)
+
+        self.assertEqual('AssetDeclaration', lines[0])
+        self.assertEqual('  W3DMesh "containerName.sword"', lines[1])
+        self.assertIn('      V x 8', lines)
+        self.assertEqual(['AssetDeclaration', '  W3DMesh "containerName.sword"'], file_tree(self, path, 2))
+
+    def test_summarize_w3d(self):
+        path = self.outpath() + 'summary.w3d'
+        self.write_w3d(path, [get_hierarchy(), get_mesh(name='sword', skin=True), get_hlod('Model', 'TestHierarchy'),
+                              get_collision_box(), get_animation(), get_compressed_animation()])
+
+        summary = summarize(*load_file(self, path))
+
+        self.assertEqual({'name': 'TestHierarchy', 'pivots': 8}, summary['hierarchy'])
+        self.assertEqual('Model', summary['hlod']['name'])
+        self.assertEqual('TestHierarchy', summary['hlod']['hierarchy'])
+        self.assertEqual(1, len(summary['meshes']))
+        self.assertEqual('containerName.sword', summary['meshes'][0]['name'])
+        self.assertEqual(8, summary['meshes'][0]['vertices'])
+        self.assertEqual(12, summary['meshes'][0]['triangles'])
+        self.assertTrue(summary['meshes'][0]['skinned'])
+        self.assertEqual([False, True], [animation['compressed'] for animation in summary['animations']])
+        self.assertEqual(['containerName.BOUNDINGBOX'], summary['collision_boxes'])
+
+        lines = format_summary(path, summary)
+        self.assertEqual(path, lines[0])
+        self.assertIn('  hierarchy  TestHierarchy (8 pivots)', lines)
+        self.assertIn('  mesh       containerName.sword (8 vertices, 12 triangles, 2 materials, skinned)', lines)
+
+    def test_summarize_w3x(self):
+        path = self.outpath() + 'summary.w3x'
+        write_struct(get_hlod('Model', 'TestHierarchy'), path)
+
+        summary = summarize(*load_file(self, path))
+
+        self.assertEqual('W3X', self.file_format)
+        self.assertIsNone(summary['hierarchy'])
+        self.assertEqual('Model', summary['hlod']['name'])
+        self.assertEqual(6, len(summary['hlod']['lods'][0]))
+
+    def test_statistics(self):
+        directory = self.outpath() + 'mod' + os.path.sep
+        os.makedirs(directory + 'art', exist_ok=True)
+        self.write_w3d(directory + 'art' + os.path.sep + 'a.w3d', [get_hierarchy(), get_mesh(name='sword')])
+        self.write_w3d(directory + 'b.w3d', [get_mesh(name='shield'), get_animation()])
+        write_struct(get_mesh(name='soldier'), directory + 'c.w3x')
+        with open(directory + 'broken.w3d', 'wb') as file:
+            file.write(b'\x00\x00\x00\x00\xff\x00\x00\x00')
+        with open(directory + 'readme.txt', 'w') as file:
+            file.write('not a model')
+
+        log = ConsoleLog(stream=io.StringIO())
+        statistics = collect_statistics(log, [directory])
+
+        self.assertEqual([directory + 'broken.w3d'], statistics.failed)
+        self.assertEqual(4, statistics.files)
+        self.assertEqual(3, statistics.meshes)
+        self.assertEqual(24, statistics.vertices)
+        self.assertEqual(1, statistics.hierarchies)
+        self.assertEqual(1, statistics.animations)
+        self.assertEqual(2, statistics.chunks[W3D_CHUNK_MESH][0])
+        self.assertEqual({'W3DMesh': 1}, statistics.elements)
+        self.assertEqual('files:           4 (1 failed)', statistics.format()[0])
+
+    def test_main(self):
+        path = self.outpath() + 'main.w3d'
+        self.write_w3d(path, [get_hierarchy()])
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['info', path], out))
+        self.assertEqual(path + '\n  hierarchy  TestHierarchy (8 pivots)\n', out.getvalue())
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['info', '--json', path], out))
+        self.assertEqual(8, json.loads(out.getvalue())[path]['hierarchy']['pivots'])
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['stats', '--json', path], out))
+        self.assertEqual(1, json.loads(out.getvalue())['chunks']['W3D_CHUNK_HIERARCHY']['count'])
+
+        out = io.StringIO()
+        with (patch('sys.stderr', new=io.StringIO())) as stderr:
+            self.assertEqual(1, main(['tree', self.outpath() + 'missing.w3d'], out))
+
+            self.assertTrue(stderr.getvalue().startswith('ERROR: failed to read'))
+        self.assertEqual('', out.getvalue())
+
+    def test_profile(self):
+        directory = self.outpath() + 'profile' + os.path.sep
+        os.makedirs(directory, exist_ok=True)
+        self.write_w3d(directory + 'a.w3d', [get_hierarchy(), get_mesh(name='sword'),
+                                             get_mesh(name='shield', skin=True)])
+        write_struct(get_mesh(name='soldier'), directory + 'b.w3x')
+        with open(directory + 'c.w3d', 'wb') as file:
+            get_mesh(name='pick').write(file)
+            write_chunk_head(0x0FFF, file, 4)
+            write_long(0, file)
+
+        profile = profile_files(ConsoleLog(stream=io.StringIO()), [directory])
+
+        self.assertEqual(3, profile.files)
+        self.assertEqual([], profile.failed)
+        self.assertEqual(3, profile.chunks[W3D_CHUNK_MESH][0])
+        self.assertEqual(3, profile.chunks[W3D_CHUNK_VERTICES][0])
+        self.assertEqual(3 * 8 * 12, profile.chunks[W3D_CHUNK_VERTICES][1])
+        self.assertIn(W3D_CHUNK_MESH, profile.decode_seconds)
+        self.assertIn(W3D_CHUNK_VERTICES, profile.decode_seconds)
+        self.assertNotIn(W3D_CHUNK_TEXTURE, profile.decode_seconds)
+        self.assertEqual(['W3DMesh'], list(profile.elements))
+        self.assertEqual([8, 8, 8, 8], profile.vertices)
+        self.assertEqual({'count': 4, 'total': 48, 'min': 12, 'median': 12, 'mean': 12.0, 'p90': 12, 'max': 12},
+                         distribution(profile.triangles))
+        self.assertEqual(1, profile.messages[('info', '-> unsupported chunk UNKNOWN (0xfff)')])
+
+        lines = profile.format()
+        self.assertTrue(lines[0].startswith('files: 3 (0 failed), '))
+        self.assertIn('  vertices                8        8        8.0        8        8         32', lines)
+
+    def test_profile_unknown_mesh_chunk(self):
+        path = self.outpath() + 'profile_unknown.w3d'
+        io_stream = io.BytesIO()
+        get_mesh(name='sword').write(io_stream)
+        data = bytearray(io_stream.getvalue())
+        # turns the user text chunk of the mesh into an unknown one
+        nodes = read_chunk_tree(self, BinaryReader(bytes(data)), len(data))
+        offset = [node.offset for node in nodes[0].children if node.chunk_type == W3D_CHUNK_MESH_USER_TEXT][0]
+        data[offset:offset + 4] = struct.pack('<L', 0x0EEE)
+        with open(path, 'wb') as file:
+            file.write(data)
+
+        profile = profile_files(self, [path])
+
+        self.assertEqual(1, profile.messages[('warning', 'unknown chunk_type in io_stream: 0xeee')])
+        self.assertEqual(1, profile.chunks[0x0EEE][0])
+        self.assertIn('         1 warning  unknown chunk_type in io_stream: 0xeee', profile.format())
+
+    def test_main_closed_pipe(self):
+        path = self.outpath() + 'pipe.w3d'
+        self.write_w3d(path, [get_hierarchy()])
+
+        out = io.StringIO()
+        with (patch.object(out, 'write', side_effect=BrokenPipeError)) as write_func:
+            self.assertEqual(1, main(['info', path], out))
+            write_func.assert_called()
+
+    def test_main_profile(self):
+        path = self.outpath() + 'main_profile.w3d'
+        self.write_w3d(path, [get_mesh(name='sword')])
+
+        out = io.StringIO()
+        self.assertEqual(0, main(['profile', '--json', path], out))
+        profile = json.loads(out.getvalue())
+        self.assertEqual(1, profile['chunks']['W3D_CHUNK_MESH']['count'])
+        self.assertIsNone(profile['chunks']['W3D_CHUNK_TEXTURE']['decode_seconds'])
+        self.assertEqual(8, profile['meshes']['vertices']['max'])
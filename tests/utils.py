@@ -21,6 +21,21 @@ def almost_equal(self, x, y, threshold=0.0001):
     self.assertTrue(abs(x - y) < threshold)
 
 
+class NonSeekableStream(io.RawIOBase):
+    # like a pipe or socket, reads return at most max_read bytes and there is no seek or tell
+    def __init__(self, data, max_read=7):
+        self.data = io.BytesIO(data)
+        self.max_read = max_read
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        if size < 0:
+            size = self.max_read
+        return self.data.read(min(size, self.max_read))
+
+
 class TestCase(unittest.TestCase):
     __save_test_data = '--save-test-data' in sys.argv
     __tmp_base = os.path.join(tempfile.gettempdir(), 'io_mesh_w3d-tests')
@@ -28,6 +43,15 @@ class TestCase(unittest.TestCase):
 
     filepath = ''
     file_format = 'W3D'
+    use_mmap = False
+    use_numpy = False
+    use_compact = False
+    use_parallel = False
+    asset_index = ''
+    texture_paths = ''
+    search_path = None
+    asset_database = None
+    mesh_names = ''
     filename_ext = '.w3d'
 
     def log(con, level, text): return text
@@ -0,0 +1,94 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+from io_mesh_w3d.w3d.chunk_index import *
+from tests.common.helpers.animation import *
+from tests.common.helpers.collision_box import *
+from tests.common.helpers.hierarchy import *
+from tests.common.helpers.hlod import *
+from tests.common.helpers.mesh import *
+from tests.utils import *
+from tests.w3d.helpers.compressed_animation import *
+from tests.w3d.helpers.dazzle import *
+
+
+class TestChunkIndex(TestCase):
+    def write_file(self):
+        path = self.outpath() + 'output.w3d'
+        file = open(path, 'wb')
+        get_hierarchy().write(file)
+        get_mesh(name='sword', skin=True).write(file)
+        get_mesh(name='soldier').write(file)
+        get_hlod().write(file)
+        get_collision_box().write(file)
+        get_dazzle().write(file)
+        get_animation().write(file)
+        get_compressed_animation().write(file)
+        write_chunk_head(0x01, file, 1)
+        write_ubyte(0x00, file)
+        file.close()
+        return path
+
+    def test_read(self):
+        index = ChunkIndex.from_file(self.write_file())
+
+        expected = [
+            (W3D_CHUNK_HIERARCHY, 'TestHierarchy', ''),
+            (W3D_CHUNK_MESH, 'sword', 'containerName'),
+            (W3D_CHUNK_MESH, 'soldier', 'containerName'),
+            (W3D_CHUNK_HLOD, 'containerName', ''),
+            (W3D_CHUNK_BOX, 'containerName.BOUNDINGBOX', ''),
+            (W3D_CHUNK_DAZZLE, 'containerName.Brakelight', ''),
+            (W3D_CHUNK_ANIMATION, 'containerName', ''),
+            (W3D_CHUNK_COMPRESSED_ANIMATION, 'containerName', ''),
+            (0x01, '', '')]
+
+        self.assertEqual(len(expected), len(index))
+        offset = 0
+        for i, entry in enumerate(index):
+            self.assertEqual(expected[i], (entry.chunk_type, entry.name, entry.container_name))
+            self.assertEqual(offset, entry.offset)
+            offset = entry.end()
+        self.assertEqual(index.io_stream.size(), offset)
+        self.assertEqual('containerName.sword', index.entries[1].identifier())
+
+    def test_filter(self):
+        index = ChunkIndex.from_file(self.write_file())
+
+        self.assertEqual(2, len(index.filter(W3D_CHUNK_MESH)))
+        self.assertEqual(1, len(index.filter(W3D_CHUNK_MESH, names=['soldier'])))
+        self.assertEqual(1, len(index.filter(names=['containerName.sword'])))
+        self.assertEqual(0, len(index.filter(W3D_CHUNK_HLOD, names=['sword'])))
+
+    def test_decode(self):
+        for use_mmap in [False, True]:
+            index = ChunkIndex.from_file(self.write_file(), use_mmap)
+
+            [mesh] = index.filter(W3D_CHUNK_MESH, names=['soldier'])
+            actual = index.decode(self, mesh)
+            compare_meshes(self, get_mesh(name='soldier'), actual)
+            self.assertTrue(actual is index.decode(self, mesh))
+
+            [hierarchy] = index.filter(W3D_CHUNK_HIERARCHY)
+            compare_hierarchies(self, get_hierarchy(), index.decode(self, hierarchy))
+
+            [box] = index.filter(W3D_CHUNK_BOX)
+            compare_collision_boxes(self, get_collision_box(), index.decode(self, box))
+
+            [dazzle] = index.filter(W3D_CHUNK_DAZZLE)
+            compare_dazzles(self, get_dazzle(), index.decode(self, dazzle))
+
+            [compressed_animation] = index.filter(W3D_CHUNK_COMPRESSED_ANIMATION)
+            compare_compressed_animation_headers(
+                self, get_compressed_animation().header, index.decode(self, compressed_animation).header)
+
+            [unknown] = index.filter(0x01)
+            self.assertIsNone(index.decode(self, unknown))
+            index.close()
+
+    def test_read_empty(self):
+        path = self.outpath() + 'empty.w3d'
+        open(path, 'wb').close()
+
+        index = ChunkIndex.from_file(path)
+        self.assertEqual(0, len(index))
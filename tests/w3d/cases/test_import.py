@@ -1,15 +1,18 @@
 # <pep8 compliant>
 # Written by Stephan Vedder and Michael Schnabel
 
+import zipfile
+
+from io_mesh_w3d.asset_index import AssetIndex
 from io_mesh_w3d.w3d.import_w3d import *
 from tests.common.helpers.collision_box import get_collision_box
 from tests.common.helpers.hlod import get_hlod
-from tests.common.helpers.mesh import get_mesh
-from tests.common.helpers.hierarchy import get_hierarchy
+from tests.common.helpers.mesh import get_mesh, compare_meshes
+from tests.common.helpers.hierarchy import get_hierarchy, compare_hierarchies
 from tests.common.helpers.animation import get_animation
 from tests.w3d.helpers.compressed_animation import get_compressed_animation
 from tests.utils import *
-from unittest.mock import patch, call
+from unittest.mock import patch, call, Mock
 
 
 class TestImport(TestCase):
@@ -34,6 +37,30 @@ class TestImport(TestCase):
         self.filepath = self.outpath() + 'base_skn.w3d'
         load(self)
 
+    def test_import_from_big_archive(self):
+        hierarchy_name = 'TestHiera_SKL'
+        hierarchy = get_hierarchy(hierarchy_name)
+        hlod = get_hlod('TestModelName', hierarchy_name)
+
+        skn = io.BytesIO()
+        get_mesh(name='sword', skin=True).write(skn)
+        hlod.write(skn)
+        skl = io.BytesIO()
+        hierarchy.write(skl)
+
+        archive = self.outpath() + 'W3DZH.big'
+        write_big_archive(archive, [('Art\\W3D\\Base_SKN.w3d', skn.getvalue()),
+                                    ('Art\\W3D\\TestHiera_SKL.w3d', skl.getvalue())])
+
+        self.filepath = os.path.join(archive, 'Art', 'W3D', 'base_skn.w3d')
+        self.error = lambda text: self.fail(r'no error should be thrown!')
+        with (patch('io_mesh_w3d.import_utils.close_big_archives', wraps=close_big_archives)) as close_func:
+            self.assertEqual({'FINISHED'}, load(self))
+            close_func.assert_called_once()
+
+        self.assertTrue(hierarchy_name in bpy.data.objects)
+        self.assertTrue('sword' in bpy.data.objects)
+
     def test_skips_multiple_hlod_chunks(self):
         hlod = get_hlod()
         skn = open(self.outpath() + 'output.w3d', 'wb')
@@ -111,6 +138,34 @@ class TestImport(TestCase):
         self.filepath = self.outpath() + 'animation.w3d'
         load(self)
 
+    def test_import_skeleton_from_asset_index(self):
+        hierarchy_name = 'TestHiera_SKL'
+        game = self.outpath() + 'game' + os.path.sep
+        mod = self.outpath() + 'mod' + os.path.sep
+        os.makedirs(game, exist_ok=True)
+        os.makedirs(mod, exist_ok=True)
+
+        skl = open(game + 'skeleton.w3d', 'wb')
+        get_hierarchy(hierarchy_name).write(skl)
+        skl.close()
+        ani = open(mod + 'animation.w3d', 'wb')
+        get_animation(hierarchy_name).write(ani)
+        ani.close()
+
+        index = AssetIndex(self.outpath() + 'assets.db')
+        index.update([game, mod])
+        index.close()
+
+        self.filepath = mod + 'animation.w3d'
+        self.asset_index = self.outpath() + 'assets.db'
+        with (patch('io_mesh_w3d.w3d.import_w3d.create_data')) as create_func, \
+                (patch('io_mesh_w3d.asset_index.AssetIndex', side_effect=AssetIndex)) as open_func:
+            self.assertEqual({'FINISHED'}, load(self))
+
+            self.assertEqual(hierarchy_name, create_func.call_args[0][3].name())
+            open_func.assert_called_once_with(self.outpath() + 'assets.db', read_only=True)
+        self.assertIsNone(self.asset_database)
+
     def test_unsupported_chunk_skip(self):
         output = open(self.outpath() + 'output.w3d', 'wb')
 
@@ -139,3 +194,171 @@ class TestImport(TestCase):
 
         self.warning = lambda text: self.assertEqual('unknown chunk_type in io_stream: 0x1', text)
         load_file(self, None, path)
+
+    def test_load_file_memory_mapped(self):
+        hierarchy = get_hierarchy()
+        meshes = [get_mesh(name='sword', skin=True), get_mesh(name='soldier'), get_mesh(name='shield')]
+        path = self.outpath() + 'output.w3d'
+        file = open(path, 'wb')
+        hierarchy.write(file)
+        for mesh in meshes:
+            mesh.write(file)
+        file.close()
+
+        self.use_mmap = True
+        data_context = DataContext()
+        load_file(self, data_context, path)
+
+        compare_hierarchies(self, hierarchy, data_context.hierarchy)
+        self.assertEqual(len(meshes), len(data_context.meshes))
+        for i, mesh in enumerate(meshes):
+            compare_meshes(self, mesh, data_context.meshes[i])
+
+    def test_load_file_selection(self):
+        hlod = get_hlod()
+        path = self.outpath() + 'output.w3d'
+        file = open(path, 'wb')
+        get_hierarchy().write(file)
+        get_mesh(name='sword', skin=True).write(file)
+        get_mesh(name='soldier').write(file)
+        get_mesh(name='TRUNK').write(file)
+        hlod.write(file)
+        get_collision_box().write(file)
+        file.close()
+
+        data_context = DataContext()
+        load_file(self, data_context, path, {'sword', 'containerName.TRUNK'})
+
+        self.assertEqual(['sword', 'TRUNK'], [mesh.name() for mesh in data_context.meshes])
+        self.assertEqual(0, len(data_context.collision_boxes))
+        self.assertIsNotNone(data_context.hierarchy)
+        self.assertIsNotNone(data_context.hlod)
+
+        filter_hlod(data_context.hlod, {'sword', 'containerName.TRUNK'})
+        sub_objects = data_context.hlod.lod_arrays[0].sub_objects
+        self.assertEqual(['containerName.sword', 'containerName.TRUNK'], [obj.identifier for obj in sub_objects])
+        self.assertEqual(2, data_context.hlod.lod_arrays[0].header.model_count)
+
+    def test_load_file_stream(self):
+        hierarchy = get_hierarchy()
+        meshes = [get_mesh(name='sword', skin=True), get_mesh(name='soldier'), get_mesh(name='shield')]
+        io_stream = io.BytesIO()
+        hierarchy.write(io_stream)
+        write_chunk_head(0x01, io_stream, 3)
+        write_padding(io_stream, 3)
+        for mesh in meshes:
+            mesh.write(io_stream)
+
+        data_context = DataContext()
+        with (patch.object(self, 'warning')) as warning_func:
+            load_file(self, data_context, self.outpath() + 'stream.w3d', {'sword', 'containerName.shield'},
+                      NonSeekableStream(io_stream.getvalue()))
+
+            warning_func.assert_called_once_with('unknown chunk_type in io_stream: 0x1')
+
+        compare_hierarchies(self, hierarchy, data_context.hierarchy)
+        self.assertEqual(2, len(data_context.meshes))
+        compare_meshes(self, meshes[0], data_context.meshes[0])
+        compare_meshes(self, meshes[2], data_context.meshes[1])
+
+    def test_load_file_closes_only_its_own_readers(self):
+        io_stream = io.BytesIO()
+        get_hierarchy().write(io_stream)
+        path = self.outpath() + 'readers.w3d'
+        with open(path, 'wb') as file:
+            file.write(io_stream.getvalue())
+
+        for stream in [NonSeekableStream(io_stream.getvalue()), BinaryReader(io_stream.getvalue())]:
+            data_context = DataContext()
+            load_file(self, data_context, path, None, stream)
+            self.assertIsNotNone(data_context.hierarchy)
+            self.assertFalse(stream.closed)
+
+        # the reader opened for the file is closed even if reading the file fails
+        readers = []
+        from_file = BinaryReader.from_file
+
+        def open_reader(*args):
+            readers.append(from_file(*args))
+            return readers[-1]
+
+        with (patch.object(BinaryReader, 'from_file', side_effect=open_reader)), \
+                (patch.dict(FILE_CHUNKS, {W3D_CHUNK_HIERARCHY: Mock(side_effect=ValueError)})):
+            with self.assertRaises(ValueError):
+                load_file(self, DataContext(), path)
+
+        self.assertEqual(1, len(readers))
+        self.assertTrue(readers[0].closed)
+
+    def test_load_file_parallel(self):
+        hierarchy = get_hierarchy()
+        meshes = [get_mesh(name='sword', skin=True), get_mesh(name='soldier'), get_mesh(name='shield')]
+        io_stream = io.BytesIO()
+        meshes[0].write(io_stream)
+        hierarchy.write(io_stream)
+        meshes[1].write(io_stream)
+        meshes[2].write(io_stream)
+
+        path = self.outpath() + 'parallel.w3d'
+        with open(path, 'wb') as file:
+            file.write(io_stream.getvalue())
+
+        self.use_parallel = True
+        data_context = DataContext()
+        # the meshes are only decoded in this process if the pool fails
+        with (patch.object(Mesh, 'read', wraps=Mesh.read)) as read_func:
+            load_file(self, data_context, path)
+
+            read_func.assert_not_called()
+
+        compare_hierarchies(self, hierarchy, data_context.hierarchy)
+        self.assertEqual(3, len(data_context.meshes))
+        self.assertEqual([list] * 3, [type(mesh.verts) for mesh in data_context.meshes])
+        for (expected, actual) in zip(meshes, data_context.meshes):
+            compare_meshes(self, expected, actual)
+
+    def test_load_file_parallel_falls_back_without_process_pool(self):
+        meshes = [get_mesh(name='sword'), get_mesh(name='shield')]
+        io_stream = io.BytesIO()
+        for mesh in meshes:
+            mesh.write(io_stream)
+
+        self.use_parallel = True
+        data_context = DataContext()
+        with (patch('io_mesh_w3d.w3d.parallel.create_executor', side_effect=OSError)) as create_func:
+            load_file(self, data_context, self.outpath() + 'fallback.w3d', None, io.BytesIO(io_stream.getvalue()))
+
+            self.assertEqual(1, create_func.call_count)
+
+        self.assertEqual(2, len(data_context.meshes))
+        for (expected, actual) in zip(meshes, data_context.meshes):
+            compare_meshes(self, expected, actual)
+
+    def test_load_file_zip_archive(self):
+        hierarchy = get_hierarchy()
+        mesh = get_mesh(name='sword', skin=True)
+        io_stream = io.BytesIO()
+        hierarchy.write(io_stream)
+        mesh.write(io_stream)
+
+        path = self.outpath() + 'pack.zip'
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('Art/Model.w3d', io_stream.getvalue())
+
+        data_context = DataContext()
+        load_file(self, data_context, os.path.join(path, 'art', 'model.w3d'))
+
+        compare_hierarchies(self, hierarchy, data_context.hierarchy)
+        self.assertEqual(1, len(data_context.meshes))
+        compare_meshes(self, mesh, data_context.meshes[0])
+
+        self.error = lambda text: self.assertEqual('file not found: ' + os.path.join(path, 'missing.w3d'), text)
+        load_file(self, DataContext(), os.path.join(path, 'missing.w3d'))
+
+    def test_get_selection(self):
+        self.assertIsNone(get_selection(self))
+        self.assertIsNone(get_selection(self, [' ']))
+        self.assertEqual({'sword', 'containerName.TRUNK'}, get_selection(self, ['sword', ' containerName.TRUNK']))
+
+        self.mesh_names = 'sword, containerName.TRUNK,'
+        self.assertEqual({'sword', 'containerName.TRUNK'}, get_selection(self))
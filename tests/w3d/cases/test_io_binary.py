@@ -6,7 +6,7 @@ import unittest
 
 from io_mesh_w3d.w3d.io_binary import *
 from tests.mathutils import *
-from tests.utils import TestCase
+from tests.utils import TestCase, NonSeekableStream
 
 
 class TestIOBinary(TestCase):
@@ -346,3 +346,273 @@ class TestIOBinary(TestCase):
 
             self.assertEqual(expecteds[i][0], chunk_type)
             self.assertEqual(expecteds[i][1], chunk_size)
+
+    def test_binary_reader_read_string(self):
+        expecteds = [
+            'Teststring',
+            '',
+            'Blender Plugin For W3D this is a veeery long string for this test']
+
+        data = b''
+        for expected in expecteds:
+            data += bytes(expected, 'UTF-8') + struct.pack('B', 0b0)
+        io_stream = BinaryReader(data)
+
+        for expected in expecteds:
+            self.assertEqual(expected, read_string(io_stream))
+        self.assertEqual(len(data), io_stream.tell())
+
+    def test_binary_reader_from_file(self):
+        path = self.outpath() + 'reader.bin'
+        file = open(path, 'wb')
+        write_chunk_head(255, file, 27, has_sub_chunks=True)
+        write_ulong(999999, file)
+        write_string('Teststring', file)
+        write_vector(get_vec(1, 2, 3), file)
+        file.close()
+
+        io_stream = BinaryReader.from_file(path)
+        self.assertEqual(35, io_stream.size())
+
+        (chunk_type, chunk_size, chunk_end) = read_chunk_head(io_stream)
+        self.assertEqual(255, chunk_type)
+        self.assertEqual(27, chunk_size)
+        self.assertEqual(35, chunk_end)
+
+        self.assertEqual(999999, read_ulong(io_stream))
+        self.assertEqual('Teststring', read_string(io_stream))
+        compare_vectors(self, get_vec(1, 2, 3), read_vector(io_stream))
+        self.assertEqual(io_stream.size(), io_stream.tell())
+
+    def test_mapped_reader_from_file(self):
+        path = self.outpath() + 'reader.bin'
+        file = open(path, 'wb')
+        write_chunk_head(255, file, 32, has_sub_chunks=True)
+        write_string('Teststring', file)
+        write_long_list([1, 2, 3], file)
+        write_ubyte(5, file)
+        write_padding(file, 8)
+        file.close()
+
+        io_stream = BinaryReader.from_file(path, use_mmap=True)
+        self.assertTrue(isinstance(io_stream, MappedReader))
+        self.assertEqual(40, io_stream.size())
+
+        (chunk_type, chunk_size, chunk_end) = read_chunk_head(io_stream)
+        self.assertEqual(255, chunk_type)
+        self.assertEqual(32, chunk_size)
+        self.assertEqual(40, chunk_end)
+
+        self.assertEqual('Teststring', read_string(io_stream))
+        self.assertEqual([1, 2, 3], read_long_list(io_stream, 31))
+        self.assertEqual(5, read_ubyte(io_stream))
+        io_stream.seek(chunk_end - io_stream.tell(), 1)
+        self.assertEqual(io_stream.size(), io_stream.tell())
+        self.assertEqual(b'', io_stream.read(4))
+        io_stream.close()
+
+    def test_mapped_reader_empty_file(self):
+        path = self.outpath() + 'empty.bin'
+        open(path, 'wb').close()
+
+        io_stream = BinaryReader.from_file(path, use_mmap=True)
+        self.assertEqual(0, io_stream.size())
+
+    def test_stream_reader(self):
+        data = struct.pack('<lll', 1, 2, 3) + b'name\x00' + struct.pack('<50l', *range(50))
+        io_stream = StreamReader(NonSeekableStream(data), block_size=16)
+
+        self.assertFalse(io_stream.at_end())
+        self.assertEqual(1, read_long(io_stream))
+        io_stream.seek(4, 1)
+        self.assertEqual(8, io_stream.tell())
+
+        io_stream.buffer(17)
+        self.assertEqual(3, read_long(io_stream))
+        self.assertEqual('name', read_string(io_stream))
+        io_stream.seek(8)
+        self.assertEqual(3, read_long(io_stream))
+        with self.assertRaises(io.UnsupportedOperation):
+            io_stream.seek(4)
+
+        io_stream.seek(17 + 40 * 4)
+        self.assertEqual(40, read_long(io_stream))
+        self.assertEqual([41, 42], read_long_list(io_stream, io_stream.tell() + 8))
+        self.assertEqual(len(data), io_stream.seek(1000))
+        self.assertTrue(io_stream.at_end())
+
+    def test_stream_reader_lookahead(self):
+        io_stream = StreamReader(NonSeekableStream(struct.pack('<ll', 1, 2)))
+
+        self.assertFalse(io_stream.at_end())
+        self.assertEqual(0, io_stream.tell())
+        self.assertEqual(1, read_long(io_stream))
+        io_stream.buffer(8)
+        self.assertFalse(io_stream.at_end())
+        self.assertEqual(2, read_long(io_stream))
+        self.assertTrue(io_stream.at_end())
+        self.assertEqual(b'', io_stream.read(4))
+
+    def test_binary_reader_seek(self):
+        io_stream = BinaryReader(struct.pack('<lll', 1, 2, 3))
+
+        io_stream.seek(4, 1)
+        self.assertEqual(2, read_long(io_stream))
+        io_stream.seek(0)
+        self.assertEqual(1, read_long(io_stream))
+
+    def test_read_long_list(self):
+        inputs = [0, 1, 200, 999999, 123456, -5, -500]
+
+        io_stream = io.BytesIO(struct.pack('<7l', *inputs))
+        self.assertEqual(inputs, read_long_list(io_stream, 28))
+        self.assertEqual(28, io_stream.tell())
+
+    def test_read_ulong_list(self):
+        inputs = [0, 1, 200, 999999, 123456, 5, 0xFFFFFFFF]
+
+        io_stream = io.BytesIO(struct.pack('<7L', *inputs))
+        self.assertEqual(inputs, read_ulong_list(io_stream, 28))
+
+    def test_read_vector_list(self):
+        inputs = [get_vec(), get_vec(1, 2, 3), get_vec(-2.5, 0.1, 33.3)]
+
+        io_stream = io.BytesIO()
+        write_list(inputs, io_stream, write_vector)
+        data = io_stream.getvalue()
+
+        expecteds = read_list(io.BytesIO(data), len(data), read_vector)
+        actuals = read_vector_list(io.BytesIO(data), len(data))
+
+        self.assertEqual(len(expecteds), len(actuals))
+        for i, expected in enumerate(expecteds):
+            self.assertEqual(expected, actuals[i])
+
+    def test_read_vector2_list(self):
+        inputs = [get_vec2(), get_vec2(1, 2), get_vec2(-2.5, 0.1)]
+
+        io_stream = io.BytesIO()
+        write_list(inputs, io_stream, write_vector2)
+        data = io_stream.getvalue()
+
+        expecteds = read_list(io.BytesIO(data), len(data), read_vector2)
+        actuals = read_vector2_list(io.BytesIO(data), len(data))
+
+        self.assertEqual(len(expecteds), len(actuals))
+        for i, expected in enumerate(expecteds):
+            self.assertEqual(expected, actuals[i])
+
+    def test_read_records_stops_at_chunk_end(self):
+        io_stream = io.BytesIO(struct.pack('<4l', 1, 2, 3, 4))
+
+        self.assertEqual([1, 2], read_long_list(io_stream, 8))
+        self.assertEqual(3, read_long(io_stream))
+
+    def test_binary_writer(self):
+        io_stream = BinaryWriter()
+        write_chunk_head(255, io_stream, 4)
+        write_ulong(999999, io_stream)
+        self.assertEqual(12, io_stream.tell())
+
+        path = self.outpath() + 'writer.bin'
+        io_stream.save(path)
+
+        file = open(path, 'rb')
+        data = file.read()
+        file.close()
+        self.assertEqual(io_stream.getvalue(), data)
+        self.assertEqual(struct.pack('<LLL', 255, 4, 999999), data)
+
+    def test_write_padding(self):
+        io_stream = BinaryWriter()
+        write_padding(io_stream, 24)
+        self.assertEqual(bytes(24), io_stream.getvalue())
+
+    def test_write_lists_match_write_list(self):
+        inputs = [
+            ([0, 1, 200, -5, -500], write_long, write_long_list),
+            ([0, 1, 200, 5, 0xFFFFFFFF], write_ulong, write_ulong_list),
+            ([0.0, 2.0, 3.14, -22.900], write_float, write_float_list),
+            ([0, 1, 127, 255], write_ubyte, write_ubyte_list),
+            ([get_vec(), get_vec(1, 2, 3)], write_vector, write_vector_list),
+            ([get_vec2(), get_vec2(1, 2)], write_vector2, write_vector2_list),
+            ([get_quat(), get_quat(0, 1, 2, 3)], write_quaternion, write_quaternion_list)]
+
+        for (data, write_func, write_list_func) in inputs:
+            expected = io.BytesIO()
+            write_list(data, expected, write_func)
+
+            actual = BinaryWriter()
+            write_list_func(data, actual)
+            self.assertEqual(expected.getvalue(), actual.getvalue())
+
+    def test_begin_end_chunk(self):
+        for io_stream in [BinaryWriter(), io.BytesIO()]:
+            chunk = begin_chunk(0x700, io_stream, has_sub_chunks=True)
+            write_chunk_head(0x701, io_stream, 4)
+            write_ulong(999999, io_stream)
+            sub_chunk = begin_chunk(0x702, io_stream)
+            write_string('test', io_stream)
+            end_chunk(io_stream, sub_chunk)
+            end_chunk(io_stream, chunk)
+            write_ulong(1, io_stream)
+
+            self.assertEqual(37, io_stream.tell())
+            io_stream = io.BytesIO(io_stream.getvalue())
+
+            self.assertEqual((0x700, 25, 33), read_chunk_head(io_stream))
+            self.assertEqual((0x701, 4, 20), read_chunk_head(io_stream))
+            self.assertEqual(999999, read_ulong(io_stream))
+            self.assertEqual((0x702, 5, 33), read_chunk_head(io_stream))
+            self.assertEqual('test', read_string(io_stream))
+            self.assertEqual(1, read_ulong(io_stream))
+
+    def test_end_chunk_sets_sub_chunks_flag(self):
+        io_stream = BinaryWriter()
+        end_chunk(io_stream, begin_chunk(0x700, io_stream, has_sub_chunks=True))
+        end_chunk(io_stream, begin_chunk(0x701, io_stream))
+        self.assertEqual(struct.pack('<LLLL', 0x700, 0x80000000, 0x701, 0), io_stream.getvalue())
+
+    def test_vector_array(self):
+        vectors = [get_vec(1, 2, 3), get_vec(-4, 5.5, 6)]
+        io_stream = io.BytesIO()
+        write_vector_list(vectors, io_stream)
+        data = io_stream.getvalue()
+
+        actual = VectorArray.read(io.BytesIO(data), len(data))
+        self.assertEqual(2, len(actual))
+        for i, vec in enumerate(vectors):
+            compare_vectors(self, vec, actual[i])
+        compare_vectors(self, vectors[1], actual[-1])
+        self.assertEqual(data, actual.tobytes())
+
+        io_stream = io.BytesIO()
+        write_vector_list(actual, io_stream)
+        self.assertEqual(data, io_stream.getvalue())
+
+        copy = actual.copy()
+        copy[0] = get_vec(7, 8, 9)
+        copy.append(get_vec(1, 1, 1))
+        compare_vectors(self, get_vec(7, 8, 9), copy[0])
+        compare_vectors(self, get_vec(1, 2, 3), actual[0])
+        self.assertEqual(3, len(copy))
+        self.assertEqual(2, len(list(actual)))
+
+        with self.assertRaises(IndexError):
+            actual[2]
+
+    def test_vector2_array(self):
+        vectors = [get_vec2(1, 2), get_vec2(-4, 5.5)]
+        io_stream = io.BytesIO()
+        write_vector2_list(vectors, io_stream)
+        data = io_stream.getvalue()
+
+        actual = VectorArray.read(io.BytesIO(data), len(data), 2)
+        self.assertEqual(2, len(actual))
+        for i, vec in enumerate(vectors):
+            self.assertEqual(vec.x, actual[i].x)
+            self.assertEqual(vec.y, actual[i].y)
+
+        io_stream = io.BytesIO()
+        write_vector2_list(actual, io_stream)
+        self.assertEqual(data, io_stream.getvalue())
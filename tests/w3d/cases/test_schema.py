@@ -0,0 +1,106 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import io
+from unittest.mock import patch, call
+
+from io_mesh_w3d.w3d.schema import *
+from tests.mathutils import *
+from tests.utils import TestCase
+
+
+@schema(0x42, [
+    ('version', 'version'),
+    ('name', 'string'),
+    ('value', 'short'),
+    padding(2),
+    ('location', 'vector'),
+    ('rotation', 'quaternion')])
+class Record:
+    def __init__(self, version=Version(), name='', value=0, location=Vector(), rotation=Quaternion()):
+        self.version = version
+        self.name = name
+        self.value = value
+        self.location = location
+        self.rotation = rotation
+
+
+@schema(None, [
+    ('first', 'ubyte'),
+    ('second', 'long_string')])
+class HeadlessRecord:
+    def __init__(self, first=0, second=''):
+        self.first = first
+        self.second = second
+
+
+class Container:
+    def __init__(self):
+        self.record = None
+        self.values = []
+
+
+class TestSchema(TestCase):
+    def test_schema_codec(self):
+        compiled = Schema(0x42, [('a', 'ulong'), padding(3), ('b', 'vector')])
+
+        self.assertEqual('<L3x3f', compiled.codec.format)
+        self.assertEqual(19, compiled.codec.size)
+
+    def test_write_read(self):
+        expected = Record(version=Version(major=4, minor=2), name='record', value=-3,
+                          location=Vector((1.0, 2.0, 3.0)), rotation=Quaternion((0.5, 0.5, 0.5, 0.5)))
+
+        io_stream = io.BytesIO()
+        expected.write(io_stream)
+        self.assertEqual(Record.size(), io_stream.tell())
+        self.assertEqual(4 + 16 + 4 + 12 + 16, Record.size(False))
+
+        io_stream = io.BytesIO(io_stream.getvalue())
+        self.assertEqual((0x42, Record.size(False), Record.size()), read_chunk_head(io_stream))
+        actual = Record.read(io_stream)
+
+        self.assertEqual(expected.version, actual.version)
+        self.assertEqual(expected.name, actual.name)
+        self.assertEqual(expected.value, actual.value)
+        compare_vectors(self, expected.location, actual.location)
+        compare_quats(self, expected.rotation, actual.rotation)
+
+    def test_write_read_without_chunk_head(self):
+        io_stream = io.BytesIO()
+        HeadlessRecord(first=7, second='long name').write(io_stream)
+        self.assertEqual(33, HeadlessRecord.size())
+        self.assertEqual(33, io_stream.tell())
+
+        actual = HeadlessRecord.read(io.BytesIO(io_stream.getvalue()))
+        self.assertEqual(7, actual.first)
+        self.assertEqual('long name', actual.second)
+
+    def test_read_chunks(self):
+        io_stream = io.BytesIO()
+        Record(name='first').write(io_stream)
+        write_chunk_head(0x43, io_stream, 4)
+        write_ulong(5, io_stream)
+        write_chunk_head(0x43, io_stream, 4)
+        write_ulong(6, io_stream)
+        write_chunk_head(0x44, io_stream, 2)
+        write_padding(io_stream, 2)
+        write_chunk_head(0x45, io_stream, 1)
+        write_ubyte(0, io_stream)
+        chunk_end = io_stream.tell()
+        io_stream = io.BytesIO(io_stream.getvalue())
+
+        readers = {
+            0x42: record_field('record', Record.read),
+            0x43: data_item('values', read_ulong_list),
+            0x44: unsupported('test chunk is not supported')}
+
+        with (patch.object(self, 'info')) as info_func, (patch.object(self, 'warning')) as warning_func:
+            result = read_chunks(self, io_stream, chunk_end, Container(), readers)
+
+            info_func.assert_called_once_with('-> test chunk is not supported')
+            warning_func.assert_called_once_with('unknown chunk_type in io_stream: 0x45')
+
+        self.assertEqual(chunk_end, io_stream.tell())
+        self.assertEqual('first', result.record.name)
+        self.assertEqual([[5], [6]], result.values)
@@ -0,0 +1,89 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+import pickle
+
+from io_mesh_w3d.common.structs import hierarchy, mesh
+from io_mesh_w3d.w3d.vecmath import *
+from io_mesh_w3d.w3x import io_xml
+from tests.utils import TestCase
+
+
+class TestVecmath(TestCase):
+    def test_vector_components(self):
+        vec = Vector((1.0, 2.0, 3.0))
+
+        self.assertEqual((1.0, 2.0, 3.0), (vec.x, vec.y, vec.z))
+        self.assertEqual(Vector((1.0, 2.0)), vec.xy)
+        self.assertEqual(Vector((0.0, 0.0, 0.0)), Vector())
+
+        vec.y = 5.0
+        vec[2] = 6.0
+        self.assertEqual([1.0, 5.0, 6.0], vec)
+        self.assertEqual((1.0, 5.0, 6.0), vec.to_tuple())
+        self.assertEqual('Vector((1.0, 5.0, 6.0))', repr(vec))
+
+        with self.assertRaises(IndexError):
+            vec.w
+
+    def test_vector_arithmetic(self):
+        vec = Vector((1.0, 2.0, 3.0))
+        other = Vector((0.5, 0.5, 0.5))
+
+        self.assertEqual(Vector((1.5, 2.5, 3.5)), vec + other)
+        self.assertEqual(Vector((1.5, 2.5, 3.5)), (0.5, 0.5, 0.5) + vec)
+        self.assertEqual(Vector((0.5, 1.5, 2.5)), vec - other)
+        self.assertEqual(Vector((2.0, 4.0, 6.0)), vec * 2)
+        self.assertEqual(Vector((2.0, 4.0, 6.0)), 2 * vec)
+        self.assertEqual(Vector((-1.0, -2.0, -3.0)), -vec)
+        self.assertEqual(3.0, vec.dot(Vector((1.0, 1.0, 0.0))))
+        self.assertEqual(Vector((0.0, 0.0, 1.0)), Vector((1.0, 0.0, 0.0)).cross(Vector((0.0, 1.0, 0.0))))
+        self.assertEqual(5.0, Vector((3.0, 4.0, 0.0)).length)
+        self.assertEqual(Vector((0.6, 0.8, 0.0)), Vector((3.0, 4.0, 0.0)).normalized())
+
+        copy = vec.copy()
+        copy += other
+        self.assertEqual(Vector((1.0, 2.0, 3.0)), vec)
+        self.assertEqual(Vector((1.5, 2.5, 3.5)), copy)
+        self.assertTrue(isinstance(copy, Vector))
+
+    def test_quaternion(self):
+        quat = Quaternion()
+
+        self.assertEqual((1.0, 0.0, 0.0, 0.0), (quat.w, quat.x, quat.y, quat.z))
+        self.assertEqual(Quaternion((0.5, 0.5, 0.5, 0.5)), Quaternion((2.0, 2.0, 2.0, 2.0)).normalized())
+
+    def test_matrix(self):
+        mat = Matrix()
+
+        self.assertEqual(Matrix.Identity(4), mat)
+        self.assertEqual(Vector((0.0, 1.0, 0.0, 0.0)), mat[1])
+        self.assertTrue(isinstance(mat[1], Vector))
+
+        mat = Matrix(([1.0, 2.0, 3.0, 4.0], [5.0, 6.0, 7.0, 8.0], [9.0, 10.0, 11.0, 12.0]))
+        self.assertEqual(3, len(mat))
+        self.assertEqual(((1.0, 2.0, 3.0, 4.0), (5.0, 6.0, 7.0, 8.0), (9.0, 10.0, 11.0, 12.0)), mat.to_tuple())
+
+        copy = mat.copy()
+        copy[0][0] = 0.0
+        self.assertEqual(1.0, mat[0][0])
+
+    def test_compare_with_other_sequences(self):
+        self.assertEqual(Vector((1.0, 2.0, 3.0)), (1.0, 2.0, 3.0))
+        self.assertNotEqual(Vector((1.0, 2.0, 3.0)), (1.0, 2.0))
+        self.assertNotEqual(Vector((1.0, 2.0, 3.0)), 1.0)
+
+    def test_pickle(self):
+        values = [Vector((1.0, 2.0, 3.0)), Quaternion((0.0, 1.0, 0.0, 0.0)), Matrix()]
+
+        result = pickle.loads(pickle.dumps(values))
+
+        self.assertEqual(values, result)
+        self.assertEqual([Vector, Quaternion, Matrix], [type(value) for value in result])
+        self.assertTrue(isinstance(result[2][0], Vector))
+
+    def test_not_star_exported_by_the_struct_modules(self):
+        # the blender modules star import the structs and must keep their mathutils types
+        for module in [hierarchy, mesh, io_xml]:
+            for name in ['Vector', 'Quaternion', 'Matrix']:
+                self.assertNotIn(name, vars(module))
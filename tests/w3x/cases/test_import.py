@@ -2,11 +2,13 @@
 # Written by Stephan Vedder and Michael Schnabel
 
 import bpy
+import zipfile
 from unittest.mock import patch
 
 from io_mesh_w3d.w3x.import_w3x import *
 from tests.common.helpers.hierarchy import get_hierarchy
 from tests.common.helpers.mesh import get_mesh
+from tests.common.helpers.collision_box import get_collision_box
 from tests.common.helpers.hlod import get_hlod
 from tests.common.helpers.animation import get_animation
 from tests.utils import *
@@ -102,3 +104,68 @@ class TestObjectImport(TestCase):
 
         mesh_mock.assert_called()
         create.assert_called()
+
+    def test_load_file_selection(self):
+        root = create_root()
+        get_mesh(name='sword', skin=True).create(root)
+        get_mesh(name='soldier').create(root)
+        get_collision_box().create(root)
+        path = self.outpath() + 'output.w3x'
+        write(root, path)
+
+        data_context = DataContext(meshes=[], collision_boxes=[])
+        load_file(self, data_context, path, {'containerName.sword'})
+
+        self.assertEqual(['sword'], [mesh.name() for mesh in data_context.meshes])
+        self.assertEqual(0, len(data_context.collision_boxes))
+
+    def test_load_file_keeps_stream_open(self):
+        root = create_root()
+        get_mesh(name='sword', skin=True).create(root)
+        path = self.outpath() + 'stream.w3x'
+        write(root, path)
+
+        with open(path, 'rb') as io_stream:
+            data_context = DataContext(meshes=[], collision_boxes=[])
+            load_file(self, data_context, path, None, io_stream)
+
+            self.assertEqual(['sword'], [mesh.name() for mesh in data_context.meshes])
+            self.assertFalse(io_stream.closed)
+
+    def test_load_file_zip_archive(self):
+        root = create_root()
+        get_mesh(name='sword', skin=True).create(root)
+        path = self.outpath() + 'sword.w3x'
+        write(root, path)
+
+        root = create_root()
+        Include(type='all', source='ART:sword.w3x').create(create_node(root, 'Includes'))
+        get_collision_box().create(root)
+        container_path = self.outpath() + 'container.w3x'
+        write(root, container_path)
+
+        archive_path = self.outpath() + 'pack.zip'
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.write(path, 'sword.w3x')
+            archive.write(container_path, 'container.w3x')
+
+        data_context = DataContext(meshes=[], collision_boxes=[])
+        load_file(self, data_context, os.path.join(archive_path, 'container.w3x'))
+
+        self.assertEqual(['sword'], [mesh.name() for mesh in data_context.meshes])
+        self.assertEqual(1, len(data_context.collision_boxes))
+
+    def test_load_file_includes_are_case_insensitive(self):
+        root = create_root()
+        get_mesh(name='sword', skin=True).create(root)
+        write(root, self.outpath() + 'case_sword.w3x')
+
+        root = create_root()
+        Include(type='all', source='ART:Case_Sword.W3X').create(create_node(root, 'Includes'))
+        path = self.outpath() + 'case_container.w3x'
+        write(root, path)
+
+        data_context = DataContext(meshes=[], collision_boxes=[])
+        load_file(self, data_context, path)
+
+        self.assertEqual(['sword'], [mesh.name() for mesh in data_context.meshes])
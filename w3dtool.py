@@ -0,0 +1,26 @@
+# <pep8 compliant>
+# Written by Stephan Vedder and Michael Schnabel
+
+# command line entry point for inspecting and converting w3d and w3x files without blender, e.g.
+#   python w3dtool.py tree model.w3d
+#   python w3dtool.py info --json units/
+#   python w3dtool.py stats path/to/mod/art
+#   python w3dtool.py profile --json path/to/mod/art
+#   python w3dtool.py convert --to w3x path/to/mod/art converted/
+#   python w3dtool.py recompute --parts planes,bounds path/to/mod/art
+#   python w3dtool.py thumbnail --size 256 path/to/mod/art previews/
+#   python w3dtool.py validate --json path/to/mod
+#   python w3dtool.py diff old.w3d new.w3d
+#   python w3dtool.py index assets.db path/to/game/art path/to/mod/art
+
+import os
+import runpy
+import sys
+
+# the package __init__ registers the blender operators and imports bpy, so the package
+# is registered without running it
+runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'io_mesh_w3d', 'bootstrap.py'))
+
+if __name__ == '__main__':
+    from io_mesh_w3d.w3dtool import main
+    sys.exit(main())